@@ -0,0 +1,281 @@
+"""
+Alert Engine for Blind Spot Detection System
+Per-zone enter/exit hysteresis fed straight from each camera, with tones on an audio thread
+
+The detector hands every camera's freshly inferred boxes to ``observe`` as
+soon as they are post-processed, before tracking, detection dicts or Kafka.
+Each zone is a two-state machine: it enters alert after ALERT_ENTER_FRAMES
+consecutive frames with an object in the zone, and leaves it only once the
+zone has been clear for ALERT_EXIT_SECONDS, so a single missed detection
+neither starts nor ends an alert. A zone whose camera disconnects leaves it
+at once; one whose camera stops delivering results (stalled or frozen)
+leaves it after ALERT_STALE_SECONDS without an observation. Tones come from a bank rendered once at
+startup (one pitch and stereo pan per zone) and are played by the engine's
+own thread: immediately on entering, then every ALERT_REPEAT_INTERVAL while
+the zone stays in alert.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import (ALERT_DURATION, ALERT_ENTER_FRAMES, ALERT_EXIT_SECONDS, ALERT_REPEAT_INTERVAL,
+                           ALERT_STALE_SECONDS, ALERT_ZONE_FREQUENCIES)
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STATE_CLEAR = "clear"
+STATE_ALERT = "alert"
+EVENT_ENTER = "enter"
+EVENT_EXIT = "exit"
+
+# (left, right) speaker gains per zone; zones not listed play on both
+ZONE_PAN = {"left": (1.0, 0.2), "right": (0.2, 1.0)}
+TONE_AMPLITUDE = 0.3
+# Fade in and out so the tone starts and stops without a click
+FADE_SECONDS = 0.005
+SAMPLE_RATE = 44100
+
+
+def build_tone(frequency: float, duration: float = ALERT_DURATION, sample_rate: int = SAMPLE_RATE,
+               channels: int = 2, gains: Tuple[float, float] = (1.0, 1.0)) -> np.ndarray:
+    """16-bit sine samples, (n, channels) for stereo or (n,) for mono"""
+    count = int(sample_rate * duration)
+    t = np.arange(count) / sample_rate
+    wave = TONE_AMPLITUDE * np.sin(2 * np.pi * frequency * t)
+    fade = min(int(sample_rate * FADE_SECONDS), count // 2)
+    if fade:
+        ramp = np.linspace(0.0, 1.0, fade)
+        wave[:fade] *= ramp
+        wave[-fade:] *= ramp[::-1]
+    if channels == 1:
+        return (wave * 32767).astype(np.int16)
+    columns = [wave * gains[min(channel, 1)] for channel in range(channels)]
+    return np.ascontiguousarray((np.column_stack(columns) * 32767).astype(np.int16))
+
+
+class ToneBank:
+    def __init__(self, make_sound: Callable[[np.ndarray], object],
+                 frequencies: Dict[str, int] = ALERT_ZONE_FREQUENCIES, duration: float = ALERT_DURATION,
+                 sample_rate: int = SAMPLE_RATE, channels: int = 2):
+        """Every zone's alert tone rendered once; ``make_sound`` turns samples into an object with play()"""
+        self.sounds = {
+            zone: make_sound(build_tone(frequency, duration, sample_rate, channels, ZONE_PAN.get(zone, (1.0, 1.0))))
+            for zone, frequency in frequencies.items()
+        }
+
+    def play(self, zone: str) -> bool:
+        """Start a zone's tone; False if the zone has none"""
+        sound = self.sounds.get(zone)
+        if sound is None:
+            return False
+        sound.play()
+        return True
+
+
+class ZoneHysteresis:
+    def __init__(self, enter_frames: int = ALERT_ENTER_FRAMES, exit_seconds: float = ALERT_EXIT_SECONDS,
+                 stale_seconds: float = ALERT_STALE_SECONDS):
+        """Enter/exit state machine of one zone"""
+        self.enter_frames = max(1, enter_frames)
+        self.exit_seconds = exit_seconds
+        self.stale_seconds = stale_seconds
+        self.state = STATE_CLEAR
+        self.hits = 0  # consecutive frames with an object while clear
+        self.last_hit = 0.0
+        self.last_seen = 0.0  # last frame result of either kind
+
+    def update(self, hit: bool, now: float) -> Optional[str]:
+        """Feed one frame's result; returns EVENT_ENTER or EVENT_EXIT when the state changes"""
+        self.last_seen = now
+        if hit:
+            self.last_hit = now
+        if self.state == STATE_CLEAR:
+            self.hits = self.hits + 1 if hit else 0
+            if self.hits >= self.enter_frames:
+                self.state = STATE_ALERT
+                self.hits = 0
+                return EVENT_ENTER
+        elif not hit and now - self.last_hit >= self.exit_seconds:
+            self.state = STATE_CLEAR
+            return EVENT_EXIT
+        return None
+
+    def expiry(self) -> Optional[float]:
+        """Time the zone goes stale without further results, or None if it is not in alert"""
+        return self.last_seen + self.stale_seconds if self.state == STATE_ALERT else None
+
+    def expire(self, now: float) -> Optional[str]:
+        """Leave the alert when no result came for stale_seconds; returns EVENT_EXIT if it did"""
+        if now - self.last_seen < self.stale_seconds:
+            return None
+        return self.clear()
+
+    def clear(self) -> Optional[str]:
+        """Drop back to clear regardless of results, e.g. when the camera disconnected"""
+        self.hits = 0
+        if self.state != STATE_ALERT:
+            return None
+        self.state = STATE_CLEAR
+        return EVENT_EXIT
+
+
+class AlertEngine(threading.Thread):
+    def __init__(self, tones: Optional[ToneBank] = None, enter_frames: int = ALERT_ENTER_FRAMES,
+                 exit_seconds: float = ALERT_EXIT_SECONDS, repeat_interval: float = ALERT_REPEAT_INTERVAL,
+                 on_change: Optional[Callable[[str, str], None]] = None,
+                 stale_seconds: float = ALERT_STALE_SECONDS):
+        """Decide per-zone alerts from each camera's results and play their tones on this thread.
+
+        ``observe`` may be called from any thread and only updates the state
+        machine; ``tones`` may be set later (e.g. once the audio mixer is up)
+        and alerts stay silent while it is None. ``on_change(zone, event)`` is
+        called on the observing thread for every enter and exit, or on this
+        thread when a zone in alert goes stale because its camera stopped
+        delivering results for ``stale_seconds``, or on the caller's thread
+        for ``clear``.
+        """
+        super().__init__(name="alert-engine", daemon=True)
+        self.tones = tones
+        self.enter_frames = enter_frames
+        self.exit_seconds = exit_seconds
+        self.stale_seconds = stale_seconds
+        self.repeat_interval = repeat_interval
+        self.on_change = on_change
+        self._zones: Dict[str, ZoneHysteresis] = {}
+        self._next_tone: Dict[str, float] = {}  # zone in alert -> monotonic time its tone is due
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self.enters = 0
+        self.exits = 0
+        self.tones_played = 0
+        self.last_latency_ms: Optional[float] = None  # frame capture to alert decision
+        self.max_latency_ms = 0.0
+
+    def observe(self, zone: str, hit: bool, captured_at: Optional[float] = None) -> Optional[str]:
+        """Feed whether a camera's latest frame has an object in ``zone``; returns the transition, if any"""
+        with self._lock:
+            state = self._zones.get(zone)
+            if state is None:
+                state = ZoneHysteresis(self.enter_frames, self.exit_seconds, self.stale_seconds)
+                self._zones[zone] = state
+            event = state.update(hit, time.monotonic())
+            if event == EVENT_ENTER:
+                self.enters += 1
+                self._next_tone[zone] = 0.0  # due now
+                if captured_at is not None:
+                    self.last_latency_ms = (time.time() - captured_at) * 1000
+                    self.max_latency_ms = max(self.max_latency_ms, self.last_latency_ms)
+            elif event == EVENT_EXIT:
+                self.exits += 1
+                self._next_tone.pop(zone, None)
+        if event is None:
+            return None
+
+        self._wake.set()
+        if event == EVENT_ENTER:
+            logger.warning(f"🚨 BLIND SPOT ALERT: {zone}")
+        else:
+            logger.info(f"✅ Blind spot clear: {zone}")
+        if self.on_change is not None:
+            self.on_change(zone, event)
+        return event
+
+    def expire_stale(self, now: Optional[float] = None) -> List[str]:
+        """End the alert of every zone without results for stale_seconds; returns those zones"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expired = [zone for zone, state in self._zones.items() if state.expire(now) == EVENT_EXIT]
+        self._ended(expired, f"no frames for {self.stale_seconds:.1f}s")
+        return expired
+
+    def clear(self, zone: str, reason: str = "camera disconnected") -> bool:
+        """End a zone's alert at once, without waiting for it to go stale; True if it was in alert"""
+        with self._lock:
+            state = self._zones.get(zone)
+            ended = state is not None and state.clear() == EVENT_EXIT
+        self._ended([zone] if ended else [], reason)
+        return ended
+
+    def _ended(self, zones: List[str], reason: str):
+        """Count, silence and report alerts that ended without a clear frame"""
+        if not zones:
+            return
+        with self._lock:
+            for zone in zones:
+                self.exits += 1
+                self._next_tone.pop(zone, None)
+        self._wake.set()
+        for zone in zones:
+            logger.info(f"✅ Blind spot clear: {zone} ({reason})")
+            if self.on_change is not None:
+                self.on_change(zone, EVENT_EXIT)
+
+    def _next_expiry(self, now: float) -> Optional[float]:
+        """Seconds until the next zone in alert goes stale, or None if none is in alert"""
+        with self._lock:
+            expiry = min((at for at in (state.expiry() for state in self._zones.values()) if at is not None),
+                         default=None)
+        return None if expiry is None else max(0.0, expiry - now)
+
+    def active_zones(self) -> List[str]:
+        """Zones currently in alert"""
+        with self._lock:
+            return [zone for zone, state in self._zones.items() if state.state == STATE_ALERT]
+
+    def _due_tones(self, now: float) -> Tuple[List[str], Optional[float]]:
+        """Zones whose tone is due (rescheduled one interval on) and seconds until the next one"""
+        due = []
+        with self._lock:
+            for zone, at in self._next_tone.items():
+                if at <= now:
+                    due.append(zone)
+                    self._next_tone[zone] = now + self.repeat_interval
+            next_at = min(self._next_tone.values(), default=None)
+        return due, None if next_at is None else max(0.0, next_at - now)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            # Cleared before reading the schedule, so an alert raised meanwhile wakes the next wait
+            self._wake.clear()
+            now = time.monotonic()
+            self.expire_stale(now)
+            due, timeout = self._due_tones(now)
+            expiry = self._next_expiry(now)
+            if expiry is not None:
+                timeout = expiry if timeout is None else min(timeout, expiry)
+            for zone in due:
+                tones = self.tones
+                try:
+                    if tones is not None and tones.play(zone):
+                        self.tones_played += 1
+                except Exception as e:
+                    logger.error(f"❌ Error playing alert tone for {zone}: {e}")
+            self._wake.wait(timeout)
+
+    def stop(self, timeout: float = 2.0):
+        self._stop_event.set()
+        self._wake.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def get_stats(self) -> Dict:
+        """Per-zone state, enter/exit and tone counts, and capture-to-alert latency in milliseconds"""
+        with self._lock:
+            zones = {zone: state.state for zone, state in self._zones.items()}
+        return {
+            "zones": zones,
+            "enters": self.enters,
+            "exits": self.exits,
+            "tones_played": self.tones_played,
+            "last_latency_ms": self.last_latency_ms,
+            "max_latency_ms": self.max_latency_ms,
+            "audio": self.tones is not None,
+        }
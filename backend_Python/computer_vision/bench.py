@@ -0,0 +1,385 @@
+"""
+Offline Replay Benchmark for Blind Spot Detection System
+Replays recorded clips through MultiCameraDetector without cameras or a Kafka broker
+
+Run from backend_Python::
+
+    python -m computer_vision.bench --left clips/left.mp4 --rear clips/rear.mp4 \\
+        --imgsz 320 --output bench.json
+
+Clips default to the *_CAMERA_SRC file paths in CAMERA_CONFIG. ``--mode fast``
+hands every frame to the detector as soon as it takes the previous one;
+``--mode realtime`` paces each clip at its recorded frame rate. Results
+(throughput, per-stage latency, CPU and RSS, plus the configuration) are
+written as JSON so runs can be compared across commits.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional
+import sys
+import os
+import cv2
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import CAMERA_CONFIG, FPS_TARGET, KAFKA_PARTITION_KEY, KAFKA_SERIALIZER, INTEGRITY_MODE
+from .capture import CameraReader
+from .multi_camera_detector import MultiCameraDetector
+from .pipeline import DetectionPipeline
+from . import roi
+from .serialization import get_serializer
+from .integrity import Signer
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODES = ("fast", "realtime")
+# Capture-stage rate used in fast pipeline mode: high enough never to be the bottleneck
+FAST_CAPTURE_HZ = 500
+# Seconds without a new cycle after the clips end before the run is considered drained
+DRAIN_TIMEOUT = 1.0
+
+
+class MemorySink:
+    def __init__(self, serializer=None, latency=None):
+        """In-memory stand-in for DetectionKafkaProducer.
+
+        Messages are serialized and signed exactly as they would be for Kafka
+        and then counted and discarded; "delivery" is immediate, so kafka_ack
+        latency only reflects the sink itself.
+        """
+        self.serializer = serializer or get_serializer(KAFKA_SERIALIZER)
+        self.latency = latency
+        self.signer = Signer() if INTEGRITY_MODE == "message" else None
+        self.is_running = False
+        self.messages = 0
+        self.detections = 0
+        self.bytes = 0
+        self.serialize_seconds = 0.0
+
+    def start_producer(self):
+        self.is_running = True
+
+    def _send(self, message: Dict, timing: Optional[Dict] = None):
+        """Serialize and count one message, then record its delivery latency"""
+        now = time.time()
+        for zone_timing in (timing or {}).values():
+            zone_timing["serialize"] = now
+        start = time.perf_counter()
+        value = self.serializer.serialize(message)
+        if self.signer is not None:
+            self.signer.record_header(value)
+        self.serialize_seconds += time.perf_counter() - start
+        self.messages += 1
+        self.bytes += len(value)
+        if timing and self.latency is not None:
+            ack = time.time()
+            for zone, zone_timing in timing.items():
+                self.latency.record_delivery(zone, zone_timing, ack)
+
+    def send_detections(self, detections: List[Dict], key: str = None, timing: Optional[Dict] = None):
+        message = {"type": "detections", "timestamp": time.time(), "detections": detections}
+        if timing:
+            message["timing"] = timing
+        self.detections += len(detections)
+        self._send(message, timing)
+
+    def send_cycle(self, zone_detections: Dict[str, List[Dict]], key: str = None,
+                   timing: Optional[Dict] = None):
+        if KAFKA_PARTITION_KEY == "zone" and key is None:
+            # One record per zone, as DetectionKafkaProducer sends them
+            for zone, detections in zone_detections.items():
+                if detections:
+                    self.send_detections(detections, key, {zone: timing[zone]} if timing and zone in timing else None)
+            return
+        detections = [detection for zone_list in zone_detections.values() for detection in zone_list]
+        self.send_detections(detections, key, timing)
+
+    def send_status(self, status: Dict):
+        self._send({"type": "status", "timestamp": time.time(), "status": status})
+
+    def stop_producer(self):
+        self.is_running = False
+
+    def get_status(self) -> Dict:
+        """Get message, detection and byte counters"""
+        return {
+            "serializer": self.serializer.name,
+            "messages": self.messages,
+            "detections": self.detections,
+            "bytes": self.bytes,
+            "avg_message_bytes": self.bytes / self.messages if self.messages else 0.0,
+            "serialize_ms_total": self.serialize_seconds * 1000,
+        }
+
+
+class ClipReader(CameraReader):
+    def __init__(self, camera_id, cap, realtime: bool = False):
+        """Replay one recorded clip once, either lossless (fast) or at its recorded rate"""
+        super().__init__(camera_id, cap)
+        self.realtime = realtime
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        self.clip_fps = fps if fps and fps > 0 else FPS_TARGET
+        self.finished = threading.Event()
+
+    def read_frames(self):
+        """Read the clip to its end, then mark the reader finished"""
+        start = time.monotonic()
+        index = 0
+        while not self._stop_event.is_set():
+            if self.realtime:
+                delay = start + index / self.clip_fps - time.monotonic()
+                if delay > 0 and self._stop_event.wait(delay):
+                    break
+            else:
+                # Lossless: hand over the next frame only once the last one was taken
+                while len(self.buffer) and not self._stop_event.is_set():
+                    self._stop_event.wait(0.001)
+
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            self.buffer.put(frame, time.time())
+            index += 1
+        self.finished.set()
+
+    def drained(self) -> bool:
+        """True once the clip has ended and its last frame was picked up"""
+        return self.finished.is_set() and len(self.buffer) == 0
+
+
+def resource_usage() -> Dict:
+    """CPU time and memory of this process (resident set sizes in MB)"""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    max_rss = usage.ru_maxrss / (1024 * 1024 if platform.system() == "Darwin" else 1024)
+    rss = None
+    try:
+        with open("/proc/self/statm") as statm:
+            rss = int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    return {"cpu_user_s": usage.ru_utime, "cpu_system_s": usage.ru_stime, "max_rss_mb": max_rss, "rss_mb": rss}
+
+
+def git_commit() -> Optional[str]:
+    """Current commit of the checkout, if git is available"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def default_clips() -> Dict[str, str]:
+    """Zones whose configured camera source is a video file"""
+    return {
+        zone: config["camera_id"] for zone, config in CAMERA_CONFIG.items()
+        if isinstance(config["camera_id"], str) and os.path.isfile(config["camera_id"])
+    }
+
+
+def attach_clips(detector: MultiCameraDetector, clips: Dict[str, str], realtime: bool) -> Dict[str, ClipReader]:
+    """Open each zone's clip and register a ClipReader under the zone's configured camera_id"""
+    readers = {}
+    paths = {}
+    for zone, path in clips.items():
+        camera_id = CAMERA_CONFIG[zone]["camera_id"]
+        if camera_id in readers:
+            # Zones sharing a source share its reader, as with live cameras
+            if paths[camera_id] != path:
+                raise ValueError(f"Zones sharing camera source {camera_id!r} cannot replay different clips")
+            cap = readers[camera_id].cap
+        else:
+            cap = cv2.VideoCapture(path)
+            if not cap.isOpened():
+                raise ValueError(f"Cannot open clip for {zone}: {path}")
+            readers[camera_id] = detector.capture.add_reader(ClipReader(camera_id, cap, realtime))
+            paths[camera_id] = path
+        detector.cameras[zone] = cap
+        detector.camera_status[zone] = {"status": "available", "cap": cap, "config": CAMERA_CONFIG[zone]}
+    return readers
+
+
+def _run_serial(detector: MultiCameraDetector, readers: Dict, max_seconds: float) -> int:
+    """Drive serial cycles until every clip is drained; returns the number of cycles"""
+    cycles = 0
+    deadline = time.monotonic() + max_seconds
+    loop = asyncio.new_event_loop()
+    try:
+        while time.monotonic() < deadline:
+            if not any(len(reader.buffer) for reader in readers.values()):
+                if all(reader.drained() for reader in readers.values()):
+                    break
+                time.sleep(0.001)
+                continue
+            loop.run_until_complete(detector.process_all_cameras())
+            cycles += 1
+    finally:
+        loop.close()
+    return cycles
+
+
+def _run_pipeline(detector: MultiCameraDetector, readers: Dict, max_seconds: float) -> int:
+    """Drive the staged pipeline until every clip is drained and published; returns cycles"""
+    pipeline = detector.pipeline
+    pipeline.start()
+    deadline = time.monotonic() + max_seconds
+    try:
+        while time.monotonic() < deadline:
+            if pipeline.get_detections(timeout=DRAIN_TIMEOUT) is None and \
+                    all(reader.drained() for reader in readers.values()) and \
+                    len(pipeline.frame_queue) == 0 and len(pipeline.publish_queue) == 0:
+                break
+    finally:
+        pipeline.stop()
+    return pipeline.stats["inference"].count
+
+
+def run_benchmark(clips: Dict[str, str], mode: str = "fast", model_path: Optional[str] = None,
+                  imgsz: Optional[int] = None, batch: Optional[bool] = None, pipeline: Optional[bool] = None,
+                  motion_gating: Optional[bool] = None, roi_inference: Optional[bool] = None,
+                  serializer: str = KAFKA_SERIALIZER,
+                  max_seconds: float = 600.0) -> Dict:
+    """Replay the clips once through a MultiCameraDetector and return the results dict.
+
+    Options left as None keep the detector's environment-driven defaults.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}', expected one of: {', '.join(MODES)}")
+    if not clips:
+        raise ValueError("No clips to replay: pass --left/--right/--rear or set *_CAMERA_SRC to files")
+
+    sink = MemorySink(get_serializer(serializer))
+    detector = MultiCameraDetector(model_path, kafka_producer=sink)
+    sink.latency = detector.latency
+    if imgsz is not None:
+        detector.imgsz = imgsz
+    if batch is not None:
+        detector.batch_inference = batch
+    if motion_gating is False:
+        detector.scheduler = None
+    if roi_inference is not None:
+        detector.rois = roi.camera_rois() if roi_inference else {}
+    if pipeline is not None:
+        detector.pipeline = DetectionPipeline(detector) if pipeline else None
+    if detector.pipeline is not None and mode == "fast":
+        detector.pipeline = DetectionPipeline(detector, fps_target=FAST_CAPTURE_HZ)
+
+    readers = attach_clips(detector, clips, realtime=(mode == "realtime"))
+    usage_before = resource_usage()
+    start = time.perf_counter()
+    try:
+        detector.capture.start()
+        if detector.pipeline is not None:
+            cycles = _run_pipeline(detector, readers, max_seconds)
+        else:
+            cycles = _run_serial(detector, readers, max_seconds)
+        elapsed = time.perf_counter() - start
+        usage_after = resource_usage()
+        capture_stats = detector.get_capture_stats()
+        pipeline_stats = detector.get_pipeline_stats()
+    finally:
+        detector.stop()
+
+    frames_read = sum(stats["frames"] for stats in capture_stats.values())
+    frames_dropped = sum(stats["dropped"] for stats in capture_stats.values())
+    if pipeline_stats:
+        frames_dropped += pipeline_stats["queues"]["frames"]["dropped"]
+    cpu_seconds = (usage_after["cpu_user_s"] + usage_after["cpu_system_s"]
+                   - usage_before["cpu_user_s"] - usage_before["cpu_system_s"])
+
+    return {
+        "config": {
+            "commit": git_commit(),
+            "mode": mode,
+            "clips": clips,
+            "model_path": model_path or os.environ.get("MODEL_PATH", "yolov8n.pt"),
+            "backend": detector.backend.name,
+            "device": detector.device,
+            "imgsz": detector.imgsz,
+            "batch_inference": detector.batch_inference,
+            "inference_workers": len(detector.workers.get_stats()) if detector.workers else 0,
+            "pipeline": detector.pipeline is not None,
+            "motion_gating": detector.scheduler is not None,
+            "roi_inference": bool(detector.rois),
+            "tracking": detector.tracker is not None,
+            "serializer": sink.serializer.name,
+        },
+        "throughput": {
+            "elapsed_s": elapsed,
+            "cycles": cycles,
+            "cycles_per_s": cycles / elapsed if elapsed else 0.0,
+            "frames_read": frames_read,
+            "frames_dropped": frames_dropped,
+            "frames_processed_per_s": (frames_read - frames_dropped) / elapsed if elapsed else 0.0,
+        },
+        "latency_ms": detector.get_latency_stats(),
+        "pipeline": pipeline_stats,
+        "sink": sink.get_status(),
+        "resources": {
+            "cpu_seconds": cpu_seconds,
+            "cpu_percent": cpu_seconds / elapsed * 100 if elapsed else 0.0,
+            "rss_mb": usage_after["rss_mb"],
+            "max_rss_mb": usage_after["max_rss_mb"],
+        },
+    }
+
+
+def _parse_bool(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def main(argv: Optional[List[str]] = None):
+    """Parse arguments, run the benchmark and write the JSON results"""
+    parser = argparse.ArgumentParser(description="Replay recorded clips through the detector")
+    for zone in CAMERA_CONFIG:
+        parser.add_argument(f"--{zone}", metavar="PATH", help=f"Clip for the {zone} camera zone")
+    parser.add_argument("--mode", choices=MODES, default="fast",
+                        help="fast: every frame, as fast as possible; realtime: at the recorded frame rate")
+    parser.add_argument("--model", dest="model_path", help="Model weights (default: MODEL_PATH)")
+    parser.add_argument("--imgsz", type=int, help="Inference size (default: INFERENCE_SIZE)")
+    parser.add_argument("--batch", type=_parse_bool, help="Batched inference true/false (default: BATCH_INFERENCE)")
+    parser.add_argument("--pipeline", type=_parse_bool, help="Staged pipeline true/false (default: PIPELINE_ENABLED)")
+    parser.add_argument("--motion-gating", type=_parse_bool, help="true/false (default: MOTION_GATING)")
+    parser.add_argument("--roi", dest="roi_inference", type=_parse_bool, help="true/false (default: ROI_INFERENCE)")
+    parser.add_argument("--serializer", default=KAFKA_SERIALIZER, help="Wire format measured by the sink")
+    parser.add_argument("--max-seconds", type=float, default=600.0, help="Stop the replay after this long")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results")
+    args = parser.parse_args(argv)
+
+    clips = default_clips()
+    clips.update({zone: getattr(args, zone) for zone in CAMERA_CONFIG if getattr(args, zone)})
+
+    results = run_benchmark(
+        clips, mode=args.mode, model_path=args.model_path, imgsz=args.imgsz, batch=args.batch,
+        pipeline=args.pipeline, motion_gating=args.motion_gating, roi_inference=args.roi_inference,
+        serializer=args.serializer,
+        max_seconds=args.max_seconds,
+    )
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    throughput = results["throughput"]
+    logger.info(f"🏁 {throughput['cycles']} cycles in {throughput['elapsed_s']:.1f}s "
+                f"({throughput['cycles_per_s']:.1f} cycles/s, {throughput['frames_processed_per_s']:.1f} frames/s) | "
+                f"CPU {results['resources']['cpu_percent']:.0f}% | RSS {results['resources']['max_rss_mb']:.0f} MB")
+    for zone, stages in results["latency_ms"].items():
+        end_to_end = stages.get("end_to_end", {})
+        if end_to_end.get("p50") is not None:
+            logger.info(f"   {zone}: end-to-end p50 {end_to_end['p50']:.1f} ms | p95 {end_to_end['p95']:.1f} ms | "
+                        f"p99 {end_to_end['p99']:.1f} ms")
+    logger.info(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
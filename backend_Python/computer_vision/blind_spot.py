@@ -4,9 +4,10 @@ Main Blind Spot Detection System — LEGACY / ARCHIVED
 This module is **no longer the active entry point**. The current entry point
 is ``computer_vision.multi_camera_detector``.
 
-``blind_spot.py`` previously wired a single-camera detector to a legacy
-WebSocket server (``archive/websocket_server.py``). That WebSocket path has
-been superseded by the Kafka → ws-bridge → React pipeline.
+``blind_spot.py`` previously wired a single-camera detector to the WebSocket
+server. The dashboard path is now Kafka → ws-bridge → React; the in-cab
+WebSocket output is built into the detector (WEBSOCKET_ENABLED, see
+``websocket_server.py``).
 
 The file is kept here for historical reference. Do not import it in new code.
 """
@@ -16,14 +17,6 @@ import cv2
 import numpy as np
 from .multi_camera_detector import MultiCameraDetector
 
-# The legacy WebSocket server has been moved to archive/websocket_server.py.
-# Import is guarded so that merely importing this module does not crash the
-# package when the archive module is not on sys.path.
-try:
-    from archive.websocket_server import DetectionWebSocketServer  # type: ignore
-except ImportError:
-    DetectionWebSocketServer = None  # type: ignore
-
 from shared.config import *
 import logging
 import signal
@@ -38,6 +31,8 @@ logger = logging.getLogger(__name__)
 class BlindSpotSystem:
     def __init__(self):
         """Initialize the complete multi-camera blind spot detection system"""
+        # Imported here so importing this module does not require websockets
+        from .websocket_server import DetectionWebSocketServer
         self.detector = MultiCameraDetector()
         self.websocket_server = DetectionWebSocketServer()
         self.is_running = False
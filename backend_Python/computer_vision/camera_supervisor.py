@@ -0,0 +1,271 @@
+"""
+Camera Supervision for Blind Spot Detection System
+Concurrent, timeout-bounded camera open with background reconnects
+
+Every unique camera source is opened on its own thread, so an unreachable
+RTSP URL costs at most CAMERA_OPEN_TIMEOUT and never delays the other zones;
+each source's reader starts the moment it opens. A supervisor thread then
+watches every source and reconnects it with exponential backoff when it
+failed to open, its reader died, it stopped delivering frames, or it keeps
+delivering the same frame (frozen stream, detected from the frame_hash).
+Stalls and freezes count toward the backoff like failed opens; it starts over
+once a source has stayed healthy for HEALTHY_RESET seconds.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import (CAMERA_CONFIG, CAMERA_FROZEN_FRAMES, CAMERA_FROZEN_SECONDS, CAMERA_OPEN_TIMEOUT,
+                           CAMERA_RETRY_INITIAL, CAMERA_RETRY_MAX, CAMERA_STALL_TIMEOUT, CAPTURE_BACKEND)
+from .capture import CaptureManager
+from .capture_backends import create_capture
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds between two health checks of the supervisor thread
+CHECK_INTERVAL = 0.5
+# Seconds a connected source must stay healthy before its reconnect backoff starts over
+HEALTHY_RESET = 60.0
+
+
+def open_capture(camera_id: Any, timeout: float = CAMERA_OPEN_TIMEOUT, backend: str = CAPTURE_BACKEND):
+    """Open a source through its capture backend, giving up after ``timeout`` seconds.
+
+    Returns the opened capture or None. The open runs on a daemon thread since
+    OpenCV cannot interrupt it; a capture that only opens after the deadline is
+    released by that thread instead of leaking.
+    """
+    lock = threading.Lock()
+    state: Dict[str, Any] = {"abandoned": False}
+    done = threading.Event()
+
+    def _open():
+        cap = None
+        try:
+            cap = create_capture(camera_id, backend, timeout=timeout)
+            if not cap.isOpened():
+                cap.release()
+                cap = None
+        except Exception as e:
+            logger.error(f"❌ Camera {camera_id}: {e}")
+            cap = None
+        with lock:
+            if state["abandoned"]:
+                if cap is not None:
+                    cap.release()
+                return
+            state["cap"] = cap
+        done.set()
+
+    threading.Thread(target=_open, name=f"open-{camera_id}", daemon=True).start()
+    done.wait(timeout)
+    with lock:
+        if "cap" not in state:
+            state["abandoned"] = True
+            logger.warning(f"⏱️  Camera {camera_id}: not opened within {timeout:.1f}s")
+            return None
+        return state["cap"]
+
+
+class _Source:
+    def __init__(self, camera_id: Any, zones: List[str], backend: str = CAPTURE_BACKEND):
+        """Connection state of one camera source and the zones it serves"""
+        self.camera_id = camera_id
+        self.zones = zones
+        self.backend = backend
+        self.status = "not_connected"
+        self.cap = None
+        self.connecting = False
+        self.connected_at = 0.0
+        self.failures = 0  # failed opens and unhealthy disconnects since it was last healthy, drives the backoff
+        self.next_attempt = 0.0
+        self.reconnects = 0
+        self.last_error: Optional[str] = None
+        self.last_hash: Optional[str] = None
+        self.repeats = 0  # consecutive frames with last_hash
+        self.repeat_since = 0.0  # time last_hash was first seen
+        self.repeat_seq = 0  # reader frame count when last_hash was first seen
+        self.frozen = False
+
+
+class CameraSupervisor(threading.Thread):
+    def __init__(self, capture: CaptureManager, on_change: Callable[[Any, str, Any], None],
+                 camera_config: Dict = CAMERA_CONFIG, open_timeout: float = CAMERA_OPEN_TIMEOUT,
+                 retry_initial: float = CAMERA_RETRY_INITIAL, retry_max: float = CAMERA_RETRY_MAX,
+                 stall_timeout: float = CAMERA_STALL_TIMEOUT, frozen_frames: int = CAMERA_FROZEN_FRAMES,
+                 frozen_seconds: float = CAMERA_FROZEN_SECONDS, interval: float = CHECK_INTERVAL,
+                 healthy_reset: float = HEALTHY_RESET):
+        """Open camera sources concurrently and keep them connected.
+
+        ``on_change(camera_id, status, cap)`` is called from supervisor threads
+        whenever a source connects (cap set) or drops (cap None), so the owner
+        can update its camera map and status live. A source is frozen once the
+        same frame_hash came with ``frozen_frames`` new reader frames over at
+        least ``frozen_seconds``.
+        """
+        super().__init__(name="camera-supervisor", daemon=True)
+        self.capture = capture
+        self.on_change = on_change
+        self.open_timeout = open_timeout
+        self.retry_initial = retry_initial
+        self.retry_max = retry_max
+        self.stall_timeout = stall_timeout
+        self.frozen_frames = frozen_frames
+        self.frozen_seconds = frozen_seconds
+        self.interval = interval
+        self.healthy_reset = healthy_reset
+        self.sources: Dict[Any, _Source] = {}
+        for zone, config in camera_config.items():
+            camera_id = config["camera_id"]
+            # Zones sharing a source share its capture, opened with the first zone's backend
+            source = self.sources.setdefault(camera_id, _Source(camera_id, [], config.get("backend", CAPTURE_BACKEND)))
+            source.zones.append(zone)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def open_all(self) -> Dict[Any, bool]:
+        """Open every source at once; returns camera_id -> opened, after at most ``open_timeout``"""
+        threads = []
+        for source in self.sources.values():
+            source.connecting = True
+            thread = threading.Thread(target=self._connect, args=(source,), name=f"connect-{source.camera_id}",
+                                      daemon=True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        return {camera_id: source.status == "available" for camera_id, source in self.sources.items()}
+
+    def _connect(self, source: _Source):
+        """Open one source and start its reader, or schedule the next attempt"""
+        cap = open_capture(source.camera_id, self.open_timeout, source.backend)
+        now = time.time()
+        with self._lock:
+            source.connecting = False
+            if self._stop_event.is_set():
+                if cap is not None:
+                    cap.release()
+                return
+            if cap is None:
+                delay = self._backoff(source, now)
+                source.status = "error"
+                source.last_error = "open failed"
+                logger.warning(f"❌ Camera {source.camera_id}: open failed, retrying in {delay:.1f}s")
+            else:
+                # The backoff only starts over once the source has stayed healthy (see check)
+                source.cap = cap
+                source.status = "available"
+                source.connected_at = now
+                source.last_hash, source.repeats, source.frozen = None, 0, False
+                # Readers start as soon as their own source is open, not after the slowest one
+                self.capture.add_source(source.camera_id, cap).start()
+                logger.info(f"✅ Camera {source.camera_id}: connected ({', '.join(source.zones)})")
+        self.on_change(source.camera_id, source.status, cap)
+
+    def _backoff(self, source: _Source, now: float) -> float:
+        """Count one more failure and schedule the next attempt; returns the delay"""
+        source.failures += 1
+        delay = min(self.retry_initial * 2 ** (source.failures - 1), self.retry_max)
+        source.next_attempt = now + delay
+        return delay
+
+    def _disconnect(self, source: _Source, reason: str):
+        """Drop an unhealthy source and retry it with the backoff of its consecutive failures"""
+        with self._lock:
+            cap, source.cap = source.cap, None
+            source.status = "reconnecting"
+            source.last_error = reason
+            source.reconnects += 1
+            delay = self._backoff(source, time.time())
+        logger.warning(f"⚠️  Camera {source.camera_id}: {reason}, reconnecting in {delay:.1f}s")
+        self.on_change(source.camera_id, source.status, None)
+        # A stalled reader may still be inside cap.read(): it releases the capture itself once that returns
+        if not self.capture.remove_source(source.camera_id, release=True) and cap is not None:
+            cap.release()
+
+    def _unhealthy(self, source: _Source, now: float) -> Optional[str]:
+        """Reason to reconnect a connected source, or None if it is fine"""
+        if source.frozen:
+            return f"frozen stream ({source.repeats} identical frames)"
+        reader = self.capture.readers.get(source.camera_id)
+        if reader is None or not reader.is_alive():
+            return "reader stopped"
+        last_frame = reader.buffer.last_capture_time or source.connected_at
+        if now - last_frame > self.stall_timeout:
+            return f"no frames for {now - last_frame:.1f}s"
+        return None
+
+    def observe(self, camera_id: Any, frame_hash: str):
+        """Count consecutive identical frame hashes of a source (called per processed frame).
+
+        Repeats only mean a frozen stream while the reader keeps decoding new
+        frames, and only after ``frozen_seconds``: a briefly uniform image
+        (lens cap, dark scene) gets that long before it counts.
+        """
+        source = self.sources.get(camera_id)
+        if source is None or self.frozen_frames <= 0:
+            return
+        reader = self.capture.readers.get(camera_id)
+        seq = reader.buffer.frames_in if reader is not None else 0
+        now = time.time()
+        if frame_hash != source.last_hash:
+            source.last_hash, source.repeats = frame_hash, 1
+            source.repeat_since, source.repeat_seq = now, seq
+            return
+        source.repeats += 1
+        if (source.repeats >= self.frozen_frames and now - source.repeat_since >= self.frozen_seconds
+                and seq - source.repeat_seq >= self.frozen_frames):
+            source.frozen = True
+
+    def check(self):
+        """One supervision pass: reconnect unhealthy sources and retry failed ones that are due"""
+        now = time.time()
+        for source in self.sources.values():
+            if source.connecting:
+                continue
+            if source.status == "available":
+                reason = self._unhealthy(source, now)
+                if reason is not None:
+                    self._disconnect(source, reason)
+                elif source.failures and now - source.connected_at >= self.healthy_reset:
+                    source.failures = 0
+            elif now >= source.next_attempt:
+                source.connecting = True
+                threading.Thread(target=self._connect, args=(source,), name=f"connect-{source.camera_id}",
+                                 daemon=True).start()
+
+    def run(self):
+        """Check every source until stopped"""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"❌ Camera supervisor error: {e}")
+
+    def stop(self, timeout: float = 2.0):
+        """Stop supervising; connected captures stay with their owner"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def get_stats(self) -> Dict[Any, Dict]:
+        """Per-source status, reconnect and consecutive failure counts, retry schedule and last error"""
+        now = time.time()
+        return {
+            camera_id: {
+                "status": source.status,
+                "zones": list(source.zones),
+                "backend": source.backend,
+                "reconnects": source.reconnects,
+                "failures": source.failures,
+                "retry_in_s": max(0.0, source.next_attempt - now) if source.status != "available" else None,
+                "last_error": source.last_error,
+            }
+            for camera_id, source in self.sources.items()
+        }
@@ -0,0 +1,252 @@
+"""
+Threaded Camera Capture for Blind Spot Detection System
+One reader thread per unique camera source keeps only the newest frames
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import CAPTURE_BUFFER_SIZE
+from .preprocess import FramePool
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Number of consecutive failed reads before a reader logs a warning
+READ_FAILURE_WARN_THRESHOLD = 30
+
+
+class LatestFrameBuffer:
+    def __init__(self, size: int = CAPTURE_BUFFER_SIZE,
+                 on_discard: Optional[Callable[[np.ndarray], None]] = None):
+        """Small ring buffer that only ever hands out the newest frame.
+
+        ``on_discard`` gets every frame dropped without being handed out, so a
+        frame pool can reuse it.
+        """
+        self._frames = deque(maxlen=max(1, size))
+        self._lock = threading.Lock()
+        self.on_discard = on_discard
+        self.frames_in = 0
+        self.dropped = 0
+        self.last_capture_time = 0.0
+        self.last_age = 0.0
+
+    def put(self, frame: np.ndarray, timestamp: float):
+        """Store a frame, evicting the oldest one when the buffer is full"""
+        evicted = None
+        with self._lock:
+            if len(self._frames) == self._frames.maxlen:
+                self.dropped += 1
+                evicted = self._frames[0][0]
+            self.frames_in += 1
+            self.last_capture_time = timestamp
+            self._frames.append((frame, timestamp, self.frames_in))
+        if evicted is not None and self.on_discard is not None:
+            self.on_discard(evicted)
+
+    def get_latest(self) -> Optional[Tuple[np.ndarray, float, int]]:
+        """Return (frame, capture_timestamp, sequence) of the newest frame, or None.
+
+        Never blocks. Older frames still in the buffer are discarded and counted
+        as dropped, so each frame is handed out at most once.
+        """
+        with self._lock:
+            if not self._frames:
+                return None
+            frame, timestamp, seq = self._frames.pop()
+            self.dropped += len(self._frames)
+            discarded = [stale for stale, _, _ in self._frames]
+            self._frames.clear()
+        if self.on_discard is not None:
+            for stale in discarded:
+                self.on_discard(stale)
+        self.last_age = time.time() - timestamp
+        return frame, timestamp, seq
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+
+class CameraReader(threading.Thread):
+    def __init__(self, camera_id: Any, cap, buffer_size: int = CAPTURE_BUFFER_SIZE):
+        """Background thread that continuously reads one camera source"""
+        super().__init__(name=f"capture-{camera_id}", daemon=True)
+        self.camera_id = camera_id
+        self.cap = cap
+        # Decode into reused arrays so steady-state capture allocates nothing; frames
+        # the buffer drops go straight back, handed-out ones via CaptureManager.release
+        self.pool = FramePool()
+        self.buffer = LatestFrameBuffer(buffer_size, on_discard=self.pool.release)
+        self.read_failures = 0
+        self._stop_event = threading.Event()
+        # Release of the capture is deferred to the reader's exit, never run under a read in progress
+        self._exit_lock = threading.Lock()
+        self._exited = False
+        self._release_on_exit = False
+        self.released = False
+
+    def run(self):
+        """Run the read loop, then release the capture if stop() handed it over"""
+        try:
+            self.read_frames()
+        finally:
+            with self._exit_lock:
+                self._exited = True
+                release = self._release_on_exit and not self.released
+                self.released = self.released or release
+            if release:
+                self._release()
+
+    def read_frames(self):
+        """Read frames until stopped, keeping only the newest ones"""
+        consecutive_failures = 0
+        while not self._stop_event.is_set():
+            image = self.pool.acquire()
+            try:
+                ret, frame = self.cap.read(image) if image is not None else self.cap.read()
+            except Exception as e:
+                logger.error(f"❌ Capture error on camera {self.camera_id}: {e}")
+                ret, frame = False, None
+            if ret and frame is not image:
+                # No free pooled frame fitted: the capture allocated a new one
+                self.pool.adopt(frame)
+            if image is not None and (not ret or frame is not image):
+                self.pool.release(image)
+            image = None
+
+            if not ret:
+                self.read_failures += 1
+                consecutive_failures += 1
+                if consecutive_failures == READ_FAILURE_WARN_THRESHOLD:
+                    logger.warning(f"⚠️  Camera {self.camera_id}: {consecutive_failures} consecutive failed reads")
+                # Back off briefly so a dead source does not spin the CPU
+                self._stop_event.wait(0.01)
+                continue
+
+            consecutive_failures = 0
+            self.buffer.put(frame, time.time())
+
+    def stop(self, timeout: float = 2.0, release: bool = False) -> bool:
+        """Signal the reader to stop and wait for it to exit; True if it did.
+
+        With ``release`` the reader also takes over releasing its capture: the
+        thread releases it once its last read returns. A reader still blocked in
+        a read after ``timeout`` keeps the capture until that read returns; if it
+        never does the capture leaks, which is safer than freeing it mid-read.
+        """
+        with self._exit_lock:
+            if release:
+                self._release_on_exit = True
+                # Never started or already gone: nothing reads from the capture any more
+                release_now = (self._exited or self.ident is None) and not self.released
+                self.released = self.released or release_now
+            else:
+                release_now = False
+        self._stop_event.set()
+        if release_now:
+            self._release()
+        if self.is_alive():
+            self.join(timeout)
+        if self.is_alive():
+            logger.warning(f"⚠️  Camera {self.camera_id}: reader still blocked in a read after {timeout:.1f}s"
+                           + (", its capture is released when the read returns" if release else ""))
+            return False
+        return True
+
+    def _release(self):
+        try:
+            self.cap.release()
+        except Exception as e:
+            logger.error(f"❌ Error releasing camera {self.camera_id}: {e}")
+
+    def get_stats(self) -> Dict:
+        """Get capture counters for this source"""
+        last_capture = self.buffer.last_capture_time
+        return {
+            "frames": self.buffer.frames_in,
+            "dropped": self.buffer.dropped,
+            "read_failures": self.read_failures,
+            # Frames the capture had to allocate (flat once the pool is warm)
+            "allocations": self.pool.allocations,
+            # Age of the newest frame in the buffer right now
+            "age_ms": (time.time() - last_capture) * 1000 if last_capture else None,
+            # Age of the last frame handed to the detector when it was picked up
+            "pickup_age_ms": self.buffer.last_age * 1000,
+        }
+
+
+class CaptureManager:
+    def __init__(self, buffer_size: int = CAPTURE_BUFFER_SIZE):
+        """Own one CameraReader per unique camera source.
+
+        ``readers`` is replaced, never mutated, when sources come and go, so the
+        detector can iterate it while the camera supervisor reconnects a source.
+        """
+        self.buffer_size = buffer_size
+        self.readers: Dict[Any, CameraReader] = {}
+        self._lock = threading.Lock()
+
+    def add_source(self, camera_id: Any, cap) -> CameraReader:
+        """Register an opened capture; sources shared by several zones get one reader"""
+        if camera_id not in self.readers:
+            self.add_reader(CameraReader(camera_id, cap, self.buffer_size))
+        return self.readers[camera_id]
+
+    def add_reader(self, reader: CameraReader) -> CameraReader:
+        """Register a pre-built reader (e.g. a file replay reader) under its camera_id"""
+        with self._lock:
+            self.readers = {**self.readers, reader.camera_id: reader}
+        return reader
+
+    def remove_source(self, camera_id: Any, release: bool = False) -> bool:
+        """Stop and forget a source's reader; False if there was none.
+
+        With ``release`` the reader releases its capture once it has exited
+        (see CameraReader.stop); otherwise the caller keeps the capture.
+        """
+        with self._lock:
+            readers = dict(self.readers)
+            reader = readers.pop(camera_id, None)
+            self.readers = readers
+        if reader is None:
+            return False
+        reader.stop(release=release)
+        return True
+
+    def start(self):
+        """Start every registered reader that is not already running"""
+        for reader in self.readers.values():
+            if not reader.is_alive():
+                reader.start()
+
+    def get_latest(self, camera_id: Any) -> Optional[Tuple[np.ndarray, float, int]]:
+        """Non-blocking fetch of the newest unseen frame for a source"""
+        reader = self.readers.get(camera_id)
+        if reader is None:
+            return None
+        return reader.buffer.get_latest()
+
+    def release(self, camera_id: Any, frame: np.ndarray):
+        """Hand a frame from get_latest() back to its reader's pool once nothing reads it any more"""
+        reader = self.readers.get(camera_id)
+        if reader is not None:
+            reader.pool.release(frame)
+
+    def get_stats(self) -> Dict[Any, Dict]:
+        """Get per-source drop and age counters"""
+        return {camera_id: reader.get_stats() for camera_id, reader in self.readers.items()}
+
+    def stop(self, release: bool = False):
+        """Stop all readers; with ``release`` each reader releases its capture once it has exited"""
+        with self._lock:
+            readers, self.readers = self.readers, {}
+        for reader in readers.values():
+            reader.stop(release=release)
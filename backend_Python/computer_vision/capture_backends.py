@@ -0,0 +1,241 @@
+"""
+Capture Backends for Blind Spot Detection System
+Low-latency GStreamer and FFmpeg decode pipelines per camera source type
+
+Each camera picks a backend in CAMERA_CONFIG (``<ZONE>_CAMERA_BACKEND``,
+default CAPTURE_BACKEND):
+
+    opencv     cv2.VideoCapture defaults, resolution requested from the device
+    ffmpeg     OpenCV's FFmpeg backend without input buffering, bounded
+               open/read timeouts, hardware decode when available and frames
+               resized to CAMERA_WIDTH x CAMERA_HEIGHT into the reader's buffer
+    gstreamer  a tuned pipeline (hardware decoders via decodebin, scaling in
+               the pipeline, BGR output, appsink that keeps only the newest
+               frame); needs OpenCV built with GStreamer
+    auto       gstreamer for CSI and network streams when available, ffmpeg
+               for network streams and files otherwise, opencv for USB
+
+A ``camera_id`` of -1, ``csi`` or ``libcamera`` is the Pi camera module; a
+string containing `` ! `` is used as a GStreamer pipeline as-is.
+"""
+
+import contextlib
+import functools
+import threading
+from typing import Any, Optional, Tuple
+import sys
+import os
+import cv2
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import (CAMERA_HEIGHT, CAMERA_OPEN_TIMEOUT, CAMERA_WIDTH, CAPTURE_BACKEND, CAPTURE_GST_DECODER,
+                           CAPTURE_HW_DECODE, FPS_TARGET)
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CAPTURE_BACKENDS = ("auto", "opencv", "ffmpeg", "gstreamer")
+# Demuxer/decoder options for OpenCV's FFmpeg backend on network streams: no
+# input buffering or frame reordering delay, TCP for RTSP so lost packets do
+# not smear frames. OpenCV reads them from the process environment at open time,
+# so they are only set while network sources open (see _FfmpegEnvironment); a
+# file must not see them, since nobuffer would skip its probed first frame.
+FFMPEG_CAPTURE_OPTIONS = "rtsp_transport;tcp|fflags;nobuffer|flags;low_delay|max_delay;0|reorder_queue_size;0"
+FFMPEG_OPTIONS_ENV = "OPENCV_FFMPEG_CAPTURE_OPTIONS"
+# Live sources: keep one decoded frame and drop older ones rather than queueing lag
+LIVE_APPSINK = "appsink drop=true max-buffers=1 sync=false"
+# Files are replayed in full, as fast as they are read
+FILE_APPSINK = "appsink max-buffers=1 sync=false"
+
+
+def source_kind(source: Any) -> str:
+    """Classify a camera_id as csi, usb, rtsp, http, pipeline or file"""
+    if isinstance(source, int):
+        return "csi" if source == -1 else "usb"
+    text = str(source)
+    lower = text.lower()
+    if " ! " in text:
+        return "pipeline"
+    if lower in ("csi", "libcamera"):
+        return "csi"
+    if lower.startswith(("rtsp://", "rtsps://")):
+        return "rtsp"
+    if lower.startswith(("http://", "https://")):
+        return "http"
+    if lower.startswith("/dev/video"):
+        return "usb"
+    return "file"
+
+
+@functools.lru_cache(maxsize=1)
+def has_gstreamer() -> bool:
+    """True if this OpenCV build includes the GStreamer video I/O backend"""
+    for line in cv2.getBuildInformation().splitlines():
+        if line.strip().startswith("GStreamer:"):
+            return "YES" in line
+    return False
+
+
+def resolve_backend(source: Any, backend: str = CAPTURE_BACKEND) -> str:
+    """The concrete backend for a source; "auto" picks by source type and OpenCV build"""
+    backend = backend.lower()
+    if backend not in CAPTURE_BACKENDS:
+        raise ValueError(f"Unknown capture backend '{backend}', expected one of: {', '.join(CAPTURE_BACKENDS)}")
+    if backend != "auto":
+        return backend
+    kind = source_kind(source)
+    if kind in ("csi", "pipeline"):
+        return "gstreamer"
+    if kind in ("rtsp", "http"):
+        return "gstreamer" if has_gstreamer() else "ffmpeg"
+    if kind == "file":
+        return "ffmpeg"
+    return "opencv"
+
+
+def gstreamer_pipeline(source: Any, width: int = CAMERA_WIDTH, height: int = CAMERA_HEIGHT,
+                       fps: int = FPS_TARGET, decoder: str = CAPTURE_GST_DECODER) -> str:
+    """GStreamer pipeline delivering width x height BGR frames of a source to an appsink"""
+    kind = source_kind(source)
+    if kind == "pipeline":
+        return str(source)
+    scale = f"videoconvert ! videoscale ! video/x-raw,format=BGR,width={width},height={height}"
+    if kind == "csi":
+        # The camera's ISP scales, so only the colour conversion is left
+        return (f"libcamerasrc ! video/x-raw,width={width},height={height},framerate={fps}/1 ! "
+                f"videoconvert ! video/x-raw,format=BGR ! {LIVE_APPSINK}")
+    if kind == "usb":
+        device = source if isinstance(source, str) else f"/dev/video{source}"
+        return f"v4l2src device={device} ! {scale} ! {LIVE_APPSINK}"
+    if kind == "rtsp":
+        return (f"rtspsrc location={source} latency=0 drop-on-latency=true protocols=tcp ! "
+                f"{decoder} ! {scale} ! {LIVE_APPSINK}")
+    if kind == "http":
+        return f"souphttpsrc location={source} is-live=true ! {decoder} ! {scale} ! {LIVE_APPSINK}"
+    return f"filesrc location={source} ! decodebin ! {scale} ! {FILE_APPSINK}"
+
+
+class ResizingCapture:
+    def __init__(self, cap, width: int = CAMERA_WIDTH, height: int = CAMERA_HEIGHT):
+        """cv2.VideoCapture wrapper whose frames always come out width x height.
+
+        Sources already delivering that size are decoded straight into the
+        caller's buffer; others are decoded into a private buffer and resized
+        into the caller's, so the reader's frame pool keeps working.
+        """
+        self.cap = cap
+        self.width = width
+        self.height = height
+        self._decoded: Optional[np.ndarray] = None
+        self._passthrough = False
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        if self._passthrough:
+            return self.cap.read(image) if image is not None else self.cap.read()
+        ret, frame = self.cap.read(self._decoded) if self._decoded is not None else self.cap.read()
+        if not ret:
+            return False, None
+        if frame.shape[0] == self.height and frame.shape[1] == self.width:
+            self._passthrough = True
+            self._decoded = None
+            return True, frame
+        self._decoded = frame
+        if image is not None and image.shape == (self.height, self.width) + frame.shape[2:]:
+            return True, cv2.resize(frame, (self.width, self.height), dst=image, interpolation=cv2.INTER_AREA)
+        return True, cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def get(self, prop: int) -> float:
+        return self.cap.get(prop)
+
+    def set(self, prop: int, value) -> bool:
+        return self.cap.set(prop, value)
+
+    def release(self):
+        self.cap.release()
+
+
+class _FfmpegEnvironment:
+    def __init__(self, options: str = FFMPEG_CAPTURE_OPTIONS):
+        """Scope OpenCV's process-wide FFmpeg capture options to the opens that want them.
+
+        Network opens set the variable, opens that must not see it (files) run
+        without it; each kind waits until no open of the other kind is in
+        progress, but opens of the same kind run concurrently, so an
+        unreachable source never holds up its peers. A value the user exported
+        is left in place for every open.
+        """
+        self.options = options
+        self._cond = threading.Condition()
+        self._opens = {True: 0, False: 0}  # opens in progress, with and without the options
+        self._owned = False  # the variable was set here and is removed after the last network open
+
+    @contextlib.contextmanager
+    def _scope(self, network: bool):
+        with self._cond:
+            self._cond.wait_for(lambda: self._opens[not network] == 0)
+            if network and self._opens[True] == 0 and FFMPEG_OPTIONS_ENV not in os.environ:
+                os.environ[FFMPEG_OPTIONS_ENV] = self.options
+                self._owned = True
+            self._opens[network] += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._opens[network] -= 1
+                if self._opens[network] == 0:
+                    if network and self._owned:
+                        os.environ.pop(FFMPEG_OPTIONS_ENV, None)
+                        self._owned = False
+                    self._cond.notify_all()
+
+    def network(self):
+        return self._scope(True)
+
+    def plain(self):
+        return self._scope(False)
+
+
+_ffmpeg_environment = _FfmpegEnvironment()
+
+
+def _open_opencv(source: Any, width: int, height: int, fps: int):
+    # OpenCV may open files through FFmpeg too
+    scope = _ffmpeg_environment.plain() if source_kind(source) == "file" else contextlib.nullcontext()
+    with scope:
+        cap = cv2.VideoCapture(source)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    cap.set(cv2.CAP_PROP_FPS, fps)
+    return cap
+
+
+def _open_ffmpeg(source: Any, width: int, height: int, timeout: float, hw_decode: bool):
+    network = source_kind(source) in ("rtsp", "http")
+    params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, int(timeout * 1000), cv2.CAP_PROP_READ_TIMEOUT_MSEC, int(timeout * 1000)]
+    if hw_decode:
+        # Falls back to software decoding when no accelerator is available
+        params += [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+    with _ffmpeg_environment.network() if network else _ffmpeg_environment.plain():
+        cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG, params)
+    # Honoured by some builds only; the options above do the real work
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return ResizingCapture(cap, width, height)
+
+
+def create_capture(source: Any, backend: str = CAPTURE_BACKEND, width: int = CAMERA_WIDTH,
+                   height: int = CAMERA_HEIGHT, fps: int = FPS_TARGET, timeout: float = CAMERA_OPEN_TIMEOUT,
+                   hw_decode: bool = CAPTURE_HW_DECODE):
+    """Build the capture for a camera source; the caller checks isOpened()"""
+    backend = resolve_backend(source, backend)
+    if backend == "gstreamer":
+        if not has_gstreamer():
+            raise RuntimeError(f"Capture backend 'gstreamer' for {source!r} needs OpenCV built with GStreamer")
+        return cv2.VideoCapture(gstreamer_pipeline(source, width, height, fps), cv2.CAP_GSTREAMER)
+    if backend == "ffmpeg":
+        return _open_ffmpeg(source, width, height, timeout, hw_decode)
+    return _open_opencv(source, width, height, fps)
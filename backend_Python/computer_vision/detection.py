@@ -15,6 +15,7 @@ from shared.config import *
 import pygame
 from typing import List, Dict, Tuple
 from .kafka_producer import DetectionKafkaProducer
+from .zones import default_zones
 
 
 class BlindSpotDetector:
@@ -56,10 +57,7 @@ class BlindSpotDetector:
 
     def is_in_blind_spot(self, x_center: float, y_center: float, zone: str) -> bool:
         """Check if an object is in a blind spot zone"""
-        zone_coords = BLIND_SPOT_ZONES[zone]
-
-        return (zone_coords["x_min"] <= x_center <= zone_coords["x_max"] and
-                zone_coords["y_min"] <= y_center <= zone_coords["y_max"])
+        return default_zones().contains(zone, x_center, y_center)
 
     def calculate_position(self, bbox: List[float], frame_width: int, frame_height: int) -> Dict[str, float]:
         """Calculate relative position of detected object"""
@@ -81,33 +79,16 @@ class BlindSpotDetector:
         """Draw bounding boxes and blind spot zones on frame"""
         # Draw blind spot zones
         height, width = frame.shape[:2]
+        zone_map = default_zones()
+        zone_map.draw(frame, (0, 0, 255), 2)
 
-        # Left blind spot
-        cv2.rectangle(frame,
-                     (int(BLIND_SPOT_ZONES["left"]["x_min"] * width),
-                      int(BLIND_SPOT_ZONES["left"]["y_min"] * height)),
-                     (int(BLIND_SPOT_ZONES["left"]["x_max"] * width),
-                      int(BLIND_SPOT_ZONES["left"]["y_max"] * height)),
-                     (0, 0, 255), 2)
-
-        # Right blind spot
-        cv2.rectangle(frame,
-                     (int(BLIND_SPOT_ZONES["right"]["x_min"] * width),
-                      int(BLIND_SPOT_ZONES["right"]["y_min"] * height)),
-                     (int(BLIND_SPOT_ZONES["right"]["x_max"] * width),
-                      int(BLIND_SPOT_ZONES["right"]["y_max"] * height)),
-                     (0, 0, 255), 2)
-
-        # Rear blind spot
-        cv2.rectangle(frame,
-                     (int(BLIND_SPOT_ZONES["rear"]["x_min"] * width),
-                      int(BLIND_SPOT_ZONES["rear"]["y_min"] * height)),
-                     (int(BLIND_SPOT_ZONES["rear"]["x_max"] * width),
-                      int(BLIND_SPOT_ZONES["rear"]["y_max"] * height)),
-                     (0, 0, 255), 2)
+        # Box centres of every detection tested against all zones at once
+        centres = np.array([((d["bbox"][0] + d["bbox"][2]) / 2 / width, (d["bbox"][1] + d["bbox"][3]) / 2 / height)
+                            for d in detections])
+        in_blind_spot = zone_map.contains_any(centres)
 
         # Draw detections
-        for detection in detections:
+        for detection, alert in zip(detections, in_blind_spot):
             x1, y1, x2, y2 = detection["bbox"]
             confidence = detection["confidence"]
             class_id = detection["class_id"]
@@ -129,13 +110,8 @@ class BlindSpotDetector:
             cv2.putText(frame, label, (int(x1), int(y1) - 10),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
-            # Check if in blind spot and add alert indicator
-            x_center = (x1 + x2) / 2 / width
-            y_center = (y1 + y2) / 2 / height
-
-            if (self.is_in_blind_spot(x_center, y_center, "left") or
-                self.is_in_blind_spot(x_center, y_center, "right") or
-                self.is_in_blind_spot(x_center, y_center, "rear")):
+            # Add alert indicator if in a blind spot
+            if alert:
                 cv2.putText(frame, "BLIND SPOT ALERT!", (50, 50),
                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
 
@@ -232,13 +208,9 @@ async def main():
                 detector.last_time = current_time
 
             # Play alert sound if objects in blind spots
-            if any(d for d in detections if
-                   detector.is_in_blind_spot(d["position"]["x"]/POSITION_SCALE["x"],
-                                          d["position"]["y"]/POSITION_SCALE["y"], "left") or
-                   detector.is_in_blind_spot(d["position"]["x"]/POSITION_SCALE["x"],
-                                          d["position"]["y"]/POSITION_SCALE["y"], "right") or
-                   detector.is_in_blind_spot(d["position"]["x"]/POSITION_SCALE["x"],
-                                          d["position"]["y"]/POSITION_SCALE["y"], "rear")):
+            centres = np.array([(d["position"]["x"] / POSITION_SCALE["x"], d["position"]["y"] / POSITION_SCALE["y"])
+                                for d in detections])
+            if default_zones().contains_any(centres).any():
                 detector.play_alert_sound()
 
             # Small delay to maintain target FPS
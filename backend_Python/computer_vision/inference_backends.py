@@ -0,0 +1,223 @@
+"""
+Inference Backends for Blind Spot Detection System
+Ultralytics/torch or CPU ONNX Runtime behind one predict() interface
+
+The backend is picked from INFERENCE_BACKEND, or from MODEL_PATH's extension
+when that is "auto": ``.onnx`` runs on ONNX Runtime with our own letterbox
+preprocessing and NMS, and never imports torch or ultralytics; anything else
+(``.pt``) loads Ultralytics YOLO.
+
+Export an ONNX model (needs ultralytics once, on any machine)::
+
+    python -m computer_vision.inference_backends export yolov8n.pt --imgsz 416
+"""
+
+import argparse
+from typing import List, Optional, Tuple
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import INFERENCE_BACKEND, ONNX_PROVIDERS, ONNX_THREADS, NMS_IOU_THRESHOLD
+from .preprocess import Letterboxer
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Largest number of boxes kept per frame after NMS
+MAX_DETECTIONS = 300
+# Class offset applied to boxes so one NMS pass never suppresses across classes
+CLASS_OFFSET = 7680
+# Execution providers tried in order when ONNX_PROVIDERS is "auto"
+DEFAULT_PROVIDERS = ("OpenVINOExecutionProvider", "CPUExecutionProvider")
+
+
+class Boxes:
+    def __init__(self, data: np.ndarray):
+        """(N, 6) x1, y1, x2, y2, conf, cls array, shaped like Ultralytics ``Results.boxes``"""
+        self.data = data
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+
+class Result:
+    def __init__(self, data: np.ndarray):
+        """Detections of one frame; postprocess.extract_boxes reads ``result.boxes.data``"""
+        self.boxes = Boxes(data)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy non-maximum suppression over xyxy boxes; returns kept indices by descending score"""
+    order = np.argsort(-scores)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        if len(keep) == MAX_DETECTIONS or order.size == 1:
+            break
+        rest = order[1:]
+        x1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def decode_predictions(prediction: np.ndarray, conf: float, iou_threshold: float) -> np.ndarray:
+    """Turn one image's YOLOv8 output (4 + classes, anchors) into an (N, 6) xyxy/conf/cls array"""
+    prediction = prediction.T  # (anchors, 4 + classes)
+    scores = prediction[:, 4:]
+    cls = scores.argmax(axis=1)
+    best = scores[np.arange(scores.shape[0]), cls]
+    keep = best >= conf
+    if not keep.any():
+        return np.zeros((0, 6), dtype=np.float32)
+
+    cxcywh, best, cls = prediction[keep, :4], best[keep], cls[keep]
+    xyxy = np.empty_like(cxcywh)
+    xyxy[:, :2] = cxcywh[:, :2] - cxcywh[:, 2:] / 2
+    xyxy[:, 2:] = cxcywh[:, :2] + cxcywh[:, 2:] / 2
+
+    kept = nms(xyxy + cls[:, None] * CLASS_OFFSET, best, iou_threshold)
+    return np.column_stack([xyxy[kept], best[kept], cls[kept]]).astype(np.float32)
+
+
+def scale_boxes(data: np.ndarray, ratio: float, pad: Tuple[float, float], shape: Tuple[int, int]) -> np.ndarray:
+    """Map letterboxed xyxy boxes back onto the original frame, in place"""
+    data[:, [0, 2]] = ((data[:, [0, 2]] - pad[0]) / ratio).clip(0, shape[1])
+    data[:, [1, 3]] = ((data[:, [1, 3]] - pad[1]) / ratio).clip(0, shape[0])
+    return data
+
+
+class UltralyticsBackend:
+    name = "ultralytics"
+
+    def __init__(self, model_path: str, threads: Optional[int] = None):
+        """Ultralytics YOLO on torch, on CUDA when available"""
+        import torch
+        from ultralytics import YOLO
+        self._torch = torch
+        if threads:
+            torch.set_num_threads(threads)
+        self.model = YOLO(model_path)
+        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.fixed_imgsz: Optional[int] = None
+        self.letterbox = Letterboxer()
+
+    def predict(self, frames: List[np.ndarray], imgsz: int, conf: float) -> List[Result]:
+        """Run one forward pass over the frames; returns one result per frame in frame pixels.
+
+        Frames are letterboxed into our reused input tensor and handed to
+        Ultralytics as a tensor (shared memory on CPU), which skips its own
+        per-call resize and normalize allocations.
+        """
+        tensor, scales = self.letterbox(frames, imgsz)
+        outputs = self.model(self._torch.from_numpy(tensor), conf=conf, verbose=False,
+                             imgsz=imgsz, device=self.device)
+        return [
+            Result(scale_boxes(output.boxes.data.cpu().numpy(), ratio, pad, frame.shape[:2]))
+            for frame, (ratio, pad), output in zip(frames, scales, outputs)
+        ]
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, model_path: str, providers: str = ONNX_PROVIDERS, threads: int = ONNX_THREADS,
+                 iou_threshold: float = NMS_IOU_THRESHOLD):
+        """YOLOv8 ONNX export on ONNX Runtime (CPU, or OpenVINO when that provider is installed)"""
+        import onnxruntime as ort
+
+        available = ort.get_available_providers()
+        if providers == "auto":
+            selected = [p for p in DEFAULT_PROVIDERS if p in available]
+        else:
+            selected = [p.strip() for p in providers.split(",") if p.strip() in available]
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=selected or ["CPUExecutionProvider"])
+        self.device = 'cpu'
+        self.letterbox = Letterboxer()
+        self.iou_threshold = iou_threshold
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch, _, height, _ = model_input.shape
+        # Static exports fix both the batch size and the input resolution
+        self.batched = not isinstance(batch, int) or batch > 1
+        self.fixed_imgsz = height if isinstance(height, int) else None
+        logger.info(f"🧠 ONNX Runtime providers: {', '.join(self.session.get_providers())} | "
+                    f"input: {model_input.shape}")
+
+    def predict(self, frames: List[np.ndarray], imgsz: int, conf: float) -> List[Result]:
+        """Letterbox, run and decode the frames; one batched run when the model allows it"""
+        tensor, scales = self.letterbox(frames, self.fixed_imgsz or imgsz)
+        if self.batched:
+            outputs = self.session.run(None, {self.input_name: tensor})[0]
+        else:
+            outputs = np.concatenate([
+                self.session.run(None, {self.input_name: tensor[i:i + 1]})[0] for i in range(len(frames))
+            ])
+
+        results = []
+        for frame, (ratio, pad), prediction in zip(frames, scales, outputs):
+            data = decode_predictions(prediction, conf, self.iou_threshold)
+            results.append(Result(scale_boxes(data, ratio, pad, frame.shape[:2])))
+        return results
+
+
+BACKENDS = {
+    UltralyticsBackend.name: UltralyticsBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def create_backend(model_path: str, backend: str = INFERENCE_BACKEND, threads: Optional[int] = None):
+    """Instantiate the inference backend named by ``backend``, or chosen from the model file when "auto".
+
+    ``threads`` overrides the backend's intra-op thread count, e.g. to match a
+    worker process's CPU affinity.
+    """
+    backend = backend.lower()
+    if backend == "auto":
+        backend = OnnxBackend.name if model_path.lower().endswith(".onnx") else UltralyticsBackend.name
+    try:
+        cls = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of: auto, {', '.join(BACKENDS)}")
+    if threads:
+        return cls(model_path, threads=threads)
+    return cls(model_path)
+
+
+def export_onnx(model_path: str, imgsz: int, dynamic: bool = True) -> str:
+    """Export Ultralytics weights to ONNX; a dynamic export allows batched inference"""
+    from ultralytics import YOLO
+    return YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=dynamic, simplify=True)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line ONNX export"""
+    parser = argparse.ArgumentParser(description="Inference backend utilities")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Export .pt weights to ONNX")
+    export.add_argument("model_path")
+    export.add_argument("--imgsz", type=int, default=416)
+    export.add_argument("--static", action="store_true", help="Fix batch size and resolution in the export")
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        logger.info(f"📦 Exported {export_onnx(args.model_path, args.imgsz, dynamic=not args.static)}")
+
+
+if __name__ == "__main__":
+    main()
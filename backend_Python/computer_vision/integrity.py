@@ -0,0 +1,209 @@
+"""
+Detection Integrity for Blind Spot Detection System
+Frame fingerprints, prepared-key HMAC signing of Kafka records and their verification
+
+With INTEGRITY_MODE "message" (default) every Kafka record carries one
+HMAC-SHA256 of its serialized value in the ``signature`` header, covering the
+whole batch exactly as it went over the wire in any serializer. Consumers
+check it with :func:`verify_record`. "detection" keeps the legacy truncated
+per-detection ``integrity_hmac`` field.
+
+Run ``python -m computer_vision.integrity`` for a micro-benchmark against the
+previous per-detection signing and MD5 frame hash.
+"""
+
+import hashlib
+import hmac
+import time
+from typing import Dict, Iterable, Optional, Tuple
+import sys
+import os
+import cv2
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import FRAME_HASH
+from .scheduler import SAMPLE_STRIDE, sample_frame
+
+try:
+    import xxhash
+except ImportError:  # optional dependency
+    xxhash = None
+
+# Kafka record header carrying the hex HMAC-SHA256 of the record value
+SIGNATURE_HEADER = "signature"
+# Hex characters kept by the legacy per-detection integrity_hmac and by frame_hash
+SHORT_DIGEST_CHARS = 16
+
+
+def load_key() -> bytes:
+    """The signing key from DETECTION_SECRET_KEY, read once per Signer"""
+    return os.environ.get('DETECTION_SECRET_KEY', 'default_key').encode()
+
+
+class Signer:
+    def __init__(self, key: Optional[bytes] = None):
+        """HMAC-SHA256 signer whose key schedule runs once.
+
+        Every signature starts from a copy of the prepared HMAC state instead
+        of re-reading the environment and re-keying per call.
+        """
+        self._prepared = hmac.new(load_key() if key is None else key, digestmod=hashlib.sha256)
+
+    def hexdigest(self, data: bytes) -> str:
+        """Hex HMAC-SHA256 of the data"""
+        mac = self._prepared.copy()
+        mac.update(data)
+        return mac.hexdigest()
+
+    def record_header(self, value: bytes) -> Tuple[str, bytes]:
+        """(name, value) Kafka header signing a serialized record"""
+        return SIGNATURE_HEADER, self.hexdigest(value).encode("ascii")
+
+    def verify_record(self, value: bytes, headers: Optional[Iterable[Tuple[str, bytes]]]) -> bool:
+        """True if the record's signature header matches its value"""
+        for name, signature in headers or ():
+            if name == SIGNATURE_HEADER:
+                return hmac.compare_digest(self.hexdigest(value).encode("ascii"), signature)
+        return False
+
+    @staticmethod
+    def _detection_message(detection: Dict) -> bytes:
+        return (f"{detection['object']}{detection['confidence']}{detection['camera_zone']}"
+                f"{detection['timestamp']}").encode()
+
+    def sign_detection(self, detection: Dict) -> str:
+        """Legacy truncated integrity_hmac over object, confidence, zone and the detection's timestamp"""
+        return self.hexdigest(self._detection_message(detection))[:SHORT_DIGEST_CHARS]
+
+    def verify_detection(self, detection: Dict) -> bool:
+        """True if the detection's integrity_hmac matches its fields"""
+        signature = detection.get("integrity_hmac")
+        return isinstance(signature, str) and hmac.compare_digest(self.sign_detection(detection), signature)
+
+
+def verify_record(value: bytes, headers: Optional[Iterable[Tuple[str, bytes]]],
+                  signer: Optional[Signer] = None) -> bool:
+    """Check a consumed Kafka record (``msg.value``, ``msg.headers``) against DETECTION_SECRET_KEY"""
+    return (signer or Signer()).verify_record(value, headers)
+
+
+def _blake2b(data) -> str:
+    return hashlib.blake2b(data, digest_size=SHORT_DIGEST_CHARS // 2).hexdigest()
+
+
+def _xxh3(data) -> str:
+    return xxhash.xxh3_64_hexdigest(data)
+
+
+def _md5(data) -> str:
+    return hashlib.md5(data).hexdigest()
+
+
+FRAME_HASHES = {
+    "blake2b": _blake2b,
+    "xxh3": _xxh3,
+    "md5": _md5,
+}
+
+
+class FrameHasher:
+    def __init__(self, algorithm: str = FRAME_HASH):
+        """Fingerprint of the downsampled frame through a reused contiguous scratch buffer.
+
+        "auto" uses xxh3 (non-cryptographic, roughly 20x faster than MD5 on a
+        640x480 sample) when the optional xxhash package is installed and MD5,
+        which keeps the original frame_hash values, otherwise.
+        """
+        algorithm = algorithm.lower()
+        if algorithm == "auto":
+            algorithm = "xxh3" if xxhash is not None else "md5"
+        if algorithm not in FRAME_HASHES:
+            raise ValueError(f"Unknown frame hash '{algorithm}', expected one of: auto, {', '.join(FRAME_HASHES)}")
+        if algorithm == "xxh3" and xxhash is None:
+            raise ImportError("xxhash is not installed: pip install xxhash")
+        self.algorithm = algorithm
+        self._hash = FRAME_HASHES[algorithm]
+        self._scratch: Dict = {}
+
+    def hexdigest(self, key, frame: np.ndarray) -> str:
+        """Hash of frame[::8, ::8], identical to hashing ``sample_frame(frame).tobytes()``"""
+        sample = sample_frame(frame)
+        scratch = self._scratch.get(key)
+        if scratch is None or scratch.shape != sample.shape or scratch.dtype != sample.dtype:
+            scratch = self._scratch[key] = np.empty(sample.shape, dtype=sample.dtype)
+        height, width = frame.shape[:2]
+        if height % SAMPLE_STRIDE == 0 and width % SAMPLE_STRIDE == 0 and frame.dtype == np.uint8:
+            # Exact integer scale: nearest-neighbour resize picks the same pixels
+            # as the strided view and gathers them several times faster
+            cv2.resize(frame, (sample.shape[1], sample.shape[0]), dst=scratch, interpolation=cv2.INTER_NEAREST)
+        else:
+            np.copyto(scratch, sample)
+        return self._hash(scratch.data)
+
+
+def _legacy_sign(detections, zone: str):
+    """Per-detection signing as multi_camera_detector did it before this module"""
+    for detection in detections:
+        secret_key = os.environ.get('DETECTION_SECRET_KEY', 'default_key')
+        message = f"{detection['object']}{detection['confidence']}{zone}{time.time()}"
+        detection["integrity_hmac"] = hmac.new(secret_key.encode(), message.encode(),
+                                               hashlib.sha256).hexdigest()[:16]
+
+
+def compare_integrity(boxes_per_zone=(1, 3, 10), iterations: int = 2000) -> Dict[str, Dict]:
+    """Mean cost per message of legacy vs prepared-key signing, and per frame of each frame hash"""
+    from .serialization import JsonSerializer, representative_message
+
+    signer = Signer()
+    serializer = JsonSerializer()
+    results: Dict[str, Dict] = {"signing": {}, "frame_hash": {}}
+    for boxes in boxes_per_zone:
+        message = representative_message(boxes)
+        value = serializer.serialize(message)
+        timings = {}
+        for name, sign in (
+            ("per_detection_legacy", lambda: _legacy_sign(message["detections"], "left")),
+            ("per_detection_prepared", lambda: [signer.sign_detection(d) for d in message["detections"]]),
+            ("per_message", lambda: signer.record_header(value)),
+        ):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                sign()
+            timings[name] = (time.perf_counter() - start) / iterations * 1e6
+        results["signing"][f"{len(message['detections'])}_boxes"] = timings
+
+    frame = np.random.RandomState(0).randint(0, 255, (480, 640, 3), dtype=np.uint8)
+
+    def legacy():
+        return hashlib.md5(sample_frame(frame).tobytes()).hexdigest()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        legacy()
+    results["frame_hash"]["md5_tobytes_legacy"] = (time.perf_counter() - start) / iterations * 1e6
+    for algorithm in FRAME_HASHES:
+        try:
+            hasher = FrameHasher(algorithm)
+        except ImportError:
+            continue
+        start = time.perf_counter()
+        for _ in range(iterations):
+            hasher.hexdigest(0, frame)
+        results["frame_hash"][algorithm] = (time.perf_counter() - start) / iterations * 1e6
+    return results
+
+
+def main():
+    """Print the integrity micro-benchmark"""
+    results = compare_integrity()
+    print(f"{'payload':<10} {'signing':<24} {'µs/message':>10}")
+    for payload, timings in results["signing"].items():
+        for name, us in timings.items():
+            print(f"{payload:<10} {name:<24} {us:>10.1f}")
+    print(f"\n{'frame hash (640x480)':<24} {'µs/frame':>10}")
+    for name, us in results["frame_hash"].items():
+        print(f"{name:<24} {us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
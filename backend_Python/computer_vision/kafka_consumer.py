@@ -0,0 +1,346 @@
+"""
+Kafka Consumer for Blind Spot Detection System
+Consumer-group reference reader for the partitioned detections topic
+
+The producer keys every record "<vehicle>:<zone>", and Kafka hashes the key
+to a partition, so one zone of one truck always lands on one partition. Each
+reader in a consumer group owns a share of the partitions, which means every
+zone is read in order by exactly one reader and the group scales out up to
+the partition count.
+
+``LocalBroker`` is an in-process stand-in with Kafka's murmur2 key hashing,
+group assignment and committed offsets. It is used by the scaling benchmark
+(run from backend_Python)::
+
+    python -m computer_vision.kafka_consumer --bench --partitions 6 --readers 1,2,3,6
+
+Without ``--bench`` the reader joins KAFKA_CONSUMER_GROUP on the configured
+broker and logs every record it reads.
+"""
+
+import argparse
+import collections
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import (CAMERA_CONFIG, KAFKA_CONSUMER_GROUP, KAFKA_HOST, KAFKA_PARTITIONS, KAFKA_PORT,
+                           KAFKA_TOPIC, INTEGRITY_MODE)
+from kafka.partitioner import murmur2
+from kafka.structs import TopicPartition
+from .integrity import Signer
+from .serialization import SERIALIZERS
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Same field names as kafka-python's ConsumerRecord and RecordMetadata
+Record = collections.namedtuple("Record", "topic partition offset timestamp key value headers")
+RecordMetadata = collections.namedtuple("RecordMetadata", "topic partition offset")
+
+
+def partition_for(key: Optional[bytes], partitions: int) -> int:
+    """Partition of a serialized key, computed like Kafka's default partitioner"""
+    if key is None:
+        return 0
+    return (murmur2(key) & 0x7FFFFFFF) % partitions
+
+
+class _Delivered:
+    def __init__(self, metadata: RecordMetadata):
+        """Already-completed send future of the local broker"""
+        self.metadata = metadata
+
+    def get(self, timeout: Optional[float] = None) -> RecordMetadata:
+        return self.metadata
+
+    def add_callback(self, callback: Callable, *args, **kwargs):
+        callback(*args, self.metadata, **kwargs)
+        return self
+
+    def add_errback(self, errback: Callable, *args, **kwargs):
+        return self
+
+
+class LocalBroker:
+    def __init__(self, partitions: int = KAFKA_PARTITIONS):
+        """In-process stand-in for a single-topic Kafka broker.
+
+        Implements the producer ``send``/``flush``/``close`` calls used by
+        DetectionKafkaProducer, so it can replace ``producer.producer``, and
+        hands out consumers that poll like kafka-python's KafkaConsumer.
+        Partitions are assigned round-robin over a group's members and
+        reassigned whenever a member joins or leaves.
+        """
+        self.partitions = partitions
+        self._logs: List[List[Record]] = [[] for _ in range(partitions)]
+        self._groups: Dict[str, List["LocalConsumer"]] = {}
+        self._committed: Dict[str, List[int]] = {}  # group -> next offset per partition
+        self._lock = threading.Lock()
+
+    def send(self, topic: str, value: bytes = None, key: Any = None, headers=None) -> _Delivered:
+        """Append a record to its key's partition; delivery completes immediately"""
+        if isinstance(key, str):
+            key = key.encode("utf-8")
+        partition = partition_for(key, self.partitions)
+        with self._lock:
+            log = self._logs[partition]
+            record = Record(topic, partition, len(log), int(time.time() * 1000), key, value, list(headers or ()))
+            log.append(record)
+        return _Delivered(RecordMetadata(topic, partition, record.offset))
+
+    def flush(self, timeout: Optional[float] = None):
+        pass
+
+    def close(self):
+        pass
+
+    def consumer(self, group_id: str = KAFKA_CONSUMER_GROUP) -> "LocalConsumer":
+        """Join a consumer group; the group's partitions are rebalanced over its members"""
+        consumer = LocalConsumer(self, group_id)
+        with self._lock:
+            self._committed.setdefault(group_id, [0] * self.partitions)
+            self._groups.setdefault(group_id, []).append(consumer)
+            self._rebalance(group_id)
+        return consumer
+
+    def _leave(self, consumer: "LocalConsumer"):
+        with self._lock:
+            members = self._groups.get(consumer.group_id, [])
+            if consumer in members:
+                members.remove(consumer)
+                self._rebalance(consumer.group_id)
+
+    def _rebalance(self, group_id: str):
+        members = self._groups[group_id]
+        for member in members:
+            member.assigned = []
+        for partition in range(self.partitions):
+            if members:
+                members[partition % len(members)].assigned.append(partition)
+
+    def _fetch(self, consumer: "LocalConsumer", max_records: int) -> Dict[TopicPartition, List[Record]]:
+        """Read from the consumer's partitions from the committed offsets, committing as it goes"""
+        batch: Dict[TopicPartition, List[Record]] = {}
+        with self._lock:
+            committed = self._committed[consumer.group_id]
+            for partition in consumer.assigned:
+                if max_records <= 0:
+                    break
+                start = committed[partition]
+                records = self._logs[partition][start:start + max_records]
+                if records:
+                    batch[TopicPartition(records[0].topic, partition)] = records
+                    committed[partition] = start + len(records)
+                    max_records -= len(records)
+        return batch
+
+    def lag(self, group_id: str = KAFKA_CONSUMER_GROUP) -> int:
+        """Records not yet read by the group"""
+        with self._lock:
+            committed = self._committed.get(group_id, [0] * self.partitions)
+            return sum(len(log) - offset for log, offset in zip(self._logs, committed))
+
+    def partition_sizes(self) -> List[int]:
+        with self._lock:
+            return [len(log) for log in self._logs]
+
+
+class LocalConsumer:
+    def __init__(self, broker: LocalBroker, group_id: str):
+        """Member of a LocalBroker consumer group"""
+        self.broker = broker
+        self.group_id = group_id
+        self.assigned: List[int] = []
+
+    def poll(self, timeout_ms: int = 0, max_records: int = 500) -> Dict[TopicPartition, List[Record]]:
+        """Next records of the assigned partitions, waiting up to timeout_ms for some to arrive"""
+        deadline = time.monotonic() + timeout_ms / 1000
+        while True:
+            batch = self.broker._fetch(self, max_records)
+            if batch or time.monotonic() >= deadline:
+                return batch
+            time.sleep(0.001)
+
+    def close(self):
+        self.broker._leave(self)
+
+
+class DetectionReader:
+    def __init__(self, consumer, handler: Optional[Callable[[Any, Dict], None]] = None,
+                 signer: Optional[Signer] = None):
+        """Read detection records from a consumer group member.
+
+        ``consumer`` is a kafka-python KafkaConsumer or a LocalConsumer. Each
+        record is decoded by its content-type header, checked against its
+        signature header when a signer is given, and passed to
+        ``handler(record, message)``. Records failing either check are counted
+        and skipped.
+        """
+        self.consumer = consumer
+        self.handler = handler
+        self.signer = signer
+        self._serializers: Dict[str, Any] = {}
+        self.records = 0
+        self.rejected = 0
+        self.per_partition: Dict[int, int] = collections.Counter()
+        self.out_of_order = 0
+        self._last_offset: Dict[int, int] = {}
+        self._stop_event = threading.Event()
+
+    def decode(self, record) -> Optional[Dict]:
+        """The record's message, or None if it is unsigned, tampered with or undecodable"""
+        headers = dict(record.headers or ())
+        if self.signer is not None and not self.signer.verify_record(record.value, record.headers):
+            return None
+        content_type = headers.get("content-type", b"application/json").decode("utf-8")
+        serializer = self._serializers.get(content_type)
+        if serializer is None:
+            for serializer_class in SERIALIZERS.values():
+                if serializer_class.content_type == content_type:
+                    serializer = self._serializers[content_type] = serializer_class()
+                    break
+            else:
+                return None
+        try:
+            return serializer.deserialize(record.value)
+        except Exception:
+            return None
+
+    def poll_once(self, timeout_ms: int = 100, max_records: int = 500) -> int:
+        """Handle one poll's worth of records; returns how many were read"""
+        count = 0
+        for records in self.consumer.poll(timeout_ms=timeout_ms, max_records=max_records).values():
+            for record in records:
+                count += 1
+                # Offsets only grow within a partition, so per-key order is preserved
+                if record.offset <= self._last_offset.get(record.partition, -1):
+                    self.out_of_order += 1
+                self._last_offset[record.partition] = record.offset
+                self.per_partition[record.partition] += 1
+                message = self.decode(record)
+                if message is None:
+                    self.rejected += 1
+                    continue
+                self.records += 1
+                if self.handler is not None:
+                    self.handler(record, message)
+        return count
+
+    def run(self, idle_timeout: Optional[float] = None):
+        """Read until stopped, or until nothing arrived for idle_timeout seconds"""
+        last_record = time.monotonic()
+        while not self._stop_event.is_set():
+            if self.poll_once():
+                last_record = time.monotonic()
+            elif idle_timeout is not None and time.monotonic() - last_record >= idle_timeout:
+                break
+
+    def stop(self):
+        self._stop_event.set()
+
+    def get_stats(self) -> Dict:
+        """Records read and rejected, per-partition counts and order violations"""
+        return {
+            "records": self.records,
+            "rejected": self.rejected,
+            "partitions": dict(self.per_partition),
+            "out_of_order": self.out_of_order,
+        }
+
+
+def run_scaling_benchmark(partitions: int = KAFKA_PARTITIONS, readers=(1, 2, 3, 6), vehicles: int = 4,
+                          cycles: int = 50, process_ms: float = 2.0) -> Dict[int, Dict]:
+    """Consume the same keyed workload with growing consumer groups on a LocalBroker.
+
+    ``vehicles`` producers publish ``cycles`` detection cycles for every zone
+    through DetectionKafkaProducer (so keys and signatures are the real ones);
+    each record then costs ``process_ms`` of downstream work. Throughput grows
+    with the group size until every partition has its own reader.
+    """
+    from .kafka_producer import DetectionKafkaProducer
+
+    zones = list(CAMERA_CONFIG)
+    results = {}
+    for group_size in readers:
+        broker = LocalBroker(partitions)
+        for vehicle in range(vehicles):
+            producer = DetectionKafkaProducer(vehicle_id=f"truck-{vehicle + 1}", key_mode="zone")
+            producer.producer, producer.is_running = broker, True
+            for cycle in range(cycles):
+                producer.send_cycle({
+                    zone: [{"object": "car", "camera_zone": zone, "confidence": 0.9, "cycle": cycle}]
+                    for zone in zones
+                })
+        total = sum(broker.partition_sizes())
+
+        group = [broker.consumer("bench") for _ in range(group_size)]
+        signer = Signer() if INTEGRITY_MODE == "message" else None
+        members = [DetectionReader(consumer, lambda record, message: time.sleep(process_ms / 1000), signer)
+                   for consumer in group]
+        threads = [threading.Thread(target=member.run, kwargs={"idle_timeout": 0.2}) for member in members]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # The readers idle for idle_timeout before exiting; that tail is not consumption time
+        elapsed = max(time.perf_counter() - start - 0.2, 1e-9)
+        for consumer in group:
+            consumer.close()
+
+        results[group_size] = {
+            "records": total,
+            "consumed": sum(member.records for member in members),
+            "seconds": elapsed,
+            "records_per_s": total / elapsed,
+            "partitions_used": sum(1 for size in broker.partition_sizes() if size),
+            "out_of_order": sum(member.out_of_order for member in members),
+        }
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run the reference reader against Kafka, or the consumer-group scaling benchmark"""
+    parser = argparse.ArgumentParser(description="Consumer-group reader for the detections topic")
+    parser.add_argument("--bench", action="store_true", help="Run the scaling benchmark on a local broker")
+    parser.add_argument("--partitions", type=int, default=KAFKA_PARTITIONS)
+    parser.add_argument("--readers", default="1,2,3,6", help="Consumer group sizes to compare")
+    parser.add_argument("--vehicles", type=int, default=4)
+    parser.add_argument("--cycles", type=int, default=50)
+    parser.add_argument("--process-ms", type=float, default=2.0, help="Simulated work per record")
+    parser.add_argument("--group", default=KAFKA_CONSUMER_GROUP)
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        readers = [int(size) for size in args.readers.split(",")]
+        results = run_scaling_benchmark(args.partitions, readers, args.vehicles, args.cycles, args.process_ms)
+        print(f"{'readers':>7} {'records':>8} {'seconds':>8} {'records/s':>10} {'partitions':>10}")
+        for size, stats in results.items():
+            print(f"{size:>7} {stats['records']:>8} {stats['seconds']:>8.2f} {stats['records_per_s']:>10.0f} "
+                  f"{stats['partitions_used']:>10}")
+        return
+
+    from kafka import KafkaConsumer
+    consumer = KafkaConsumer(KAFKA_TOPIC, bootstrap_servers=[f"{KAFKA_HOST}:{KAFKA_PORT}"],
+                             group_id=args.group, auto_offset_reset="latest", enable_auto_commit=True)
+    signer = Signer() if INTEGRITY_MODE == "message" else None
+    reader = DetectionReader(consumer, lambda record, message: logger.info(
+        f"📥 {record.key.decode() if record.key else '-'} p{record.partition}@{record.offset}: "
+        f"{len(message.get('detections', []))} detections"), signer)
+    logger.info(f"Reading {KAFKA_TOPIC} as group {args.group}")
+    try:
+        reader.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        consumer.close()
+        logger.info(f"Reader stopped: {reader.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,32 +3,100 @@ Kafka Producer for Blind Spot Detection System
 Sends detection results to Kafka topic in real-time
 """
 
-import json
+import functools
+import threading
 import time
-from kafka import KafkaProducer
+from kafka import KafkaProducer, KafkaAdminClient
+from kafka.admin import NewPartitions, NewTopic
 from kafka.errors import KafkaError
-from typing import List, Dict
+from typing import List, Dict, Optional
 import sys
 import os
 import ssl
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
-from shared.config import KAFKA_HOST, KAFKA_PORT, KAFKA_TOPIC
+from shared.config import (
+    KAFKA_HOST, KAFKA_PORT, KAFKA_TOPIC, KAFKA_ASYNC_SEND, KAFKA_MAX_IN_FLIGHT,
+    KAFKA_OVERFLOW_POLICY, KAFKA_LINGER_MS, KAFKA_MAX_BLOCK_MS, KAFKA_SEND_TIMEOUT, KAFKA_SERIALIZER,
+    INTEGRITY_MODE, VEHICLE_ID, KAFKA_PARTITION_KEY, KAFKA_IDEMPOTENCE, KAFKA_PROVISION_TOPIC,
+    KAFKA_PARTITIONS, KAFKA_REPLICATION_FACTOR, KAFKA_SPOOL_DIR, KAFKA_SPOOL_REPLAY_RATE,
+    KAFKA_STALL_TIMEOUT
+)
+from .serialization import get_serializer
+from .integrity import Signer
+from .spool import Spool, SpoolDrainer
+from .metrics import Histogram
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PARTITION_KEY_MODES = ("zone", "vehicle")
+
+
+def partition_key(vehicle_id: str = VEHICLE_ID, zone: Optional[str] = None) -> str:
+    """Record key: "<vehicle>:<zone>" for one zone's records, "<vehicle>" for whole-vehicle ones.
+
+    Kafka hashes the key to pick the partition, so every record of one zone
+    of one truck lands on the same partition and is consumed in order, while
+    different trucks and zones spread over all partitions.
+    """
+    return f"{vehicle_id}:{zone}" if zone else vehicle_id
+
+
+def provision_topic(bootstrap_servers: List[str], topic: str = KAFKA_TOPIC, partitions: int = KAFKA_PARTITIONS,
+                    replication_factor: int = KAFKA_REPLICATION_FACTOR, **client_config) -> int:
+    """Create the topic with ``partitions`` partitions, or grow an existing one to that many.
+
+    Partitions are never removed; an existing topic with more is left as is.
+    Returns the topic's partition count afterwards.
+    """
+    admin = KafkaAdminClient(bootstrap_servers=bootstrap_servers, client_id="safedetect-admin", **client_config)
+    try:
+        if topic not in admin.list_topics():
+            admin.create_topics([NewTopic(name=topic, num_partitions=partitions,
+                                          replication_factor=replication_factor)])
+            logger.info(f"Created topic {topic} with {partitions} partitions")
+            return partitions
+        current = len(admin.describe_topics([topic])[0]["partitions"])
+        if current < partitions:
+            # Existing keys may move to a new partition, so ordering restarts from here
+            admin.create_partitions({topic: NewPartitions(total_count=partitions)})
+            logger.info(f"Grew topic {topic} from {current} to {partitions} partitions")
+            return partitions
+        return current
+    finally:
+        admin.close()
+
 
 class DetectionKafkaProducer:
-    def __init__(self, host: str = KAFKA_HOST, port: int = KAFKA_PORT, topic: str = KAFKA_TOPIC):
+    def __init__(self, host: str = KAFKA_HOST, port: int = KAFKA_PORT, topic: str = KAFKA_TOPIC,
+                 serializer=None, latency=None, signer=None, vehicle_id: str = VEHICLE_ID,
+                 key_mode: str = KAFKA_PARTITION_KEY, spool_dir: str = KAFKA_SPOOL_DIR):
         """Initialize the Kafka producer"""
+        if key_mode not in PARTITION_KEY_MODES:
+            raise ValueError(f"Unknown KAFKA_PARTITION_KEY '{key_mode}', expected one of: "
+                             f"{', '.join(PARTITION_KEY_MODES)}")
         self.host = host
         self.port = port
         self.topic = topic
+        # Records are keyed per vehicle and zone so downstream consumers can scale out by partition
+        self.vehicle_id = vehicle_id
+        self.key_mode = key_mode
         self.producer = None
         self.is_running = False
 
+        # Wire format: JSON by default; the content-type header tells consumers which one
+        self.serializer = serializer or get_serializer(KAFKA_SERIALIZER)
+        self._headers = [("content-type", self.serializer.content_type.encode("utf-8"))]
+        # One HMAC per record over the serialized value, in the "signature" header
+        if signer is None and INTEGRITY_MODE == "message":
+            signer = Signer()
+        self.signer = signer
+
+        # Optional LatencyRecorder fed with serialize-to-ack and end-to-end times
+        self.latency = latency
+
         # Security configuration from environment
         self.security_protocol = os.environ.get('KAFKA_SECURITY_PROTOCOL', 'PLAINTEXT')
         self.sasl_mechanism = os.environ.get('KAFKA_SASL_MECHANISM', 'PLAIN')
@@ -38,6 +106,32 @@ class DetectionKafkaProducer:
         self.ssl_certfile = os.environ.get('KAFKA_SSL_CERTFILE')
         self.ssl_keyfile = os.environ.get('KAFKA_SSL_KEYFILE')
 
+        # Asynchronous publishing: delivery callbacks instead of blocking on every ack
+        self.async_send = KAFKA_ASYNC_SEND
+        self.max_in_flight = KAFKA_MAX_IN_FLIGHT
+        self.overflow_policy = KAFKA_OVERFLOW_POLICY  # "drop" or "block"
+        self.send_timeout = KAFKA_SEND_TIMEOUT
+        # A full window whose oldest record has waited this long for its ack is an outage, not backpressure
+        self.stall_timeout = KAFKA_STALL_TIMEOUT
+        self._in_flight_cond = threading.Condition()
+        self.in_flight = 0
+        self._slots: Dict[int, float] = {}  # in-flight slot -> monotonic send time, oldest first
+        self._next_slot = 0
+        self.sent_count = 0
+        self.acked_count = 0
+        self.failed_count = 0
+        self.dropped_count = 0
+        # Send-to-ack time, observed on whichever thread completes the send (see metrics.py)
+        self.ack_seconds = Histogram()
+
+        # Records Kafka could not take go to a disk spool, replayed in the background once it recovers
+        self.spool_dir = spool_dir
+        self.spool = None
+        self.drainer = None
+        self.spooled_count = 0
+        # KafkaProducer settings, kept to reconnect when the broker was down at startup
+        self._producer_config = None
+
     def start_producer(self):
         """Start the Kafka producer"""
         if self.is_running:
@@ -61,25 +155,242 @@ class DetectionKafkaProducer:
             if self.ssl_keyfile:
                 security_config['ssl_keyfile'] = self.ssl_keyfile
 
+        bootstrap_servers = [f"{self.host}:{self.port}"]
+        if KAFKA_PROVISION_TOPIC:
+            try:
+                provision_topic(bootstrap_servers, self.topic, **security_config)
+            except Exception as e:
+                # The broker may still auto-create the topic; publishing works either way
+                logger.warning(f"Could not provision topic {self.topic}: {e}")
+
+        # In async mode send() must never stall the caller on metadata or a full buffer
+        if self.async_send:
+            security_config['max_block_ms'] = KAFKA_MAX_BLOCK_MS
+
+        self._producer_config = dict(
+            bootstrap_servers=bootstrap_servers,
+            key_serializer=lambda k: k.encode('utf-8') if k else None,
+            acks='all',
+            retries=3,
+            linger_ms=KAFKA_LINGER_MS,
+            # Idempotence keeps retried batches in order with up to 5 requests in flight;
+            # without it only one in-flight request per connection preserves per-key order
+            enable_idempotence=KAFKA_IDEMPOTENCE,
+            max_in_flight_requests_per_connection=5 if KAFKA_IDEMPOTENCE else 1,
+            **security_config
+        )
+
+        # The spool opens first: a broker that is down at startup is the outage it exists for
+        if self.spool_dir:
+            try:
+                self.spool = Spool(self.spool_dir)
+            except OSError as e:
+                logger.error(f"Error opening Kafka spool {self.spool_dir}, failed records will be dropped: {e}")
+                self.spool = None
+
+        try:
+            self.producer = KafkaProducer(**self._producer_config)
+        except Exception as e:
+            if self.spool is None:
+                logger.error(f"Error starting Kafka producer: {e}")
+                raise
+            # Keep running: records go to the spool and the drainer reconnects once the broker is back
+            logger.warning(f"Kafka broker {self.host}:{self.port} unreachable, spooling records until it is back: {e}")
+
+        self.is_running = True
+        if self.spool is not None:
+            self.drainer = SpoolDrainer(self.spool, self._replay, KAFKA_SPOOL_REPLAY_RATE, self._broker_reachable)
+            self.drainer.start()
+        if self.producer is not None:
+            self._log_started()
+
+    def _log_started(self):
+        mode = f"async, max in-flight {self.max_in_flight}" if self.async_send else "sync"
+        mode += f", {self.serializer.name}, key per {self.key_mode}"
+        if KAFKA_IDEMPOTENCE:
+            mode += ", idempotent"
+        logger.info(f"Kafka producer started on {self.host}:{self.port}, topic: {self.topic} ({mode})")
+
+    def _connect(self) -> bool:
+        """Create the KafkaProducer a failed startup left out; False while the broker is still down"""
+        try:
+            producer = KafkaProducer(**self._producer_config)
+        except Exception as e:
+            logger.debug(f"Kafka broker still unreachable: {e}")
+            return False
+        if not self.is_running:
+            # Stopped while connecting
+            producer.close()
+            return False
+        self.producer = producer
+        self._log_started()
+        return True
+
+    def _broker_reachable(self) -> bool:
+        """Cheap check the drainer makes before replaying; reconnects a producer that never started"""
+        producer = self.producer
+        if producer is None:
+            return self.is_running and self._connect()
+        return producer.bootstrap_connected()
+
+    def _replay(self, key: Optional[bytes], value: bytes, headers: List):
+        """Publish one spooled record and wait for its ack (drainer thread only)"""
+        future = self.producer.send(self.topic, value=value, key=key.decode("utf-8") if key else None,
+                                    headers=headers)
+        future.get(timeout=self.send_timeout)
+
+    def _spool(self, key: Optional[str], value: bytes, headers: List) -> bool:
+        """Keep a record Kafka could not take; False if there is no spool to keep it in"""
+        if self.spool is None:
+            return False
+        if not self.spool.append(key.encode("utf-8") if key else None, value, headers):
+            return False
+        self.spooled_count += 1
+        return True
+
+    def _reserve_slot(self) -> Optional[int]:
+        """Claim an in-flight slot, applying the overflow policy when the limit is reached; None if full"""
+        with self._in_flight_cond:
+            if self.in_flight >= self.max_in_flight:
+                if self.overflow_policy != "block" or not self._in_flight_cond.wait_for(
+                    lambda: self.in_flight < self.max_in_flight, timeout=self.send_timeout
+                ):
+                    return None
+            self.in_flight += 1
+            self._next_slot += 1
+            self._slots[self._next_slot] = time.monotonic()
+            return self._next_slot
+
+    def _release_slot(self, slot: int, acked: bool):
+        """Return an in-flight slot and wake a sender waiting under the block policy"""
+        with self._in_flight_cond:
+            self.in_flight -= 1
+            self._slots.pop(slot, None)
+            if acked:
+                self.acked_count += 1
+            else:
+                self.failed_count += 1
+            self._in_flight_cond.notify()
+
+    def _window_stalled(self) -> bool:
+        """Whether a full window means the broker went away rather than backpressure.
+
+        kafka-python keeps accepting sends on cached metadata after the broker
+        is gone, and those records only fail after its delivery timeout, so a
+        full window is an outage when the broker connection is down or the
+        oldest record has waited ``stall_timeout`` for its ack.
+        """
+        with self._in_flight_cond:
+            oldest = next(iter(self._slots.values()), None)
+        if oldest is not None and time.monotonic() - oldest >= self.stall_timeout:
+            return True
+        try:
+            return not self.producer.bootstrap_connected()
+        except Exception:
+            return True
+
+    def _record_delivery(self, timing: Optional[Dict]):
+        """Close the per-zone latency measurement of an acknowledged message"""
+        if timing and self.latency is not None:
+            ack = time.time()
+            for zone, zone_timing in timing.items():
+                self.latency.record_delivery(zone, zone_timing, ack)
+
+    def _on_send_success(self, record_metadata, slot: int, timing: Optional[Dict] = None,
+                         sent_at: Optional[float] = None):
+        """Delivery callback, runs on the Kafka I/O thread"""
+        self._release_slot(slot, acked=True)
+        if sent_at is not None:
+            self.ack_seconds.observe(time.monotonic() - sent_at)
+        self._record_delivery(timing)
+        logger.debug(f"Message sent to {record_metadata.topic} partition {record_metadata.partition} "
+                     f"offset {record_metadata.offset}")
+
+    def _on_send_error(self, exc, slot: int, record: Optional[tuple] = None):
+        """Delivery errback, runs on the Kafka I/O thread; the failed record goes to the spool"""
+        self._release_slot(slot, acked=False)
+        if record is not None and self._spool(*record):
+            logger.warning(f"Kafka delivery failed, record spooled: {exc}")
+            return
+        logger.error(f"Error delivering message to Kafka: {exc}")
+
+    def _send(self, message: Dict, key: Optional[str] = None, timing: Optional[Dict] = None) -> bool:
+        """Publish one message; returns False if it was dropped or failed immediately.
+
+        ``timing`` maps zone -> stage stamps already referenced by the message;
+        the serialize stamp is added here and the ack closes the measurement.
+        """
+        if timing:
+            now = time.time()
+            for zone_timing in timing.values():
+                zone_timing["serialize"] = now
+        value = self.serializer.serialize(message)
+        headers = self._headers
+        if self.signer is not None:
+            headers = headers + [self.signer.record_header(value)]
+        if self.producer is None:
+            # Broker down since startup: everything waits in the spool for the drainer
+            if self._spool(key, value, headers):
+                return False
+            raise RuntimeError("Kafka producer is not connected")
+        if not self.async_send:
+            try:
+                sent_at = time.monotonic()
+                future = self.producer.send(self.topic, value=value, key=key, headers=headers)
+                record_metadata = future.get(timeout=self.send_timeout)
+                self.ack_seconds.observe(time.monotonic() - sent_at)
+            except Exception as e:
+                if self._spool(key, value, headers):
+                    logger.warning(f"Kafka send failed, record spooled: {e}")
+                    return False
+                raise
+            self.sent_count += 1
+            self.acked_count += 1
+            self._record_delivery(timing)
+            logger.debug(f"Message sent to {record_metadata.topic} partition {record_metadata.partition} "
+                         f"offset {record_metadata.offset}")
+            return True
+
+        slot = self._reserve_slot()
+        if slot is None:
+            # Backpressure from a healthy broker: the overflow policy applies and nothing is
+            # spooled, so replay never lands behind newer records. A broker gone mid-run fills
+            # the window too; those records go to the spool instead of being dropped
+            if self._window_stalled() and self._spool(key, value, headers):
+                logger.debug(f"Kafka in-flight limit ({self.max_in_flight}) reached with the broker "
+                             f"unresponsive, record spooled")
+                return False
+            self.dropped_count += 1
+            logger.debug(f"Kafka in-flight limit ({self.max_in_flight}) reached, message dropped")
+            return False
+
         try:
-            self.producer = KafkaProducer(
-                bootstrap_servers=[f"{self.host}:{self.port}"],
-                value_serializer=lambda v: json.dumps(v).encode('utf-8'),
-                key_serializer=lambda k: k.encode('utf-8') if k else None,
-                acks='all',
-                retries=3,
-                linger_ms=5,
-                **security_config
-            )
-            self.is_running = True
-            logger.info(f"Kafka producer started on {self.host}:{self.port}, topic: {self.topic}")
+            sent_at = time.monotonic()
+            future = self.producer.send(self.topic, value=value, key=key, headers=headers)
         except Exception as e:
-            logger.error(f"Error starting Kafka producer: {e}")
+            # Typically no broker metadata within KAFKA_MAX_BLOCK_MS: the broker is unreachable
+            self._release_slot(slot, acked=False)
+            if self._spool(key, value, headers):
+                logger.debug(f"Kafka send failed, record spooled: {e}")
+                return False
             raise
 
-    def send_detections(self, detections: List[Dict], key: str = None):
+        self.sent_count += 1
+        future.add_callback(functools.partial(self._on_send_success, slot=slot, timing=timing, sent_at=sent_at))
+        future.add_errback(functools.partial(self._on_send_error, slot=slot, record=(key, value, headers)))
+        return True
+
+    def _key_for(self, detections: List[Dict]) -> str:
+        """Default key of a detections record: its zone's key when it holds a single zone"""
+        if self.key_mode == "zone":
+            zones = {detection.get("camera_zone") for detection in detections}
+            if len(zones) == 1:
+                return partition_key(self.vehicle_id, zones.pop())
+        return partition_key(self.vehicle_id)
+
+    def send_detections(self, detections: List[Dict], key: str = None, timing: Optional[Dict] = None):
         """Send detection results to Kafka topic"""
-        if not self.is_running or not self.producer:
+        if not self.is_running:
             logger.warning("Producer not running, cannot send detections")
             return
 
@@ -87,26 +398,38 @@ class DetectionKafkaProducer:
             return
 
         try:
-           
             message = {
                 "type": "detections",
                 "timestamp": time.time(),
+                "vehicle_id": self.vehicle_id,
                 "detections": detections
             }
-
-          
-            future = self.producer.send(self.topic, value=message, key=key)
-
-            
-            record_metadata = future.get(timeout=10)
-            logger.debug(f"Message sent to {record_metadata.topic} partition {record_metadata.partition} offset {record_metadata.offset}")
+            if timing:
+                message["timing"] = timing
+            self._send(message, key or self._key_for(detections), timing)
 
         except Exception as e:
             logger.error(f"Error sending detections to Kafka: {e}")
 
-    def send_status(self, status: Dict, key: str = "status"):
+    def send_cycle(self, zone_detections: Dict[str, List[Dict]], key: str = None,
+                   timing: Optional[Dict] = None):
+        """Send one detection cycle with per-zone stage timestamps.
+
+        Keyed per zone, each zone with detections becomes its own record on its
+        zone's partition; keyed per vehicle, the zones share one record.
+        """
+        if self.key_mode == "zone" and key is None:
+            for zone, detections in zone_detections.items():
+                if detections:
+                    zone_timing = {zone: timing[zone]} if timing and zone in timing else None
+                    self.send_detections(detections, partition_key(self.vehicle_id, zone), zone_timing)
+            return
+        detections = [detection for zone_list in zone_detections.values() for detection in zone_list]
+        self.send_detections(detections, key, timing)
+
+    def send_status(self, status: Dict, key: str = None):
         """Send system status to Kafka topic"""
-        if not self.is_running or not self.producer:
+        if not self.is_running:
             logger.warning("Producer not running, cannot send status")
             return
 
@@ -114,12 +437,10 @@ class DetectionKafkaProducer:
             message = {
                 "type": "status",
                 "timestamp": time.time(),
+                "vehicle_id": self.vehicle_id,
                 "status": status
             }
-
-            future = self.producer.send(self.topic, value=message, key=key)
-            record_metadata = future.get(timeout=10)
-            logger.debug(f"Status sent to {record_metadata.topic} partition {record_metadata.partition} offset {record_metadata.offset}")
+            self._send(message, key or partition_key(self.vehicle_id, "status"))
 
         except Exception as e:
             logger.error(f"Error sending status to Kafka: {e}")
@@ -131,10 +452,22 @@ class DetectionKafkaProducer:
 
         logger.info("Stopping Kafka producer...")
         self.is_running = False
+        if self.drainer is not None:
+            self.drainer.stop()
+            self.drainer = None
 
         if self.producer:
+            # Deliver whatever is still in flight before closing
+            try:
+                self.producer.flush(timeout=self.send_timeout)
+            except Exception as e:
+                logger.error(f"Error flushing Kafka producer: {e}")
             self.producer.close()
             self.producer = None
+        # Closed last: records failing during the flush still land in it
+        if self.spool is not None:
+            self.spool.close()
+            self.spool = None
 
         logger.info("Kafka producer stopped")
 
@@ -144,7 +477,20 @@ class DetectionKafkaProducer:
             "is_running": self.is_running,
             "host": self.host,
             "port": self.port,
-            "topic": self.topic
+            "topic": self.topic,
+            "vehicle_id": self.vehicle_id,
+            "key_mode": self.key_mode,
+            "serializer": self.serializer.name,
+            "async_send": self.async_send,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "overflow_policy": self.overflow_policy,
+            "sent": self.sent_count,
+            "acked": self.acked_count,
+            "failed": self.failed_count,
+            "dropped": self.dropped_count,
+            "spooled": self.spooled_count,
+            "spool": self.spool.get_stats() if self.spool is not None else None
         }
 
 
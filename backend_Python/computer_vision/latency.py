@@ -0,0 +1,104 @@
+"""
+End-to-End Latency Instrumentation for Blind Spot Detection System
+Per-stage timestamps aggregated into rolling p50/p95/p99 per camera zone
+
+Every detection message carries a ``timing`` dict per zone with wall-clock
+stamps (seconds since epoch) for the stages it went through::
+
+    capture      frame returned by the camera reader
+    infer_start  model call started
+    infer_end    model call returned
+    postprocess  box arrays filtered and positioned
+    serialize    message handed to the Kafka serializer
+
+The broker ack time is only known locally and closes the measurement.
+"""
+
+import threading
+from collections import deque
+from typing import Dict, Optional
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import LATENCY_WINDOW
+
+# (stage name, start stamp, end stamp) measured before the message leaves the process
+LOCAL_STAGES = (
+    ("queue", "capture", "infer_start"),
+    ("inference", "infer_start", "infer_end"),
+    ("postprocess", "infer_end", "postprocess"),
+)
+# Measured once the broker has acknowledged the message
+DELIVERY_STAGES = (
+    ("publish_wait", "postprocess", "serialize"),
+    ("kafka_ack", "serialize", "ack"),
+    ("end_to_end", "capture", "ack"),
+)
+PERCENTILES = (50, 95, 99)
+
+
+class RollingHistogram:
+    def __init__(self, window: int = LATENCY_WINDOW):
+        """Keep the last ``window`` samples (milliseconds) for percentile queries"""
+        self._samples = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, ms: float):
+        """Add one sample; deque appends are safe without a lock"""
+        self._samples.append(ms)
+        self.count += 1
+
+    def get_stats(self) -> Dict:
+        """Get count and p50/p95/p99 over the current window"""
+        samples = np.fromiter(tuple(self._samples), dtype=np.float64)
+        stats = {"count": self.count}
+        if samples.size == 0:
+            stats.update({f"p{p}": None for p in PERCENTILES})
+            return stats
+        for p, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES)):
+            stats[f"p{p}"] = float(value)
+        return stats
+
+
+class LatencyRecorder:
+    def __init__(self, window: int = LATENCY_WINDOW):
+        """Rolling latency histograms keyed by camera zone and stage"""
+        self.window = window
+        self._histograms: Dict[str, Dict[str, RollingHistogram]] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, zone: str, stage: str) -> RollingHistogram:
+        zone_histograms = self._histograms.get(zone)
+        if zone_histograms is None or stage not in zone_histograms:
+            with self._lock:
+                zone_histograms = self._histograms.setdefault(zone, {})
+                zone_histograms.setdefault(stage, RollingHistogram(self.window))
+        return zone_histograms[stage]
+
+    def record(self, zone: str, stage: str, seconds: float):
+        """Record one stage duration"""
+        self._histogram(zone, stage).record(seconds * 1000)
+
+    def _record_stages(self, zone: str, timing: Dict, stages):
+        for stage, start, end in stages:
+            if start in timing and end in timing:
+                self.record(zone, stage, timing[end] - timing[start])
+
+    def record_local(self, zone: str, timing: Dict):
+        """Record capture-to-postprocess stages for one zone's cycle"""
+        self._record_stages(zone, timing, LOCAL_STAGES)
+
+    def record_delivery(self, zone: str, timing: Dict, ack: float):
+        """Record serialization-to-ack and end-to-end latency once the broker acked"""
+        self._record_stages(zone, dict(timing, ack=ack), DELIVERY_STAGES)
+
+    def get_stats(self, zone: Optional[str] = None) -> Dict:
+        """Get {zone: {stage: {count, p50, p95, p99}}}, or one zone's stages"""
+        with self._lock:
+            zones = {z: dict(h) for z, h in self._histograms.items()}
+        stats = {
+            z: {stage: histogram.get_stats() for stage, histogram in histograms.items()}
+            for z, histograms in zones.items()
+        }
+        return stats.get(zone, {}) if zone is not None else stats
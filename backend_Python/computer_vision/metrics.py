@@ -0,0 +1,297 @@
+"""
+Metrics Endpoint for Blind Spot Detection System
+Prometheus text-format metrics served over HTTP with the standard library only
+
+The hot path only touches plain counters: a ``Histogram`` is a list of bucket
+counts and a sum, bumped by the one thread that owns the series (the
+inference thread for per-camera inference time and boxes, the Kafka I/O
+thread for acks), so observing never takes a lock. Everything else (capture
+counters, queue depths, Kafka totals, camera status, process RSS and CPU) is
+read from the components' existing stats when a scrape arrives, on the
+server's own thread. A scrape may see a histogram's sum one sample ahead of
+its buckets, which Prometheus tolerates.
+"""
+
+import bisect
+import os
+import resource
+import threading
+import time
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import METRICS_HOST, METRICS_PORT
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "safedetect_"
+# Seconds; spans a fast GPU forward pass up to a stalled broker ack
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5, 5.0)
+BOX_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 20, 50)
+
+# One metric family at scrape time. ``samples`` holds (labels, value) pairs, and
+# for histograms (labels, Histogram) pairs.
+Metric = namedtuple("Metric", "name type help samples")
+_PROCESS_START = time.time()
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        """Cumulative-on-read histogram; observe() is lock-free for a single writer thread"""
+        self.bounds = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def snapshot(self):
+        """(cumulative counts per bound then +Inf, sum, count)"""
+        counts = list(self.counts)
+        cumulative, total = [], 0
+        for count in counts:
+            total += count
+            cumulative.append(total)
+        return cumulative, self.sum, total
+
+
+class HistogramFamily:
+    def __init__(self, name: str, help: str, label: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        """Histograms of one metric keyed by a single label value (e.g. camera)"""
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = buckets
+        self.children: Dict[str, Histogram] = {}
+
+    def labels(self, value) -> Histogram:
+        """The series for one label value; created on first use"""
+        key = str(value)
+        child = self.children.get(key)
+        if child is None:
+            child = self.children.setdefault(key, Histogram(self.buckets))
+        return child
+
+    def collect(self) -> Metric:
+        return Metric(self.name, "histogram", self.help,
+                      [({self.label: key}, child) for key, child in list(self.children.items())])
+
+
+class DetectionMetrics:
+    def __init__(self):
+        """Hot-path histograms the detector feeds per camera"""
+        self.inference_seconds = HistogramFamily(
+            PREFIX + "inference_seconds", "Model inference time per camera frame", "camera")
+        self.boxes_per_frame = HistogramFamily(
+            PREFIX + "boxes_per_frame", "Detected boxes per inferred frame after class filtering", "camera",
+            BOX_BUCKETS)
+
+    def observe_camera(self, camera_id, stamps: Optional[Dict], boxes: int):
+        """Record one freshly inferred frame of a camera"""
+        if stamps and "infer_start" in stamps and "infer_end" in stamps:
+            self.inference_seconds.labels(camera_id).observe(stamps["infer_end"] - stamps["infer_start"])
+        self.boxes_per_frame.labels(camera_id).observe(boxes)
+
+    def collect(self) -> List[Metric]:
+        return [self.inference_seconds.collect(), self.boxes_per_frame.collect()]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict, extra: Optional[Dict] = None) -> str:
+    items = dict(labels, **extra) if extra else labels
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items.items()) + "}"
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(metrics: Iterable[Metric]) -> str:
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for metric in metrics:
+        if not metric.samples:
+            continue
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for labels, value in metric.samples:
+            if metric.type != "histogram":
+                lines.append(f"{metric.name}{_labels(labels)} {_number(value)}")
+                continue
+            cumulative, total, count = value.snapshot()
+            for bound, bucket_count in zip(value.bounds + (float("inf"),), cumulative):
+                lines.append(f"{metric.name}_bucket{_labels(labels, {'le': _number(bound)})} {bucket_count}")
+            lines.append(f"{metric.name}_sum{_labels(labels)} {_number(float(total))}")
+            lines.append(f"{metric.name}_count{_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def process_metrics() -> List[Metric]:
+    """Resident memory, CPU time, threads and start time of this process"""
+    rss = None
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current RSS, in KiB on Linux and bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return [
+        Metric("process_resident_memory_bytes", "gauge", "Resident memory size in bytes", [({}, rss)]),
+        Metric("process_cpu_seconds_total", "counter", "User and system CPU time spent in seconds",
+               [({}, time.process_time())]),
+        Metric("process_threads", "gauge", "Python threads in the process", [({}, threading.active_count())]),
+        Metric("process_start_time_seconds", "gauge", "Start time of the process since unix epoch in seconds",
+               [({}, _PROCESS_START)]),
+    ]
+
+
+class _RateTracker:
+    def __init__(self):
+        """Per-key rate between consecutive scrapes, e.g. capture FPS from a frame counter"""
+        self._last: Dict = {}
+        self._rates: Dict = {}
+        self._lock = threading.Lock()
+
+    def rate(self, key, total: int, now: float) -> float:
+        with self._lock:
+            last = self._last.get(key)
+            self._last[key] = (now, total)
+            if last is not None and now > last[0]:
+                self._rates[key] = max(0.0, (total - last[1]) / (now - last[0]))
+            return self._rates.get(key, 0.0)
+
+
+def detector_collector(detector) -> Callable[[], List[Metric]]:
+    """Scrape-time metrics of a MultiCameraDetector and its producer, server and alert engine"""
+    fps = _RateTracker()
+
+    def collect() -> List[Metric]:
+        now = time.time()
+        metrics = list(detector.metrics.collect())
+
+        camera_status = detector.get_camera_status()
+        metrics.append(Metric(PREFIX + "camera_status", "gauge", "Camera status per zone (1 for the current status)",
+                              [({"zone": zone, "status": info["status"]}, 1)
+                               for zone, info in camera_status.items()]))
+        reconnects = detector.get_supervisor_stats()
+        metrics.append(Metric(PREFIX + "camera_reconnects_total", "counter", "Camera reconnects per source",
+                              [({"camera": camera_id}, stats["reconnects"])
+                               for camera_id, stats in reconnects.items()]))
+
+        capture = detector.get_capture_stats()
+        metrics += [
+            Metric(PREFIX + "capture_frames_total", "counter", "Frames read per camera source",
+                   [({"camera": camera_id}, stats["frames"]) for camera_id, stats in capture.items()]),
+            Metric(PREFIX + "capture_fps", "gauge", "Frames read per second per camera source since the last scrape",
+                   [({"camera": camera_id}, fps.rate(camera_id, stats["frames"], now))
+                    for camera_id, stats in capture.items()]),
+            Metric(PREFIX + "capture_dropped_frames_total", "counter", "Frames overwritten before being processed",
+                   [({"camera": camera_id}, stats["dropped"]) for camera_id, stats in capture.items()]),
+            Metric(PREFIX + "capture_read_failures_total", "counter", "Failed frame reads per camera source",
+                   [({"camera": camera_id}, stats["read_failures"]) for camera_id, stats in capture.items()]),
+            Metric(PREFIX + "capture_pickup_age_seconds", "gauge", "Age of the last frame when the detector took it",
+                   [({"camera": camera_id}, stats["pickup_age_ms"] / 1000) for camera_id, stats in capture.items()]),
+        ]
+
+        depths, dropped = [], []
+        pipeline = detector.get_pipeline_stats()
+        for name, queue in pipeline.get("queues", {}).items():
+            depths.append(({"queue": name}, queue["depth"]))
+            dropped.append(({"queue": name}, queue["dropped"]))
+
+        producer = detector.kafka_producer
+        status = producer.get_status() if producer is not None else None
+        if isinstance(status, dict):
+            metrics.append(Metric(PREFIX + "kafka_records_total", "counter", "Kafka records by outcome",
+                                  [({"outcome": outcome}, status[outcome])
+                                   for outcome in ("sent", "acked", "failed", "dropped", "spooled")]))
+            depths.append(({"queue": "kafka_in_flight"}, status["in_flight"]))
+            if status.get("spool"):
+                depths.append(({"queue": "kafka_spool"}, status["spool"]["pending"]))
+            ack = getattr(producer, "ack_seconds", None)
+            if isinstance(ack, Histogram):
+                metrics.append(Metric(PREFIX + "kafka_send_seconds", "histogram",
+                                      "Time from handing a record to the Kafka client to its ack", [({}, ack)]))
+
+        websocket_server = detector.websocket_server
+        if websocket_server is not None:
+            clients = websocket_server.get_status()["clients"]
+            depths += [({"queue": f"websocket:{address}"}, client["queued"]) for address, client in clients.items()]
+            metrics.append(Metric(PREFIX + "websocket_clients", "gauge", "Connected in-cab WebSocket clients",
+                                  [({}, len(clients))]))
+
+        metrics += [
+            Metric(PREFIX + "queue_depth", "gauge", "Items waiting per queue", depths),
+            Metric(PREFIX + "queue_dropped_total", "counter", "Items dropped by drop-oldest pipeline queues", dropped),
+        ]
+        if detector.alerts is not None:
+            zones = detector.alerts.get_stats()["zones"]
+            metrics.append(Metric(PREFIX + "alert_active", "gauge", "1 while a zone is in blind spot alert",
+                                  [({"zone": zone}, int(state == "alert")) for zone, state in zones.items()]))
+        return metrics
+
+    return collect
+
+
+class MetricsServer(threading.Thread):
+    def __init__(self, collectors: Sequence[Callable[[], List[Metric]]] = (), host: str = METRICS_HOST,
+                 port: int = METRICS_PORT):
+        """Serve GET /metrics from the given collectors (plus process metrics); binds immediately"""
+        super().__init__(name="metrics-server", daemon=True)
+        self.collectors = list(collectors) + [process_metrics]
+        self.scrapes = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = server.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # one line per scrape would drown the detector's logs
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.host, self.port = self.httpd.server_address[:2]
+
+    def render(self) -> str:
+        """Collect every family now and format them"""
+        self.scrapes += 1
+        metrics = []
+        for collect in self.collectors:
+            try:
+                metrics += collect()
+            except Exception as e:
+                logger.error(f"❌ Error collecting metrics: {e}")
+        return render(metrics)
+
+    def run(self):
+        logger.info(f"📈 Metrics endpoint on http://{self.host}:{self.port}/metrics")
+        self.httpd.serve_forever(poll_interval=0.5)
+
+    def stop(self, timeout: float = 2.0):
+        if self.is_alive():
+            self.httpd.shutdown()
+            self.join(timeout)
+        self.httpd.server_close()
@@ -5,20 +5,36 @@ Supports multiple camera feeds for comprehensive blind spot monitoring
 
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import time
 import asyncio
 import json
+import threading
 import sys
 import os
-import hashlib
-import hmac
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from shared.config import *
-import pygame
 from typing import List, Dict, Tuple, Optional
 import logging
 from .kafka_producer import DetectionKafkaProducer
+from .capture import CaptureManager
+from .camera_supervisor import CameraSupervisor
+from . import postprocess
+from .pipeline import DetectionPipeline
+from . import tracking
+from .scheduler import InferenceScheduler
+from .latency import LatencyRecorder
+from .inference_backends import create_backend
+from .workers import InferenceWorkerPool
+from . import roi
+from . import zones
+from .integrity import FrameHasher, Signer
+from .startup import StartupTimer
+from .quality import QualityController
+from .alerts import AlertEngine, ToneBank, EVENT_ENTER
+from .metrics import DetectionMetrics, MetricsServer, detector_collector
+
+# Imported by the audio startup phase, in parallel with the model load
+pygame = None
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -26,49 +42,180 @@ logger = logging.getLogger(__name__)
 
 
 class MultiCameraDetector:
-    def __init__(self, model_path: str = None):
-        """Initialize the multi-camera blind spot detection system"""
-        import torch
+    def __init__(self, model_path: str = None, kafka_producer=None, open_cameras: bool = False,
+                 warmup: bool = WARMUP_INFERENCE, websocket_server=None):
+        """Initialize the multi-camera blind spot detection system.
+
+        ``kafka_producer`` replaces the default DetectionKafkaProducer, e.g. with
+        the in-memory sink used by the offline benchmark. Model load and warm-up,
+        the audio mixer, the Kafka bootstrap and, with ``open_cameras``, the
+        cameras start concurrently (see PARALLEL_STARTUP); per-phase times are
+        in get_startup_stats(). ``websocket_server`` (or WEBSOCKET_ENABLED) adds
+        the in-cab WebSocket output, fed every cycle's full detections.
+        """
+        self.startup = StartupTimer()
         if model_path is None:
             model_path = os.environ.get("MODEL_PATH", "yolov8n.pt")
-        self.model = YOLO(model_path)
-        # Auto-select device: GPU if available, otherwise CPU
-        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        # Use smaller inference size on CPU to maintain acceptable FPS
-        default_imgsz = '640' if self.device == 'cuda' else '416'
-        self.imgsz = int(os.environ.get('INFERENCE_SIZE', default_imgsz))
-        logger.info(f"🖥️  Running inference on: {self.device.upper()} | imgsz: {self.imgsz}")
+        # Stack every camera's latest frame into a single forward pass per cycle
+        self.batch_inference = BATCH_INFERENCE
+        # Blind spot zones (rectangles, polygons or masks) compiled into lookup grids once
+        self.zones = zones.default_zones()
+        # ROI inference: camera_id -> normalized crop covering the blind spot zones it serves
+        self.rois = roi.camera_rois() if ROI_INFERENCE else {}
         self.cameras = {}  # Dictionary to store multiple camera feeds
+        self.capture = CaptureManager()  # One reader thread per unique camera source
+        # Opens cameras concurrently, then reconnects dropped, stalled or frozen ones
+        self.supervisor = CameraSupervisor(self.capture, self._on_camera_change)
+        self._camera_lock = threading.Lock()
         self.is_running = False
         self.frame_count = 0
         self.fps = 0
         self.last_time = time.time()
-
-        # Initialize pygame for audio alerts
         self.audio_enabled = False
-        try:
-            pygame.mixer.init()
-            self.alert_sound = self._create_beep_sound()
-            self.audio_enabled = True
-        except Exception as e:
-            logger.warning(f"Audio device not available, alerts will be silent: {e}")
-            self.alert_sound = None
-
-        # Detection history for smoothing
-        self.detection_history = []
+        self.alert_sound = None
+        # Per-zone alert hysteresis fed by each camera's boxes ahead of tracking and publishing;
+        # its tone bank is added by the audio startup phase
+        self.alerts = AlertEngine(on_change=self._on_alert_change) if ALERT_ENGINE else None
+
+        # Per-zone multi-object tracker: stable track ids, smoothed positions and
+        # change-only publishing (births, significant updates, deaths)
+        self.tracker = tracking.MultiZoneTracker() if TRACKING_ENABLED else None
+        # Created after the tracker: with one, the publish queue must not drop track events
+        self.pipeline = DetectionPipeline(self) if PIPELINE_ENABLED else None
+
+        # Motion-gated inference: quiet cameras reuse their last boxes between inferences
+        self.scheduler = InferenceScheduler() if MOTION_GATING else None
+        self._last_boxes: Dict = {}  # camera_id -> BoxArrays from the last inference
+        self.quality: Optional[QualityController] = None  # set in _load_model when ADAPTIVE_QUALITY is on
+        self.hasher = FrameHasher()  # reused per-camera scratch for the frame integrity hash
+        # Legacy per-detection integrity_hmac; in "message" mode the producer signs whole records
+        self.signer = Signer() if INTEGRITY_MODE == "detection" else None
 
         # Camera status tracking
         self.camera_status = {
-            "left": {"status": "not_connected", "cap": None},
-            "right": {"status": "not_connected", "cap": None},
-            "rear": {"status": "not_connected", "cap": None}
+            zone: {"status": "not_connected", "cap": None, "config": config}
+            for zone, config in CAMERA_CONFIG.items()
         }
 
-        # Initialize Kafka producer
-        self.kafka_producer = DetectionKafkaProducer()
-        self.kafka_producer.start_producer()
-
-    def _create_beep_sound(self) -> pygame.mixer.Sound:
+        # Rolling per-zone, per-stage latency histograms (fed locally and on Kafka acks)
+        self.latency = LatencyRecorder()
+        # Lock-free per-camera histograms for the metrics endpoint (METRICS_ENABLED)
+        self.metrics = DetectionMetrics()
+        self.metrics_server: Optional[MetricsServer] = None
+        self.kafka_producer = kafka_producer
+        self.websocket_server = websocket_server
+
+        # Independent startup steps overlap; the slowest one sets the time to first frame
+        tasks = {
+            "model": lambda: self._load_model(model_path, warmup),
+            "audio": self._init_audio,
+            "kafka": self._start_kafka,
+        }
+        if self.websocket_server is not None or WEBSOCKET_ENABLED:
+            tasks["websocket"] = self._start_websocket
+        if METRICS_ENABLED:
+            tasks["metrics"] = self.start_metrics_server
+        if open_cameras:
+            tasks["cameras"] = self._open_cameras
+        self.startup.run(tasks, parallel=PARALLEL_STARTUP)
+        self.startup.mark("ready")
+        self.startup.log_summary("ready")
+
+    def _load_model(self, model_path: str, warmup: bool):
+        """Load the inference backend (or worker pool) and optionally warm it up"""
+        with self.startup.phase("model"):
+            # Ultralytics/torch for .pt weights, ONNX Runtime for .onnx (see INFERENCE_BACKEND);
+            # with INFERENCE_WORKERS the model lives in worker processes instead of this one
+            self.workers = InferenceWorkerPool(model_path) if INFERENCE_WORKERS > 0 else None
+            self.backend = self.workers or create_backend(model_path)
+            # GPU if the backend found one, otherwise CPU
+            self.device = self.backend.device
+            # Use smaller inference size on CPU to maintain acceptable FPS; static ONNX exports fix it
+            default_imgsz = '640' if self.device == 'cuda' else '416'
+            self.imgsz = self.backend.fixed_imgsz or int(os.environ.get('INFERENCE_SIZE', default_imgsz))
+            # Closed-loop imgsz/stride control against LATENCY_BUDGET_MS (static ONNX exports keep their size)
+            if ADAPTIVE_QUALITY:
+                sizes = (self.imgsz,) if self.backend.fixed_imgsz else QUALITY_IMGSZ_STEPS
+                self.quality = QualityController(self.imgsz, sizes)
+        logger.info(f"🖥️  Running inference on: {self.device.upper()} ({self.backend.name}) | "
+                    f"imgsz: {self.imgsz} | batched: {self.batch_inference and self.workers is None}")
+        if warmup:
+            with self.startup.phase("warmup"):
+                self.warm_up()
+
+    def warm_up(self):
+        """Run the model on blank frames at every size it will see, so lazy kernel and
+        graph initialization happens before the first camera frame"""
+        frame = np.zeros((CAMERA_HEIGHT, CAMERA_WIDTH, 3), dtype=np.uint8)
+        if self.workers is not None:
+            self.workers.warm_up(frame, self.imgsz, MODEL_CONFIDENCE)
+            return
+        sources = len({config["camera_id"] for config in CAMERA_CONFIG.values()})
+        batch = sources if self.batch_inference and sources > 1 else 1
+        self.backend.predict([frame] * batch, self.imgsz, MODEL_CONFIDENCE)
+        # ROI crops run at their own, smaller sizes
+        crops = {}
+        for camera_roi in self.rois.values():
+            crop = roi.crop(frame, camera_roi)
+            crops.setdefault(roi.effective_imgsz(self.imgsz, crop.shape, frame.shape), crop)
+        for size, crop in crops.items():
+            if size != self.imgsz:
+                self.backend.predict([crop], size, MODEL_CONFIDENCE)
+
+    def _init_audio(self):
+        """Import pygame and open the mixer for audio alerts, off the model's critical path"""
+        global pygame
+        with self.startup.phase("audio"):
+            try:
+                if pygame is None:
+                    import pygame
+                pygame.mixer.init()
+                self.alert_sound = self._create_beep_sound()
+                self.audio_enabled = True
+            except Exception as e:
+                logger.warning(f"Audio device not available, alerts will be silent: {e}")
+                self.alert_sound = None
+                return
+            if self.alerts is not None:
+                try:
+                    sample_rate, _, channels = pygame.mixer.get_init()
+                    self.alerts.tones = ToneBank(lambda samples: pygame.mixer.Sound(buffer=samples.tobytes()),
+                                                 sample_rate=sample_rate, channels=channels)
+                except Exception as e:
+                    logger.warning(f"Could not build the alert tone bank, zone alerts will be silent: {e}")
+
+    def _start_kafka(self):
+        """Create and start the Kafka producer (broker bootstrap can take seconds)"""
+        with self.startup.phase("kafka"):
+            if self.kafka_producer is None:
+                self.kafka_producer = DetectionKafkaProducer(latency=self.latency)
+            self.kafka_producer.start_producer()
+
+    def _start_websocket(self):
+        """Start the in-cab WebSocket server on its own thread and event loop"""
+        with self.startup.phase("websocket"):
+            if self.websocket_server is None:
+                # Imported here: websockets is only needed with WEBSOCKET_ENABLED
+                from .websocket_server import DetectionWebSocketServer
+                self.websocket_server = DetectionWebSocketServer()
+            self.websocket_server.start_in_thread()
+
+    def start_metrics_server(self, host: str = METRICS_HOST, port: int = METRICS_PORT) -> MetricsServer:
+        """Serve Prometheus metrics from a background thread; scrapes never run on the detection thread"""
+        if self.metrics_server is None:
+            self.metrics_server = MetricsServer([detector_collector(self)], host, port)
+            self.metrics_server.start()
+        return self.metrics_server
+
+    def _open_cameras(self):
+        with self.startup.phase("cameras"):
+            self.start_cameras()
+
+    def get_startup_stats(self) -> Dict:
+        """Get startup phase durations and milestones (ready, first_cycle, first_alert) in milliseconds"""
+        return self.startup.get_stats()
+
+    def _create_beep_sound(self) -> "pygame.mixer.Sound":
         """Create a beep sound for alerts"""
         sample_rate = 44100
         duration = ALERT_DURATION
@@ -84,11 +231,30 @@ class MultiCameraDetector:
         # Create pygame sound object
         return pygame.mixer.Sound(wave.tobytes())
 
+    def _on_alert_change(self, zone: str, event: str):
+        """Alert engine transition callback (runs on the thread that fed the camera's results)"""
+        if event == EVENT_ENTER and self.startup.mark("first_alert"):
+            self.startup.log_summary("first_alert")
+
+    def _feed_alerts(self, camera_id, boxes: postprocess.BoxArrays, frame_shape: Tuple[int, ...],
+                     timing: Optional[Dict] = None):
+        """Tell the alert engine, for every active zone this camera serves, whether a box is in it"""
+        height, width = frame_shape[:2]
+        stamps = timing.get(camera_id) if timing else None
+        captured_at = stamps.get("capture") if stamps else None
+        for zone in self.cameras:
+            if CAMERA_CONFIG[zone]['camera_id'] != camera_id:
+                continue
+            hit = len(boxes.xyxy) > 0 and bool(self.zones.hits(zone, boxes.xyxy, width, height).any())
+            self.alerts.observe(zone, hit, captured_at)
+
+    def get_alert_stats(self) -> Dict:
+        """Get per-zone alert states, transition and tone counts and capture-to-alert latency"""
+        return self.alerts.get_stats() if self.alerts is not None else {}
+
     def is_in_blind_spot(self, x_center: float, y_center: float, zone: str) -> bool:
-        """Check if an object is in a blind spot zone"""
-        zone_coords = BLIND_SPOT_ZONES[zone]
-        return (zone_coords["x_min"] <= x_center <= zone_coords["x_max"] and
-                zone_coords["y_min"] <= y_center <= zone_coords["y_max"])
+        """Check if a normalized point is in a blind spot zone (one grid lookup)"""
+        return self.zones.contains(zone, x_center, y_center)
 
     def calculate_position(self, bbox: List[float], frame_width: int, frame_height: int, zone: str) -> Dict[str, float]:
         """Calculate relative position of detected object"""
@@ -106,51 +272,43 @@ class MultiCameraDetector:
         return {"x": world_x, "y": world_y, "z": world_z, "zone": zone}
 
     def start_cameras(self) -> Dict[str, bool]:
-        """Start all configured cameras"""
-        logger.info("🔄 Starting multi-camera system...")
-        success_count = 0
-        results = {}
+        """Open all configured cameras concurrently and start supervising them.
 
+        Returns after at most CAMERA_OPEN_TIMEOUT. Each camera's reader starts as
+        soon as it opens; cameras that failed are retried in the background with
+        exponential backoff and show up in self.cameras once connected.
+        """
+        logger.info("🔄 Starting multi-camera system...")
         for zone, config in CAMERA_CONFIG.items():
-            camera_id = config["camera_id"]
-            try:
-                logger.info(f"📹 Starting {config['name']} (Camera ID: {camera_id})...")
-
-                cap = cv2.VideoCapture(camera_id)
-                cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_WIDTH)
-                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_HEIGHT)
-                cap.set(cv2.CAP_PROP_FPS, FPS_TARGET)
-
-                if cap.isOpened():
-                    self.cameras[zone] = cap
-                    self.camera_status[zone] = {
-                        "status": "available",
-                        "cap": cap,
-                        "config": config
-                    }
+            logger.info(f"📹 Starting {config['name']} (Camera ID: {config['camera_id']})...")
+        opened = self.supervisor.open_all()
+        results = {zone: opened[config["camera_id"]] for zone, config in CAMERA_CONFIG.items()}
+        self.supervisor.start()
+
+        logger.info(f"📊 Camera startup complete: {sum(results.values())}/{len(CAMERA_CONFIG)} cameras connected")
+        return results
+
+    def _on_camera_change(self, camera_id, status: str, cap):
+        """Supervisor callback: (un)register every zone served by a source that (dis)connected"""
+        with self._camera_lock:
+            # Replaced rather than mutated so cycles iterating the old map are unaffected
+            cameras = dict(self.cameras)
+            for zone, config in CAMERA_CONFIG.items():
+                if config["camera_id"] != camera_id:
+                    continue
+                if cap is not None:
+                    cameras[zone] = cap
                     logger.info(f"✅ {config['name']}: Connected successfully")
-                    success_count += 1
-                    results[zone] = True
                 else:
-                    logger.warning(f"❌ {config['name']}: Failed to open camera {camera_id}")
-                    self.camera_status[zone] = {
-                        "status": "error",
-                        "cap": None,
-                        "config": config
-                    }
-                    results[zone] = False
+                    cameras.pop(zone, None)
+                    if self.alerts is not None:
+                        self.alerts.clear(zone)
+                self.camera_status[zone] = {"status": status, "cap": cap, "config": config}
+            self.cameras = cameras
 
-            except Exception as e:
-                logger.error(f"❌ {config['name']}: Error - {e}")
-                self.camera_status[zone] = {
-                    "status": "error",
-                    "cap": None,
-                    "config": config
-                }
-                results[zone] = False
-
-        logger.info(f"📊 Camera startup complete: {success_count}/{len(CAMERA_CONFIG)} cameras connected")
-        return results
+    def get_supervisor_stats(self) -> Dict:
+        """Get per-source connection status, reconnects and retry schedule"""
+        return self.supervisor.get_stats()
 
     def get_camera_status(self) -> Dict:
         """Get status of all cameras"""
@@ -166,85 +324,308 @@ class MultiCameraDetector:
             }
         return status
 
-    async def process_all_cameras(self) -> List[Dict]:
-        """Process frames from all active cameras"""
-        all_detections = []
-
-        # Deduplicate: read each unique camera source only once and
-        # cache inference results so zones sharing a camera don't pay 3x cost.
-        frame_cache: Dict[int, tuple] = {}  # camera_id -> (frame, results)
+    def get_capture_stats(self) -> Dict:
+        """Get per-source frame drop and age counters from the capture readers"""
+        return self.capture.get_stats()
+
+    def get_inference_rates(self) -> Dict[str, float]:
+        """Get the achieved inference rate (per second) of each active zone"""
+        if self.scheduler is None:
+            return {}
+        stats = self.scheduler.get_stats()
+        return {
+            zone: stats[CAMERA_CONFIG[zone]['camera_id']]["inference_rate"]
+            for zone in self.cameras
+            if CAMERA_CONFIG[zone]['camera_id'] in stats
+        }
 
-        for zone, cap in self.cameras.items():
+    def get_latency_stats(self) -> Dict:
+        """Get rolling p50/p95/p99 per camera zone and stage, in milliseconds"""
+        return self.latency.get_stats()
+
+    def get_pipeline_stats(self) -> Dict:
+        """Get pipeline queue depths and per-stage latencies (empty in serial mode)"""
+        return self.pipeline.get_stats() if self.pipeline else {}
+
+    async def next_detections(self) -> List[Dict]:
+        """Return the next cycle's detections in either pipelined or serial mode"""
+        if self.alerts is not None and self.alerts.ident is None:
+            self.alerts.start()
+        if self.pipeline is None:
+            detections = await self.process_all_cameras()
+            self._mark_first_cycle()
+            # Small delay to maintain target FPS
+            await asyncio.sleep(1/FPS_TARGET)
+            return detections
+
+        if not self.pipeline.is_running:
+            self.pipeline.start()
+        # Wait off the event loop so other tasks keep running while inference is busy
+        loop = asyncio.get_running_loop()
+        detections = await loop.run_in_executor(None, self.pipeline.get_detections, 1.0)
+        if detections is None:
+            return []
+        self._mark_first_cycle()
+        return detections
+
+    def _mark_first_cycle(self):
+        """Log the startup summary once the first detection cycle has come out"""
+        if self.startup.mark("first_cycle"):
+            self.startup.log_summary("first_cycle")
+
+    def _grab_frames(self, timing: Optional[Dict] = None) -> Dict:
+        """Take the newest unseen frame from every unique active camera source.
+
+        When a ``timing`` dict is given, each source gets a per-cycle stamp dict
+        under its camera_id, starting with the reader's capture timestamp.
+        """
+        frames = {}
+        for zone in self.cameras:
+            camera_id = CAMERA_CONFIG[zone]['camera_id']
+            if camera_id in frames:
+                continue
+            # Non-blocking: None means the reader has no new frame yet
+            latest = self.capture.get_latest(camera_id)
+            if latest is not None:
+                frames[camera_id] = latest[0]
+                if timing is not None:
+                    timing[camera_id] = {"capture": latest[1]}
+        return frames
+
+    def _release_frames(self, frames: Dict):
+        """Hand a cycle's frames back to their readers' pools once inference and hashing are done"""
+        for camera_id, frame in frames.items():
+            self.capture.release(camera_id, frame)
+
+    def _run_inference(self, frames: Dict, timing: Optional[Dict] = None) -> Dict:
+        """Run the inference backend on every grabbed frame and return camera_id -> results.
+
+        In batched mode all frames go through one backend call at self.imgsz and
+        the results are split back per source in input order. With motion
+        gating, sources the scheduler skips are left out of the result. With ROI
+        inference each frame is cropped to its zones and run at a proportionally
+        smaller size; boxes stay in crop coordinates until _postprocess. With
+        inference workers every source goes to its own worker process instead,
+        all of them in parallel.
+        """
+        if self.quality is not None and self.quality.stride > 1:
+            # Degraded quality: each camera is inferred only every Nth cycle
+            frames = {camera_id: frames[camera_id] for camera_id in self.quality.select(list(frames))}
+        if self.scheduler is not None:
+            frames = {
+                camera_id: frame for camera_id, frame in frames.items()
+                if self.scheduler.should_infer(camera_id, frame)
+            }
+        if not frames:
+            return {}
+
+        inputs, sizes = {}, {}
+        for camera_id, frame in frames.items():
+            camera_roi = self.rois.get(camera_id)
+            if camera_roi is None:
+                inputs[camera_id], sizes[camera_id] = frame, self.imgsz
+            else:
+                inputs[camera_id] = roi.crop(frame, camera_roi)
+                sizes[camera_id] = roi.effective_imgsz(self.imgsz, inputs[camera_id].shape, frame.shape)
+
+        camera_ids = list(frames)
+        if self.workers is not None:
+            start = time.time()
+            inference = self.workers.predict_cameras(inputs, sizes, MODEL_CONFIDENCE)
+            end = time.time()
+            if timing is not None:
+                for camera_id in camera_ids:
+                    timing.get(camera_id, {}).update(infer_start=start, infer_end=end)
+            return inference
+
+        if self.batch_inference and len(camera_ids) > 1:
+            start = time.time()
+            results = self.backend.predict(
+                [inputs[camera_id] for camera_id in camera_ids], max(sizes.values()), MODEL_CONFIDENCE
+            )
+            end = time.time()
+            if timing is not None:
+                for camera_id in camera_ids:
+                    timing.get(camera_id, {}).update(infer_start=start, infer_end=end)
+            return {camera_id: [result] for camera_id, result in zip(camera_ids, results)}
+
+        inference = {}
+        for camera_id in camera_ids:
+            start = time.time()
+            inference[camera_id] = self.backend.predict([inputs[camera_id]], sizes[camera_id], MODEL_CONFIDENCE)
+            if timing is not None:
+                timing.get(camera_id, {}).update(infer_start=start, infer_end=time.time())
+        return inference
+
+    def _postprocess(self, frames: Dict, inference: Dict, timing: Optional[Dict] = None) -> Dict:
+        """Hash each frame and turn its results into box arrays: camera_id -> (frame_hash, boxes, (h, w))"""
+        frame_cache: Dict[int, tuple] = {}
+        for camera_id, frame in frames.items():
             try:
-                camera_id = CAMERA_CONFIG[zone]['camera_id']
-
-                if camera_id not in frame_cache:
-                    ret, frame = cap.read()
-                    if not ret:
-                        logger.warning(f"⚠️  Failed to read frame from {zone} camera")
-                        frame_cache[camera_id] = None
-                        continue
-                    # Cheap integrity check: sample every 8th pixel instead of full SHA-256
-                    frame_hash = hashlib.md5(frame[::8, ::8].tobytes()).hexdigest()
-                    # Run YOLO inference once per unique frame
-                    results = self.model(
-                        frame,
-                        conf=MODEL_CONFIDENCE,
-                        verbose=False,
-                        imgsz=self.imgsz,
-                        device=self.device,
+                # Cheap integrity fingerprint of every 8th pixel (xxh3 when installed, see FRAME_HASH)
+                frame_hash = self.hasher.hexdigest(camera_id, frame)
+                # Identical hashes frame after frame mean a frozen stream
+                self.supervisor.observe(camera_id, frame_hash)
+                results = inference.get(camera_id)
+                if results is None:
+                    # Inference skipped on a quiet camera: carry the last boxes forward
+                    boxes = self._last_boxes.get(camera_id, postprocess.EMPTY_BOXES)
+                    if self.alerts is not None:
+                        # Carried boxes keep the zone's alert fed; no capture time, they are not new
+                        self._feed_alerts(camera_id, boxes, frame.shape)
+                else:
+                    # Class filtering and positions for every box at once, shared by zones on this source
+                    camera_roi = self.rois.get(camera_id)
+                    boxes = postprocess.process_results(
+                        results, frame.shape[1], frame.shape[0],
+                        offset=roi.offset(frame.shape, camera_roi) if camera_roi else None,
                     )
-                    frame_cache[camera_id] = (frame, frame_hash, results)
-
+                    self._last_boxes[camera_id] = boxes
+                    self.metrics.observe_camera(camera_id, timing.get(camera_id) if timing else None,
+                                                len(boxes.xyxy))
+                    if self.alerts is not None:
+                        # Alerts are decided here, without waiting for tracking, other zones or Kafka
+                        self._feed_alerts(camera_id, boxes, frame.shape, timing)
+                frame_cache[camera_id] = (frame_hash, boxes, frame.shape[:2])
+                if timing is not None and camera_id in timing:
+                    timing[camera_id]["postprocess"] = time.time()
+            except Exception as e:
+                logger.error(f"❌ Error post-processing camera {camera_id}: {e}")
+        return frame_cache
+
+    def _build_detections(self, frame_cache: Dict, timing: Optional[Dict] = None) -> Dict[str, List[Dict]]:
+        """Build signed detection dicts per zone from the post-processed box arrays"""
+        zone_detections = {}
+        cameras = self.cameras
+        for zone in cameras:
+            try:
+                camera_id = CAMERA_CONFIG[zone]['camera_id']
                 cached = frame_cache.get(camera_id)
                 if cached is None:
                     continue
-                frame, frame_hash, results = cached
-                detections = []
-
-                # Process results for this camera
-                for result in results:
-                    boxes = result.boxes
-                    for box in boxes:
-                        class_id = int(box.cls[0])
-                        confidence = float(box.conf[0])
-                        bbox = box.xyxy[0].tolist()
-
-                        # Only process relevant classes
-                        if class_id in OBJECT_CLASSES:
-                            object_type = OBJECT_CLASSES[class_id]
-                            position = self.calculate_position(bbox, frame.shape[1], frame.shape[0], zone)
-
-                            # Create detection with integrity data
-                            detection_data = {
-                                "object": object_type,
-                                "position": position,
-                                "confidence": confidence,
-                                "bbox": bbox,
-                                "class_id": class_id,
-                                "camera_zone": zone,
-                                "timestamp": time.time(),
-                                "frame_hash": frame_hash[:16]  # Short hash for integrity
-                            }
-
-                            # Add HMAC for detection integrity (using a simple key for demo)
-                            secret_key = os.environ.get('DETECTION_SECRET_KEY', 'default_key')
-                            message = f"{object_type}{confidence}{zone}{time.time()}"
-                            hmac_digest = hmac.new(secret_key.encode(), message.encode(), hashlib.sha256).hexdigest()
-                            detection_data["integrity_hmac"] = hmac_digest[:16]
-
-                            detections.append(detection_data)
-
-                all_detections.extend(detections)
-
-                # Send detections via Kafka with integrity checks
+                frame_hash, boxes, (height, width) = cached
+
+                # Dicts are only built here, at the serialization edge
+                if self.tracker is not None:
+                    events = self.tracker.update(zone, boxes, width, height)
+                    detections = tracking.events_to_detection_dicts(
+                        events, zone, time.time(), frame_hash[:16]
+                    )
+                else:
+                    detections = postprocess.to_detection_dicts(
+                        boxes, zone, time.time(), frame_hash[:16]  # Short hash for integrity
+                    )
+
                 if detections:
-                    self.kafka_producer.send_detections(detections)
+                    # Every box of the zone tested against its grid at once (centre or overlap)
+                    in_zone = self.zones.hits(zone, [d["bbox"] for d in detections], width, height)
+                    for detection_data, flag in zip(detections, in_zone.tolist()):
+                        detection_data["in_blind_spot"] = flag
+
+                if self.signer is not None:
+                    for detection_data in detections:
+                        detection_data["integrity_hmac"] = self.signer.sign_detection(detection_data)
+
+                zone_detections[zone] = detections
+                if timing is not None and camera_id in timing:
+                    self.latency.record_local(zone, timing[camera_id])
 
             except Exception as e:
                 logger.error(f"❌ Error processing {zone} camera: {e}")
 
-        return all_detections
+        if self.tracker is not None:
+            # A disconnected camera's zones get no more frames: end their tracks now,
+            # or consumers keep them as ghosts until it comes back
+            for zone, events in self.tracker.end_zones(cameras).items():
+                detections = tracking.events_to_detection_dicts(events, zone, time.time(), "")
+                for detection_data in detections:
+                    detection_data["in_blind_spot"] = False
+                    if self.signer is not None:
+                        detection_data["integrity_hmac"] = self.signer.sign_detection(detection_data)
+                zone_detections[zone] = detections
+
+        if self.quality is not None and timing:
+            self._adapt_quality(timing)
+        return zone_detections
+
+    def _adapt_quality(self, timing: Dict):
+        """Feed the cycle's worst capture-to-postprocess latency to the quality controller and apply its decision"""
+        latencies = [
+            (stamps["postprocess"] - stamps["capture"]) * 1000 for stamps in timing.values()
+            if "infer_end" in stamps and "postprocess" in stamps
+        ]
+        if not latencies:
+            return
+        change = self.quality.record(max(latencies))
+        if change is None:
+            return
+        self.imgsz = change["imgsz"]
+        previous = change["previous"]
+        logger.info(f"🎚️  Quality {change['direction']}: imgsz {previous['imgsz']} → {change['imgsz']}, "
+                    f"stride {previous['stride']} → {change['stride']} ({change['reason']})")
+        try:
+            self.kafka_producer.send_status({"quality": change})
+        except Exception as e:
+            logger.error(f"❌ Error publishing quality status: {e}")
+
+    def get_quality_stats(self) -> Dict:
+        """Get the adaptive quality level, imgsz, stride and CPU temperature (empty when disabled)"""
+        return self.quality.get_stats() if self.quality is not None else {}
+
+    def _publish(self, zone_detections: Dict[str, List[Dict]], timing: Optional[Dict] = None,
+                 carried: Optional[Dict[str, List[Dict]]] = None):
+        """Send the cycle's detections to the in-cab WebSocket clients and via Kafka.
+
+        ``carried`` holds track events of earlier cycles the pipeline could not
+        publish in time; they go to Kafka ahead of this cycle's events.
+        """
+        if self.websocket_server is not None:
+            # In-cab clients get the full state every cycle (they may skip cycles when slow);
+            # serialized once and fanned out on the server's own loop
+            self.websocket_server.publish_detections(
+                [detection for detections in zone_detections.values() for detection in detections])
+        if self.tracker is not None:
+            # Steady tracks are not re-sent; consumers keep state by track_id
+            carried = carried or {}
+            zone_detections = {
+                zone: carried.get(zone, []) + [d for d in zone_detections.get(zone, [])
+                                               if d["event"] in tracking.PUBLISHED_EVENTS]
+                for zone in {**zone_detections, **carried}
+            }
+        if not any(zone_detections.values()):
+            return
+        zone_timing = None
+        if timing is not None:
+            zone_timing = {
+                zone: timing[CAMERA_CONFIG[zone]['camera_id']]
+                for zone, detections in zone_detections.items()
+                if detections and CAMERA_CONFIG[zone]['camera_id'] in timing
+            }
+        try:
+            self.kafka_producer.send_cycle(zone_detections, timing=zone_timing)
+        except Exception as e:
+            logger.error(f"❌ Error publishing detections: {e}")
+
+    async def process_all_cameras(self) -> List[Dict]:
+        """Process frames from all active cameras (one serial cycle)"""
+        # Deduplicate: take each unique camera source's latest frame only once
+        # and cache inference results so zones sharing a camera don't pay 3x cost.
+        timing: Dict = {}
+        frames = self._grab_frames(timing)
+        try:
+            try:
+                inference = self._run_inference(frames, timing)
+            except Exception as e:
+                logger.error(f"❌ Inference error: {e}")
+                return []
+            frame_cache = self._postprocess(frames, inference, timing)
+        finally:
+            # Nothing after post-processing reads pixels: the readers may decode into these again
+            self._release_frames(frames)
+
+        zone_detections = self._build_detections(frame_cache, timing)
+        self._publish(zone_detections, timing)
+        return [detection for detections in zone_detections.values() for detection in detections]
 
     def draw_camera_status(self, frame: np.ndarray, camera_status: Dict) -> np.ndarray:
         """Draw camera status information on frame"""
@@ -270,10 +651,19 @@ class MultiCameraDetector:
         logger.info("🛑 Stopping multi-camera detection system...")
         self.is_running = False
 
-        # Release all camera resources
+        # Stop reconnecting, then the pipeline and reader threads; each reader releases
+        # its capture only after its last read returned, never under a read in progress
+        self.supervisor.stop()
+        if self.pipeline:
+            self.pipeline.stop()
+        if self.alerts is not None:
+            self.alerts.stop()
+        self.capture.stop(release=True)
+        if self.workers is not None:
+            self.workers.close()
+
         for zone, cap in self.cameras.items():
             if cap:
-                cap.release()
                 logger.info(f"📹 Released {zone} camera")
 
         self.cameras.clear()
@@ -288,18 +678,27 @@ class MultiCameraDetector:
             self.kafka_producer.stop_producer()
             logger.info("Kafka producer closed")
 
-        cv2.destroyAllWindows()
+        if self.websocket_server:
+            self.websocket_server.stop()
+
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+
+        try:
+            cv2.destroyAllWindows()
+        except cv2.error:
+            pass  # opencv-python-headless (slim image, benchmark) has no GUI to tear down
         logger.info("✅ Multi-camera system stopped")
 
 
 async def test_multi_camera_system():
     """Test function for the multi-camera system"""
-    detector = MultiCameraDetector()
+    # Cameras open while the model loads and warms up
+    logger.info("🚀 Starting multi-camera test...")
+    detector = MultiCameraDetector(open_cameras=True)
 
     try:
-        # Start all cameras
-        logger.info("🚀 Starting multi-camera test...")
-        camera_results = detector.start_cameras()
 
         # Print camera status
         status = detector.get_camera_status()
@@ -312,7 +711,7 @@ async def test_multi_camera_system():
 
         try:
             while True:  # Run continuously
-                detections = await detector.process_all_cameras()
+                detections = await detector.next_detections()
 
                 # Calculate FPS
                 detector.frame_count += 1
@@ -322,26 +721,48 @@ async def test_multi_camera_system():
                     detector.frame_count = 0
                     detector.last_time = current_time
 
-                    # Log performance
-                    logger.info(f"FPS: {detector.fps:.1f} | Active detections: {len(detections)}")
-
-                # Play alert sound if objects in blind spots
-                blind_spot_detections = []
-                for detection in detections:
-                    zone = detection["camera_zone"]
-                    x_pos = detection["position"]["x"] / POSITION_SCALE["x"]
-                    y_pos = detection["position"]["y"] / POSITION_SCALE["y"]
+                    # Log performance, including how stale frames are when picked up
+                    capture_stats = detector.get_capture_stats().values()
+                    max_age = max((s["pickup_age_ms"] for s in capture_stats), default=0.0)
+                    dropped = sum(s["dropped"] for s in capture_stats)
+                    logger.info(f"FPS: {detector.fps:.1f} | Active detections: {len(detections)} | "
+                                f"Frame age: {max_age:.0f} ms | Dropped frames: {dropped}")
+                    end_to_end = {
+                        zone: stages["end_to_end"]["p95"]
+                        for zone, stages in detector.get_latency_stats().items()
+                        if stages.get("end_to_end", {}).get("p95") is not None
+                    }
+                    if end_to_end:
+                        logger.info("End-to-end p95 | " + ", ".join(f"{zone}: {ms:.0f} ms"
+                                                                    for zone, ms in end_to_end.items()))
+                    rates = detector.get_inference_rates()
+                    if rates:
+                        logger.info("Inference rate | " + ", ".join(f"{zone}: {rate:.1f}/s"
+                                                                    for zone, rate in rates.items()))
+                    pipeline_stats = detector.get_pipeline_stats()
+                    if pipeline_stats:
+                        stages = " | ".join(f"{name}: {stats['avg_ms']:.1f} ms"
+                                            for name, stats in pipeline_stats["stages"].items())
+                        queues = ", ".join(f"{name}={q['depth']}/{q['capacity']}"
+                                           for name, q in pipeline_stats["queues"].items())
+                        logger.info(f"Pipeline | {stages} | queues: {queues}")
+
+                if detector.alerts is not None:
+                    # The alert engine already acted on this cycle's cameras as their boxes came out
+                    continue
 
-                    if detector.is_in_blind_spot(x_pos, y_pos, zone):
-                        blind_spot_detections.append(detection)
+                # Play alert sound if objects in blind spots (flagged per cycle in _build_detections)
+                blind_spot_detections = [
+                    detection for detection in detections
+                    if detection["in_blind_spot"] and detection.get("event") != tracking.EVENT_DEATH
+                ]
 
                 if blind_spot_detections:
                     detector.play_alert_sound()
+                    if detector.startup.mark("first_alert"):
+                        detector.startup.log_summary("first_alert")
                     logger.warning(f"🚨 BLIND SPOT ALERT! Objects detected: {len(blind_spot_detections)}")
 
-                # Small delay to maintain target FPS
-                await asyncio.sleep(1/FPS_TARGET)
-
         except KeyboardInterrupt:
             logger.info("⏹️  Test interrupted by user")
     except Exception as e:
@@ -33,7 +33,7 @@ USE_THREADING = True  # Use threading for better performance
 # Hardware-specific settings
 ENABLE_GPU = False  # Most Pi models don't have GPU support for deep learning
 USE_EDGE_TPU = False  # Set to True if using Coral USB Accelerator
-ENABLE_THERMAL_THROTTLING = True  # Monitor Pi's temperature
+ENABLE_THERMAL_THROTTLING = True  # Monitor Pi's temperature (the detector does so with ADAPTIVE_QUALITY, see THERMAL_*)
 
 # Model optimization
 MODEL_CONFIDENCE = 0.4  # Slightly lower confidence threshold for better performance
@@ -0,0 +1,282 @@
+"""
+Staged Detection Pipeline for Blind Spot Detection System
+Overlaps frame capture, inference and Kafka publishing with bounded queues
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import FPS_TARGET, FRAME_QUEUE_SIZE, PUBLISH_QUEUE_SIZE, ALERT_QUEUE_SIZE
+from .tracking import PUBLISHED_EVENTS
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Smoothing factor for the per-stage latency moving average
+LATENCY_EMA_ALPHA = 0.1
+
+
+def carry_track_events(older: Dict, newer: Dict) -> Dict:
+    """Publish item ``newer`` with the track events of the evicted ``older`` one carried along.
+
+    With tracking on Kafka only sees births, updates and deaths, so losing one
+    leaves consumers with ghost or missing tracks. Carried events are kept
+    apart from ``zone_detections``, which in-cab clients get as full state.
+    """
+    carried = {zone: list(events) for zone, events in older.get("carried", {}).items()}
+    for zone, detections in older["zone_detections"].items():
+        carried.setdefault(zone, []).extend(d for d in detections if d.get("event") in PUBLISHED_EVENTS)
+    for zone, events in newer.get("carried", {}).items():
+        carried.setdefault(zone, []).extend(events)
+    return {**newer, "carried": carried}
+
+
+class DropOldestQueue:
+    def __init__(self, maxsize: int, name: str = "", merge: Optional[Callable[[Any, Any], Any]] = None,
+                 on_drop: Optional[Callable[[Any], None]] = None):
+        """Bounded queue whose put() never blocks: when full the oldest item is dropped.
+
+        ``on_drop`` gets every dropped item. With ``merge`` the oldest item is
+        folded into the next one instead, ``merge(oldest, next)`` replacing the
+        next item.
+        """
+        self.name = name
+        self._items = deque(maxlen=max(1, maxsize))
+        self._cond = threading.Condition()
+        self._merge = merge
+        self._on_drop = on_drop
+        self.put_count = 0
+        self.dropped = 0
+        self.merged = 0
+
+    def put(self, item: Any):
+        """Enqueue an item, evicting (or merging) the oldest one if the queue is full"""
+        dropped = None
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                if self._merge is None:
+                    self.dropped += 1
+                    dropped = self._items[0]
+                else:
+                    oldest = self._items.popleft()
+                    if self._items:
+                        self._items[0] = self._merge(oldest, self._items[0])
+                    else:
+                        item = self._merge(oldest, item)
+                    self.merged += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify()
+        if dropped is not None and self._on_drop is not None:
+            self._on_drop(dropped)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Dequeue the oldest item, waiting up to timeout seconds; None if nothing arrived"""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def wake(self):
+        """Release any consumer blocked in get()"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get_stats(self) -> Dict:
+        """Get depth and drop counters"""
+        return {
+            "depth": len(self._items),
+            "capacity": self._items.maxlen,
+            "enqueued": self.put_count,
+            "dropped": self.dropped,
+            "merged": self.merged,
+        }
+
+
+class StageStats:
+    def __init__(self):
+        """Latency counters for one pipeline stage"""
+        self.count = 0
+        self.errors = 0
+        self.last_ms = 0.0
+        self.avg_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float):
+        """Record one stage execution time"""
+        ms = seconds * 1000
+        self.count += 1
+        self.last_ms = ms
+        self.avg_ms = ms if self.count == 1 else self.avg_ms + LATENCY_EMA_ALPHA * (ms - self.avg_ms)
+        self.max_ms = max(self.max_ms, ms)
+
+    def get_stats(self) -> Dict:
+        """Get latency counters in milliseconds"""
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "last_ms": self.last_ms,
+            "avg_ms": self.avg_ms,
+            "max_ms": self.max_ms,
+        }
+
+
+class DetectionPipeline:
+    STAGES = ("capture", "inference", "publish", "end_to_end")
+
+    def __init__(self, detector, fps_target: int = FPS_TARGET,
+                 frame_queue_size: int = FRAME_QUEUE_SIZE,
+                 publish_queue_size: int = PUBLISH_QUEUE_SIZE,
+                 alert_queue_size: int = ALERT_QUEUE_SIZE):
+        """Run a MultiCameraDetector as capture -> inference -> publish stages.
+
+        Each stage runs on its own thread so capture of cycle N+1 overlaps
+        inference of cycle N and publishing of cycle N-1. Every queue drops its
+        oldest entry when full, so no stage ever blocks on a slower one:
+        stale frames are discarded and alerts always see the newest results.
+        With a tracker the publish queue folds its oldest cycle's track events
+        into the next cycle instead, since Kafka only sees those changes.
+        """
+        self.detector = detector
+        self.interval = 1.0 / fps_target if fps_target > 0 else 0.0
+        # Frames of a dropped cycle go straight back to their readers' pools
+        self.frame_queue = DropOldestQueue(frame_queue_size, "frames",
+                                           on_drop=lambda item: detector._release_frames(item["frames"]))
+        tracking = getattr(detector, "tracker", None) is not None
+        self.publish_queue = DropOldestQueue(publish_queue_size, "publish",
+                                             merge=carry_track_events if tracking else None)
+        self.alert_queue = DropOldestQueue(alert_queue_size, "alerts")
+        self.stats = {stage: StageStats() for stage in self.STAGES}
+        self.is_running = False
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        """Start the stage threads"""
+        if self.is_running:
+            logger.warning("Pipeline is already running")
+            return
+
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(target=self._capture_stage, name="pipeline-capture", daemon=True),
+            threading.Thread(target=self._inference_stage, name="pipeline-inference", daemon=True),
+            threading.Thread(target=self._publish_stage, name="pipeline-publish", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        self.is_running = True
+        logger.info("🔀 Detection pipeline started (capture → inference → publish)")
+
+    def stop(self, timeout: float = 2.0):
+        """Stop the stage threads and wait for them to exit"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        self._stop_event.set()
+        for queue in (self.frame_queue, self.publish_queue, self.alert_queue):
+            queue.wake()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        logger.info("Detection pipeline stopped")
+
+    def _capture_stage(self):
+        """Collect the newest frame of every source at FPS_TARGET"""
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            start = time.time()
+            try:
+                timing: Dict = {}
+                frames = self.detector._grab_frames(timing)
+                if frames:
+                    self.frame_queue.put({"created": start, "frames": frames, "timing": timing})
+                    self.stats["capture"].record(time.time() - start)
+            except Exception as e:
+                self.stats["capture"].errors += 1
+                logger.error(f"❌ Pipeline capture error: {e}")
+
+            # Pace against a fixed schedule so stage time is not added to the period
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                self._stop_event.wait(delay)
+            else:
+                next_tick = time.monotonic()
+
+    def _inference_stage(self):
+        """Run inference and post-processing, then fan out to publish and alerts"""
+        while not self._stop_event.is_set():
+            item = self.frame_queue.get(timeout=0.1)
+            if item is None:
+                continue
+            start = time.time()
+            try:
+                # Frames leave the item here: downstream stages only need detections,
+                # and the frames go back to the capture pool once inference and hashing are done
+                frames, timing = item.pop("frames"), item["timing"]
+                try:
+                    inference = self.detector._run_inference(frames, timing)
+                    frame_cache = self.detector._postprocess(frames, inference, timing)
+                finally:
+                    # Nothing downstream reads pixels: the readers may decode into these again
+                    self.detector._release_frames(frames)
+                    frames = inference = None
+                zone_detections = self.detector._build_detections(frame_cache, timing)
+            except Exception as e:
+                self.stats["inference"].errors += 1
+                logger.error(f"❌ Pipeline inference error: {e}")
+                continue
+            self.stats["inference"].record(time.time() - start)
+
+            item["zone_detections"] = zone_detections
+            # Alerts never wait on Kafka: they get results as soon as inference is done
+            self.alert_queue.put(item)
+            self.publish_queue.put(item)
+
+    def _publish_stage(self):
+        """Send each cycle's detections to Kafka"""
+        while not self._stop_event.is_set():
+            item = self.publish_queue.get(timeout=0.1)
+            if item is None:
+                continue
+            start = time.time()
+            try:
+                self.detector._publish(item["zone_detections"], item["timing"], item.get("carried"))
+            except Exception as e:
+                self.stats["publish"].errors += 1
+                logger.error(f"❌ Pipeline publish error: {e}")
+                continue
+            end = time.time()
+            self.stats["publish"].record(end - start)
+            self.stats["end_to_end"].record(end - item["created"])
+
+    def get_detections(self, timeout: Optional[float] = None) -> Optional[List[Dict]]:
+        """Wait for the next inferred cycle and return its detections, or None on timeout"""
+        item = self.alert_queue.get(timeout)
+        if item is None:
+            return None
+        return [detection for detections in item["zone_detections"].values() for detection in detections]
+
+    def get_stats(self) -> Dict:
+        """Get queue depths and per-stage latencies"""
+        return {
+            "is_running": self.is_running,
+            "queues": {
+                queue.name: queue.get_stats()
+                for queue in (self.frame_queue, self.publish_queue, self.alert_queue)
+            },
+            "stages": {stage: stats.get_stats() for stage, stats in self.stats.items()},
+        }
@@ -0,0 +1,140 @@
+"""
+Vectorized Detection Post-Processing for Blind Spot Detection System
+Turns whole YOLO box arrays into filtered, positioned detections in NumPy
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import OBJECT_CLASSES, POSITION_SCALE
+
+
+def _build_class_lookup(object_classes: Dict[int, str]):
+    """Build a class_id -> keep mask and class_id -> label table"""
+    size = max(object_classes) + 1 if object_classes else 1
+    mask = np.zeros(size, dtype=bool)
+    names = np.empty(size, dtype=object)
+    for class_id, name in object_classes.items():
+        mask[class_id] = True
+        names[class_id] = name
+    return mask, names
+
+
+CLASS_MASK, CLASS_NAMES = _build_class_lookup(OBJECT_CLASSES)
+POSITION_SCALE_VECTOR = np.array(
+    [POSITION_SCALE["x"], POSITION_SCALE["y"], POSITION_SCALE["z"]], dtype=np.float32
+)
+
+
+class BoxArrays(NamedTuple):
+    """Detections of one frame as parallel arrays"""
+    xyxy: np.ndarray       # (N, 4) float32 pixel coordinates
+    conf: np.ndarray       # (N,) float32
+    cls: np.ndarray        # (N,) int64
+    positions: Optional[np.ndarray] = None  # (N, 3) float32 world x, y, z
+
+
+EMPTY_BOXES = BoxArrays(
+    np.zeros((0, 4), dtype=np.float32),
+    np.zeros(0, dtype=np.float32),
+    np.zeros(0, dtype=np.int64),
+    np.zeros((0, 3), dtype=np.float32),
+)
+
+
+def _to_numpy(value) -> np.ndarray:
+    """Convert a torch tensor or array-like to a NumPy array without copying when possible"""
+    if hasattr(value, "cpu"):
+        value = value.cpu().numpy()
+    return np.asarray(value)
+
+
+def extract_boxes(results) -> BoxArrays:
+    """Pull xyxy/conf/cls for every box of a YOLO result list in one transfer per result.
+
+    Uses ``boxes.data`` (N x 6: x1, y1, x2, y2, conf, cls; N x 7 with a track id
+    before conf) so each result costs a single device-to-host copy instead of
+    three tensor indexings per box.
+    """
+    chunks = []
+    for result in results:
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            continue
+        data = _to_numpy(boxes.data)
+        chunks.append(data.reshape(-1, data.shape[-1]))
+
+    if not chunks:
+        return EMPTY_BOXES
+
+    data = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+    return BoxArrays(
+        data[:, :4].astype(np.float32, copy=False),
+        data[:, -2].astype(np.float32, copy=False),
+        data[:, -1].astype(np.int64),
+    )
+
+
+def filter_classes(boxes: BoxArrays) -> BoxArrays:
+    """Keep only boxes whose class is in OBJECT_CLASSES using the lookup mask"""
+    cls = boxes.cls
+    in_range = (cls >= 0) & (cls < CLASS_MASK.shape[0])
+    keep = in_range.copy()
+    keep[in_range] = CLASS_MASK[cls[in_range]]
+    if keep.all():
+        return boxes
+    positions = boxes.positions[keep] if boxes.positions is not None else None
+    return BoxArrays(boxes.xyxy[keep], boxes.conf[keep], cls[keep], positions)
+
+
+def calculate_positions(xyxy: np.ndarray, frame_width: int, frame_height: int) -> np.ndarray:
+    """Vectorized calculate_position: (N, 4) pixel boxes -> (N, 3) world x, y, z"""
+    positions = np.empty((xyxy.shape[0], 3), dtype=np.float32)
+    positions[:, 0] = (xyxy[:, 0] + xyxy[:, 2]) / (2 * frame_width)
+    positions[:, 1] = (xyxy[:, 1] + xyxy[:, 3]) / (2 * frame_height)
+    # Bbox width relative to frame — larger value means object is closer to camera
+    positions[:, 2] = (xyxy[:, 2] - xyxy[:, 0]) / frame_width
+    positions *= POSITION_SCALE_VECTOR
+    return positions
+
+
+def process_results(results, frame_width: int, frame_height: int,
+                    offset: Optional[Tuple[int, int]] = None) -> BoxArrays:
+    """Extract, class-filter and position every box of one frame.
+
+    ``offset`` is the (x, y) origin of the crop the model saw, for ROI inference;
+    boxes are moved back to full-frame pixels before positions are computed.
+    """
+    boxes = filter_classes(extract_boxes(results))
+    if offset is not None and boxes.cls.shape[0]:
+        x, y = offset
+        boxes = boxes._replace(xyxy=boxes.xyxy + np.array([x, y, x, y], dtype=np.float32))
+    return boxes._replace(positions=calculate_positions(boxes.xyxy, frame_width, frame_height))
+
+
+def to_detection_dicts(boxes: BoxArrays, zone: str, timestamp: float, frame_hash: str) -> List[Dict]:
+    """Build the per-detection dicts sent downstream (serialization edge only)"""
+    if boxes.cls.shape[0] == 0:
+        return []
+
+    class_ids = boxes.cls.tolist()
+    names = CLASS_NAMES[boxes.cls].tolist()
+    confidences = boxes.conf.tolist()
+    bboxes = boxes.xyxy.tolist()
+    positions = boxes.positions.tolist()
+
+    return [
+        {
+            "object": name,
+            "position": {"x": pos[0], "y": pos[1], "z": pos[2], "zone": zone},
+            "confidence": confidence,
+            "bbox": bbox,
+            "class_id": class_id,
+            "camera_zone": zone,
+            "timestamp": timestamp,
+            "frame_hash": frame_hash,
+        }
+        for name, pos, confidence, bbox, class_id in zip(names, positions, confidences, bboxes, class_ids)
+    ]
@@ -0,0 +1,114 @@
+"""
+Allocation-Free Preprocessing for Blind Spot Detection System
+Reusable capture frames and in-place letterbox input tensors
+"""
+
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+import os
+import cv2
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import FRAME_POOL_SIZE
+
+# Letterbox padding value, as used by Ultralytics training
+PAD_VALUE = 114
+
+
+class FramePool:
+    def __init__(self, max_frames: int = FRAME_POOL_SIZE):
+        """Capture frames lent out by the reader and reused once handed back.
+
+        A frame is busy from acquire() or adopt() until release(): the reader
+        releases frames its latest-frame buffer discards, the detector those of
+        a cycle once inference and hashing are done with them. A frame that is
+        never released is simply never reused. When no frame is free the reader
+        falls back to a fresh allocation, which the pool adopts while it is
+        below ``max_frames``.
+        """
+        self.max_frames = max_frames
+        self._frames: List[np.ndarray] = []
+        self._free: List[np.ndarray] = []
+        # release() runs on consumer threads, acquire() on the reader
+        self._lock = threading.Lock()
+        self.allocations = 0
+
+    def acquire(self) -> Optional[np.ndarray]:
+        """A pooled frame that was handed back, or None if all are in use"""
+        with self._lock:
+            return self._free.pop() if self._free else None
+
+    def release(self, frame: np.ndarray):
+        """Hand a frame back for reuse; frames the pool does not own are ignored"""
+        with self._lock:
+            if any(owned is frame for owned in self._frames) and not any(free is frame for free in self._free):
+                self._free.append(frame)
+
+    def adopt(self, frame: np.ndarray):
+        """Account for a newly allocated (busy) frame and keep it for reuse if there is room"""
+        with self._lock:
+            self.allocations += 1
+            if self._frames and self._frames[0].shape != frame.shape:
+                # Source changed resolution: the old frames can never be reused
+                self._frames.clear()
+                self._free.clear()
+            if len(self._frames) < self.max_frames:
+                self._frames.append(frame)
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+
+class Letterboxer:
+    def __init__(self):
+        """Letterbox frames in place into a reusable float32 RGB NCHW input tensor.
+
+        Canvases and the tensor are kept per input size and grown only when a
+        larger batch arrives; the padding is refilled only when the geometry of
+        a batch slot changes.
+        """
+        self._canvases: Dict[int, List[np.ndarray]] = {}
+        self._geometry: Dict[int, List[Optional[tuple]]] = {}
+        self._tensors: Dict[int, np.ndarray] = {}
+
+    def _buffers(self, size: int, batch: int):
+        canvases = self._canvases.setdefault(size, [])
+        geometry = self._geometry.setdefault(size, [])
+        while len(canvases) < batch:
+            canvases.append(np.full((size, size, 3), PAD_VALUE, dtype=np.uint8))
+            geometry.append(None)
+        tensor = self._tensors.get(size)
+        if tensor is None or tensor.shape[0] < batch:
+            tensor = self._tensors[size] = np.empty((batch, 3, size, size), dtype=np.float32)
+        return canvases, geometry, tensor
+
+    @staticmethod
+    def geometry(shape: Tuple[int, ...], size: int) -> Tuple[float, int, int, int, int]:
+        """(ratio, left, top, new_w, new_h) of a frame letterboxed into size x size"""
+        height, width = shape[:2]
+        ratio = min(size / height, size / width)
+        new_w, new_h = int(round(width * ratio)), int(round(height * ratio))
+        left = int(round((size - new_w) / 2 - 0.1))
+        top = int(round((size - new_h) / 2 - 0.1))
+        return ratio, left, top, new_w, new_h
+
+    def __call__(self, frames: List[np.ndarray], size: int) -> Tuple[np.ndarray, List[Tuple[float, Tuple[int, int]]]]:
+        """Fill the input tensor from the frames; returns (tensor view, [(ratio, (pad_x, pad_y))])"""
+        canvases, geometry, tensor = self._buffers(size, len(frames))
+        scales = []
+        for i, frame in enumerate(frames):
+            ratio, left, top, new_w, new_h = self.geometry(frame.shape, size)
+            canvas = canvases[i]
+            if geometry[i] != (left, top, new_w, new_h):
+                canvas.fill(PAD_VALUE)
+                geometry[i] = (left, top, new_w, new_h)
+            region = canvas[top:top + new_h, left:left + new_w]
+            if (new_w, new_h) == (frame.shape[1], frame.shape[0]):
+                np.copyto(region, frame)
+            else:
+                cv2.resize(frame, (new_w, new_h), dst=region, interpolation=cv2.INTER_LINEAR)
+            # BGR HWC uint8 -> RGB CHW float32 in 0-1, written straight into the batch slot
+            np.multiply(canvas[..., ::-1].transpose(2, 0, 1), np.float32(1 / 255), out=tensor[i], casting="unsafe")
+            scales.append((ratio, (left, top)))
+        return tensor[:len(frames)], scales
@@ -0,0 +1,143 @@
+"""
+Adaptive Quality Control for Blind Spot Detection System
+Closed-loop imgsz and inference stride against a latency budget and CPU temperature
+
+The controller walks a ladder of quality levels, best first: every inference
+size from QUALITY_IMGSZ_STEPS up to the startup imgsz at stride 1, then the
+smallest size at strides 2 .. QUALITY_MAX_STRIDE. Stride N infers each camera
+every Nth cycle, staggered across cameras, so each forward pass also batches
+fewer frames; cameras skipped in a cycle carry their last boxes forward.
+
+After every QUALITY_WINDOW measured cycles (and at most once per
+QUALITY_COOLDOWN seconds) it steps one level down when the p95 latency is over
+budget or the CPU is at THERMAL_LIMIT_C, and one level up when the p95 is below
+QUALITY_HEADROOM x budget and the CPU has cooled down.
+"""
+
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import (LATENCY_BUDGET_MS, QUALITY_COOLDOWN, QUALITY_HEADROOM, QUALITY_IMGSZ_STEPS,
+                           QUALITY_MAX_STRIDE, QUALITY_WINDOW, THERMAL_HYSTERESIS_C, THERMAL_LIMIT_C, THERMAL_PATH)
+
+Level = Tuple[int, int]  # (imgsz, stride)
+
+
+def read_cpu_temperature(path: str = THERMAL_PATH) -> Optional[float]:
+    """CPU temperature in °C from a sysfs thermal zone, or None if unavailable"""
+    if not path:
+        return None
+    try:
+        with open(path) as f:
+            return int(f.read().strip()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+
+def build_levels(imgsz: int, sizes: Sequence[int] = QUALITY_IMGSZ_STEPS,
+                 max_stride: int = QUALITY_MAX_STRIDE) -> List[Level]:
+    """Quality ladder, best first: sizes up to imgsz at stride 1, then the smallest at longer strides"""
+    steps = sorted({size for size in sizes if size < imgsz} | {imgsz}, reverse=True)
+    levels = [(size, 1) for size in steps]
+    levels += [(steps[-1], stride) for stride in range(2, max_stride + 1)]
+    return levels
+
+
+class QualityController:
+    def __init__(self, imgsz: int, sizes: Sequence[int] = QUALITY_IMGSZ_STEPS,
+                 max_stride: int = QUALITY_MAX_STRIDE, budget_ms: float = LATENCY_BUDGET_MS,
+                 window: int = QUALITY_WINDOW, cooldown: float = QUALITY_COOLDOWN,
+                 headroom: float = QUALITY_HEADROOM, thermal_path: str = THERMAL_PATH,
+                 temp_limit: float = THERMAL_LIMIT_C, temp_hysteresis: float = THERMAL_HYSTERESIS_C):
+        """Pick the inference size and per-camera stride that hold the latency budget"""
+        self.levels = build_levels(imgsz, sizes, max_stride)
+        self.level = 0
+        self.budget_ms = budget_ms
+        self.window = window
+        self.cooldown = cooldown
+        self.headroom = headroom
+        self.thermal_path = thermal_path
+        self.temp_limit = temp_limit
+        self.temp_hysteresis = temp_hysteresis
+        self.temperature: Optional[float] = None
+        self.adjustments = 0
+        self._samples = deque(maxlen=window)
+        self._last_change = float("-inf")  # the first window is not held back by the cooldown
+        self._cycle = 0
+        self._order: Dict[Any, int] = {}  # camera_id -> stagger offset
+
+    @property
+    def imgsz(self) -> int:
+        return self.levels[self.level][0]
+
+    @property
+    def stride(self) -> int:
+        return self.levels[self.level][1]
+
+    def select(self, camera_ids: Sequence[Any]) -> List[Any]:
+        """Cameras to infer this cycle; with stride N each one is picked every Nth cycle, staggered"""
+        cycle = self._cycle
+        self._cycle += 1
+        stride = self.stride
+        if stride == 1:
+            return list(camera_ids)
+        selected = []
+        for camera_id in camera_ids:
+            offset = self._order.setdefault(camera_id, len(self._order))
+            if (cycle + offset) % stride == 0:
+                selected.append(camera_id)
+        return selected
+
+    def record(self, latency_ms: float, now: Optional[float] = None) -> Optional[Dict]:
+        """Add one cycle's latency; returns a description of the adjustment when the level changed"""
+        self._samples.append(latency_ms)
+        now = time.monotonic() if now is None else now
+        if len(self._samples) < self.window or now - self._last_change < self.cooldown:
+            return None
+
+        p95 = float(np.percentile(np.fromiter(self._samples, dtype=np.float64), 95))
+        self.temperature = read_cpu_temperature(self.thermal_path)
+        hot = self.temperature is not None and self.temperature >= self.temp_limit
+        cool = self.temperature is None or self.temperature < self.temp_limit - self.temp_hysteresis
+        if (p95 > self.budget_ms or hot) and self.level < len(self.levels) - 1:
+            step = 1
+            reason = (f"CPU {self.temperature:.0f}°C >= {self.temp_limit:.0f}°C" if hot
+                      else f"p95 {p95:.0f} ms > budget {self.budget_ms:.0f} ms")
+        elif p95 < self.budget_ms * self.headroom and cool and self.level > 0:
+            step = -1
+            reason = f"p95 {p95:.0f} ms < {self.headroom:.0%} of budget {self.budget_ms:.0f} ms"
+        else:
+            return None
+
+        previous = self.levels[self.level]
+        self.level += step
+        self.adjustments += 1
+        self._samples.clear()
+        self._last_change = now
+        return {
+            "direction": "down" if step > 0 else "up",
+            "level": self.level,
+            "imgsz": self.imgsz,
+            "stride": self.stride,
+            "previous": {"imgsz": previous[0], "stride": previous[1]},
+            "p95_ms": p95,
+            "budget_ms": self.budget_ms,
+            "temperature_c": self.temperature,
+            "reason": reason,
+        }
+
+    def get_stats(self) -> Dict:
+        """Current level, its imgsz and stride, adjustment count and last CPU temperature"""
+        return {
+            "level": self.level,
+            "levels": len(self.levels),
+            "imgsz": self.imgsz,
+            "stride": self.stride,
+            "budget_ms": self.budget_ms,
+            "adjustments": self.adjustments,
+            "temperature_c": self.temperature,
+        }
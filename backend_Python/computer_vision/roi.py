@@ -0,0 +1,79 @@
+"""
+Region-of-Interest Inference for Blind Spot Detection System
+Crops each camera frame to the blind spot zones it serves before inference
+"""
+
+import math
+from typing import Any, Dict, Optional, Tuple
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import CAMERA_CONFIG, ROI_MARGIN, ROI_ZOOM
+from .zones import default_zones
+
+# Ultralytics and ONNX exports need input sizes that are a multiple of the model stride
+MODEL_STRIDE = 32
+
+# Normalized (x_min, y_min, x_max, y_max) rectangle
+Rect = Tuple[float, float, float, float]
+
+
+def camera_rois(margin: float = ROI_MARGIN, camera_config: Dict = CAMERA_CONFIG,
+                zones: Optional[Dict] = None) -> Dict[Any, Rect]:
+    """Union of the zone rectangles each camera source serves, grown by ``margin`` and clipped to the frame.
+
+    ``zones`` defaults to the bounding rectangles of the configured zone polygons.
+    """
+    if zones is None:
+        zones = default_zones().bounds()
+    rois: Dict[Any, Rect] = {}
+    for zone, config in camera_config.items():
+        if zone not in zones:
+            continue
+        coords = zones[zone]
+        rect = (coords["x_min"], coords["y_min"], coords["x_max"], coords["y_max"])
+        camera_id = config["camera_id"]
+        if camera_id in rois:
+            current = rois[camera_id]
+            rect = (min(current[0], rect[0]), min(current[1], rect[1]),
+                    max(current[2], rect[2]), max(current[3], rect[3]))
+        rois[camera_id] = rect
+
+    return {
+        camera_id: (max(0.0, x0 - margin), max(0.0, y0 - margin), min(1.0, x1 + margin), min(1.0, y1 + margin))
+        for camera_id, (x0, y0, x1, y1) in rois.items()
+    }
+
+
+def roi_box(shape: Tuple[int, ...], roi: Rect) -> Tuple[int, int, int, int]:
+    """Pixel (x0, y0, x1, y1) of a normalized ROI in a frame of the given shape"""
+    height, width = shape[:2]
+    x0, y0 = int(roi[0] * width), int(roi[1] * height)
+    x1, y1 = int(math.ceil(roi[2] * width)), int(math.ceil(roi[3] * height))
+    return x0, y0, max(x1, x0 + 1), max(y1, y0 + 1)
+
+
+def crop(frame: np.ndarray, roi: Rect) -> np.ndarray:
+    """View (no copy) of the frame inside the ROI"""
+    x0, y0, x1, y1 = roi_box(frame.shape, roi)
+    return frame[y0:y1, x0:x1]
+
+
+def offset(shape: Tuple[int, ...], roi: Rect) -> Tuple[int, int]:
+    """(x, y) pixel offset that maps crop coordinates back onto the full frame"""
+    x0, y0, _, _ = roi_box(shape, roi)
+    return x0, y0
+
+
+def effective_imgsz(imgsz: int, crop_shape: Tuple[int, ...], frame_shape: Tuple[int, ...],
+                    zoom: float = ROI_ZOOM) -> int:
+    """Inference size for a crop.
+
+    At ``zoom`` 1.0 the crop keeps the pixel density the full frame gets at
+    ``imgsz``, so fewer pixels go through the model. Larger values give small
+    objects inside the zone more resolution, up to ``imgsz``.
+    """
+    fraction = max(crop_shape[:2]) / max(frame_shape[:2]) * zoom
+    size = int(math.ceil(imgsz * min(1.0, fraction) / MODEL_STRIDE)) * MODEL_STRIDE
+    return max(MODEL_STRIDE, size)
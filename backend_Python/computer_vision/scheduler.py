@@ -0,0 +1,108 @@
+"""
+Motion-Gated Inference Scheduler for Blind Spot Detection System
+Skips YOLO on quiet cameras and runs it at full rate on active ones
+"""
+
+import time
+from collections import deque
+from typing import Any, Dict
+import sys
+import os
+import cv2
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import MOTION_THRESHOLD, SKIP_FRAMES
+
+# Pixel stride of the motion thumbnail; matches the frame_hash sampling
+SAMPLE_STRIDE = 8
+# Window (seconds) over which achieved inference rates are measured
+RATE_WINDOW = 5.0
+
+
+def sample_frame(frame: np.ndarray) -> np.ndarray:
+    """Downsampled view of a frame (no copy) shared by motion detection and hashing"""
+    return frame[::SAMPLE_STRIDE, ::SAMPLE_STRIDE]
+
+
+class CameraSchedule:
+    def __init__(self):
+        """Motion and inference bookkeeping for one camera source"""
+        self.previous = None  # contiguous copy of the last sampled frame
+        self.current = None   # scratch for this frame's sample
+        self.diff = None      # scratch for the absolute difference
+        self.motion = 0.0
+        self.skipped_in_row = 0
+        self.cycles = deque()
+        self.inferences = deque()
+        self.skipped = 0
+
+    @staticmethod
+    def _rate(stamps: deque, now: float) -> float:
+        """Events per second over the rate window"""
+        while stamps and now - stamps[0] > RATE_WINDOW:
+            stamps.popleft()
+        if len(stamps) < 2:
+            return 0.0
+        span = now - stamps[0]
+        return (len(stamps) - 1) / span if span > 0 else 0.0
+
+    def get_stats(self, now: float) -> Dict:
+        """Get motion score and achieved cycle and inference rates"""
+        return {
+            "motion": self.motion,
+            "cycle_rate": self._rate(self.cycles, now),
+            "inference_rate": self._rate(self.inferences, now),
+            "skipped": self.skipped,
+        }
+
+
+class InferenceScheduler:
+    def __init__(self, motion_threshold: float = MOTION_THRESHOLD, max_skip: int = SKIP_FRAMES):
+        """Decide per cycle which cameras need a fresh inference.
+
+        Motion is the mean absolute difference between consecutive downsampled
+        frames (0–255 scale). A camera above ``motion_threshold`` is inferred on
+        every frame. A quiet camera is inferred once every ``max_skip + 1``
+        frames, and the caller carries its last boxes forward in between.
+        """
+        self.motion_threshold = motion_threshold
+        self.max_skip = max_skip
+        self.cameras: Dict[Any, CameraSchedule] = {}
+
+    def should_infer(self, camera_id: Any, frame: np.ndarray) -> bool:
+        """Update the camera's motion estimate and decide whether to run inference"""
+        schedule = self.cameras.get(camera_id)
+        if schedule is None:
+            schedule = self.cameras[camera_id] = CameraSchedule()
+
+        now = time.time()
+        schedule.cycles.append(now)
+        sample = sample_frame(frame)
+        first = schedule.previous is None or schedule.previous.shape != sample.shape
+        if first:
+            # (Re)allocate the scratch buffers; every later frame reuses them
+            schedule.previous = np.empty(sample.shape, dtype=sample.dtype)
+            schedule.current = np.empty_like(schedule.previous)
+            schedule.diff = np.empty_like(schedule.previous)
+            np.copyto(schedule.previous, sample)
+            schedule.motion = 0.0
+        else:
+            np.copyto(schedule.current, sample)
+            cv2.absdiff(schedule.current, schedule.previous, dst=schedule.diff)
+            schedule.motion = float(schedule.diff.mean())
+            # Swap so this sample becomes the reference without copying it again
+            schedule.previous, schedule.current = schedule.current, schedule.previous
+
+        if first or schedule.motion >= self.motion_threshold or schedule.skipped_in_row >= self.max_skip:
+            schedule.skipped_in_row = 0
+            schedule.inferences.append(now)
+            return True
+
+        schedule.skipped_in_row += 1
+        schedule.skipped += 1
+        return False
+
+    def get_stats(self) -> Dict[Any, Dict]:
+        """Get per-camera motion and achieved inference rates"""
+        now = time.time()
+        return {camera_id: schedule.get_stats(now) for camera_id, schedule in self.cameras.items()}
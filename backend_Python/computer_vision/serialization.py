@@ -0,0 +1,276 @@
+"""
+Wire Formats for Blind Spot Detection Kafka Messages
+JSON (default), msgpack, and a compact schema-versioned binary layout
+
+Run ``python -m computer_vision.serialization`` for a size and encode-time
+comparison on representative detection payloads.
+"""
+
+import json
+import struct
+import time
+from typing import Dict, List, Optional
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import CAMERA_CONFIG, OBJECT_CLASSES
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+
+def _u16(value: float) -> int:
+    """Round a pixel coordinate into the u16 range"""
+    value = int(value + 0.5)
+    return 0 if value < 0 else (0xFFFF if value > 0xFFFF else value)
+
+
+class JsonSerializer:
+    """Plain JSON — what the ws-bridge and dashboard understand today"""
+    name = "json"
+    content_type = "application/json"
+
+    def serialize(self, message: Dict) -> bytes:
+        return json.dumps(message, separators=(",", ":")).encode("utf-8")
+
+    def deserialize(self, data: bytes) -> Dict:
+        return json.loads(data.decode("utf-8"))
+
+
+class MsgpackSerializer:
+    """msgpack — same structure as JSON, binary-encoded numbers and strings"""
+    name = "msgpack"
+    content_type = "application/msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("msgpack is not installed: pip install msgpack")
+
+    def serialize(self, message: Dict) -> bytes:
+        return msgpack.packb(message)
+
+    def deserialize(self, data: bytes) -> Dict:
+        return msgpack.unpackb(data)
+
+
+class CompactBinarySerializer:
+    """Fixed struct layout with quantized coordinates, version 3.
+
+    Message header (little-endian)::
+
+        magic "SD" | version u8 | msg_type u8 | timestamp f64 | count u16
+
+    followed by ``count`` detection records::
+
+        flags u8 | class_id u8 | zone u8 | confidence f16 |
+        bbox 4 x u16 (pixels, rounded) | position 3 x f16 | timestamp delta f32 |
+        [frame_hash 8 bytes if flags & 1] | [integrity_hmac 8 bytes if flags & 2] |
+        [track_id u32 | event u8 if flags & 4]
+
+    where ``flags & 8`` marks a detection carrying ``in_blind_spot`` and
+    ``flags & 16`` is its value. A trailing ``u32`` length plus JSON blob
+    carries any other top-level message fields (e.g. everything in a status
+    message). Detection fields not listed above are not carried. Version 1 is
+    version 2 without tracking fields, version 2 is version 3 without the
+    blind spot flag; both are still decoded.
+    """
+    name = "binary"
+    content_type = "application/vnd.safedetect.v3+binary"
+
+    MAGIC = b"SD"
+    VERSION = 3
+    SUPPORTED_VERSIONS = (1, 2, 3)
+    TYPE_OTHER = 0
+    TYPE_DETECTIONS = 1
+    FLAG_FRAME_HASH = 0x01
+    FLAG_HMAC = 0x02
+    FLAG_TRACK = 0x04
+    FLAG_ZONE_HIT = 0x08
+    FLAG_IN_BLIND_SPOT = 0x10
+    EVENTS = ("birth", "update", "steady", "death")
+    ZONES = tuple(CAMERA_CONFIG)
+    ZONE_UNKNOWN = 0xFF
+
+    HEADER = struct.Struct("<2sBBdH")
+    RECORD = struct.Struct("<BBBe4H3ef")
+    TRACK = struct.Struct("<IB")
+    EXTRAS = struct.Struct("<I")
+
+    def __init__(self):
+        self._zone_index = {zone: i for i, zone in enumerate(self.ZONES)}
+        self._event_index = {event: i for i, event in enumerate(self.EVENTS)}
+
+    @staticmethod
+    def _hex8(value) -> Optional[bytes]:
+        """Pack a 16-character hex digest into 8 bytes, or None if it is not one"""
+        if not isinstance(value, str) or len(value) != 16:
+            return None
+        try:
+            return bytes.fromhex(value)
+        except ValueError:
+            return None
+
+    def serialize(self, message: Dict) -> bytes:
+        is_detections = message.get("type") == "detections"
+        detections = message.get("detections", []) if is_detections else []
+        timestamp = float(message.get("timestamp", 0.0))
+        skip = ("type", "timestamp", "detections") if is_detections else ("timestamp",)
+        extras = {k: v for k, v in message.items() if k not in skip}
+
+        out = bytearray(self.HEADER.pack(
+            self.MAGIC, self.VERSION,
+            self.TYPE_DETECTIONS if is_detections else self.TYPE_OTHER,
+            timestamp, len(detections),
+        ))
+        record = self.RECORD
+        for det in detections:
+            frame_hash = self._hex8(det.get("frame_hash"))
+            hmac_digest = self._hex8(det.get("integrity_hmac"))
+            track_id = det.get("track_id")
+            in_blind_spot = det.get("in_blind_spot")
+            flags = ((self.FLAG_FRAME_HASH if frame_hash else 0) | (self.FLAG_HMAC if hmac_digest else 0)
+                     | (self.FLAG_TRACK if track_id is not None else 0))
+            if in_blind_spot is not None:
+                flags |= self.FLAG_ZONE_HIT | (self.FLAG_IN_BLIND_SPOT if in_blind_spot else 0)
+            x1, y1, x2, y2 = det.get("bbox", (0, 0, 0, 0))
+            pos = det.get("position", {})
+            out += record.pack(
+                flags,
+                int(det.get("class_id", 0)) & 0xFF,
+                self._zone_index.get(det.get("camera_zone"), self.ZONE_UNKNOWN),
+                float(det.get("confidence", 0.0)),
+                _u16(x1), _u16(y1), _u16(x2), _u16(y2),
+                float(pos.get("x", 0.0)), float(pos.get("y", 0.0)), float(pos.get("z", 0.0)),
+                float(det.get("timestamp", timestamp)) - timestamp,
+            )
+            if frame_hash:
+                out += frame_hash
+            if hmac_digest:
+                out += hmac_digest
+            if track_id is not None:
+                out += self.TRACK.pack(int(track_id), self._event_index.get(det.get("event"), 0xFF))
+
+        blob = json.dumps(extras, separators=(",", ":")).encode("utf-8") if extras else b""
+        out += self.EXTRAS.pack(len(blob))
+        out += blob
+        return bytes(out)
+
+    def deserialize(self, data: bytes) -> Dict:
+        magic, version, msg_type, timestamp, count = self.HEADER.unpack_from(data, 0)
+        if magic != self.MAGIC or version not in self.SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported binary detection message (magic={magic!r}, version={version})")
+
+        offset = self.HEADER.size
+        detections: List[Dict] = []
+        for _ in range(count):
+            flags, class_id, zone_idx, conf, x1, y1, x2, y2, px, py, pz, dt = self.RECORD.unpack_from(data, offset)
+            offset += self.RECORD.size
+            zone = self.ZONES[zone_idx] if zone_idx < len(self.ZONES) else None
+            det = {
+                "object": OBJECT_CLASSES.get(class_id, "unknown"),
+                "position": {"x": px, "y": py, "z": pz, "zone": zone},
+                "confidence": conf,
+                "bbox": [float(x1), float(y1), float(x2), float(y2)],
+                "class_id": class_id,
+                "camera_zone": zone,
+                "timestamp": timestamp + dt,
+            }
+            if flags & self.FLAG_ZONE_HIT:
+                det["in_blind_spot"] = bool(flags & self.FLAG_IN_BLIND_SPOT)
+            if flags & self.FLAG_FRAME_HASH:
+                det["frame_hash"] = data[offset:offset + 8].hex()
+                offset += 8
+            if flags & self.FLAG_HMAC:
+                det["integrity_hmac"] = data[offset:offset + 8].hex()
+                offset += 8
+            if flags & self.FLAG_TRACK:
+                track_id, event_idx = self.TRACK.unpack_from(data, offset)
+                offset += self.TRACK.size
+                det["track_id"] = track_id
+                det["event"] = self.EVENTS[event_idx] if event_idx < len(self.EVENTS) else None
+            detections.append(det)
+
+        (blob_len,) = self.EXTRAS.unpack_from(data, offset)
+        offset += self.EXTRAS.size
+        extras = json.loads(data[offset:offset + blob_len].decode("utf-8")) if blob_len else {}
+
+        if msg_type == self.TYPE_DETECTIONS:
+            return {"type": "detections", "timestamp": timestamp, "detections": detections, **extras}
+        return {"timestamp": timestamp, **extras}
+
+
+SERIALIZERS = {
+    JsonSerializer.name: JsonSerializer,
+    MsgpackSerializer.name: MsgpackSerializer,
+    CompactBinarySerializer.name: CompactBinarySerializer,
+}
+
+
+def get_serializer(name: str):
+    """Instantiate a serializer by name ("json", "msgpack" or "binary")"""
+    try:
+        return SERIALIZERS[name.lower()]()
+    except KeyError:
+        raise ValueError(f"Unknown serializer '{name}', expected one of: {', '.join(SERIALIZERS)}")
+
+
+def representative_message(boxes_per_zone: int = 3) -> Dict:
+    """Build a detections message shaped like a real three-camera cycle"""
+    now = time.time()
+    detections = []
+    for zone_idx, zone in enumerate(CAMERA_CONFIG):
+        for i in range(boxes_per_zone):
+            x1 = 37.4321 + 90.123 * i
+            y1 = 120.9876 + 11.5 * zone_idx
+            x2, y2 = x1 + 84.56789, y1 + 141.2345
+            detections.append({
+                "object": "car",
+                "position": {"x": 0.3512345678, "y": 0.5123456789, "z": 0.1321987654, "zone": zone},
+                "confidence": 0.8734567891,
+                "bbox": [x1, y1, x2, y2],
+                "class_id": 2,
+                "camera_zone": zone,
+                "timestamp": now,
+                "frame_hash": "9f86d081884c7d65",
+                "integrity_hmac": "2c26b46b68ffc68f",
+            })
+    return {"type": "detections", "timestamp": now, "detections": detections}
+
+
+def compare_serializers(boxes_per_zone=(1, 3, 10), iterations: int = 2000) -> Dict[str, Dict]:
+    """Measure encoded size and mean encode time of every available serializer"""
+    results = {}
+    for name, cls in SERIALIZERS.items():
+        try:
+            serializer = cls()
+        except ImportError:
+            continue
+        per_payload = {}
+        for boxes in boxes_per_zone:
+            message = representative_message(boxes)
+            encoded = serializer.serialize(message)
+            start = time.perf_counter()
+            for _ in range(iterations):
+                serializer.serialize(message)
+            elapsed = time.perf_counter() - start
+            per_payload[f"{boxes * len(CAMERA_CONFIG)}_boxes"] = {
+                "bytes": len(encoded),
+                "encode_us": elapsed / iterations * 1e6,
+            }
+        results[name] = per_payload
+    return results
+
+
+def main():
+    """Print the serializer comparison table"""
+    results = compare_serializers()
+    print(f"{'serializer':<10} {'payload':<10} {'bytes':>8} {'encode µs':>10}")
+    for name, payloads in results.items():
+        for payload, stats in payloads.items():
+            print(f"{name:<10} {payload:<10} {stats['bytes']:>8} {stats['encode_us']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
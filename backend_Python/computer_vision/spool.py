@@ -0,0 +1,319 @@
+"""
+Disk Spool for Blind Spot Detection System
+Append-only, memory-mapped outbox for Kafka records the broker could not take
+
+Records are appended to fixed-size segment files (``<seq>.seg``) that are
+preallocated and memory-mapped, so an append is a memcpy under a lock and
+never waits on the disk. Each record is framed as::
+
+    u32 length | u32 crc32 | u16 key length | key | u16 header count |
+    (u16 name length | name | u32 value length | value)* | record value
+
+The length is written last, so a record torn by a crash reads as the end of
+the segment. When the segments together would exceed the size bound the
+oldest one is deleted, unreplayed records included. A ``SpoolDrainer``
+thread replays records oldest first at a fixed rate and commits its read
+position to a ``cursor`` file, so a restart resumes where it stopped.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Iterable, List, Optional, Tuple
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import KAFKA_SPOOL_MAX_MB, KAFKA_SPOOL_REPLAY_RATE, KAFKA_SPOOL_SEGMENT_MB
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FRAME = struct.Struct("<II")  # payload length, crc32 of the payload
+CURSOR = struct.Struct("<QQ")  # segment sequence, offset within it
+SEGMENT_SUFFIX = ".seg"
+# Batch of records the drainer reads per pass
+DRAIN_BATCH = 50
+# Seconds the drainer waits after a failed replay or while the broker is unreachable
+RETRY_INTERVAL = 1.0
+
+SpooledRecord = Tuple[Optional[bytes], bytes, List[Tuple[str, bytes]]]  # key, value, headers
+
+
+def encode_record(key: Optional[bytes], value: bytes, headers: Iterable[Tuple[str, bytes]] = ()) -> bytes:
+    """Payload bytes of one record (without the frame)"""
+    key = key or b""
+    parts = [struct.pack("<H", len(key)), key]
+    headers = list(headers or ())
+    parts.append(struct.pack("<H", len(headers)))
+    for name, header_value in headers:
+        name_bytes = name.encode("utf-8")
+        parts += [struct.pack("<H", len(name_bytes)), name_bytes, struct.pack("<I", len(header_value)), header_value]
+    parts.append(value)
+    return b"".join(parts)
+
+
+def decode_record(payload: bytes) -> SpooledRecord:
+    """Inverse of encode_record"""
+    (key_length,) = struct.unpack_from("<H", payload, 0)
+    position = 2
+    key = payload[position:position + key_length] or None
+    position += key_length
+    (count,) = struct.unpack_from("<H", payload, position)
+    position += 2
+    headers = []
+    for _ in range(count):
+        (name_length,) = struct.unpack_from("<H", payload, position)
+        position += 2
+        name = payload[position:position + name_length].decode("utf-8")
+        position += name_length
+        (value_length,) = struct.unpack_from("<I", payload, position)
+        position += 4
+        headers.append((name, payload[position:position + value_length]))
+        position += value_length
+    return key, payload[position:], headers
+
+
+class _Segment:
+    def __init__(self, path: str, seq: int, size: int):
+        """One preallocated, memory-mapped segment file; scans existing records to find its end"""
+        self.path = path
+        self.seq = seq
+        exists = os.path.exists(path)
+        self.file = open(path, "r+b" if exists else "w+b")
+        if os.fstat(self.file.fileno()).st_size < size:
+            self.file.truncate(size)
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), self.size)
+        self.records = 0
+        self.end = 0
+        if exists:
+            for _ in self.scan(0):
+                pass
+
+    def scan(self, offset: int):
+        """Yield (offset, next_offset, payload) of every intact record from offset on"""
+        while offset + FRAME.size <= self.size:
+            length, crc = FRAME.unpack_from(self.map, offset)
+            start, stop = offset + FRAME.size, offset + FRAME.size + length
+            if length == 0 or stop > self.size:
+                break
+            payload = self.map[start:stop]
+            if zlib.crc32(payload) != crc:
+                break
+            if offset >= self.end:
+                self.end = stop
+                self.records += 1
+            yield offset, stop, payload
+            offset = stop
+
+    def append(self, payload: bytes) -> bool:
+        """Write one framed record at the end; False if it does not fit"""
+        stop = self.end + FRAME.size + len(payload)
+        if stop > self.size:
+            return False
+        self.map[self.end + FRAME.size:stop] = payload
+        # The length goes in last: until then the record reads as the end of the segment
+        struct.pack_into("<I", self.map, self.end + 4, zlib.crc32(payload))
+        struct.pack_into("<I", self.map, self.end, len(payload))
+        self.end = stop
+        self.records += 1
+        return True
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        self.file.close()
+
+    def delete(self):
+        self.map.close()
+        self.file.close()
+        os.remove(self.path)
+
+
+class Spool:
+    def __init__(self, directory: str, segment_bytes: int = int(KAFKA_SPOOL_SEGMENT_MB * 1024 * 1024),
+                 max_bytes: int = int(KAFKA_SPOOL_MAX_MB * 1024 * 1024)):
+        """Bounded on-disk FIFO of Kafka records, reopened from ``directory`` after a restart"""
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max(2, int(max_bytes // segment_bytes))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.appended = 0
+        self.replayed = 0
+        self.evicted = 0
+        self.rejected = 0
+
+        self.segments: List[_Segment] = []
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit():
+                seq = int(name[:-len(SEGMENT_SUFFIX)])
+                self.segments.append(_Segment(os.path.join(directory, name), seq, segment_bytes))
+        self.segments.sort(key=lambda segment: segment.seq)
+        if not self.segments:
+            self.segments.append(self._new_segment(0))
+
+        self._cursor_path = os.path.join(directory, "cursor")
+        self.read_seq, self.read_offset = self.segments[0].seq, 0
+        try:
+            with open(self._cursor_path, "rb") as f:
+                seq, offset = CURSOR.unpack(f.read(CURSOR.size))
+            if seq >= self.segments[0].seq:
+                self.read_seq, self.read_offset = seq, offset
+        except (OSError, struct.error):
+            pass
+        self.pending = sum(self._unread(segment) for segment in self.segments)
+        if self.pending:
+            logger.info(f"📦 Spool {directory}: {self.pending} records waiting for replay")
+
+    def _new_segment(self, seq: int) -> _Segment:
+        return _Segment(os.path.join(self.directory, f"{seq:012d}{SEGMENT_SUFFIX}"), seq, self.segment_bytes)
+
+    def _unread(self, segment: _Segment) -> int:
+        """Records of a segment after the read cursor"""
+        if segment.seq < self.read_seq:
+            return 0
+        if segment.seq > self.read_seq:
+            return segment.records
+        return sum(1 for _ in segment.scan(self.read_offset))
+
+    def append(self, key: Optional[bytes], value: bytes, headers: Iterable[Tuple[str, bytes]] = ()) -> bool:
+        """Spool one record; False only if it is larger than a segment"""
+        payload = encode_record(key, value, headers)
+        if FRAME.size + len(payload) > self.segment_bytes:
+            self.rejected += 1
+            return False
+        with self._lock:
+            tail = self.segments[-1]
+            if not tail.append(payload):
+                tail.map.flush()
+                tail = self._new_segment(tail.seq + 1)
+                self.segments.append(tail)
+                tail.append(payload)
+                while len(self.segments) > self.max_segments:
+                    self._evict_oldest()
+            self.appended += 1
+            self.pending += 1
+        return True
+
+    def _evict_oldest(self):
+        """Drop the oldest segment and whatever in it was not replayed yet"""
+        oldest = self.segments.pop(0)
+        lost = self._unread(oldest)
+        self.evicted += lost
+        self.pending -= lost
+        if self.read_seq <= oldest.seq:
+            self.read_seq, self.read_offset = self.segments[0].seq, 0
+        oldest.delete()
+        if lost:
+            logger.warning(f"🗑️  Spool full: evicted {lost} unreplayed records")
+
+    def read(self, max_records: int = DRAIN_BATCH) -> List[Tuple[Tuple[int, int], SpooledRecord]]:
+        """Oldest unreplayed records with the position after each; does not advance the cursor"""
+        records = []
+        with self._lock:
+            seq, offset = self.read_seq, self.read_offset
+            for segment in self.segments:
+                if segment.seq < seq:
+                    continue
+                start = offset if segment.seq == seq else 0
+                for _, stop, payload in segment.scan(start):
+                    records.append(((segment.seq, stop), decode_record(payload)))
+                    if len(records) >= max_records:
+                        return records
+        return records
+
+    def commit(self, position: Tuple[int, int], count: int = 1):
+        """Advance the cursor past replayed records, deleting segments that were fully replayed"""
+        seq, offset = position
+        with self._lock:
+            if (seq, offset) <= (self.read_seq, self.read_offset) or seq < self.segments[0].seq:
+                return  # already committed, or evicted meanwhile
+            self.read_seq, self.read_offset = seq, offset
+            self.replayed += count
+            self.pending = max(0, self.pending - count)
+            while len(self.segments) > 1 and self.segments[0].seq < self.read_seq:
+                self.segments.pop(0).delete()
+            head = self.segments[0]
+            if len(self.segments) > 1 and head.seq == self.read_seq and self.read_offset >= head.end:
+                self.segments.pop(0).delete()
+                self.read_seq, self.read_offset = self.segments[0].seq, 0
+            with open(self._cursor_path, "wb") as f:
+                f.write(CURSOR.pack(self.read_seq, self.read_offset))
+
+    def close(self):
+        with self._lock:
+            for segment in self.segments:
+                segment.close()
+
+    def get_stats(self) -> dict:
+        """Pending, appended, replayed, evicted and oversized record counts, and disk usage"""
+        return {
+            "pending": self.pending,
+            "appended": self.appended,
+            "replayed": self.replayed,
+            "evicted": self.evicted,
+            "rejected": self.rejected,
+            "segments": len(self.segments),
+            "bytes_on_disk": sum(segment.size for segment in self.segments),
+        }
+
+
+class SpoolDrainer(threading.Thread):
+    def __init__(self, spool: Spool, send: Callable[[Optional[bytes], bytes, List[Tuple[str, bytes]]], None],
+                 rate: float = KAFKA_SPOOL_REPLAY_RATE, is_ready: Optional[Callable[[], bool]] = None,
+                 retry_interval: float = RETRY_INTERVAL):
+        """Replay spooled records through ``send(key, value, headers)`` at most ``rate`` per second.
+
+        ``send`` blocks until the record is acknowledged and raises if it was
+        not; the record then stays in the spool and the drainer retries after
+        ``retry_interval``. ``is_ready`` gates replay on the broker being
+        reachable, so a dead uplink costs one cheap check per interval.
+        """
+        super().__init__(name="spool-drainer", daemon=True)
+        self.spool = spool
+        self.send = send
+        self.rate = rate
+        self.is_ready = is_ready
+        self.retry_interval = retry_interval
+        self._next_send = 0.0  # monotonic time the rate limit allows the next record
+        self._stop_event = threading.Event()
+
+    def drain_once(self) -> int:
+        """Replay one batch; returns how many records were delivered"""
+        delivered = 0
+        for position, (key, value, headers) in self.spool.read():
+            if self._stop_event.is_set():
+                break
+            wait = self._next_send - time.monotonic()
+            if wait > 0 and self._stop_event.wait(wait):
+                break
+            self._next_send = max(self._next_send, time.monotonic()) + (1.0 / self.rate if self.rate > 0 else 0.0)
+            try:
+                self.send(key, value, headers)
+            except Exception as e:
+                logger.warning(f"📦 Spool replay paused: {e}")
+                raise
+            self.spool.commit(position)
+            delivered += 1
+        return delivered
+
+    def run(self):
+        while not self._stop_event.is_set():
+            if self.spool.pending == 0 or (self.is_ready is not None and not self.is_ready()):
+                self._stop_event.wait(self.retry_interval)
+                continue
+            try:
+                if self.drain_once() and self.spool.pending == 0:
+                    logger.info(f"📦 Spool drained ({self.spool.replayed} records replayed)")
+            except Exception:
+                self._stop_event.wait(self.retry_interval)
+
+    def stop(self, timeout: float = 2.0):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
@@ -6,7 +6,8 @@ Simple script to verify Kafka connectivity
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
-from shared.config import KAFKA_HOST, KAFKA_PORT, KAFKA_TOPIC
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from shared.config import KAFKA_HOST, KAFKA_PORT, KAFKA_TOPIC, KAFKA_PARTITIONS
 
 def test_kafka_connection():
     print(f"Testing Kafka connection...")
@@ -17,31 +18,26 @@ def test_kafka_connection():
 
     try:
         from kafka import KafkaProducer, KafkaAdminClient
-        from kafka.admin import NewTopic
         import json
 
+        from computer_vision.kafka_producer import provision_topic
+
         print("\n1. Testing Kafka Admin Client...")
         admin_client = KafkaAdminClient(
             bootstrap_servers=[f"{KAFKA_HOST}:{KAFKA_PORT}"],
             client_id='test-admin'
         )
         print("✓ Admin client connected successfully")
+        admin_client.close()
 
         print("\n2. Checking/Creating topic...")
         try:
-            existing_topics = admin_client.list_topics()
-            if KAFKA_TOPIC in existing_topics:
-                print(f"✓ Topic '{KAFKA_TOPIC}' already exists")
-            else:
-                print(f"Creating topic '{KAFKA_TOPIC}'...")
-                topic = NewTopic(name=KAFKA_TOPIC, num_partitions=1, replication_factor=1)
-                admin_client.create_topics([topic])
-                print(f"✓ Topic '{KAFKA_TOPIC}' created successfully")
+            # Created with (or grown to) KAFKA_PARTITIONS so consumer groups can scale out
+            partitions = provision_topic([f"{KAFKA_HOST}:{KAFKA_PORT}"], KAFKA_TOPIC, KAFKA_PARTITIONS)
+            print(f"✓ Topic '{KAFKA_TOPIC}' has {partitions} partitions")
         except Exception as e:
             print(f"✗ Topic check/creation failed: {e}")
 
-        admin_client.close()
-
         print("\n3. Testing Kafka Producer...")
         producer = KafkaProducer(
             bootstrap_servers=[f"{KAFKA_HOST}:{KAFKA_PORT}"],
@@ -58,7 +54,7 @@ def test_kafka_connection():
             "message": "Kafka connection test"
         }
 
-        future = producer.send(KAFKA_TOPIC, value=test_message)
+        future = producer.send(KAFKA_TOPIC, value=test_message, key=b"connection-test")
         record_metadata = future.get(timeout=10)
 
         print(f"✓ Test message sent successfully!")
@@ -0,0 +1,196 @@
+"""
+Multi-Object Tracking for Blind Spot Detection System
+Per-zone IoU association with a constant-velocity (alpha-beta) motion model
+"""
+
+import itertools
+from typing import Dict, List, Optional
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import (
+    TRACK_IOU_THRESHOLD, TRACK_MAX_MISSES, TRACK_SMOOTHING, TRACK_UPDATE_THRESHOLD
+)
+from .postprocess import BoxArrays, CLASS_NAMES, calculate_positions
+
+# Track lifecycle events carried in the "event" field of tracked detections.
+# Only births, significant updates and deaths are published; steady tracks are
+# kept for local consumers such as alerting.
+EVENT_BIRTH = "birth"
+EVENT_UPDATE = "update"
+EVENT_STEADY = "steady"
+EVENT_DEATH = "death"
+PUBLISHED_EVENTS = (EVENT_BIRTH, EVENT_UPDATE, EVENT_DEATH)
+
+# Gain applied to the velocity estimate from each measurement residual
+VELOCITY_GAIN = 0.1
+
+_track_ids = itertools.count(1)
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy boxes"""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+class Track:
+    def __init__(self, bbox: np.ndarray, class_id: int, confidence: float):
+        """One tracked object with a smoothed box and per-frame box velocity"""
+        self.track_id = next(_track_ids)
+        self.class_id = class_id
+        self.confidence = confidence
+        self.bbox = bbox.astype(np.float32).copy()
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.position: Optional[np.ndarray] = None
+        self.published_position: Optional[np.ndarray] = None
+        self.hits = 1
+        self.misses = 0
+
+    def predict(self) -> np.ndarray:
+        """Constant-velocity prediction of the box in the next frame"""
+        return self.bbox + self.velocity
+
+    def correct(self, measured: np.ndarray, confidence: float, alpha: float):
+        """Alpha-beta update from a matched detection"""
+        predicted = self.predict()
+        residual = measured - predicted
+        self.bbox = predicted + alpha * residual
+        self.velocity = self.velocity + VELOCITY_GAIN * residual
+        self.confidence = confidence
+        self.hits += 1
+        self.misses = 0
+
+    def coast(self):
+        """Advance an unmatched track along its motion model"""
+        self.bbox = self.predict()
+        self.misses += 1
+
+
+class ZoneTracker:
+    def __init__(self, iou_threshold: float = TRACK_IOU_THRESHOLD, max_misses: int = TRACK_MAX_MISSES,
+                 smoothing: float = TRACK_SMOOTHING, update_threshold: float = TRACK_UPDATE_THRESHOLD):
+        """Track objects seen by one camera zone across frames"""
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.smoothing = smoothing
+        self.update_threshold = update_threshold
+        self.tracks: List[Track] = []
+
+    def _associate(self, boxes: BoxArrays):
+        """Greedy highest-IoU matching between predicted tracks and detections of the same class"""
+        if not self.tracks or boxes.cls.shape[0] == 0:
+            return [], list(range(len(self.tracks))), list(range(boxes.cls.shape[0]))
+
+        predicted = np.stack([track.predict() for track in self.tracks])
+        track_cls = np.array([track.class_id for track in self.tracks])
+        scores = iou_matrix(predicted, boxes.xyxy)
+        scores[track_cls[:, None] != boxes.cls[None, :]] = -1.0
+
+        matches = []
+        while True:
+            t, d = np.unravel_index(np.argmax(scores), scores.shape)
+            if scores[t, d] < self.iou_threshold:
+                break
+            matches.append((t, d))
+            scores[t, :] = -1.0
+            scores[:, d] = -1.0
+
+        matched_t = {t for t, _ in matches}
+        matched_d = {d for _, d in matches}
+        unmatched_tracks = [t for t in range(len(self.tracks)) if t not in matched_t]
+        unmatched_dets = [d for d in range(boxes.cls.shape[0]) if d not in matched_d]
+        return matches, unmatched_tracks, unmatched_dets
+
+    def update(self, boxes: BoxArrays, frame_width: int, frame_height: int) -> List[tuple]:
+        """Feed one frame's detections; returns (event, track) for every live or ended track"""
+        matches, unmatched_tracks, unmatched_dets = self._associate(boxes)
+
+        for t, d in matches:
+            self.tracks[t].correct(boxes.xyxy[d], float(boxes.conf[d]), self.smoothing)
+        for t in unmatched_tracks:
+            self.tracks[t].coast()
+
+        born = [Track(boxes.xyxy[d], int(boxes.cls[d]), float(boxes.conf[d])) for d in unmatched_dets]
+        self.tracks.extend(born)
+
+        events = []
+        if not self.tracks:
+            return events
+
+        # Smoothed world positions for every track in one array operation
+        positions = calculate_positions(np.stack([track.bbox for track in self.tracks]), frame_width, frame_height)
+        survivors = []
+        born_ids = {track.track_id for track in born}
+        for track, position in zip(self.tracks, positions):
+            track.position = position
+            if track.misses > self.max_misses:
+                events.append((EVENT_DEATH, track))
+                continue
+            survivors.append(track)
+            if track.track_id in born_ids:
+                event = EVENT_BIRTH
+            elif np.max(np.abs(position - track.published_position)) > self.update_threshold:
+                event = EVENT_UPDATE
+            else:
+                event = EVENT_STEADY
+            if event != EVENT_STEADY:
+                track.published_position = position
+            events.append((event, track))
+
+        self.tracks = survivors
+        return events
+
+
+class MultiZoneTracker:
+    def __init__(self, **tracker_kwargs):
+        """One ZoneTracker per camera zone, created on first use"""
+        self.tracker_kwargs = tracker_kwargs
+        self.zones: Dict[str, ZoneTracker] = {}
+
+    def update(self, zone: str, boxes: BoxArrays, frame_width: int, frame_height: int) -> List[tuple]:
+        """Update the zone's tracker with one frame of detections"""
+        tracker = self.zones.get(zone)
+        if tracker is None:
+            tracker = self.zones[zone] = ZoneTracker(**self.tracker_kwargs)
+        return tracker.update(boxes, frame_width, frame_height)
+
+    def end_zones(self, active) -> Dict[str, List[tuple]]:
+        """End every track of the zones not in ``active`` (their camera is gone); returns zone -> deaths"""
+        ended = {}
+        for zone in [zone for zone in self.zones if zone not in active]:
+            tracks = self.zones.pop(zone).tracks
+            if tracks:
+                ended[zone] = [(EVENT_DEATH, track) for track in tracks]
+        return ended
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get the number of live tracks per zone"""
+        return {zone: len(tracker.tracks) for zone, tracker in self.zones.items()}
+
+
+def events_to_detection_dicts(events: List[tuple], zone: str, timestamp: float, frame_hash: str) -> List[Dict]:
+    """Build detection dicts for tracked objects, tagged with track_id and lifecycle event"""
+    detections = []
+    for event, track in events:
+        x, y, z = track.position.tolist()
+        detections.append({
+            "object": CLASS_NAMES[track.class_id],
+            "position": {"x": x, "y": y, "z": z, "zone": zone},
+            "confidence": track.confidence,
+            "bbox": track.bbox.tolist(),
+            "class_id": track.class_id,
+            "camera_zone": zone,
+            "timestamp": timestamp,
+            "frame_hash": frame_hash,
+            "track_id": track.track_id,
+            "event": event,
+        })
+    return detections
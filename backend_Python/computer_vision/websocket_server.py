@@ -0,0 +1,391 @@
+"""
+WebSocket Server for Blind Spot Detection System
+Streams detection results to in-cab clients with concurrent, serialize-once fan-out
+
+Every message is serialized to JSON bytes once and handed to each client's
+bounded queue; one sender task per client drains its own queue, so a slow or
+stuck dashboard never delays the others. A client that falls more than
+WEBSOCKET_CLIENT_QUEUE messages behind either skips ahead to the latest state
+("latest") or is disconnected ("disconnect"), and one whose send stalls for
+WEBSOCKET_SEND_TIMEOUT is disconnected. The server runs its own event loop on
+a thread (``start_in_thread``) and ``publish`` may be called from any thread:
+the caller pays one serialization and a loop wake-up, whatever the number of
+clients.
+"""
+
+import asyncio
+import collections
+import inspect
+import json
+import threading
+import time
+import websockets
+from typing import Dict, List, Optional
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import (BLIND_SPOT_ZONES, VEHICLE_ID, WEBSOCKET_CLIENT_QUEUE, WEBSOCKET_HOST, WEBSOCKET_PORT,
+                           WEBSOCKET_SEND_TIMEOUT, WEBSOCKET_SLOW_CLIENT)
+import logging
+
+try:
+    from websockets.asyncio.server import serve
+except ImportError:  # websockets < 13
+    from websockets import serve
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SLOW_CLIENT_POLICIES = ("latest", "disconnect")
+# Close code for clients dropped for falling behind ("try again later")
+CLOSE_TOO_SLOW = 1013
+# Seconds start_in_thread waits for the listening socket
+START_TIMEOUT = 5.0
+
+
+def _encode(message: Dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode("utf-8")
+
+
+class _Client:
+    def __init__(self, websocket, queue_size: int):
+        """One connection, its bounded outgoing queue and delivery counters"""
+        self.websocket = websocket
+        self.address = "{}:{}".format(*websocket.remote_address[:2]) if websocket.remote_address else "?"
+        self.queue = collections.deque()  # (enqueued_at, payload)
+        self.queue_size = queue_size
+        self.ready = asyncio.Event()
+        self.sender: Optional[asyncio.Task] = None
+        self.connected_at = time.time()
+        self.sent = 0
+        self.skipped = 0  # dropped from the queue under the "latest" policy
+        self.last_lag_ms = 0.0  # enqueue-to-sent time of the last message
+
+    def lag_ms(self, now: float) -> float:
+        """Age of the oldest undelivered message, or 0 when caught up"""
+        return (now - self.queue[0][0]) * 1000 if self.queue else 0.0
+
+
+class DetectionWebSocketServer:
+    def __init__(self, host: str = WEBSOCKET_HOST, port: int = WEBSOCKET_PORT,
+                 queue_size: int = WEBSOCKET_CLIENT_QUEUE, slow_client: str = WEBSOCKET_SLOW_CLIENT,
+                 send_timeout: float = WEBSOCKET_SEND_TIMEOUT):
+        """Initialize the WebSocket server"""
+        if slow_client not in SLOW_CLIENT_POLICIES:
+            raise ValueError(f"Unknown WEBSOCKET_SLOW_CLIENT '{slow_client}', expected one of: "
+                             f"{', '.join(SLOW_CLIENT_POLICIES)}")
+        self.host = host
+        self.port = port
+        self.queue_size = max(1, queue_size)
+        self.slow_client = slow_client
+        self.send_timeout = send_timeout
+        self.clients: Dict[object, _Client] = {}
+        self.is_running = False
+        self.server = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._stop_future: Optional[asyncio.Future] = None
+        self._text_bytes: Optional[bool] = None  # whether send() takes bytes as a text frame
+        self.published = 0
+        self.disconnected_slow = 0
+        self.serialize_seconds = 0.0
+
+    @property
+    def connected_clients(self):
+        return set(self.clients)
+
+    # --- fan-out -------------------------------------------------------------
+
+    def publish(self, message: Dict):
+        """Serialize a message once and queue it for every client; safe from any thread"""
+        if not self.is_running or self.loop is None:
+            return
+        start = time.perf_counter()
+        payload = _encode(message)
+        self.serialize_seconds += time.perf_counter() - start
+        self.published += 1
+        try:
+            self.loop.call_soon_threadsafe(self._fan_out, payload)
+        except RuntimeError:
+            pass  # loop closed during shutdown
+
+    def publish_detections(self, detections: List[Dict]):
+        """Send one cycle's detections (the full current state, so clients may skip cycles)"""
+        self.publish({"type": "detections", "timestamp": time.time(), "vehicle_id": VEHICLE_ID,
+                      "detections": detections})
+
+    def publish_status(self, status: Dict):
+        self.publish({"type": "status", "timestamp": time.time(), "vehicle_id": VEHICLE_ID, "status": status})
+
+    async def broadcast_detections(self, detections: List[Dict]):
+        """Coroutine form of publish_detections for callers already on the server loop"""
+        self.publish_detections(detections)
+
+    def _fan_out(self, payload: bytes):
+        """Queue one payload for every client (runs on the server loop)"""
+        now = time.time()
+        for client in list(self.clients.values()):
+            self._offer(client, payload, now)
+
+    def _offer(self, client: _Client, payload: bytes, now: float):
+        if len(client.queue) >= client.queue_size:
+            if self.slow_client == "disconnect":
+                self._drop(client, f"{len(client.queue)} messages behind")
+                return
+            # Detections messages carry the full state: the newest one supersedes the queued ones
+            client.queue.popleft()
+            client.skipped += 1
+        client.queue.append((now, payload))
+        client.ready.set()
+
+    def _drop(self, client: _Client, reason: str):
+        """Disconnect a client that cannot keep up"""
+        if self.clients.pop(client.websocket, None) is None:
+            return
+        self.disconnected_slow += 1
+        logger.warning(f"🐢 Dropping slow WebSocket client {client.address}: {reason}")
+        client.queue.clear()
+        if client.sender is not None:
+            client.sender.cancel()
+        asyncio.ensure_future(self._close(client.websocket, CLOSE_TOO_SLOW, "too slow"))
+
+    @staticmethod
+    async def _close(websocket, code: int, reason: str):
+        try:
+            await websocket.close(code, reason)
+        except Exception:
+            pass
+
+    async def _send(self, websocket, payload: bytes):
+        """Send JSON bytes as a text frame without re-encoding where websockets allows it"""
+        if self._text_bytes is None:
+            self._text_bytes = "text" in inspect.signature(websocket.send).parameters
+        if self._text_bytes:
+            await websocket.send(payload, text=True)
+        else:
+            await websocket.send(payload.decode("utf-8"))
+
+    async def _sender(self, client: _Client):
+        """Deliver one client's queue in order; a stalled send disconnects the client"""
+        try:
+            while True:
+                await client.ready.wait()
+                while client.queue:
+                    enqueued_at, payload = client.queue.popleft()
+                    try:
+                        await asyncio.wait_for(self._send(client.websocket, payload), self.send_timeout)
+                    except asyncio.TimeoutError:
+                        self._drop(client, f"send stalled for {self.send_timeout:.1f}s")
+                        return
+                    client.sent += 1
+                    client.last_lag_ms = (time.time() - enqueued_at) * 1000
+                client.ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        except Exception as e:
+            logger.error(f"Error sending to WebSocket client {client.address}: {e}")
+
+    # --- connections ---------------------------------------------------------
+
+    async def register_client(self, websocket) -> _Client:
+        """Register a new client connection and start its sender"""
+        client = _Client(websocket, self.queue_size)
+        self.clients[websocket] = client
+        logger.info(f"Client connected. Total clients: {len(self.clients)}")
+        # The welcome message goes through the queue like everything else
+        self._offer(client, _encode({
+            "type": "connection",
+            "status": "connected",
+            "message": "Connected to SafeDetect Blind Spot Detection System"
+        }), time.time())
+        client.sender = asyncio.ensure_future(self._sender(client))
+        return client
+
+    async def unregister_client(self, websocket):
+        """Unregister a client connection"""
+        client = self.clients.pop(websocket, None)
+        if client is not None and client.sender is not None:
+            client.sender.cancel()
+        logger.info(f"Client disconnected. Total clients: {len(self.clients)}")
+
+    async def handle_client(self, websocket, path: str = ""):
+        """Handle individual client connection"""
+        client = await self.register_client(websocket)
+
+        try:
+            async for message in websocket:
+                # Handle incoming messages from clients
+                try:
+                    data = json.loads(message)
+                    await self.process_client_message(client, data)
+                except json.JSONDecodeError:
+                    logger.warning("Received invalid JSON from client")
+                except Exception as e:
+                    logger.error(f"Error processing client message: {e}")
+
+        except websockets.exceptions.ConnectionClosed:
+            logger.info("Client connection closed")
+        except Exception as e:
+            logger.error(f"Error handling client: {e}")
+        finally:
+            await self.unregister_client(websocket)
+
+    async def process_client_message(self, client: _Client, data: Dict):
+        """Process messages received from clients; replies share the client's queue"""
+        message_type = data.get("type", "")
+
+        if message_type == "ping":
+            # Respond to ping with pong
+            response = {
+                "type": "pong",
+                "timestamp": time.time() * 1000
+            }
+        elif message_type == "status":
+            # Send server status
+            response = {
+                "type": "status",
+                "connected_clients": len(self.clients),
+                "server_status": "running"
+            }
+        elif message_type == "command" and data.get("command", "") == "get_config":
+            response = {
+                "type": "config",
+                "blind_spot_zones": BLIND_SPOT_ZONES,
+                "object_colors": {
+                    "car": "green",
+                    "motorcycle": "orange",
+                    "person": "yellow"
+                }
+            }
+        else:
+            logger.warning(f"Unknown message type: {message_type}")
+            return
+        self._offer(client, _encode(response), time.time())
+
+    # --- lifecycle -----------------------------------------------------------
+
+    async def start_server(self):
+        """Start the WebSocket server on the running loop and serve until stopped"""
+        if self.is_running:
+            logger.warning("Server is already running")
+            return
+
+        try:
+            self.loop = asyncio.get_running_loop()
+            self._stop_future = self.loop.create_future()
+            self.server = await serve(
+                self.handle_client,
+                self.host,
+                self.port,
+                ping_interval=20,
+                ping_timeout=10
+            )
+            if self.port == 0:
+                self.port = next(iter(self.server.sockets)).getsockname()[1]
+
+            self.is_running = True
+            self._started.set()
+            logger.info(f"WebSocket server started on ws://{self.host}:{self.port} "
+                        f"(queue {self.queue_size}/client, slow clients: {self.slow_client})")
+
+            # Keep the server running
+            await self._stop_future
+        except Exception as e:
+            logger.error(f"Error starting WebSocket server: {e}")
+            self.is_running = False
+            raise
+        finally:
+            self._started.set()
+            await self._shutdown()
+
+    async def _shutdown(self):
+        self.is_running = False
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        # Close all client connections
+        for websocket in list(self.clients):
+            await self.unregister_client(websocket)
+
+    def start_in_thread(self):
+        """Serve from a dedicated thread and event loop, so callers' loops never run the fan-out"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._started.clear()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.start_server()),
+                                        name="websocket-server", daemon=True)
+        self._thread.start()
+        if not self._started.wait(START_TIMEOUT) or not self.is_running:
+            raise RuntimeError(f"WebSocket server did not start on {self.host}:{self.port}")
+
+    async def stop_server(self):
+        """Stop the WebSocket server (from its own loop)"""
+        if not self.is_running:
+            return
+
+        logger.info("Stopping WebSocket server...")
+        if self._stop_future is not None and not self._stop_future.done():
+            self._stop_future.set_result(None)
+        logger.info("WebSocket server stopped")
+
+    def stop(self, timeout: float = 2.0):
+        """Stop the server from any thread"""
+        loop = self.loop
+        if loop is None or not self.is_running:
+            return
+        future = asyncio.run_coroutine_threadsafe(self.stop_server(), loop)
+        try:
+            future.result(timeout)
+        except Exception:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def get_status(self) -> Dict:
+        """Get server status information, with per-client queue depth, lag and delivery counts"""
+        now = time.time()
+        clients = list(self.clients.values())
+        return {
+            "is_running": self.is_running,
+            "host": self.host,
+            "port": self.port,
+            "connected_clients": len(clients),
+            "published": self.published,
+            "serialize_ms_avg": self.serialize_seconds / self.published * 1000 if self.published else 0.0,
+            "slow_client_policy": self.slow_client,
+            "disconnected_slow": self.disconnected_slow,
+            "clients": {
+                client.address: {
+                    "queued": len(client.queue),
+                    "lag_ms": client.lag_ms(now),
+                    "last_lag_ms": client.last_lag_ms,
+                    "sent": client.sent,
+                    "skipped": client.skipped,
+                    "connected_s": now - client.connected_at,
+                }
+                for client in clients
+            },
+        }
+
+
+async def main():
+    """Main function for testing the WebSocket server"""
+    server = DetectionWebSocketServer()
+
+    try:
+        await server.start_server()
+    except KeyboardInterrupt:
+        logger.info("Shutting down server...")
+        await server.stop_server()
+    except Exception as e:
+        logger.error(f"Server error: {e}")
+
+
+if __name__ == "__main__":
+    # Run the server
+    asyncio.run(main())
@@ -0,0 +1,386 @@
+"""
+Inference Worker Processes for Blind Spot Detection System
+Process-pool inference with shared-memory frame transport and per-worker CPU affinity
+
+Each worker process loads its own backend (see inference_backends) and serves
+a fixed subset of cameras, so an 8-core host can run one camera per core
+instead of sharing one interpreter. The parent copies every frame into a
+shared-memory slot owned by its camera and sends only the slot name and shape
+down a pipe; the worker answers with the (N, 6) box array of that frame. Every
+request carries the sequence number of its round, and replies from an earlier
+round are discarded, so a camera's results can never fall a frame behind.
+"""
+
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Set
+import sys
+import os
+import time
+import cv2
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import (INFERENCE_BACKEND, INFERENCE_WORKERS, INFERENCE_WORKER_CPUS,
+                           INFERENCE_WORKER_THREADS, INFERENCE_WORKER_TIMEOUT)
+from .inference_backends import Result, create_backend
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds a worker may take to import its runtime and load the model
+STARTUP_TIMEOUT = 120.0
+# Seconds to wait for a worker to exit after being asked to stop
+STOP_TIMEOUT = 5.0
+# Seconds before a worker whose restart failed is started again
+RESTART_BACKOFF = 5.0
+
+
+def parse_cpu_sets(spec: str, workers: int, available: Optional[List[int]] = None) -> List[Optional[Set[int]]]:
+    """CPU set per worker from INFERENCE_WORKER_CPUS; None means no pinning.
+
+    "auto" splits the available CPUs into contiguous, even chunks (one CPU per
+    worker, reused round-robin, when there are more workers than CPUs).
+    Explicit sets such as "0-1;2-3" are handed out in order and cycled.
+    """
+    spec = spec.strip()
+    if not spec:
+        return [None] * workers
+    if spec == "auto":
+        if available is None:
+            available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        if not available:
+            return [None] * workers
+        if workers >= len(available):
+            return [{available[i % len(available)]} for i in range(workers)]
+        return [set(int(cpu) for cpu in chunk) for chunk in np.array_split(available, workers)]
+
+    sets = []
+    for group in spec.split(";"):
+        cpus = set()
+        for part in filter(None, (p.strip() for p in group.split(","))):
+            first, _, last = part.partition("-")
+            cpus.update(range(int(first), int(last or first) + 1))
+        if cpus:
+            sets.append(cpus)
+    if not sets:
+        raise ValueError(f"Invalid INFERENCE_WORKER_CPUS: '{spec}'")
+    return [sets[i % len(sets)] for i in range(workers)]
+
+
+def _worker_main(conn, model_path: str, backend_name: str, cpus: Optional[Set[int]], threads: int):
+    """Worker process loop: load the model, then answer inference requests until told to stop"""
+    try:
+        if cpus and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+        if not threads and cpus:
+            threads = len(cpus)
+        if threads:
+            cv2.setNumThreads(threads)
+        backend = create_backend(model_path, backend_name, threads=threads or None)
+    except Exception as e:
+        conn.send(("error", None, f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", backend.name, backend.device, backend.fixed_imgsz))
+
+    slots: Dict[Any, shared_memory.SharedMemory] = {}  # camera key -> attached slot
+    try:
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                break  # Parent went away
+            if request is None:
+                break
+            _, seq, key, name, shape, dtype, imgsz, conf = request
+            try:
+                slot = slots.get(key)
+                if slot is None or slot.name != name:
+                    # The parent replaced the slot after a resolution change
+                    if slot is not None:
+                        slot.close()
+                    slot = slots[key] = shared_memory.SharedMemory(name=name)
+                frame = np.ndarray(shape, dtype=dtype, buffer=slot.buf)
+                data = backend.predict([frame], imgsz, conf)[0].boxes.data
+                del frame  # No view may outlive the mapping
+                conn.send(("ok", seq, key, np.ascontiguousarray(data, dtype=np.float32)))
+            except Exception as e:
+                conn.send(("error", seq, key, f"{type(e).__name__}: {e}"))
+    finally:
+        for slot in slots.values():
+            slot.close()
+
+
+class _Worker:
+    def __init__(self, index: int, cpus: Optional[Set[int]]):
+        """Handle on one worker process and the parent end of its pipe"""
+        self.index = index
+        self.cpus = cpus
+        self.process = None
+        self.conn = None
+        self.restarts = 0
+        self.ready = False  # model loaded and answering requests
+        self.started_at = 0.0
+        self.retry_at = 0.0  # monotonic time a failed restart may be attempted again
+
+    def start(self, context, model_path: str, backend: str, threads: int):
+        """Spawn the process; readiness is awaited separately so workers load in parallel"""
+        self.ready = False
+        self.started_at = time.monotonic()
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child, model_path, backend, self.cpus, threads),
+            name=f"inference-worker-{self.index}", daemon=True,
+        )
+        self.process.start()
+        child.close()
+
+    def receive(self, timeout: float):
+        """Next reply from the worker; raises TimeoutError or EOFError if there is none"""
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"inference worker {self.index} did not answer within {timeout:.0f}s")
+        return self.conn.recv()
+
+    def stop(self, timeout: float = STOP_TIMEOUT):
+        """Ask the process to exit, then terminate it if it does not"""
+        self.ready = False
+        if self.process is None:
+            return
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.conn.close()
+        self.process = None
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+
+class InferenceWorkerPool:
+    name = "workers"
+
+    def __init__(self, model_path: str, workers: int = INFERENCE_WORKERS, backend: str = INFERENCE_BACKEND,
+                 cpus: str = INFERENCE_WORKER_CPUS, threads: int = INFERENCE_WORKER_THREADS,
+                 timeout: float = INFERENCE_WORKER_TIMEOUT):
+        """Pool of inference worker processes behind the backend predict() interface.
+
+        Workers are spawned (never forked, so no torch or capture threads are
+        inherited) and each loads its own model. Cameras are assigned to
+        workers round-robin in the order they are first seen and stay there.
+        A worker that dies or stops answering is restarted on the next call,
+        in the background: its cameras are left out of the results until the
+        new process has loaded its model.
+        """
+        if workers < 1:
+            raise ValueError("InferenceWorkerPool needs at least one worker")
+        self.model_path = model_path
+        self.backend = backend
+        self.threads = threads
+        self.timeout = timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [_Worker(i, cpu_set) for i, cpu_set in enumerate(parse_cpu_sets(cpus, workers))]
+        self._assignment: Dict[Any, _Worker] = {}  # camera key -> worker
+        self._slots: Dict[Any, shared_memory.SharedMemory] = {}  # camera key -> frame slot
+        self._seq = 0  # round number carried by every request and echoed by its reply
+        self.device = 'cpu'
+        self.fixed_imgsz: Optional[int] = None
+
+        start = time.time()
+        for worker in self._workers:
+            worker.start(self._context, model_path, backend, threads)
+        try:
+            for worker in self._workers:
+                self._await_ready(worker)
+        except Exception:
+            self.close()
+            raise
+        logger.info(f"👷 {len(self._workers)} inference workers ready in {time.time() - start:.1f}s | "
+                    f"CPUs: {', '.join(self._describe(w.cpus) for w in self._workers)}")
+
+    @staticmethod
+    def _describe(cpus: Optional[Set[int]]) -> str:
+        return ",".join(str(cpu) for cpu in sorted(cpus)) if cpus else "any"
+
+    def _await_ready(self, worker: _Worker):
+        """Wait for a freshly started worker's model to load and adopt its backend details"""
+        self._adopt(worker, worker.receive(STARTUP_TIMEOUT))
+
+    def _adopt(self, worker: _Worker, reply: tuple):
+        """Take a started worker's ready reply; raises RuntimeError if its model failed to load"""
+        if reply[0] != "ready":
+            raise RuntimeError(f"inference worker {worker.index} failed to start: {reply[2]}")
+        _, backend_name, self.device, self.fixed_imgsz = reply
+        self.name = f"{backend_name} x{len(self._workers)} workers"
+        worker.ready = True
+
+    def _restart(self, worker: _Worker):
+        """Replace a dead or hung worker with a fresh process serving the same cameras, without waiting for it"""
+        logger.warning(f"♻️  Restarting inference worker {worker.index}")
+        worker.stop(timeout=1.0)
+        worker.restarts += 1
+        try:
+            worker.start(self._context, self.model_path, self.backend, self.threads)
+        except Exception as e:
+            logger.error(f"❌ Could not restart inference worker {worker.index}: {e}")
+            self._retry_later(worker)
+
+    def _retry_later(self, worker: _Worker):
+        worker.stop(timeout=1.0)
+        worker.retry_at = time.monotonic() + RESTART_BACKOFF
+
+    def _available(self, worker: _Worker) -> bool:
+        """Whether the worker can take a request now; restarts it in the background when needed.
+
+        Never waits on a model load: a restarted worker's ready reply is picked
+        up by a later call, once the process has sent it.
+        """
+        if worker.ready:
+            if worker.is_alive():
+                return True
+            worker.stop(timeout=1.0)  # Died since its last reply
+        if worker.process is None:
+            if time.monotonic() >= worker.retry_at:
+                self._restart(worker)
+            return False
+        try:
+            if worker.conn.poll(0):
+                self._adopt(worker, worker.conn.recv())
+                logger.info(f"♻️  Inference worker {worker.index} is back")
+                return True
+        except (RuntimeError, EOFError, OSError) as e:
+            logger.error(f"❌ {e or f'inference worker {worker.index} exited while starting'}")
+            self._retry_later(worker)
+            return False
+        if not worker.is_alive() or time.monotonic() - worker.started_at > STARTUP_TIMEOUT:
+            logger.error(f"❌ Inference worker {worker.index} did not come back within {STARTUP_TIMEOUT:.0f}s")
+            self._retry_later(worker)
+        return False
+
+    def _worker_for(self, key) -> _Worker:
+        worker = self._assignment.get(key)
+        if worker is None:
+            worker = self._assignment[key] = self._workers[len(self._assignment) % len(self._workers)]
+        return worker
+
+    def _write(self, key, frame: np.ndarray) -> str:
+        """Copy the frame into its camera's slot, replacing the slot when the frame outgrew it"""
+        slot = self._slots.get(key)
+        if slot is None or slot.size < frame.nbytes:
+            if slot is not None:
+                slot.close()
+                slot.unlink()
+            slot = self._slots[key] = shared_memory.SharedMemory(create=True, size=max(frame.nbytes, 1))
+        np.copyto(np.ndarray(frame.shape, dtype=frame.dtype, buffer=slot.buf), frame)
+        return slot.name
+
+    def predict_cameras(self, frames: Dict[Any, np.ndarray], sizes: Dict[Any, int],
+                        conf: float) -> Dict[Any, List[Result]]:
+        """Infer every camera's frame on its worker in parallel; returns key -> [Result].
+
+        All requests are sent before any reply is read, so workers run
+        concurrently and a worker with several cameras works through them in
+        order. Cameras of a worker that is restarting are left out of the
+        result. Every reply owed is read, even when a send fails partway; raises
+        RuntimeError after the whole round if any camera failed.
+        """
+        self._seq += 1
+        pending: Dict[_Worker, int] = {}
+        errors: List[str] = []
+        try:
+            for key, frame in frames.items():
+                worker = self._worker_for(key)
+                if not self._available(worker):
+                    continue
+                request = ("infer", self._seq, key, self._write(key, frame), frame.shape, frame.dtype.str,
+                           sizes[key], conf)
+                try:
+                    worker.conn.send(request)
+                except (BrokenPipeError, OSError) as e:
+                    # Died after the liveness check: its earlier replies of this round are lost too
+                    errors.append(f"worker {worker.index}: {e or type(e).__name__}")
+                    pending.pop(worker, None)
+                    worker.stop(timeout=1.0)
+                    continue
+                pending[worker] = pending.get(worker, 0) + 1
+        finally:
+            results = self._collect(pending, errors)
+        if errors:
+            raise RuntimeError("inference worker error: " + "; ".join(errors))
+        return results
+
+    def _collect(self, pending: Dict[_Worker, int], errors: List[str]) -> Dict[Any, List[Result]]:
+        """Read the replies each worker owes for this round, discarding any left from an earlier one"""
+        results: Dict[Any, List[Result]] = {}
+        for worker, count in pending.items():
+            while count:
+                try:
+                    status, seq, key, payload = worker.receive(self.timeout)
+                except (TimeoutError, EOFError, OSError) as e:
+                    # Replies still owed by this worker are lost; start it afresh next call
+                    errors.append(f"worker {worker.index}: {e or type(e).__name__}")
+                    worker.stop(timeout=1.0)
+                    break
+                if seq != self._seq:
+                    continue
+                count -= 1
+                if status == "ok":
+                    results[key] = [Result(payload)]
+                else:
+                    errors.append(f"camera {key}: {payload}")
+        return results
+
+    def predict(self, frames: List[np.ndarray], imgsz: int, conf: float) -> List[Result]:
+        """Backend-compatible call: frame i is treated as camera i"""
+        results = self.predict_cameras(dict(enumerate(frames)), {i: imgsz for i in range(len(frames))}, conf)
+        missing = [i for i in range(len(frames)) if i not in results]
+        if missing:
+            raise RuntimeError(f"inference worker restarting, no results for frames {missing}")
+        return [results[i][0] for i in range(len(frames))]
+
+    def warm_up(self, frame: np.ndarray, imgsz: int, conf: float):
+        """Run one inference on every worker at once so none pays lazy initialization on a camera frame"""
+        keys = [("warmup", worker.index) for worker in self._workers]
+        self._seq += 1
+        try:
+            for key, worker in zip(keys, self._workers):
+                worker.conn.send(("infer", self._seq, key, self._write(key, frame), frame.shape, frame.dtype.str,
+                                  imgsz, conf))
+            for worker in self._workers:
+                status, _, _, payload = worker.receive(STARTUP_TIMEOUT)
+                if status != "ok":
+                    raise RuntimeError(f"inference worker {worker.index} warm-up failed: {payload}")
+        finally:
+            for key in keys:
+                slot = self._slots.pop(key, None)
+                if slot is not None:
+                    slot.close()
+                    slot.unlink()
+
+    def get_stats(self) -> Dict:
+        """Per-worker pid, CPU set, restart count and assigned cameras"""
+        return {
+            worker.index: {
+                "pid": worker.process.pid if worker.process else None,
+                "alive": worker.is_alive(),
+                "ready": worker.ready,
+                "cpus": sorted(worker.cpus) if worker.cpus else None,
+                "restarts": worker.restarts,
+                "cameras": [key for key, assigned in self._assignment.items() if assigned is worker],
+            }
+            for worker in self._workers
+        }
+
+    def close(self):
+        """Stop every worker and free the shared-memory slots"""
+        for worker in self._workers:
+            worker.stop()
+        for slot in self._slots.values():
+            slot.close()
+            slot.unlink()
+        self._slots.clear()
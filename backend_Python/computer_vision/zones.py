@@ -0,0 +1,198 @@
+"""
+Blind Spot Zones for Blind Spot Detection System
+Polygon and mask zones compiled into occupancy grids for vectorized membership tests
+
+Every zone (rectangle from BLIND_SPOT_ZONES, polygon or mask image from
+BLIND_SPOT_POLYGONS) is rasterized once into a low-resolution occupancy grid
+plus its summed-area table. Centre-point tests for all boxes of a frame are
+then one fancy-indexing lookup, and the fraction of each box covering the zone
+is four table lookups per box.
+"""
+
+import json
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import sys
+import os
+import cv2
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from shared.config import (BLIND_SPOT_ZONES, BLIND_SPOT_POLYGONS, POSITION_SCALE,
+                           ZONE_GRID_SIZE, ZONE_MIN_OVERLAP)
+
+# Fixed-point fractional bits used when rasterizing polygon vertices
+SUBPIXEL_BITS = 8
+# Polygons are rasterized this many times finer than the grid before pooling
+SUPERSAMPLE = 4
+
+Polygon = List[Tuple[float, float]]
+
+
+def rect_polygon(rect: Dict[str, float]) -> Polygon:
+    """Corner polygon of an {x_min, x_max, y_min, y_max} rectangle"""
+    return [(rect["x_min"], rect["y_min"]), (rect["x_max"], rect["y_min"]),
+            (rect["x_max"], rect["y_max"]), (rect["x_min"], rect["y_max"])]
+
+
+def load_shapes(spec: str = BLIND_SPOT_POLYGONS,
+                rects: Dict[str, Dict[str, float]] = BLIND_SPOT_ZONES) -> Dict[str, Union[Polygon, str]]:
+    """Zone -> polygon or mask path: the rectangles, overridden by BLIND_SPOT_POLYGONS (JSON or JSON file)"""
+    shapes: Dict[str, Union[Polygon, str]] = {zone: rect_polygon(rect) for zone, rect in rects.items()}
+    spec = spec.strip()
+    if spec:
+        if not spec.startswith("{"):
+            with open(spec) as f:
+                spec = f.read()
+        for zone, shape in json.loads(spec).items():
+            shapes[zone] = shape if isinstance(shape, str) else [tuple(point) for point in shape]
+    return shapes
+
+
+class ZoneGrid:
+    def __init__(self, shape: Union[Polygon, str, np.ndarray], size: int = ZONE_GRID_SIZE):
+        """One zone rasterized into a size x size occupancy grid over the normalized frame.
+
+        ``shape`` is a polygon of normalized (x, y) points, a mask image path or
+        a mask array (non-zero = zone). Polygon edges are drawn on top of the
+        fill so every cell the zone touches counts as inside.
+        """
+        self.size = size
+        if isinstance(shape, (str, np.ndarray)):
+            mask = cv2.imread(shape, cv2.IMREAD_GRAYSCALE) if isinstance(shape, str) else shape
+            if mask is None:
+                raise ValueError(f"Cannot read zone mask '{shape}'")
+            if mask.ndim == 3:
+                mask = mask.max(axis=2)
+            # INTER_AREA keeps any cell that contains part of the mask non-zero
+            grid = (cv2.resize((mask > 0).astype(np.uint8) * 255, (size, size),
+                               interpolation=cv2.INTER_AREA) > 0).astype(np.uint8)
+            contours, _ = cv2.findContours(grid, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            self.polygon: Polygon = [
+                (float(x) / size, float(y) / size) for x, y in max(contours, key=cv2.contourArea)[:, 0]
+            ] if contours else []
+        else:
+            self.polygon = [(float(x), float(y)) for x, y in shape]
+            # Rasterize at SUPERSAMPLE x the grid resolution, then mark a cell if any
+            # sub-cell is inside. Sub-cell i spans [i, i + 1) while OpenCV puts
+            # pixel centres on integers, hence the half-pixel shift.
+            fine = size * SUPERSAMPLE
+            points = np.round((np.array(self.polygon, dtype=np.float64) * fine - 0.5) * (1 << SUBPIXEL_BITS))
+            points = points.astype(np.int32).reshape(-1, 1, 2)
+            raster = np.zeros((fine, fine), dtype=np.uint8)
+            cv2.fillPoly(raster, [points], 1, shift=SUBPIXEL_BITS)
+            cv2.polylines(raster, [points], True, 1, shift=SUBPIXEL_BITS)
+            grid = raster.reshape(size, SUPERSAMPLE, size, SUPERSAMPLE).max(axis=(1, 3))
+        self.grid = grid.astype(bool)
+        # Summed-area table with a zero row and column in front
+        self.integral = np.zeros((size + 1, size + 1), dtype=np.int32)
+        self.integral[1:, 1:] = self.grid.cumsum(axis=0).cumsum(axis=1)
+
+    def _cells(self, values: np.ndarray) -> np.ndarray:
+        return np.clip((values * self.size).astype(np.int64), 0, self.size - 1)
+
+    def contains_point(self, x: float, y: float) -> bool:
+        """Scalar test without building arrays"""
+        last = self.size - 1
+        column = min(max(int(x * self.size), 0), last)
+        row = min(max(int(y * self.size), 0), last)
+        return bool(self.grid[row, column])
+
+    def contains(self, points: np.ndarray) -> np.ndarray:
+        """(N, 2) normalized x, y points -> (N,) bool"""
+        return self.grid[self._cells(points[:, 1]), self._cells(points[:, 0])]
+
+    def overlap(self, boxes: np.ndarray) -> np.ndarray:
+        """(N, 4) normalized xyxy boxes -> (N,) fraction of each box's grid cells inside the zone"""
+        x0, y0 = self._cells(boxes[:, 0]), self._cells(boxes[:, 1])
+        x1 = np.maximum(self._cells(boxes[:, 2]), x0) + 1
+        y1 = np.maximum(self._cells(boxes[:, 3]), y0) + 1
+        table = self.integral
+        inside = table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0]
+        return inside / ((x1 - x0) * (y1 - y0))
+
+    def bounds(self) -> Dict[str, float]:
+        """Bounding rectangle of the zone, in the BLIND_SPOT_ZONES format"""
+        if not self.polygon:
+            return {"x_min": 0.0, "x_max": 0.0, "y_min": 0.0, "y_max": 0.0}
+        xs, ys = zip(*self.polygon)
+        return {"x_min": max(0.0, min(xs)), "x_max": min(1.0, max(xs)),
+                "y_min": max(0.0, min(ys)), "y_max": min(1.0, max(ys))}
+
+
+class ZoneMap:
+    def __init__(self, shapes: Optional[Dict[str, Union[Polygon, str, np.ndarray]]] = None,
+                 size: int = ZONE_GRID_SIZE, min_overlap: float = ZONE_MIN_OVERLAP):
+        """Compiled occupancy grids for every blind spot zone"""
+        if shapes is None:
+            shapes = load_shapes()
+        self.zones: Dict[str, ZoneGrid] = {zone: ZoneGrid(shape, size) for zone, shape in shapes.items()}
+        self.min_overlap = min_overlap
+
+    def contains(self, zone: str, x: float, y: float) -> bool:
+        """Single normalized point test, the scalar is_in_blind_spot"""
+        return self.zones[zone].contains_point(x, y)
+
+    def hits(self, zone: str, xyxy: np.ndarray, frame_width: int, frame_height: int,
+             min_overlap: Optional[float] = None) -> np.ndarray:
+        """(N, 4) pixel boxes -> (N,) bool: centre inside the zone, or enough area overlap if min_overlap > 0"""
+        min_overlap = self.min_overlap if min_overlap is None else min_overlap
+        grid = self.zones[zone]
+        scale = np.array([frame_width, frame_height, frame_width, frame_height], dtype=np.float64)
+        boxes = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4) / scale
+        if min_overlap > 0:
+            return grid.overlap(boxes) >= min_overlap
+        centres = np.column_stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2])
+        return grid.contains(centres)
+
+    def contains_any(self, points: np.ndarray) -> np.ndarray:
+        """(N, 2) normalized points -> (N,) bool, inside any zone"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        inside = np.zeros(points.shape[0], dtype=bool)
+        for grid in self.zones.values():
+            inside |= grid.contains(points)
+        return inside
+
+    def bounds(self) -> Dict[str, Dict[str, float]]:
+        """Bounding rectangle of every zone, e.g. for ROI cropping"""
+        return {zone: grid.bounds() for zone, grid in self.zones.items()}
+
+    def draw(self, frame: np.ndarray, color: Tuple[int, int, int] = (0, 0, 255), thickness: int = 2) -> np.ndarray:
+        """Outline every zone on the frame"""
+        height, width = frame.shape[:2]
+        for grid in self.zones.values():
+            if grid.polygon:
+                points = np.array([(x * width, y * height) for x, y in grid.polygon], dtype=np.int32)
+                cv2.polylines(frame, [points.reshape(-1, 1, 2)], True, color, thickness)
+        return frame
+
+
+_default_zones: Optional[ZoneMap] = None
+
+
+def default_zones() -> ZoneMap:
+    """The ZoneMap compiled from the configured zones, built on first use and shared"""
+    global _default_zones
+    if _default_zones is None:
+        _default_zones = ZoneMap()
+    return _default_zones
+
+
+def blind_spot_flags(detections: Sequence[Dict], zone_map: Optional[ZoneMap] = None) -> np.ndarray:
+    """Centre-point zone test for built detection dicts, one grid lookup per zone.
+
+    Uses the normalized centre carried in each detection's world position, for
+    consumers that no longer have the frame size at hand.
+    """
+    zone_map = zone_map or default_zones()
+    flags = np.zeros(len(detections), dtype=bool)
+    by_zone: Dict[str, List[int]] = {}
+    for i, detection in enumerate(detections):
+        zone = detection.get("camera_zone")
+        if zone in zone_map.zones:
+            by_zone.setdefault(zone, []).append(i)
+    for zone, indices in by_zone.items():
+        points = np.array([
+            (detections[i]["position"]["x"] / POSITION_SCALE["x"], detections[i]["position"]["y"] / POSITION_SCALE["y"])
+            for i in indices
+        ], dtype=np.float64)
+        flags[indices] = zone_map.zones[zone].contains(points)
+    return flags
@@ -14,3 +14,5 @@ def pytest_configure(config):
     os.environ.setdefault("KAFKA_PORT", "29092")
     os.environ.setdefault("KAFKA_TOPIC", "detections")
     os.environ.setdefault("DETECTION_SECRET_KEY", "test_secret_key_do_not_use")
+    # No disk outbox unless a test creates one in tmp_path
+    os.environ.setdefault("KAFKA_SPOOL_DIR", "")
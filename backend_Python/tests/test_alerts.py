@@ -0,0 +1,173 @@
+"""
+Unit tests for the alert engine, its hysteresis and tone bank (alerts.py)
+"""
+import sys
+import os
+import time
+from unittest.mock import MagicMock
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision.alerts import (AlertEngine, ToneBank, ZoneHysteresis, build_tone,
+                                                   EVENT_ENTER, EVENT_EXIT, STATE_ALERT, STATE_CLEAR)
+
+
+def _wait_for(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+class TestZoneHysteresis:
+
+    def test_enters_after_consecutive_hits(self):
+        zone = ZoneHysteresis(enter_frames=3, exit_seconds=0.5)
+        assert zone.update(True, 0.0) is None
+        assert zone.update(True, 0.1) is None
+        assert zone.update(True, 0.2) == EVENT_ENTER
+        assert zone.state == STATE_ALERT
+
+    def test_a_miss_restarts_the_enter_count(self):
+        zone = ZoneHysteresis(enter_frames=2, exit_seconds=0.5)
+        zone.update(True, 0.0)
+        zone.update(False, 0.1)
+        assert zone.update(True, 0.2) is None
+        assert zone.update(True, 0.3) == EVENT_ENTER
+
+    def test_exits_only_after_clear_for_hold_time(self):
+        zone = ZoneHysteresis(enter_frames=1, exit_seconds=0.5)
+        assert zone.update(True, 0.0) == EVENT_ENTER
+        assert zone.update(False, 0.2) is None
+        assert zone.update(True, 0.3) is None  # flicker back: hold time restarts
+        assert zone.update(False, 0.7) is None
+        assert zone.update(False, 0.8) == EVENT_EXIT
+        assert zone.state == STATE_CLEAR
+
+    def test_alert_expires_without_results(self):
+        zone = ZoneHysteresis(enter_frames=1, exit_seconds=0.5, stale_seconds=5.0)
+        assert zone.update(True, 0.0) == EVENT_ENTER
+        assert zone.expiry() == 5.0
+        assert zone.expire(4.9) is None
+        assert zone.expire(5.0) == EVENT_EXIT
+        assert zone.state == STATE_CLEAR and zone.expiry() is None
+
+    def test_sparse_results_keep_the_alert(self):
+        # Slow inference, quality strides or motion-gated skips space results out beyond exit_seconds
+        zone = ZoneHysteresis(enter_frames=2, exit_seconds=0.5, stale_seconds=5.0)
+        zone.update(True, 0.0)
+        assert zone.update(True, 0.8) == EVENT_ENTER
+        for now in (1.6, 2.4, 3.2):
+            assert zone.expire(now - 0.01) is None
+            assert zone.update(True, now) is None
+        assert zone.state == STATE_ALERT
+        assert zone.update(False, 4.0) == EVENT_EXIT
+
+
+class TestToneBank:
+
+    def test_stereo_tone_is_panned_and_faded(self):
+        samples = build_tone(800, duration=0.1, sample_rate=8000, channels=2, gains=(1.0, 0.2))
+        assert samples.shape == (800, 2) and samples.dtype == np.int16
+        assert samples[0].tolist() == [0, 0]
+        assert np.abs(samples[:, 1]).max() < np.abs(samples[:, 0]).max() / 2
+
+    def test_mono_tone(self):
+        assert build_tone(600, duration=0.05, sample_rate=8000, channels=1).shape == (400,)
+
+    def test_one_sound_per_zone_rendered_up_front(self):
+        make_sound = MagicMock(side_effect=lambda samples: MagicMock())
+        bank = ToneBank(make_sound, frequencies={'left': 800, 'rear': 600}, duration=0.05, sample_rate=8000)
+        assert make_sound.call_count == 2
+        assert bank.play('left') is True
+        bank.sounds['left'].play.assert_called_once()
+        assert bank.play('right') is False
+
+
+class TestAlertEngine:
+
+    def test_enter_plays_tone_immediately_then_repeats(self):
+        tones = MagicMock()
+        tones.play.return_value = True
+        engine = AlertEngine(tones, enter_frames=1, exit_seconds=1.0, repeat_interval=0.05)
+        engine.start()
+        try:
+            assert engine.observe('left', True, captured_at=time.time()) == EVENT_ENTER
+            assert _wait_for(lambda: engine.tones_played >= 2)
+            tones.play.assert_called_with('left')
+            assert engine.active_zones() == ['left']
+        finally:
+            engine.stop()
+        assert engine.get_stats()['last_latency_ms'] >= 0.0
+
+    def test_tones_stop_after_exit(self):
+        tones = MagicMock()
+        tones.play.return_value = True
+        engine = AlertEngine(tones, enter_frames=1, exit_seconds=0.1, repeat_interval=0.02)
+        engine.start()
+        try:
+            engine.observe('rear', True)
+            assert _wait_for(lambda: engine.tones_played >= 1)
+            # Clear frames keep arriving until the hold time has passed
+            events = []
+            assert _wait_for(lambda: events.append(engine.observe('rear', False)) or EVENT_EXIT in events)
+            played = engine.tones_played
+            time.sleep(0.1)
+            assert engine.tones_played == played
+        finally:
+            engine.stop()
+        assert engine.get_stats()['zones'] == {'rear': STATE_CLEAR}
+
+    def test_zone_of_a_dropped_camera_clears_and_goes_quiet(self):
+        tones = MagicMock()
+        tones.play.return_value = True
+        changes = []
+        engine = AlertEngine(tones, enter_frames=1, exit_seconds=0.05, repeat_interval=0.02,
+                             on_change=lambda zone, event: changes.append((zone, event)), stale_seconds=0.1)
+        engine.start()
+        try:
+            # The camera reports an object once, then stops delivering frames
+            engine.observe('left', True)
+            assert _wait_for(lambda: ('left', EVENT_EXIT) in changes)
+            assert engine.active_zones() == []
+            played = engine.tones_played
+            time.sleep(0.1)
+            assert engine.tones_played == played
+        finally:
+            engine.stop()
+        assert changes == [('left', EVENT_ENTER), ('left', EVENT_EXIT)]
+        assert engine.get_stats()['exits'] == 1
+
+    def test_sparse_results_do_not_restart_the_tone(self):
+        changes = []
+        engine = AlertEngine(None, enter_frames=1, exit_seconds=0.05, stale_seconds=1.0,
+                             on_change=lambda zone, event: changes.append((zone, event)))
+        engine.start()
+        try:
+            for _ in range(3):
+                engine.observe('rear', True)
+                time.sleep(0.1)  # twice exit_seconds between results
+        finally:
+            engine.stop()
+        assert changes == [('rear', EVENT_ENTER)]
+        assert engine.active_zones() == ['rear']
+
+    def test_clear_ends_the_alert_at_once(self):
+        changes = []
+        engine = AlertEngine(None, enter_frames=1, on_change=lambda zone, event: changes.append((zone, event)))
+        engine.observe('left', True)
+        assert engine.clear('left') is True
+        assert engine.clear('left') is False
+        assert engine.clear('right') is False
+        assert changes == [('left', EVENT_ENTER), ('left', EVENT_EXIT)]
+        assert engine.get_stats()['exits'] == 1
+
+    def test_silent_without_tone_bank(self):
+        changes = []
+        engine = AlertEngine(None, enter_frames=2, on_change=lambda zone, event: changes.append((zone, event)))
+        engine.observe('right', True)
+        engine.observe('right', True)
+        assert changes == [('right', EVENT_ENTER)]
+        assert engine.get_stats()['audio'] is False
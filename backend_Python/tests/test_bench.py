@@ -0,0 +1,94 @@
+"""
+Unit tests for the offline replay benchmark (bench.py)
+
+A short clip is written to a temp directory; the inference backend, pygame and
+Kafka are replaced so the replay runs without weights, audio or a broker.
+"""
+import json
+import sys
+import os
+import time
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision import bench
+from backend_Python.computer_vision.latency import LatencyRecorder
+
+CLIP_FRAMES = 12
+
+
+@pytest.fixture()
+def clip(tmp_path):
+    """Write a small MJPG clip whose frames differ from each other"""
+    path = str(tmp_path / 'left.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 48))
+    for i in range(CLIP_FRAMES):
+        writer.write(np.full((48, 64, 3), i * 20, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.fixture()
+def fake_model():
+    """Patch the inference backend and pygame; the model reports no boxes for every frame"""
+    empty = SimpleNamespace(boxes=None)
+    backend = MagicMock(device='cpu', fixed_imgsz=None)
+    backend.name = 'fake'
+    backend.predict.side_effect = lambda frames, imgsz, conf: [empty] * len(frames)
+
+    with patch('backend_Python.computer_vision.multi_camera_detector.create_backend', return_value=backend), \
+         patch('backend_Python.computer_vision.multi_camera_detector.pygame'):
+        yield backend
+
+
+class TestClipReader:
+
+    def test_fast_mode_hands_over_every_frame(self, clip):
+        reader = bench.ClipReader('left', cv2.VideoCapture(clip))
+        reader.start()
+        received = []
+        deadline = time.monotonic() + 5
+        while not reader.drained() and time.monotonic() < deadline:
+            latest = reader.buffer.get_latest()
+            if latest is not None:
+                received.append(latest[2])
+            time.sleep(0.002)
+        reader.stop()
+        assert received == list(range(1, CLIP_FRAMES + 1))
+        assert reader.buffer.dropped == 0
+
+
+class TestMemorySink:
+
+    def test_counts_and_records_delivery(self):
+        sink = bench.MemorySink(latency=LatencyRecorder(window=10))
+        timing = {'left': {'capture': time.time() - 0.02}}
+        sink.send_cycle({'left': [{'object': 'car', 'camera_zone': 'left'}], 'rear': []}, timing=timing)
+        status = sink.get_status()
+        assert status['messages'] == 1
+        assert status['detections'] == 1
+        assert status['bytes'] > 0
+        assert sink.latency.get_stats('left')['end_to_end']['count'] == 1
+
+
+class TestRunBenchmark:
+
+    @pytest.mark.parametrize('pipeline', [False, True])
+    def test_replays_whole_clip(self, clip, fake_model, pipeline):
+        results = bench.run_benchmark({'left': clip}, pipeline=pipeline, motion_gating=False, max_seconds=20)
+        assert results['throughput']['frames_read'] == CLIP_FRAMES
+        assert results['throughput']['cycles'] > 0
+        assert results['config']['pipeline'] is pipeline
+        assert results['resources']['max_rss_mb'] > 0
+        assert 'inference' in results['latency_ms']['left']
+        json.dumps(results)
+
+    def test_unknown_mode_rejected(self, clip):
+        with pytest.raises(ValueError):
+            bench.run_benchmark({'left': clip}, mode='slow')
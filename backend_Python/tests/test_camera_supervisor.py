@@ -0,0 +1,232 @@
+"""
+Unit tests for concurrent camera open and reconnection (camera_supervisor.py)
+"""
+import sys
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision.camera_supervisor import CameraSupervisor, open_capture
+from backend_Python.computer_vision.capture import CaptureManager
+
+CONFIG = {
+    'left': {'camera_id': 'good', 'backend': 'opencv'},
+    'right': {'camera_id': 'good', 'backend': 'opencv'},
+    'rear': {'camera_id': 'slow', 'backend': 'opencv'},
+}
+
+
+class FakeCapture:
+    """cv2.VideoCapture stand-in; sources named 'slow' hang on open, 'dead' never open."""
+
+    opens = {}
+
+    def __init__(self, source, *args):
+        FakeCapture.opens[source] = FakeCapture.opens.get(source, 0) + 1
+        self.source = source
+        self.released = False
+        self.fail_reads = False
+        self.unblock = None  # set to an Event to hang reads until it is set
+        self.reading = threading.Event()
+        if source == 'slow':
+            time.sleep(0.5)
+
+    def set(self, prop, value):
+        return True
+
+    def isOpened(self):
+        return self.source != 'dead'
+
+    def read(self, image=None):
+        if self.unblock is not None:
+            self.reading.set()
+            self.unblock.wait()
+            assert not self.released, 'released during a read'
+        time.sleep(0.002)
+        if self.fail_reads:
+            return False, None
+        if image is None:
+            image = np.empty((4, 4, 3), dtype=np.uint8)
+        image.fill(7)
+        return True, image
+
+    def release(self):
+        self.released = True
+
+
+@pytest.fixture(autouse=True)
+def fake_cv2():
+    FakeCapture.opens = {}
+    with patch('cv2.VideoCapture', FakeCapture):
+        yield
+
+
+def _supervisor(config=CONFIG, **kwargs):
+    changes = []
+    capture = CaptureManager()
+    options = dict(open_timeout=0.1, retry_initial=0.05, retry_max=0.2, stall_timeout=0.3,
+                   frozen_frames=5, frozen_seconds=0.05, interval=0.02)
+    options.update(kwargs)
+    supervisor = CameraSupervisor(capture, lambda *change: changes.append(change), camera_config=config, **options)
+    return supervisor, capture, changes
+
+
+class TestOpenCapture:
+
+    def test_opened_capture_is_returned(self):
+        assert isinstance(open_capture('good', timeout=1.0, backend='opencv'), FakeCapture)
+
+    def test_source_that_never_opens(self):
+        assert open_capture('dead', timeout=1.0, backend='opencv') is None
+
+    def test_slow_open_is_abandoned(self):
+        start = time.time()
+        assert open_capture('slow', timeout=0.05, backend='opencv') is None
+        assert time.time() - start < 0.3
+
+
+class TestCameraSupervisor:
+
+    def test_sources_open_concurrently_within_the_timeout(self):
+        supervisor, capture, changes = _supervisor()
+        start = time.time()
+        assert supervisor.open_all() == {'good': True, 'slow': False}
+        assert time.time() - start < 0.4
+        # The healthy source reads frames without waiting for the slow one
+        assert set(capture.readers) == {'good'}
+        assert ('slow', 'error', None) in changes
+        capture.stop()
+
+    def test_failed_source_is_retried_with_backoff(self):
+        supervisor, capture, _ = _supervisor({'left': {'camera_id': 'dead', 'backend': 'opencv'}})
+        supervisor.open_all()
+        assert supervisor.get_stats()['dead']['retry_in_s'] == pytest.approx(0.05, abs=0.05)
+        for _ in range(3):
+            time.sleep(0.25)
+            supervisor.check()
+            time.sleep(0.05)
+        stats = supervisor.get_stats()['dead']
+        assert FakeCapture.opens['dead'] >= 3
+        assert stats['status'] == 'error' and stats['failures'] >= 3
+        capture.stop()
+
+    def test_stalled_source_reconnects(self):
+        supervisor, capture, changes = _supervisor({'left': {'camera_id': 'good', 'backend': 'opencv'}})
+        supervisor.open_all()
+        reader = capture.readers['good']
+        reader.cap.fail_reads = True
+        time.sleep(0.4)
+        supervisor.check()
+        assert ('good', 'reconnecting', None) in changes
+        assert reader.cap.released and not reader.is_alive()
+        time.sleep(0.1)
+        supervisor.check()
+        time.sleep(0.1)
+        assert changes[-1][:2] == ('good', 'available')
+        assert capture.readers['good'] is not reader
+        assert supervisor.get_stats()['good']['reconnects'] == 1
+        capture.stop()
+
+    def test_stalled_read_is_not_released_under_the_reader(self):
+        supervisor, capture, changes = _supervisor({'left': {'camera_id': 'good', 'backend': 'opencv'}})
+        supervisor.open_all()
+        reader = capture.readers['good']
+        cap = reader.cap
+        cap.unblock = threading.Event()
+        assert cap.reading.wait(1.0)
+        time.sleep(0.4)
+        with patch.object(reader, 'join'):  # skip the 2s join timeout
+            supervisor.check()
+        assert ('good', 'reconnecting', None) in changes
+        # The reader is still inside cap.read(): the capture must stay open
+        assert reader.is_alive() and not cap.released
+        cap.unblock.set()
+        reader.join(1.0)
+        assert not reader.is_alive() and cap.released
+        capture.stop()
+
+    def test_stall_disconnects_back_off_until_healthy(self):
+        supervisor, capture, changes = _supervisor({'left': {'camera_id': 'good', 'backend': 'opencv'}},
+                                                   retry_max=1.0, healthy_reset=0.2)
+        supervisor.open_all()
+        delays = []
+        for _ in range(3):
+            capture.readers['good'].cap.fail_reads = True
+            time.sleep(0.35)
+            supervisor.check()
+            delays.append(supervisor.get_stats()['good']['retry_in_s'])
+            time.sleep(delays[-1] + 0.02)
+            supervisor.check()
+            time.sleep(0.05)
+            assert changes[-1][:2] == ('good', 'available')
+        assert delays == pytest.approx([0.05, 0.1, 0.2], abs=0.02)
+        # Healthy long enough: the next stall starts from the initial delay again
+        time.sleep(0.25)
+        supervisor.check()
+        assert supervisor.get_stats()['good']['failures'] == 0
+        capture.stop()
+
+    def test_frozen_stream_reconnects(self):
+        supervisor, capture, changes = _supervisor({'left': {'camera_id': 'good', 'backend': 'opencv'}})
+        supervisor.open_all()
+        for _ in range(5):
+            supervisor.observe('good', 'same-hash')
+            time.sleep(0.02)
+        supervisor.check()
+        assert changes[-1] == ('good', 'reconnecting', None)
+        assert 'frozen' in supervisor.get_stats()['good']['last_error']
+        capture.stop()
+
+    def test_uniform_image_is_not_frozen_within_the_window(self):
+        supervisor, capture, changes = _supervisor({'left': {'camera_id': 'good', 'backend': 'opencv'}},
+                                                   frozen_seconds=10.0)
+        supervisor.open_all()
+        for _ in range(10):
+            supervisor.observe('good', 'black-frame')
+            time.sleep(0.01)
+        supervisor.check()
+        assert changes[-1][:2] == ('good', 'available')
+        capture.stop()
+
+    def test_repeats_without_new_reader_frames_are_not_frozen(self):
+        supervisor, capture, changes = _supervisor({'left': {'camera_id': 'good', 'backend': 'opencv'}})
+        supervisor.open_all()
+        cap = capture.readers['good'].cap
+        cap.unblock = threading.Event()
+        assert cap.reading.wait(1.0)
+        for _ in range(10):
+            supervisor.observe('good', 'same-hash')
+            time.sleep(0.01)
+        supervisor.check()
+        assert changes[-1][:2] == ('good', 'available')
+        cap.unblock.set()
+        capture.stop()
+
+    def test_changing_hashes_are_healthy(self):
+        supervisor, capture, changes = _supervisor({'left': {'camera_id': 'good', 'backend': 'opencv'}})
+        supervisor.open_all()
+        for i in range(20):
+            supervisor.observe('good', str(i % 2))
+        supervisor.check()
+        assert changes[-1][:2] == ('good', 'available')
+        capture.stop()
+
+    def test_background_thread_reconnects(self):
+        supervisor, capture, changes = _supervisor({'left': {'camera_id': 'good', 'backend': 'opencv'}})
+        supervisor.open_all()
+        supervisor.start()
+        try:
+            capture.readers['good'].cap.fail_reads = True
+            deadline = time.time() + 3
+            while supervisor.get_stats()['good']['reconnects'] == 0 and time.time() < deadline:
+                time.sleep(0.02)
+            assert supervisor.get_stats()['good']['reconnects'] >= 1
+        finally:
+            supervisor.stop()
+            capture.stop()
@@ -0,0 +1,131 @@
+"""
+Unit tests for the threaded camera capture layer (capture.py)
+"""
+import sys
+import os
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision.capture import LatestFrameBuffer, CaptureManager
+
+
+class FakeCapture:
+    """Stands in for cv2.VideoCapture, yielding numbered frames."""
+
+    def __init__(self, frames=None):
+        self.count = 0
+        self.frames = frames
+
+    def read(self, image=None):
+        if self.frames is not None and self.count >= self.frames:
+            time.sleep(0.001)
+            return False, None
+        self.count += 1
+        time.sleep(0.001)
+        # Like cv2.VideoCapture.read, decode into the given array when one is passed
+        if image is None:
+            image = np.empty((4, 4, 3), dtype=np.uint8)
+        image.fill(self.count % 255)
+        return True, image
+
+
+class TestLatestFrameBuffer:
+
+    def test_empty_buffer_returns_none(self):
+        assert LatestFrameBuffer(2).get_latest() is None
+
+    def test_returns_newest_frame_and_counts_drops(self):
+        buf = LatestFrameBuffer(2)
+        for i in range(5):
+            buf.put(np.full((2, 2), i, dtype=np.uint8), time.time())
+        frame, _, seq = buf.get_latest()
+        assert frame[0, 0] == 4
+        assert seq == 5
+        # Three evicted on put, one discarded on get
+        assert buf.dropped == 4
+
+    def test_frame_is_handed_out_once(self):
+        buf = LatestFrameBuffer(2)
+        buf.put(np.zeros((2, 2)), time.time())
+        assert buf.get_latest() is not None
+        assert buf.get_latest() is None
+
+
+class TestCaptureManager:
+
+    def test_shared_source_gets_single_reader(self):
+        manager = CaptureManager()
+        cap = FakeCapture()
+        r1 = manager.add_source(0, cap)
+        r2 = manager.add_source(0, cap)
+        assert r1 is r2
+        assert len(manager.readers) == 1
+
+    def test_reader_delivers_frames_and_stats(self):
+        manager = CaptureManager(buffer_size=1)
+        manager.add_source('left.mp4', FakeCapture())
+        manager.start()
+        try:
+            deadline = time.time() + 2.0
+            latest = None
+            while latest is None and time.time() < deadline:
+                latest = manager.get_latest('left.mp4')
+                time.sleep(0.005)
+            assert latest is not None
+            stats = manager.get_stats()['left.mp4']
+            assert stats['frames'] >= 1
+            assert stats['age_ms'] is not None
+        finally:
+            manager.stop()
+
+    def test_unknown_source_returns_none(self):
+        assert CaptureManager().get_latest(7) is None
+
+    def test_failed_reads_are_counted(self):
+        manager = CaptureManager()
+        reader = manager.add_source(1, FakeCapture(frames=0))
+        manager.start()
+        time.sleep(0.05)
+        manager.stop()
+        assert reader.read_failures > 0
+
+    def test_reader_reuses_frames_once_released(self):
+        manager = CaptureManager(buffer_size=1)
+        reader = manager.add_source(0, FakeCapture())
+        manager.start()
+        try:
+            deadline = time.time() + 2.0
+            taken = 0
+            while taken < 50 and time.time() < deadline:
+                latest = manager.get_latest(0)
+                if latest is not None:
+                    taken += 1
+                    manager.release(0, latest[0])
+                time.sleep(0.002)
+        finally:
+            manager.stop()
+        assert taken == 50
+        # Only the first few reads allocate; afterwards the pool recycles them
+        assert reader.get_stats()['allocations'] <= 4
+
+    def test_frames_held_by_consumers_are_never_decoded_into(self):
+        manager = CaptureManager(buffer_size=1)
+        manager.add_source(0, FakeCapture())
+        manager.start()
+        held = []
+        try:
+            deadline = time.time() + 2.0
+            while len(held) < 10 and time.time() < deadline:
+                latest = manager.get_latest(0)
+                if latest is not None:
+                    held.append((latest[0], latest[0].copy()))
+                time.sleep(0.002)
+        finally:
+            manager.stop()
+        assert len(held) == 10
+        # Nothing was released: every frame still holds the pixels it was handed out with
+        assert len({id(frame) for frame, _ in held}) == 10
+        assert all(np.array_equal(frame, snapshot) for frame, snapshot in held)
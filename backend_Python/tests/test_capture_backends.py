@@ -0,0 +1,169 @@
+"""
+Unit tests for the capture backend layer (capture_backends.py)
+"""
+import sys
+import os
+import threading
+from unittest.mock import MagicMock, patch
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision import capture_backends
+from backend_Python.computer_vision.capture_backends import (ResizingCapture, create_capture, gstreamer_pipeline,
+                                                             resolve_backend, source_kind)
+
+
+@pytest.fixture
+def clip(tmp_path):
+    """A 10-frame 320x240 MJPEG clip whose frame i is filled with 20 * i"""
+    path = str(tmp_path / 'clip.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 15, (320, 240))
+    for i in range(10):
+        writer.write(np.full((240, 320, 3), 20 * i, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+class TestSourceSelection:
+
+    @pytest.mark.parametrize('source, kind', [
+        (0, 'usb'), (-1, 'csi'), ('csi', 'csi'), ('/dev/video2', 'usb'),
+        ('rtsp://10.0.0.5:554/stream', 'rtsp'), ('https://cam/feed.mjpg', 'http'),
+        ('/app/videos/left.mp4', 'file'), ('videotestsrc ! appsink', 'pipeline'),
+    ])
+    def test_source_kind(self, source, kind):
+        assert source_kind(source) == kind
+
+    def test_auto_backend_depends_on_gstreamer(self):
+        with patch.object(capture_backends, 'has_gstreamer', return_value=True):
+            assert resolve_backend('rtsp://cam/stream', 'auto') == 'gstreamer'
+        with patch.object(capture_backends, 'has_gstreamer', return_value=False):
+            assert resolve_backend('rtsp://cam/stream', 'auto') == 'ffmpeg'
+        assert resolve_backend('/videos/left.mp4', 'auto') == 'ffmpeg'
+        assert resolve_backend(0, 'auto') == 'opencv'
+        assert resolve_backend(-1, 'auto') == 'gstreamer'
+        assert resolve_backend(0, 'FFmpeg') == 'ffmpeg'
+
+    def test_unknown_backend_rejected(self):
+        with pytest.raises(ValueError):
+            resolve_backend(0, 'directshow')
+
+    def test_gstreamer_without_support_raises(self):
+        with patch.object(capture_backends, 'has_gstreamer', return_value=False):
+            with pytest.raises(RuntimeError):
+                create_capture(-1, 'gstreamer')
+
+
+class TestGstreamerPipeline:
+
+    def test_rtsp_pipeline_is_low_latency_and_scaled(self):
+        pipeline = gstreamer_pipeline('rtsp://cam/stream', 416, 320, decoder='decodebin')
+        assert pipeline.startswith('rtspsrc location=rtsp://cam/stream latency=0 drop-on-latency=true')
+        assert 'video/x-raw,format=BGR,width=416,height=320' in pipeline
+        assert pipeline.endswith('appsink drop=true max-buffers=1 sync=false')
+
+    def test_csi_pipeline_uses_libcamera(self):
+        pipeline = gstreamer_pipeline(-1, 640, 480, 15)
+        assert pipeline.startswith('libcamerasrc ! video/x-raw,width=640,height=480,framerate=15/1')
+        assert 'format=BGR' in pipeline and 'drop=true' in pipeline
+
+    def test_file_pipeline_keeps_every_frame(self):
+        pipeline = gstreamer_pipeline('/videos/left.mp4', 640, 480)
+        assert pipeline.startswith('filesrc location=/videos/left.mp4 ! decodebin')
+        assert 'drop=true' not in pipeline
+
+    def test_custom_pipeline_passes_through(self):
+        assert gstreamer_pipeline('videotestsrc ! appsink') == 'videotestsrc ! appsink'
+
+    @pytest.mark.skipif(not capture_backends.has_gstreamer(), reason='OpenCV built without GStreamer')
+    def test_file_pipeline_decodes_scaled_bgr(self, clip):
+        cap = create_capture(clip, 'gstreamer', width=160, height=120)
+        try:
+            ret, frame = cap.read()
+            assert ret and frame.shape == (120, 160, 3)
+        finally:
+            cap.release()
+
+
+class TestFfmpegBackend:
+
+    def test_file_frames_are_resized_into_the_callers_buffer(self, clip):
+        cap = create_capture(clip, 'ffmpeg', width=160, height=120, timeout=2.0)
+        try:
+            assert isinstance(cap, ResizingCapture) and cap.isOpened()
+            ret, first = cap.read()
+            assert ret and first.shape == (120, 160, 3)
+            buffer = np.empty((120, 160, 3), dtype=np.uint8)
+            ret, second = cap.read(buffer)
+            assert ret and second is buffer
+            assert abs(second.mean() - 20) <= 3
+            count = 2
+            while cap.read(buffer)[0]:
+                count += 1
+            assert count == 10
+        finally:
+            cap.release()
+
+    def test_native_size_passes_straight_through(self, clip):
+        cap = create_capture(clip, 'ffmpeg', width=320, height=240, timeout=2.0)
+        try:
+            ret, first = cap.read()
+            assert ret and first.shape == (240, 320, 3)
+            buffer = np.empty_like(first)
+            ret, second = cap.read(buffer)
+            assert ret and second is buffer
+        finally:
+            cap.release()
+
+    def test_network_options_are_only_set_while_a_stream_opens(self, clip):
+        seen = {}
+
+        def open_capture(source, *args):
+            seen[source] = os.environ.get(capture_backends.FFMPEG_OPTIONS_ENV)
+            return MagicMock()
+
+        with patch.dict(os.environ), patch('cv2.VideoCapture', side_effect=open_capture):
+            os.environ.pop(capture_backends.FFMPEG_OPTIONS_ENV, None)
+            create_capture('rtsp://cam/stream', 'ffmpeg')
+            create_capture(clip, 'ffmpeg')
+            create_capture(clip, 'opencv')
+            assert capture_backends.FFMPEG_OPTIONS_ENV not in os.environ
+        assert seen == {'rtsp://cam/stream': capture_backends.FFMPEG_CAPTURE_OPTIONS, clip: None}
+
+    def test_file_open_waits_for_a_network_open_in_progress(self, clip):
+        opening, release = threading.Event(), threading.Event()
+        seen = []
+
+        def open_capture(source, *args):
+            if source.startswith('rtsp'):
+                opening.set()
+                release.wait(2.0)
+            else:
+                seen.append(os.environ.get(capture_backends.FFMPEG_OPTIONS_ENV))
+            return MagicMock()
+
+        with patch.dict(os.environ), patch('cv2.VideoCapture', side_effect=open_capture):
+            os.environ.pop(capture_backends.FFMPEG_OPTIONS_ENV, None)
+            network = threading.Thread(target=create_capture, args=('rtsp://cam/stream', 'ffmpeg'))
+            network.start()
+            assert opening.wait(2.0)
+            file_open = threading.Thread(target=create_capture, args=(clip, 'ffmpeg'))
+            file_open.start()
+            file_open.join(0.1)
+            assert file_open.is_alive() and seen == []
+            release.set()
+            network.join(2.0)
+            file_open.join(2.0)
+        assert seen == [None]
+
+    def test_opencv_backend_keeps_source_size(self, clip):
+        cap = create_capture(clip, 'opencv', width=160, height=120)
+        try:
+            ret, frame = cap.read()
+            assert ret and frame.shape == (240, 320, 3)
+        finally:
+            cap.release()
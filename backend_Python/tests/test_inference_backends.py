@@ -0,0 +1,88 @@
+"""
+Unit tests for the inference backends (inference_backends.py)
+"""
+import sys
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision import inference_backends as ib
+
+
+def prediction(boxes, num_classes=80):
+    """Build a (4 + classes, anchors) YOLOv8 output from (cx, cy, w, h, score, cls) rows"""
+    out = np.zeros((4 + num_classes, len(boxes)), dtype=np.float32)
+    for i, (cx, cy, w, h, score, cls) in enumerate(boxes):
+        out[:4, i] = (cx, cy, w, h)
+        out[4 + cls, i] = score
+    return out
+
+
+class TestDecoding:
+
+    def test_nms_suppresses_overlaps_within_class_only(self):
+        pred = prediction([
+            (50, 50, 40, 40, 0.9, 2),
+            (52, 50, 40, 40, 0.8, 2),   # same class, overlapping: suppressed
+            (52, 50, 40, 40, 0.7, 0),   # other class: kept
+            (200, 200, 20, 20, 0.3, 2),  # below confidence
+        ])
+        data = ib.decode_predictions(pred, conf=0.5, iou_threshold=0.7)
+        assert data.shape == (2, 6)
+        assert data[:, 5].tolist() == [2, 0]
+        assert data[0, :4].tolist() == pytest.approx([30, 30, 70, 70])
+
+    def test_no_boxes_above_confidence(self):
+        data = ib.decode_predictions(prediction([(50, 50, 10, 10, 0.1, 2)]), conf=0.5, iou_threshold=0.7)
+        assert data.shape == (0, 6)
+
+    def test_scale_boxes_undoes_letterbox(self):
+        data = np.array([[100, 90, 200, 140, 0.9, 2]], dtype=np.float32)
+        ib.scale_boxes(data, ratio=0.5, pad=(0, 40), shape=(480, 640))
+        assert data[0, :4].tolist() == pytest.approx([200, 100, 400, 200])
+
+
+class TestBackendSelection:
+
+    def test_auto_picks_by_extension(self):
+        with patch.dict(ib.BACKENDS, {'onnx': lambda path: ('onnx', path),
+                                      'ultralytics': lambda path: ('ultralytics', path)}):
+            assert ib.create_backend('models/yolov8n.onnx', 'auto') == ('onnx', 'models/yolov8n.onnx')
+            assert ib.create_backend('yolov8n.pt', 'auto') == ('ultralytics', 'yolov8n.pt')
+            assert ib.create_backend('yolov8n.pt', 'ONNX')[0] == 'onnx'
+
+    def test_unknown_backend_rejected(self):
+        with pytest.raises(ValueError):
+            ib.create_backend('yolov8n.pt', 'tensorrt')
+
+
+class TestOnnxBackend:
+
+    def test_static_model_end_to_end(self, tmp_path):
+        onnx = pytest.importorskip('onnx')
+        pytest.importorskip('onnxruntime')
+        from onnx import helper, TensorProto, numpy_helper
+
+        # A static 1x3x64x64 "model" that always predicts one car centred in the letterbox
+        const = numpy_helper.from_array(prediction([(32, 32, 16, 16, 0.9, 2)])[None], name='pred')
+        graph = helper.make_graph(
+            [helper.make_node('Constant', [], ['output0'], value=const)], 'fake_yolo',
+            [helper.make_tensor_value_info('images', TensorProto.FLOAT, [1, 3, 64, 64])],
+            [helper.make_tensor_value_info('output0', TensorProto.FLOAT, [1, 84, 1])],
+        )
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+        model.ir_version = 8
+        path = str(tmp_path / 'fake.onnx')
+        onnx.save(model, path)
+
+        backend = ib.create_backend(path)
+        assert backend.name == 'onnx' and backend.fixed_imgsz == 64 and not backend.batched
+        frames = [np.zeros((48, 64, 3), dtype=np.uint8), np.zeros((96, 128, 3), dtype=np.uint8)]
+        results = backend.predict(frames, imgsz=416, conf=0.5)
+        assert len(results) == 2 and len(results[0].boxes) == 1
+        assert results[0].boxes.data[0].tolist() == pytest.approx([24, 16, 40, 32, 0.9, 2])
+        assert results[1].boxes.data[0, :4].tolist() == pytest.approx([48, 32, 80, 64])
@@ -0,0 +1,86 @@
+"""
+Unit tests for detection integrity signing and frame fingerprints (integrity.py)
+"""
+import hashlib
+import hmac
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision import integrity
+from backend_Python.computer_vision.integrity import FrameHasher, Signer
+
+
+class TestSigner:
+
+    def test_prepared_key_matches_fresh_hmac(self):
+        signer = Signer(b'secret')
+        for data in (b'', b'first', b'second'):
+            assert signer.hexdigest(data) == hmac.new(b'secret', data, hashlib.sha256).hexdigest()
+
+    def test_key_is_read_once(self, monkeypatch):
+        monkeypatch.setenv('DETECTION_SECRET_KEY', 'before')
+        signer = Signer()
+        monkeypatch.setenv('DETECTION_SECRET_KEY', 'after')
+        assert signer.hexdigest(b'x') == hmac.new(b'before', b'x', hashlib.sha256).hexdigest()
+
+    def test_record_round_trip(self):
+        signer = Signer(b'secret')
+        headers = [('content-type', b'application/json'), signer.record_header(b'{"detections":[]}')]
+        assert integrity.verify_record(b'{"detections":[]}', headers, signer)
+        assert not integrity.verify_record(b'{"detections":[1]}', headers, signer)
+        assert not integrity.verify_record(b'{"detections":[]}', headers[:1], signer)
+        assert not integrity.verify_record(b'{"detections":[]}', None, signer)
+
+    def test_detection_round_trip(self):
+        signer = Signer(b'secret')
+        detection = {'object': 'car', 'confidence': 0.9, 'camera_zone': 'left', 'timestamp': 1.5}
+        detection['integrity_hmac'] = signer.sign_detection(detection)
+        assert len(detection['integrity_hmac']) == 16
+        assert signer.verify_detection(detection)
+        detection['confidence'] = 0.1
+        assert not signer.verify_detection(detection)
+
+
+class TestFrameHasher:
+
+    def setup_method(self):
+        self.frame = np.random.RandomState(0).randint(0, 255, (480, 640, 3), dtype=np.uint8)
+
+    def test_md5_matches_original_frame_hash(self):
+        expected = hashlib.md5(self.frame[::8, ::8].tobytes()).hexdigest()
+        hasher = FrameHasher('md5')
+        assert hasher.hexdigest('left', self.frame) == expected
+        assert hasher.hexdigest('left', self.frame) == expected
+
+    def test_blake2b_is_a_16_char_fingerprint_of_the_sample(self):
+        expected = hashlib.blake2b(self.frame[::8, ::8].tobytes(), digest_size=8).hexdigest()
+        assert FrameHasher('blake2b').hexdigest(0, self.frame) == expected
+        assert FrameHasher('blake2b').hexdigest(0, self.frame[::-1]) != expected
+
+    def test_xxh3_when_installed(self):
+        xxhash = pytest.importorskip('xxhash')
+        expected = xxhash.xxh3_64_hexdigest(self.frame[::8, ::8].tobytes())
+        assert FrameHasher('auto').hexdigest(0, self.frame) == expected
+
+    def test_odd_frame_sizes_hash_the_same_sample(self):
+        frame = self.frame[:475, :633]
+        expected = hashlib.md5(frame[::8, ::8].tobytes()).hexdigest()
+        assert FrameHasher('md5').hexdigest(0, frame) == expected
+
+    def test_unknown_algorithm_rejected(self):
+        with pytest.raises(ValueError):
+            FrameHasher('crc32')
+
+
+class TestBenchmark:
+
+    def test_compare_integrity_reports_every_variant(self):
+        results = integrity.compare_integrity(boxes_per_zone=(1,), iterations=2)
+        assert set(results['signing']['3_boxes']) == {
+            'per_detection_legacy', 'per_detection_prepared', 'per_message'}
+        assert {'md5_tobytes_legacy', 'blake2b', 'md5'} <= set(results['frame_hash'])
@@ -0,0 +1,103 @@
+"""
+Unit tests for the consumer-group reader and local stand-in broker (kafka_consumer.py)
+"""
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from kafka.partitioner import murmur2
+
+from backend_Python.computer_vision.integrity import Signer
+from backend_Python.computer_vision.kafka_consumer import (DetectionReader, LocalBroker, partition_for,
+                                                           run_scaling_benchmark)
+from backend_Python.computer_vision.kafka_producer import DetectionKafkaProducer
+
+
+def _producer(broker, vehicle_id='truck-1', signer=None):
+    producer = DetectionKafkaProducer(vehicle_id=vehicle_id, key_mode='zone', signer=signer)
+    producer.producer, producer.is_running = broker, True
+    return producer
+
+
+def _cycle(zones=('left', 'right', 'rear'), index=0):
+    return {zone: [{'object': 'car', 'camera_zone': zone, 'cycle': index}] for zone in zones}
+
+
+class TestLocalBroker:
+
+    def test_partition_matches_kafka_default_partitioner(self):
+        key = b'truck-1:left'
+        assert partition_for(key, 6) == (murmur2(key) & 0x7FFFFFFF) % 6
+
+    def test_zone_records_stay_on_their_key_partition(self):
+        broker = LocalBroker(6)
+        producer = _producer(broker)
+        for i in range(3):
+            producer.send_cycle(_cycle(index=i))
+        consumer = broker.consumer('g')
+        batch = consumer.poll(max_records=100)
+        by_key = {}
+        for records in batch.values():
+            for record in records:
+                by_key.setdefault(record.key, set()).add(record.partition)
+        assert set(by_key) == {b'truck-1:left', b'truck-1:right', b'truck-1:rear'}
+        assert all(len(partitions) == 1 for partitions in by_key.values())
+
+    def test_group_members_split_the_partitions(self):
+        broker = LocalBroker(6)
+        first, second = broker.consumer('g'), broker.consumer('g')
+        assert sorted(first.assigned + second.assigned) == list(range(6))
+        assert not set(first.assigned) & set(second.assigned)
+        second.close()
+        assert first.assigned == list(range(6))
+
+    def test_groups_read_independently(self):
+        broker = LocalBroker(2)
+        _producer(broker).send_cycle(_cycle())
+        assert broker.lag('a') == 3
+        broker.consumer('a').poll(max_records=10)
+        assert broker.lag('a') == 0
+        assert sum(len(r) for r in broker.consumer('b').poll(max_records=10).values()) == 3
+
+
+class TestDetectionReader:
+
+    def test_reads_and_decodes_in_order(self):
+        broker = LocalBroker(4)
+        producer = _producer(broker)
+        for i in range(5):
+            producer.send_cycle(_cycle(('left',), index=i))
+        seen = []
+        reader = DetectionReader(broker.consumer('g'), lambda record, message: seen.append(message))
+        assert reader.poll_once(max_records=100) == 5
+        assert [m['detections'][0]['cycle'] for m in seen] == list(range(5))
+        assert seen[0]['vehicle_id'] == 'truck-1'
+        assert reader.get_stats()['out_of_order'] == 0
+
+    def test_signature_is_checked(self):
+        broker = LocalBroker(1)
+        _producer(broker, signer=Signer(b'key')).send_cycle(_cycle(('left',)))
+        record = next(iter(broker.consumer('peek').poll().values()))[0]
+        broker.send('detections', value=record.value + b' ', key='truck-1:left', headers=record.headers)
+        reader = DetectionReader(broker.consumer('g'), signer=Signer(b'key'))
+        reader.poll_once()
+        assert reader.get_stats()['records'] == 1 and reader.get_stats()['rejected'] == 1
+
+    def test_unknown_content_type_is_rejected(self):
+        broker = LocalBroker(1)
+        broker.send('detections', value=json.dumps({}).encode(), key='k', headers=[('content-type', b'text/csv')])
+        reader = DetectionReader(broker.consumer('g'))
+        reader.poll_once()
+        assert reader.get_stats()['rejected'] == 1
+
+
+class TestScalingBenchmark:
+
+    def test_more_readers_consume_faster(self):
+        results = run_scaling_benchmark(partitions=6, readers=(1, 3), vehicles=4, cycles=10, process_ms=3.0)
+        for stats in results.values():
+            assert stats['consumed'] == stats['records'] == 4 * 10 * 3
+            assert stats['out_of_order'] == 0
+        assert results[3]['records_per_s'] > results[1]['records_per_s'] * 1.3
@@ -49,7 +49,7 @@ class TestDetectionKafkaProducer:
         producer, mock_kp = mock_producer
         sent_payloads = []
 
-        def capture_send(topic, value):
+        def capture_send(topic, value, **kwargs):
             sent_payloads.append(json.loads(value.decode('utf-8')))
             fut = MagicMock()
             fut.get.return_value = None
@@ -73,3 +73,314 @@ class TestDetectionKafkaProducer:
         producer.stop_producer()
         mock_kp.flush.assert_called_once()
         mock_kp.close.assert_called_once()
+
+
+class TestAsyncPublishing:
+
+    def test_async_send_does_not_wait_for_ack(self, mock_producer):
+        producer, mock_kp = mock_producer
+        producer.async_send = True
+        future = MagicMock()
+        mock_kp.send.return_value = future
+        producer.send_detections([{'object': 'car', 'camera_zone': 'left'}])
+        future.get.assert_not_called()
+        future.add_callback.assert_called_once()
+        future.add_errback.assert_called_once()
+        assert producer.in_flight == 1
+
+    def test_callbacks_release_in_flight_slots(self, mock_producer):
+        producer, mock_kp = mock_producer
+        producer.async_send = True
+        futures = [MagicMock(), MagicMock()]
+        mock_kp.send.side_effect = futures
+        producer.send_detections([{'object': 'car'}])
+        producer.send_status({'fps': 10})
+        futures[0].add_callback.call_args[0][0](MagicMock())
+        futures[1].add_errback.call_args[0][0](Exception('broker down'))
+        status = producer.get_status()
+        assert status['in_flight'] == 0
+        assert status['acked'] == 1
+        assert status['failed'] == 1
+        # Only the acked record reaches the send-latency histogram
+        assert producer.ack_seconds.snapshot()[2] == 1
+
+    def test_overflow_drops_when_in_flight_limit_reached(self, mock_producer):
+        producer, mock_kp = mock_producer
+        producer.async_send = True
+        producer.max_in_flight = 2
+        producer.overflow_policy = 'drop'
+        for _ in range(5):
+            producer.send_detections([{'object': 'person'}])
+        assert mock_kp.send.call_count == 2
+        assert producer.get_status()['dropped'] == 3
+
+    def test_send_cycle_coalesces_zones_into_one_record(self, mock_producer):
+        producer, mock_kp = mock_producer
+        producer.async_send = True
+        producer.key_mode = 'vehicle'
+        producer.send_cycle({
+            'left': [{'object': 'car', 'camera_zone': 'left'}],
+            'right': [{'object': 'person', 'camera_zone': 'right'}],
+            'rear': [],
+        })
+        assert mock_kp.send.call_count == 1
+        message = json.loads(mock_kp.send.call_args[1]['value'])
+        assert {d['camera_zone'] for d in message['detections']} == {'left', 'right'}
+        assert mock_kp.send.call_args[1]['key'] == producer.vehicle_id
+
+    def test_sync_mode_waits_for_ack(self, mock_producer):
+        producer, mock_kp = mock_producer
+        producer.async_send = False
+        future = MagicMock()
+        mock_kp.send.return_value = future
+        producer.send_detections([{'object': 'car'}])
+        future.get.assert_called_once()
+        assert producer.ack_seconds.snapshot()[2] == 1
+
+    def test_ack_records_delivery_latency(self, mock_producer):
+        from backend_Python.computer_vision.latency import LatencyRecorder
+        producer, mock_kp = mock_producer
+        producer.async_send = True
+        producer.latency = LatencyRecorder(window=10)
+        future = MagicMock()
+        mock_kp.send.return_value = future
+        timing = {'left': {'capture': time.time() - 0.05, 'postprocess': time.time()}}
+        producer.send_cycle({'left': [{'object': 'car', 'camera_zone': 'left'}]}, timing=timing)
+        message = json.loads(mock_kp.send.call_args[1]['value'])
+        assert 'serialize' in message['timing']['left']
+        future.add_callback.call_args[0][0](MagicMock())
+        left = producer.latency.get_stats('left')
+        assert left['end_to_end']['count'] == 1
+        assert left['end_to_end']['p50'] >= 50
+
+
+class TestPartitionKeys:
+
+    def test_send_cycle_keys_one_record_per_zone(self, mock_producer):
+        producer, mock_kp = mock_producer
+        producer.vehicle_id = 'truck-7'
+        timing = {'left': {'capture': 1.0}, 'right': {'capture': 2.0}}
+        producer.send_cycle({
+            'left': [{'object': 'car', 'camera_zone': 'left'}],
+            'right': [{'object': 'person', 'camera_zone': 'right'}],
+            'rear': [],
+        }, timing=timing)
+        sent = {kwargs['key']: json.loads(kwargs['value']) for _, kwargs in mock_kp.send.call_args_list}
+        assert set(sent) == {'truck-7:left', 'truck-7:right'}
+        assert list(sent['truck-7:left']['timing']) == ['left']
+        assert sent['truck-7:right']['detections'][0]['object'] == 'person'
+        assert sent['truck-7:left']['vehicle_id'] == 'truck-7'
+
+    def test_single_zone_detections_get_their_zone_key(self, mock_producer):
+        producer, mock_kp = mock_producer
+        producer.send_detections([{'object': 'car', 'camera_zone': 'rear'}])
+        assert mock_kp.send.call_args[1]['key'] == f'{producer.vehicle_id}:rear'
+        producer.send_detections([{'object': 'car', 'camera_zone': 'rear'}, {'object': 'car', 'camera_zone': 'left'}])
+        assert mock_kp.send.call_args[1]['key'] == producer.vehicle_id
+
+    def test_status_is_keyed_per_vehicle(self, mock_producer):
+        producer, mock_kp = mock_producer
+        producer.send_status({'fps': 10})
+        assert mock_kp.send.call_args[1]['key'] == f'{producer.vehicle_id}:status'
+
+    def test_idempotent_ordered_delivery(self):
+        with patch('backend_Python.computer_vision.kafka_producer.KafkaProducer') as mock_kp:
+            from backend_Python.computer_vision.kafka_producer import DetectionKafkaProducer
+            DetectionKafkaProducer().start_producer()
+            kwargs = mock_kp.call_args[1]
+            assert kwargs['enable_idempotence'] is True and kwargs['acks'] == 'all'
+            assert kwargs['max_in_flight_requests_per_connection'] <= 5
+
+    def test_unknown_key_mode_is_rejected(self):
+        from backend_Python.computer_vision.kafka_producer import DetectionKafkaProducer
+        with pytest.raises(ValueError):
+            DetectionKafkaProducer(key_mode='camera')
+
+
+class TestSpool:
+
+    @pytest.fixture()
+    def spooling_producer(self, tmp_path):
+        with patch('backend_Python.computer_vision.kafka_producer.KafkaProducer') as mock_kp:
+            mock_instance = MagicMock()
+            mock_instance.bootstrap_connected.return_value = False
+            mock_kp.return_value = mock_instance
+            from backend_Python.computer_vision.kafka_producer import DetectionKafkaProducer
+            producer = DetectionKafkaProducer(spool_dir=str(tmp_path))
+            producer.async_send = True
+            producer.start_producer()
+            yield producer, mock_instance
+            producer.stop_producer()
+
+    def test_unreachable_broker_spools_without_raising(self, spooling_producer):
+        producer, mock_kp = spooling_producer
+        mock_kp.send.side_effect = Exception('KafkaTimeoutError: metadata not available')
+        producer.send_detections([{'object': 'car', 'camera_zone': 'left'}])
+        status = producer.get_status()
+        assert status['spooled'] == 1 and status['dropped'] == 0 and status['in_flight'] == 0
+        (_, (key, value, headers)), = producer.spool.read()
+        assert key == f'{producer.vehicle_id}:left'.encode()
+        assert json.loads(value)['detections'][0]['object'] == 'car'
+        assert ('content-type', b'application/json') in headers
+
+    def test_failed_delivery_is_spooled(self, spooling_producer):
+        producer, mock_kp = spooling_producer
+        future = MagicMock()
+        mock_kp.send.return_value = future
+        producer.send_detections([{'object': 'car', 'camera_zone': 'left'}])
+        future.add_errback.call_args[0][0](Exception('broker down'))
+        assert producer.get_status()['spool']['pending'] == 1
+
+    def test_in_flight_overflow_is_dropped_not_spooled(self, spooling_producer):
+        producer, mock_kp = spooling_producer
+        mock_kp.bootstrap_connected.return_value = True
+        producer.max_in_flight = 1
+        producer.overflow_policy = 'drop'
+        producer.send_detections([{'object': 'car'}])
+        producer.send_detections([{'object': 'car'}])
+        status = producer.get_status()
+        assert status['dropped'] == 1 and status['spooled'] == 0
+        assert status['spool']['pending'] == 0
+
+    def test_broker_lost_mid_run_spools_once_the_window_fills(self, spooling_producer):
+        producer, mock_kp = spooling_producer
+        # Sends keep succeeding on cached metadata, but no ack ever comes back
+        mock_kp.bootstrap_connected.return_value = True
+        mock_kp.send.return_value = MagicMock()
+        producer.max_in_flight = 100
+        producer.overflow_policy = 'drop'
+        producer.stall_timeout = 0.05
+        for _ in range(100):
+            producer.send_detections([{'object': 'car', 'camera_zone': 'left'}])
+        time.sleep(0.06)
+        for _ in range(200):
+            producer.send_detections([{'object': 'car', 'camera_zone': 'left'}])
+        status = producer.get_status()
+        assert status['in_flight'] == 100
+        assert status['dropped'] == 0 and status['spooled'] == 200
+
+    def test_disconnected_broker_spools_a_full_window_at_once(self, spooling_producer):
+        producer, mock_kp = spooling_producer
+        mock_kp.send.return_value = MagicMock()
+        producer.max_in_flight = 1
+        producer.send_detections([{'object': 'car'}])
+        producer.send_detections([{'object': 'car'}])
+        status = producer.get_status()
+        assert status['dropped'] == 0 and status['spooled'] == 1
+
+    def test_spool_is_replayed_once_the_broker_is_back(self, spooling_producer):
+        producer, mock_kp = spooling_producer
+        mock_kp.send.side_effect = Exception('broker down')
+        producer.send_detections([{'object': 'car', 'camera_zone': 'rear'}])
+        mock_kp.send.side_effect = None
+        mock_kp.send.reset_mock()
+        producer.drainer.retry_interval = 0.01
+        mock_kp.bootstrap_connected.return_value = True
+        deadline = time.time() + 3
+        while producer.spool.pending and time.time() < deadline:
+            time.sleep(0.01)
+        assert producer.spool.pending == 0
+        kwargs = mock_kp.send.call_args[1]
+        assert kwargs['key'] == f'{producer.vehicle_id}:rear'
+        mock_kp.send.return_value.get.assert_called()
+
+    def test_broker_down_at_startup_spools_then_reconnects(self, tmp_path):
+        with patch('backend_Python.computer_vision.kafka_producer.KafkaProducer') as mock_kp:
+            mock_instance = MagicMock()
+            mock_kp.side_effect = Exception('NoBrokersAvailable')
+            from backend_Python.computer_vision.kafka_producer import DetectionKafkaProducer
+            producer = DetectionKafkaProducer(spool_dir=str(tmp_path))
+            producer.start_producer()
+            try:
+                producer.drainer.retry_interval = 0.01
+                producer.send_detections([{'object': 'person', 'camera_zone': 'left'}])
+                assert producer.is_running and producer.producer is None
+                assert producer.get_status()['spool']['pending'] == 1
+
+                mock_kp.side_effect = None
+                mock_kp.return_value = mock_instance
+                deadline = time.time() + 3
+                while producer.spool.pending and time.time() < deadline:
+                    time.sleep(0.01)
+                assert producer.producer is mock_instance
+                assert producer.spool.pending == 0
+                assert mock_instance.send.call_args[1]['key'] == f'{producer.vehicle_id}:left'
+            finally:
+                producer.stop_producer()
+
+    def test_broker_down_at_startup_without_spool_raises(self):
+        with patch('backend_Python.computer_vision.kafka_producer.KafkaProducer') as mock_kp:
+            mock_kp.side_effect = Exception('NoBrokersAvailable')
+            from backend_Python.computer_vision.kafka_producer import DetectionKafkaProducer
+            producer = DetectionKafkaProducer(spool_dir='')
+            with pytest.raises(Exception):
+                producer.start_producer()
+            assert not producer.is_running
+
+
+class TestProvisionTopic:
+
+    def _admin(self, existing):
+        admin = MagicMock()
+        admin.list_topics.return_value = list(existing)
+        admin.describe_topics.return_value = [{'topic': t, 'partitions': [{}] * n} for t, n in existing.items()]
+        return admin
+
+    def test_missing_topic_is_created_with_partitions(self):
+        from backend_Python.computer_vision.kafka_producer import provision_topic
+        admin = self._admin({})
+        with patch('backend_Python.computer_vision.kafka_producer.KafkaAdminClient', return_value=admin):
+            assert provision_topic(['b:9092'], 'detections', partitions=6) == 6
+        topic = admin.create_topics.call_args[0][0][0]
+        assert topic.name == 'detections' and topic.num_partitions == 6
+        admin.close.assert_called_once()
+
+    def test_single_partition_topic_is_grown(self):
+        from backend_Python.computer_vision.kafka_producer import provision_topic
+        admin = self._admin({'detections': 1})
+        with patch('backend_Python.computer_vision.kafka_producer.KafkaAdminClient', return_value=admin):
+            assert provision_topic(['b:9092'], 'detections', partitions=6) == 6
+        assert admin.create_partitions.call_args[0][0]['detections'].total_count == 6
+
+    def test_larger_topic_is_left_alone(self):
+        from backend_Python.computer_vision.kafka_producer import provision_topic
+        admin = self._admin({'detections': 12})
+        with patch('backend_Python.computer_vision.kafka_producer.KafkaAdminClient', return_value=admin):
+            assert provision_topic(['b:9092'], 'detections', partitions=6) == 12
+        assert not admin.create_partitions.called and not admin.create_topics.called
+
+
+class TestSerializerSelection:
+
+    def test_json_is_default_with_content_type_header(self, mock_producer):
+        producer, mock_kp = mock_producer
+        producer.send_detections([{'object': 'car'}])
+        kwargs = mock_kp.send.call_args[1]
+        assert isinstance(kwargs['value'], bytes)
+        assert ('content-type', b'application/json') in kwargs['headers']
+
+    def test_binary_serializer_sets_its_content_type(self):
+        with patch('backend_Python.computer_vision.kafka_producer.KafkaProducer') as mock_kp:
+            from backend_Python.computer_vision.kafka_producer import DetectionKafkaProducer
+            from backend_Python.computer_vision.serialization import CompactBinarySerializer
+            producer = DetectionKafkaProducer(serializer=CompactBinarySerializer())
+            producer.start_producer()
+            producer.send_detections([{'object': 'car', 'class_id': 2, 'camera_zone': 'left',
+                                       'bbox': [1, 2, 3, 4], 'position': {'x': 0.1, 'y': 0.2, 'z': 0.3}}])
+            kwargs = mock_kp.return_value.send.call_args[1]
+            assert kwargs['value'][:2] == b'SD'
+            assert kwargs['headers'][0][1] == CompactBinarySerializer.content_type.encode()
+
+
+class TestRecordSigning:
+
+    def test_record_carries_verifiable_signature(self, mock_producer):
+        from backend_Python.computer_vision.integrity import Signer, verify_record
+        producer, mock_kp = mock_producer
+        producer.signer = Signer(b'key')
+        producer.send_detections([{'object': 'car', 'camera_zone': 'left'}])
+        kwargs = mock_kp.send.call_args[1]
+        assert kwargs['headers'][0][0] == 'content-type'
+        assert verify_record(kwargs['value'], kwargs['headers'], Signer(b'key'))
+        assert not verify_record(kwargs['value'] + b' ', kwargs['headers'], Signer(b'key'))
+        assert not verify_record(kwargs['value'], kwargs['headers'], Signer(b'other'))
@@ -0,0 +1,62 @@
+"""
+Unit tests for the latency instrumentation (latency.py)
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision.latency import LatencyRecorder, RollingHistogram
+
+
+def stamps(start=100.0):
+    return {
+        'capture': start,
+        'infer_start': start + 0.010,
+        'infer_end': start + 0.040,
+        'postprocess': start + 0.042,
+        'serialize': start + 0.045,
+    }
+
+
+class TestRollingHistogram:
+
+    def test_empty_histogram_has_no_percentiles(self):
+        stats = RollingHistogram(10).get_stats()
+        assert stats == {'count': 0, 'p50': None, 'p95': None, 'p99': None}
+
+    def test_percentiles_over_window_only(self):
+        histogram = RollingHistogram(100)
+        for ms in range(1000):
+            histogram.record(float(ms))
+        stats = histogram.get_stats()
+        assert stats['count'] == 1000
+        # Only the last 100 samples (900..999) are in the window
+        assert stats['p50'] == pytest.approx(949.5)
+        assert 990 <= stats['p99'] <= 999
+
+
+class TestLatencyRecorder:
+
+    def test_local_stages_per_zone(self):
+        recorder = LatencyRecorder(window=10)
+        recorder.record_local('left', stamps())
+        left = recorder.get_stats('left')
+        assert set(left) == {'queue', 'inference', 'postprocess'}
+        assert left['inference']['p50'] == pytest.approx(30.0)
+        assert recorder.get_stats('right') == {}
+
+    def test_delivery_closes_end_to_end(self):
+        recorder = LatencyRecorder(window=10)
+        recorder.record_delivery('rear', stamps(), ack=100.060)
+        rear = recorder.get_stats('rear')
+        assert rear['publish_wait']['p50'] == pytest.approx(3.0)
+        assert rear['kafka_ack']['p50'] == pytest.approx(15.0)
+        assert rear['end_to_end']['p50'] == pytest.approx(60.0)
+
+    def test_missing_stamps_are_skipped(self):
+        recorder = LatencyRecorder(window=10)
+        recorder.record_local('left', {'capture': 1.0})
+        assert recorder.get_stats() == {}
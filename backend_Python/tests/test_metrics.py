@@ -0,0 +1,99 @@
+"""
+Unit tests for the Prometheus metrics endpoint (metrics.py)
+"""
+import sys
+import os
+import urllib.error
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision.metrics import (CONTENT_TYPE, DetectionMetrics, Histogram, Metric, MetricsServer,
+                                                    process_metrics, render)
+
+
+def _scrape(server):
+    with urllib.request.urlopen(f'http://127.0.0.1:{server.port}/metrics', timeout=2) as response:
+        return response.headers['Content-Type'], response.read().decode('utf-8')
+
+
+class TestHistogram:
+
+    def test_buckets_are_cumulative_and_inclusive(self):
+        histogram = Histogram((0.1, 0.5))
+        for value in (0.05, 0.1, 0.3, 2.0):
+            histogram.observe(value)
+        cumulative, total, count = histogram.snapshot()
+        assert cumulative == [2, 3, 4]
+        assert count == 4
+        assert total == pytest.approx(2.45)
+
+    def test_family_creates_one_series_per_label(self):
+        metrics = DetectionMetrics()
+        metrics.observe_camera(0, {'infer_start': 1.0, 'infer_end': 1.02}, 3)
+        metrics.observe_camera(0, None, 0)
+        metrics.observe_camera(1, {'infer_start': 1.0, 'infer_end': 1.5}, 1)
+        inference, boxes = metrics.collect()
+        assert [labels for labels, _ in inference.samples] == [{'camera': '0'}, {'camera': '1'}]
+        assert boxes.samples[0][1].snapshot()[2] == 2
+
+
+class TestRender:
+
+    def test_text_exposition_format(self):
+        histogram = Histogram((0.1,))
+        histogram.observe(0.05)
+        text = render([
+            Metric('frames_total', 'counter', 'Frames read', [({'camera': 'a"b'}, 7)]),
+            Metric('latency_seconds', 'histogram', 'Latency', [({'camera': '0'}, histogram)]),
+            Metric('empty', 'gauge', 'Skipped without samples', []),
+        ])
+        assert text.splitlines() == [
+            '# HELP frames_total Frames read',
+            '# TYPE frames_total counter',
+            'frames_total{camera="a\\"b"} 7',
+            '# HELP latency_seconds Latency',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{camera="0",le="0.1"} 1',
+            'latency_seconds_bucket{camera="0",le="+Inf"} 1',
+            'latency_seconds_sum{camera="0"} 0.05',
+            'latency_seconds_count{camera="0"} 1',
+        ]
+
+    def test_process_metrics(self):
+        values = {metric.name: metric.samples[0][1] for metric in process_metrics()}
+        assert values['process_resident_memory_bytes'] > 0
+        assert values['process_cpu_seconds_total'] > 0
+
+
+class TestMetricsServer:
+
+    def test_local_scrape(self):
+        calls = []
+
+        def collect():
+            calls.append(1)
+            return [Metric('safedetect_test', 'gauge', 'Test gauge', [({}, 1.5)])]
+
+        server = MetricsServer([collect], host='127.0.0.1', port=0)
+        server.start()
+        try:
+            content_type, body = _scrape(server)
+            assert content_type == CONTENT_TYPE
+            assert 'safedetect_test 1.5' in body
+            assert '# TYPE process_cpu_seconds_total counter' in body
+            assert calls == [1]
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(f'http://127.0.0.1:{server.port}/other', timeout=2)
+        finally:
+            server.stop()
+
+    def test_failing_collector_does_not_break_the_scrape(self):
+        def broken():
+            raise RuntimeError('boom')
+
+        server = MetricsServer([broken], host='127.0.0.1', port=0)
+        assert 'process_resident_memory_bytes' in server.render()
+        server.stop()
@@ -7,8 +7,6 @@ frame-deduplication / HMAC-signing logic works as expected.
 """
 import sys
 import os
-import hashlib
-import hmac
 from unittest.mock import patch, MagicMock
 
 import pytest
@@ -20,22 +18,22 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 def detector():
     """
     Create a MultiCameraDetector with all external I/O mocked:
-    - YOLO model (no GPU/weights file needed)
+    - inference backend (no GPU/weights file needed)
     - DetectionKafkaProducer (no Kafka broker needed)
     - pygame (no audio device needed)
     - cv2.VideoCapture (no cameras needed)
     """
-    with patch('backend_Python.computer_vision.multi_camera_detector.YOLO') as mock_yolo, \
+    with patch('backend_Python.computer_vision.multi_camera_detector.create_backend') as mock_backend, \
          patch('backend_Python.computer_vision.multi_camera_detector.DetectionKafkaProducer') as mock_kafka, \
          patch('backend_Python.computer_vision.multi_camera_detector.pygame'), \
          patch('cv2.VideoCapture') as mock_cap:
 
-        mock_yolo.return_value = MagicMock()
+        mock_backend.return_value = MagicMock(device='cpu', fixed_imgsz=None)
         mock_kafka.return_value = MagicMock()
         mock_cap.return_value = MagicMock()
 
         from backend_Python.computer_vision.multi_camera_detector import MultiCameraDetector
-        d = MultiCameraDetector(model_path='yolov8n.pt')
+        d = MultiCameraDetector(model_path='yolov8n.pt', warmup=False)
         yield d
 
 
@@ -57,6 +55,200 @@ class TestMultiCameraDetectorInit:
         assert set(CAMERA_CONFIG.keys()) == {'left', 'right', 'rear'}
 
 
+class TestStartup:
+
+    def test_startup_phases_are_timed(self, detector):
+        stats = detector.get_startup_stats()
+        assert {'model', 'audio', 'kafka'} <= set(stats['phases'])
+        assert 'ready' in stats['milestones']
+        detector.kafka_producer.start_producer.assert_called_once()
+
+    def test_warm_up_runs_every_source_batched(self, detector):
+        from shared.config import CAMERA_CONFIG
+        detector.batch_inference = True
+        detector.warm_up()
+        frames, imgsz, _ = detector.backend.predict.call_args[0]
+        sources = len({c['camera_id'] for c in CAMERA_CONFIG.values()})
+        assert len(frames) == max(sources, 1)
+        assert imgsz == detector.imgsz
+        assert not frames[0].any()
+
+    def test_warm_up_covers_roi_sizes(self, detector):
+        detector.rois = {0: (0.0, 0.1, 0.4, 0.9)}
+        detector.warm_up()
+        sizes = [call[0][1] for call in detector.backend.predict.call_args_list]
+        assert sizes[0] == detector.imgsz and len(sizes) == 2 and sizes[1] < detector.imgsz
+
+
+class TestCameraSupervision:
+
+    def test_camera_change_updates_every_zone_of_the_source(self, detector):
+        from shared.config import CAMERA_CONFIG
+        camera_id = CAMERA_CONFIG['left']['camera_id']
+        zones = {zone for zone, c in CAMERA_CONFIG.items() if c['camera_id'] == camera_id}
+        cap = MagicMock()
+        before = detector.cameras
+
+        detector._on_camera_change(camera_id, 'available', cap)
+        assert set(detector.cameras) == zones and all(detector.cameras[z] is cap for z in zones)
+        # Replaced, never mutated, so a cycle iterating the old map is unaffected
+        assert before == {}
+        assert detector.get_camera_status()['left']['status'] == 'available'
+
+        detector._on_camera_change(camera_id, 'reconnecting', None)
+        assert detector.cameras == {}
+        assert detector.camera_status['left']['status'] == 'reconnecting'
+
+    def test_postprocess_feeds_frame_hashes_to_the_supervisor(self, detector):
+        import numpy as np
+        detector.supervisor = MagicMock()
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        detector._postprocess({0: frame}, {})
+        detector.supervisor.observe.assert_called_once_with(0, detector.hasher.hexdigest(0, frame))
+
+
+class TestAdaptiveQuality:
+
+    def test_stride_infers_a_subset_of_cameras(self, detector):
+        import numpy as np
+        from backend_Python.computer_vision.quality import QualityController
+
+        detector.quality = QualityController(256, sizes=(256,), max_stride=2)
+        detector.quality.level = 1
+        detector.batch_inference = True
+        detector.backend.predict.return_value = ['res']
+        frames = {0: np.zeros((48, 64, 3), dtype=np.uint8), 1: np.ones((48, 64, 3), dtype=np.uint8)}
+        assert set(detector._run_inference(frames)) == {0}
+        assert set(detector._run_inference(frames)) == {1}
+
+    def test_quality_change_applies_imgsz_and_publishes_status(self, detector):
+        from backend_Python.computer_vision.quality import QualityController
+
+        detector.imgsz = 416
+        detector.quality = QualityController(416, sizes=(416, 352), budget_ms=50, window=1, cooldown=0,
+                                             thermal_path='')
+        detector._adapt_quality({'left': {'capture': 1.0, 'infer_end': 1.05, 'postprocess': 1.2}})
+        assert detector.imgsz == 352
+        status = detector.kafka_producer.send_status.call_args[0][0]
+        assert status['quality']['direction'] == 'down' and status['quality']['imgsz'] == 352
+        assert detector.get_quality_stats()['imgsz'] == 352
+
+
+class TestWebSocketOutput:
+
+    def test_full_state_published_even_when_tracker_filters(self, detector):
+        detector.websocket_server = MagicMock()
+        detector.tracker = MagicMock()
+        steady = {'object': 'car', 'camera_zone': 'left', 'event': 'steady'}
+        detector._publish({'left': [steady], 'right': [], 'rear': []})
+        detector.websocket_server.publish_detections.assert_called_once_with([steady])
+        # Kafka only carries tracker changes
+        assert not detector.kafka_producer.send_cycle.called
+
+    def test_carried_track_events_go_to_kafka_first(self, detector):
+        detector.websocket_server = MagicMock()
+        detector.tracker = MagicMock()
+        birth = {'object': 'car', 'camera_zone': 'left', 'track_id': 1, 'event': 'birth'}
+        death = {'object': 'person', 'camera_zone': 'rear', 'track_id': 2, 'event': 'death'}
+        steady = {'object': 'car', 'camera_zone': 'left', 'track_id': 1, 'event': 'steady'}
+        detector._publish({'left': [steady], 'right': [], 'rear': []}, carried={'left': [birth], 'rear': [death]})
+        # In-cab clients get this cycle's state only
+        detector.websocket_server.publish_detections.assert_called_once_with([steady])
+        zone_detections = detector.kafka_producer.send_cycle.call_args[0][0]
+        assert zone_detections['left'] == [birth] and zone_detections['rear'] == [death]
+
+    def test_stop_stops_server(self, detector):
+        detector.websocket_server = MagicMock()
+        detector.stop()
+        detector.websocket_server.stop.assert_called_once()
+
+
+class TestAlertFeed:
+
+    def test_fresh_boxes_feed_the_alert_engine_per_zone(self, detector):
+        import numpy as np
+        from backend_Python.computer_vision import postprocess
+        from shared.config import CAMERA_CONFIG
+
+        detector.alerts = MagicMock()
+        detector.cameras = {'left': MagicMock()}
+        camera_id = CAMERA_CONFIG['left']['camera_id']
+        # Box centre (0.1, 0.5) is inside the left zone
+        boxes = postprocess.BoxArrays(np.array([[32, 200, 96, 280]], dtype=np.float32),
+                                      np.array([0.9], dtype=np.float32), np.array([2]))
+        detector._feed_alerts(camera_id, boxes, (480, 640, 3), {camera_id: {'capture': 12.0}})
+        detector.alerts.observe.assert_called_once_with('left', True, 12.0)
+
+        detector.alerts.reset_mock()
+        detector._feed_alerts(camera_id, postprocess.EMPTY_BOXES, (480, 640, 3))
+        detector.alerts.observe.assert_called_once_with('left', False, None)
+
+    def test_skipped_cameras_feed_their_carried_boxes(self, detector):
+        import numpy as np
+        from backend_Python.computer_vision import postprocess
+        from shared.config import CAMERA_CONFIG
+
+        detector.alerts = MagicMock()
+        detector.cameras = {'left': MagicMock()}
+        camera_id = CAMERA_CONFIG['left']['camera_id']
+        detector._last_boxes[camera_id] = postprocess.BoxArrays(
+            np.array([[32, 200, 96, 280]], dtype=np.float32), np.array([0.9], dtype=np.float32), np.array([2]))
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        detector._postprocess({camera_id: frame}, {}, {camera_id: {'capture': 12.0}})
+        detector.alerts.observe.assert_called_once_with('left', True, None)
+
+    def test_disconnect_ends_the_zones_alerts(self, detector):
+        from shared.config import CAMERA_CONFIG
+        detector.alerts = MagicMock()
+        camera_id = CAMERA_CONFIG['left']['camera_id']
+        detector._on_camera_change(camera_id, 'available', MagicMock())
+        detector.alerts.clear.assert_not_called()
+        detector._on_camera_change(camera_id, 'reconnecting', None)
+        detector.alerts.clear.assert_any_call('left')
+
+    def test_stop_stops_alert_engine(self, detector):
+        detector.alerts = MagicMock()
+        detector.stop()
+        detector.alerts.stop.assert_called_once()
+
+
+class TestMetrics:
+
+    def test_scrape_reports_cycle_metrics(self, detector):
+        import asyncio
+        import time
+        import urllib.request
+        import numpy as np
+        from types import SimpleNamespace
+        from shared.config import CAMERA_CONFIG
+
+        camera_id = CAMERA_CONFIG['left']['camera_id']
+        detector.cameras = {'left': MagicMock()}
+        detector.capture = MagicMock()
+        detector.capture.get_latest.return_value = (np.zeros((480, 640, 3), dtype=np.uint8), time.time(), 1)
+        detector.capture.get_stats.return_value = {
+            camera_id: {'frames': 30, 'dropped': 2, 'read_failures': 0, 'pickup_age_ms': 12.0}
+        }
+        boxes = MagicMock()
+        boxes.data = np.array([[270, 215, 370, 265, 0.9, 2]], dtype=np.float32)
+        boxes.__len__.return_value = 1
+        detector.backend.predict.return_value = [SimpleNamespace(boxes=boxes)]
+        asyncio.run(detector.process_all_cameras())
+
+        server = detector.start_metrics_server('127.0.0.1', 0)
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{server.port}/metrics', timeout=2) as response:
+                body = response.read().decode('utf-8')
+        finally:
+            detector.stop()
+        assert f'safedetect_inference_seconds_count{{camera="{camera_id}"}} 1' in body
+        assert f'safedetect_boxes_per_frame_bucket{{camera="{camera_id}",le="1"}} 1' in body
+        assert f'safedetect_capture_frames_total{{camera="{camera_id}"}} 30' in body
+        assert 'safedetect_camera_status{zone="left",status="' in body
+        assert 'process_resident_memory_bytes' in body
+        assert detector.metrics_server is None
+
+
 class TestFrameHashingLogic:
     """
     The detector computes frame hashes inline (no dedicated method).
@@ -77,3 +269,226 @@ class TestFrameHashingLogic:
         h1 = __import__('hashlib').md5(f1[::8, ::8].tobytes()).hexdigest()
         h2 = __import__('hashlib').md5(f2[::8, ::8].tobytes()).hexdigest()
         assert h1 != h2
+
+
+class TestBatchedInference:
+    """_run_inference should issue one model call per cycle in batched mode."""
+
+    def _frames(self):
+        import numpy as np
+        return {0: np.zeros((48, 64, 3), dtype=np.uint8),
+                1: np.ones((48, 64, 3), dtype=np.uint8)}
+
+    def test_batched_mode_single_model_call(self, detector):
+        detector.batch_inference = True
+        detector.backend.predict.return_value = ['res0', 'res1']
+        out = detector._run_inference(self._frames())
+        assert detector.backend.predict.call_count == 1
+        batch = detector.backend.predict.call_args[0][0]
+        assert isinstance(batch, list) and len(batch) == 2
+        assert detector.backend.predict.call_args[0][1] == detector.imgsz
+        assert out == {0: ['res0'], 1: ['res1']}
+
+    def test_unbatched_mode_one_call_per_source(self, detector):
+        detector.batch_inference = False
+        detector.backend.predict.return_value = ['res']
+        out = detector._run_inference(self._frames())
+        assert detector.backend.predict.call_count == 2
+        assert set(out) == {0, 1}
+
+    def test_no_frames_skips_model(self, detector):
+        assert detector._run_inference({}) == {}
+        assert not detector.backend.predict.called
+
+    def test_worker_mode_sends_every_source_to_the_pool(self, detector):
+        detector.batch_inference = True
+        detector.workers = MagicMock()
+        detector.workers.predict_cameras.return_value = {0: ['res0'], 1: ['res1']}
+        timing = {0: {'capture': 1.0}, 1: {'capture': 1.0}}
+        out = detector._run_inference(self._frames(), timing)
+        frames, sizes, _ = detector.workers.predict_cameras.call_args[0]
+        assert set(frames) == {0, 1} and sizes == {0: detector.imgsz, 1: detector.imgsz}
+        assert not detector.backend.predict.called
+        assert out == {0: ['res0'], 1: ['res1']}
+        assert 'infer_end' in timing[0] and 'infer_end' in timing[1]
+
+
+class TestProcessAllCameras:
+    """End-to-end cycle with a stubbed capture layer and model output."""
+
+    def test_detections_built_from_box_arrays(self, detector):
+        import asyncio
+        import time
+        import numpy as np
+        from types import SimpleNamespace
+        from shared.config import CAMERA_CONFIG
+
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        zone = 'left'
+        camera_id = CAMERA_CONFIG[zone]['camera_id']
+        detector.cameras = {zone: MagicMock()}
+        detector.capture = MagicMock()
+        detector.capture.get_latest.return_value = (frame, time.time(), 1)
+
+        data = np.array([[270, 215, 370, 265, 0.9, 2],
+                         [10, 10, 20, 20, 0.8, 7]], dtype=np.float32)
+        boxes = MagicMock()
+        boxes.data = data
+        boxes.__len__.return_value = 2
+        detector.backend.predict.return_value = [SimpleNamespace(boxes=boxes)]
+
+        detections = asyncio.run(detector.process_all_cameras())
+
+        detector.capture.get_latest.assert_called_with(camera_id)
+        assert len(detections) == 1
+        assert detections[0]['object'] == 'car'
+        assert detections[0]['camera_zone'] == zone
+        # Records are signed as a whole by the producer, not per detection
+        assert 'integrity_hmac' not in detections[0]
+        # Box centre (0.5, 0.5) is outside the left zone rectangle
+        assert detections[0]['in_blind_spot'] is False
+        detector.kafka_producer.send_cycle.assert_called_once()
+
+    def test_detection_mode_signs_every_detection(self, detector):
+        import asyncio
+        import time
+        import numpy as np
+        from types import SimpleNamespace
+        from backend_Python.computer_vision.integrity import Signer
+
+        detector.signer = Signer(b'key')
+        detector.cameras = {'left': MagicMock()}
+        detector.capture = MagicMock()
+        detector.capture.get_latest.return_value = (np.zeros((480, 640, 3), dtype=np.uint8), time.time(), 1)
+        boxes = MagicMock()
+        boxes.data = np.array([[270, 215, 370, 265, 0.9, 2]], dtype=np.float32)
+        boxes.__len__.return_value = 1
+        detector.backend.predict.return_value = [SimpleNamespace(boxes=boxes)]
+
+        detections = asyncio.run(detector.process_all_cameras())
+
+        assert len(detections[0]['integrity_hmac']) == 16
+        assert detector.signer.verify_detection(detections[0])
+
+    def test_cycle_carries_stage_timing(self, detector):
+        import asyncio
+        import time
+        import numpy as np
+        from types import SimpleNamespace
+
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        captured = time.time()
+        detector.cameras = {'left': MagicMock()}
+        detector.capture = MagicMock()
+        detector.capture.get_latest.return_value = (frame, captured, 1)
+        boxes = MagicMock()
+        boxes.data = np.array([[270, 215, 370, 265, 0.9, 2]], dtype=np.float32)
+        boxes.__len__.return_value = 1
+        detector.backend.predict.return_value = [SimpleNamespace(boxes=boxes)]
+
+        asyncio.run(detector.process_all_cameras())
+
+        timing = detector.kafka_producer.send_cycle.call_args[1]['timing']
+        assert list(timing) == ['left']
+        assert timing['left']['capture'] == captured
+        assert captured <= timing['left']['infer_start'] <= timing['left']['infer_end'] <= timing['left']['postprocess']
+        assert set(detector.get_latency_stats()['left']) == {'queue', 'inference', 'postprocess'}
+
+    def test_tracking_publishes_only_changes(self, detector):
+        import asyncio
+        import time
+        import numpy as np
+        from types import SimpleNamespace
+        from backend_Python.computer_vision.tracking import MultiZoneTracker
+
+        detector.tracker = MultiZoneTracker()
+        detector.cameras = {'left': MagicMock()}
+        detector.capture = MagicMock()
+        detector.capture.get_latest.return_value = (np.zeros((480, 640, 3), dtype=np.uint8), time.time(), 1)
+        boxes = MagicMock()
+        boxes.data = np.array([[270, 215, 370, 265, 0.9, 2]], dtype=np.float32)
+        boxes.__len__.return_value = 1
+        detector.backend.predict.return_value = [SimpleNamespace(boxes=boxes)]
+
+        first = asyncio.run(detector.process_all_cameras())
+        second = asyncio.run(detector.process_all_cameras())
+
+        assert first[0]['event'] == 'birth'
+        assert second[0]['event'] == 'steady'
+        assert second[0]['track_id'] == first[0]['track_id']
+        # The steady cycle is kept for alerting but not re-published
+        assert detector.kafka_producer.send_cycle.call_count == 1
+
+    def test_disconnected_camera_publishes_track_deaths(self, detector):
+        import asyncio
+        import time
+        import numpy as np
+        from types import SimpleNamespace
+        from backend_Python.computer_vision.tracking import MultiZoneTracker
+
+        detector.tracker = MultiZoneTracker()
+        detector.cameras = {'left': MagicMock()}
+        detector.capture = MagicMock()
+        detector.capture.get_latest.return_value = (np.zeros((480, 640, 3), dtype=np.uint8), time.time(), 1)
+        boxes = MagicMock()
+        boxes.data = np.array([[270, 215, 370, 265, 0.9, 2]], dtype=np.float32)
+        boxes.__len__.return_value = 1
+        detector.backend.predict.return_value = [SimpleNamespace(boxes=boxes)]
+        born = asyncio.run(detector.process_all_cameras())
+
+        detector.cameras = {}
+        ended = asyncio.run(detector.process_all_cameras())
+        assert [(d['event'], d['track_id']) for d in ended] == [('death', born[0]['track_id'])]
+        assert ended[0]['in_blind_spot'] is False
+        published = detector.kafka_producer.send_cycle.call_args[0][0]
+        assert [d['event'] for d in published['left']] == ['death']
+        assert detector.tracker.get_stats() == {}
+        # Deaths are published once
+        assert asyncio.run(detector.process_all_cameras()) == []
+
+    def test_quiet_camera_reuses_last_boxes(self, detector):
+        import asyncio
+        import time
+        import numpy as np
+        from types import SimpleNamespace
+        from backend_Python.computer_vision.scheduler import InferenceScheduler
+
+        detector.scheduler = InferenceScheduler(motion_threshold=3.0, max_skip=2)
+        detector.cameras = {'left': MagicMock()}
+        detector.capture = MagicMock()
+        detector.capture.get_latest.return_value = (np.zeros((480, 640, 3), dtype=np.uint8), time.time(), 1)
+        boxes = MagicMock()
+        boxes.data = np.array([[270, 215, 370, 265, 0.9, 2]], dtype=np.float32)
+        boxes.__len__.return_value = 1
+        detector.backend.predict.return_value = [SimpleNamespace(boxes=boxes)]
+
+        cycles = [asyncio.run(detector.process_all_cameras()) for _ in range(3)]
+
+        assert detector.backend.predict.call_count == 1
+        assert all(len(c) == 1 and c[0]['object'] == 'car' for c in cycles)
+        assert 'left' in detector.get_inference_rates()
+
+    def test_roi_inference_crops_and_maps_back(self, detector):
+        import asyncio
+        import time
+        import numpy as np
+        from types import SimpleNamespace
+        from shared.config import CAMERA_CONFIG
+
+        camera_id = CAMERA_CONFIG['left']['camera_id']
+        detector.rois = {camera_id: (0.0, 0.1, 0.4, 0.9)}
+        detector.scheduler = None
+        detector.cameras = {'left': MagicMock()}
+        detector.capture = MagicMock()
+        detector.capture.get_latest.return_value = (np.zeros((480, 640, 3), dtype=np.uint8), time.time(), 1)
+        boxes = MagicMock()
+        boxes.data = np.array([[10, 20, 110, 70, 0.9, 2]], dtype=np.float32)
+        boxes.__len__.return_value = 1
+        detector.backend.predict.return_value = [SimpleNamespace(boxes=boxes)]
+
+        detections = asyncio.run(detector.process_all_cameras())
+
+        crops, imgsz, _ = detector.backend.predict.call_args[0]
+        assert crops[0].shape == (384, 256, 3)
+        assert imgsz < detector.imgsz
+        assert detections[0]['bbox'] == [10, 68, 110, 118]
@@ -0,0 +1,149 @@
+"""
+Unit tests for the staged detection pipeline (pipeline.py)
+"""
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision.pipeline import DropOldestQueue, DetectionPipeline, carry_track_events
+
+
+class FakeDetector:
+    """Implements the stage hooks DetectionPipeline calls on MultiCameraDetector."""
+
+    def __init__(self, publish_delay=0.0):
+        self.seq = 0
+        self.published = []
+        self.released = []
+        self.publish_delay = publish_delay
+        self.lock = threading.Lock()
+
+    def _grab_frames(self, timing=None):
+        with self.lock:
+            self.seq += 1
+            return {0: self.seq}
+
+    def _release_frames(self, frames):
+        self.released.extend(frames.values())
+
+    def _run_inference(self, frames, timing=None):
+        return {camera_id: frame for camera_id, frame in frames.items()}
+
+    def _postprocess(self, frames, inference, timing=None):
+        return inference
+
+    def _build_detections(self, frame_cache, timing=None):
+        return {'left': [{'camera_zone': 'left', 'seq': frame_cache[0]}]}
+
+    def _publish(self, zone_detections, timing=None, carried=None):
+        time.sleep(self.publish_delay)
+        self.published.append(zone_detections)
+
+
+class TestDropOldestQueue:
+
+    def test_put_never_blocks_and_drops_oldest(self):
+        q = DropOldestQueue(2, 'frames')
+        for i in range(5):
+            q.put(i)
+        assert len(q) == 2
+        assert q.dropped == 3
+        assert q.get(timeout=0) == 3
+        assert q.get(timeout=0) == 4
+
+    def test_get_times_out_with_none(self):
+        assert DropOldestQueue(1).get(timeout=0.01) is None
+
+    def test_merge_folds_oldest_into_next(self):
+        q = DropOldestQueue(2, 'publish', merge=lambda older, newer: older + newer)
+        for item in ('a', 'b', 'c', 'd'):
+            q.put(item)
+        assert q.dropped == 0 and q.merged == 2
+        assert q.get(timeout=0) == 'abc'
+        assert q.get(timeout=0) == 'd'
+
+    def test_merge_into_incoming_item_when_size_one(self):
+        q = DropOldestQueue(1, 'publish', merge=lambda older, newer: older + newer)
+        q.put('a')
+        q.put('b')
+        assert q.get(timeout=0) == 'ab'
+
+    def test_stats_report_depth(self):
+        q = DropOldestQueue(3, 'publish')
+        q.put('a')
+        stats = q.get_stats()
+        assert stats['depth'] == 1 and stats['capacity'] == 3 and stats['enqueued'] == 1
+
+
+class TestCarryTrackEvents:
+
+    def test_changes_are_carried_and_steady_tracks_are_not(self):
+        birth = {'track_id': 1, 'event': 'birth'}
+        steady = {'track_id': 2, 'event': 'steady'}
+        death = {'track_id': 3, 'event': 'death'}
+        newer = {'zone_detections': {'left': [{'track_id': 1, 'event': 'steady'}]}, 'timing': {}}
+        first = carry_track_events({'zone_detections': {'left': [birth, steady]}}, newer)
+        merged = carry_track_events(first, {'zone_detections': {'rear': []}})
+        assert first['carried'] == {'left': [birth]}
+        assert merged['carried'] == {'left': [birth]}
+        # The item shared with the alert queue is left untouched
+        assert 'carried' not in newer
+
+        merged = carry_track_events({'zone_detections': {'left': [death]}, 'carried': {'left': [birth]}}, newer)
+        assert merged['carried'] == {'left': [birth, death]}
+
+
+class TestDetectionPipeline:
+
+    def test_cycles_flow_to_alerts_and_publish(self):
+        detector = FakeDetector()
+        pipeline = DetectionPipeline(detector, fps_target=200)
+        pipeline.start()
+        try:
+            detections = pipeline.get_detections(timeout=2.0)
+            assert detections and detections[0]['camera_zone'] == 'left'
+            deadline = time.time() + 2.0
+            while not detector.published and time.time() < deadline:
+                time.sleep(0.01)
+            assert detector.published
+        finally:
+            pipeline.stop()
+
+        stats = pipeline.get_stats()
+        assert set(stats['queues']) == {'frames', 'publish', 'alerts'}
+        assert stats['stages']['inference']['count'] >= 1
+        assert stats['stages']['end_to_end']['count'] >= 1
+        # Every inferred or dropped cycle hands its frames back to the capture pool
+        frames = stats['queues']['frames']
+        assert len(detector.released) >= stats['stages']['inference']['count'] + frames['dropped']
+
+    def test_slow_publish_does_not_stall_inference(self):
+        # Publishing takes far longer than the capture interval
+        detector = FakeDetector(publish_delay=0.2)
+        pipeline = DetectionPipeline(detector, fps_target=100, publish_queue_size=2)
+        pipeline.start()
+        try:
+            time.sleep(0.5)
+        finally:
+            pipeline.stop()
+
+        stats = pipeline.get_stats()
+        # Inference kept running while only a couple of publishes completed
+        assert stats['stages']['inference']['count'] > 3 * max(1, stats['stages']['publish']['count'])
+        assert stats['queues']['publish']['dropped'] > 0
+
+    def test_tracking_publish_queue_merges_instead_of_dropping(self):
+        detector = FakeDetector(publish_delay=0.2)
+        detector.tracker = object()
+        pipeline = DetectionPipeline(detector, fps_target=100, publish_queue_size=2)
+        pipeline.start()
+        try:
+            time.sleep(0.5)
+        finally:
+            pipeline.stop()
+
+        publish = pipeline.get_stats()['queues']['publish']
+        assert publish['dropped'] == 0 and publish['merged'] > 0
@@ -0,0 +1,88 @@
+"""
+Unit tests for vectorized detection post-processing (postprocess.py)
+"""
+import sys
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision import postprocess
+from shared.config import POSITION_SCALE
+
+
+def make_result(rows):
+    """Mimic an Ultralytics Results object exposing boxes.data (N x 6)."""
+    data = np.array(rows, dtype=np.float32).reshape(-1, 6)
+    return SimpleNamespace(boxes=_Boxes(data))
+
+
+class _Boxes:
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return self.data.shape[0]
+
+
+class TestExtractAndFilter:
+
+    def test_empty_results(self):
+        boxes = postprocess.extract_boxes([make_result([])])
+        assert boxes.xyxy.shape == (0, 4)
+
+    def test_filters_out_unknown_classes(self):
+        result = make_result([
+            [0, 0, 10, 10, 0.9, 2],    # car
+            [0, 0, 10, 10, 0.8, 7],    # truck — not tracked
+            [0, 0, 10, 10, 0.7, 0],    # person
+            [0, 0, 10, 10, 0.6, 99],   # outside lookup range
+        ])
+        boxes = postprocess.filter_classes(postprocess.extract_boxes([result]))
+        assert boxes.cls.tolist() == [2, 0]
+        assert np.allclose(boxes.conf, [0.9, 0.7])
+
+    def test_concatenates_multiple_results(self):
+        boxes = postprocess.extract_boxes([
+            make_result([[0, 0, 1, 1, 0.5, 0]]),
+            make_result([[0, 0, 2, 2, 0.6, 3]]),
+        ])
+        assert boxes.cls.tolist() == [0, 3]
+
+
+class TestPositions:
+
+    def test_matches_scalar_formula(self):
+        xyxy = np.array([[270, 215, 370, 265], [0, 0, 64, 48]], dtype=np.float32)
+        positions = postprocess.calculate_positions(xyxy, 640, 480)
+        for (x1, y1, x2, y2), pos in zip(xyxy, positions):
+            assert pos[0] == pytest.approx((x1 + x2) / 2 / 640 * POSITION_SCALE['x'], rel=1e-5)
+            assert pos[1] == pytest.approx((y1 + y2) / 2 / 480 * POSITION_SCALE['y'], rel=1e-5)
+            assert pos[2] == pytest.approx((x2 - x1) / 640 * POSITION_SCALE['z'], rel=1e-5)
+
+    def test_detection_dicts_schema(self):
+        result = make_result([[270, 215, 370, 265, 0.9, 2]])
+        boxes = postprocess.process_results([result], 640, 480)
+        dets = postprocess.to_detection_dicts(boxes, 'left', 123.0, 'abcd')
+        assert len(dets) == 1
+        det = dets[0]
+        assert det['object'] == 'car'
+        assert det['class_id'] == 2
+        assert det['camera_zone'] == 'left'
+        assert det['position']['zone'] == 'left'
+        assert det['frame_hash'] == 'abcd'
+        assert isinstance(det['confidence'], float)
+        assert len(det['bbox']) == 4
+
+
+class TestRoiOffset:
+
+    def test_offset_moves_boxes_before_positions(self):
+        result = make_result([[10, 20, 30, 40, 0.9, 2]])
+        boxes = postprocess.process_results([result], 640, 480, offset=(100, 50))
+        assert boxes.xyxy.tolist() == [[110, 70, 130, 90]]
+        expected_x = (110 + 130) / 2 / 640 * POSITION_SCALE["x"]
+        assert boxes.positions[0, 0] == pytest.approx(expected_x)
@@ -0,0 +1,81 @@
+"""
+Unit tests for allocation-free preprocessing (preprocess.py)
+"""
+import sys
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision.preprocess import FramePool, Letterboxer, PAD_VALUE
+
+
+class TestFramePool:
+
+    def test_frame_is_reused_only_once_released(self):
+        pool = FramePool(max_frames=2)
+        frame = np.zeros((4, 4, 3), dtype=np.uint8)
+        pool.adopt(frame)
+        # Adopted frames are busy until their consumer hands them back
+        assert pool.acquire() is None
+        pool.release(frame)
+        held = pool.acquire()
+        assert held is frame
+        assert pool.acquire() is None
+        pool.release(held)
+        pool.release(held)  # a second release does not hand it out twice
+        assert pool.acquire() is frame and pool.acquire() is None
+
+    def test_foreign_frames_are_ignored(self):
+        pool = FramePool(max_frames=2)
+        pool.release(np.zeros((4, 4, 3), dtype=np.uint8))
+        assert pool.acquire() is None
+
+    def test_pool_is_bounded_and_counts_allocations(self):
+        pool = FramePool(max_frames=2)
+        for _ in range(5):
+            pool.adopt(np.zeros((2, 2), dtype=np.uint8))
+        assert len(pool) == 2
+        assert pool.allocations == 5
+
+    def test_resolution_change_drops_old_frames(self):
+        pool = FramePool(max_frames=4)
+        old = np.zeros((2, 2), dtype=np.uint8)
+        pool.adopt(old)
+        pool.adopt(np.zeros((3, 3), dtype=np.uint8))
+        assert len(pool) == 1
+        pool.release(old)
+        assert pool.acquire() is None
+
+
+class TestLetterboxer:
+
+    def test_matches_reference_letterbox(self):
+        frame = np.random.RandomState(1).randint(0, 255, (480, 640, 3), dtype=np.uint8)
+        tensor, scales = Letterboxer()([frame], 320)
+        ratio, (left, top) = scales[0]
+        assert tensor.shape == (1, 3, 320, 320) and tensor.dtype == np.float32
+        assert ratio == pytest.approx(0.5) and (left, top) == (0, 40)
+
+        resized = cv2.resize(frame, (320, 240), interpolation=cv2.INTER_LINEAR)
+        expected = np.full((320, 320, 3), PAD_VALUE, dtype=np.uint8)
+        expected[40:280] = resized
+        expected = expected[..., ::-1].transpose(2, 0, 1).astype(np.float32) / 255
+        assert np.allclose(tensor[0], expected, atol=1e-6)
+
+    def test_buffers_are_reused_across_calls(self):
+        letterbox = Letterboxer()
+        frames = [np.zeros((48, 64, 3), dtype=np.uint8), np.ones((96, 64, 3), dtype=np.uint8)]
+        first, _ = letterbox(frames, 64)
+        second, _ = letterbox(frames[:1], 64)
+        assert np.shares_memory(first, second)
+
+    def test_padding_refilled_when_geometry_changes(self):
+        letterbox = Letterboxer()
+        letterbox([np.zeros((32, 64, 3), dtype=np.uint8)], 64)   # letterboxed: rows 16-47 are image
+        tensor, _ = letterbox([np.zeros((64, 32, 3), dtype=np.uint8)], 64)  # pillarboxed
+        # Row 32 column 0 was image in the first layout and is padding in the second
+        assert tensor[0, 0, 32, 0] == pytest.approx(PAD_VALUE / 255)
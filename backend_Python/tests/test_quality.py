@@ -0,0 +1,103 @@
+"""
+Unit tests for the adaptive quality controller (quality.py)
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision.quality import QualityController, build_levels, read_cpu_temperature
+
+SIZES = (640, 512, 416, 352, 320, 256)
+
+
+def _controller(imgsz=416, **kwargs):
+    options = dict(sizes=SIZES, max_stride=3, budget_ms=100, window=5, cooldown=1.0, headroom=0.5,
+                   thermal_path='', temp_limit=80, temp_hysteresis=5)
+    options.update(kwargs)
+    return QualityController(imgsz, **options)
+
+
+def _feed(controller, latency_ms, cycles, now):
+    changes = [controller.record(latency_ms, now=now) for _ in range(cycles)]
+    return [change for change in changes if change is not None]
+
+
+class TestBuildLevels:
+
+    def test_sizes_above_imgsz_are_dropped(self):
+        assert build_levels(416, SIZES, 3) == [(416, 1), (352, 1), (320, 1), (256, 1), (256, 2), (256, 3)]
+
+    def test_fixed_size_only_varies_stride(self):
+        assert build_levels(416, (416,), 3) == [(416, 1), (416, 2), (416, 3)]
+
+
+class TestQualityController:
+
+    def test_no_decision_before_the_window_fills(self):
+        controller = _controller()
+        assert _feed(controller, 500, 4, now=10.0) == []
+        assert controller.imgsz == 416
+
+    def test_steps_down_when_over_budget(self):
+        controller = _controller()
+        changes = _feed(controller, 150, 5, now=10.0)
+        assert len(changes) == 1
+        change = changes[0]
+        assert change['direction'] == 'down' and change['imgsz'] == 352 and change['stride'] == 1
+        assert change['previous'] == {'imgsz': 416, 'stride': 1}
+        assert 'budget' in change['reason']
+        assert controller.imgsz == 352
+
+    def test_cooldown_limits_changes(self):
+        controller = _controller()
+        _feed(controller, 150, 5, now=10.0)
+        assert _feed(controller, 150, 5, now=10.5) == []
+        assert len(_feed(controller, 150, 5, now=11.5)) == 1
+        assert controller.imgsz == 320
+
+    def test_bottom_of_the_ladder_raises_the_stride(self):
+        controller = _controller(imgsz=256)
+        _feed(controller, 150, 5, now=10.0)
+        assert (controller.imgsz, controller.stride) == (256, 2)
+
+    def test_steps_up_with_headroom(self):
+        controller = _controller()
+        _feed(controller, 150, 5, now=10.0)
+        changes = _feed(controller, 20, 5, now=12.0)
+        assert changes[0]['direction'] == 'up' and controller.imgsz == 416
+        # Already at the best level: nothing left to raise
+        assert _feed(controller, 20, 5, now=14.0) == []
+
+    def test_latency_within_band_holds_the_level(self):
+        controller = _controller()
+        _feed(controller, 150, 5, now=10.0)
+        assert _feed(controller, 70, 5, now=12.0) == []
+        assert controller.imgsz == 352
+
+    def test_hot_cpu_steps_down_and_blocks_step_up(self, tmp_path):
+        sensor = tmp_path / 'temp'
+        sensor.write_text('85000\n')
+        controller = _controller(thermal_path=str(sensor))
+        change = _feed(controller, 20, 5, now=10.0)[0]
+        assert change['direction'] == 'down' and change['temperature_c'] == 85.0
+        assert 'CPU' in change['reason']
+        # Below the limit but within the hysteresis band: no step back up yet
+        sensor.write_text('77000\n')
+        assert _feed(controller, 20, 5, now=12.0) == []
+        sensor.write_text('70000\n')
+        assert _feed(controller, 20, 5, now=14.0)[0]['direction'] == 'up'
+
+    def test_missing_sensor_reads_none(self, tmp_path):
+        assert read_cpu_temperature(str(tmp_path / 'missing')) is None
+        assert read_cpu_temperature('') is None
+
+    def test_stride_staggers_cameras(self):
+        controller = _controller(imgsz=256, max_stride=2)
+        _feed(controller, 150, 5, now=10.0)
+        assert controller.stride == 2
+        cycles = [controller.select(['left', 'right', 'rear']) for _ in range(4)]
+        assert cycles == [['left', 'rear'], ['right'], ['left', 'rear'], ['right']]
+
+    def test_stride_one_selects_every_camera(self):
+        assert _controller().select([0, 1]) == [0, 1]
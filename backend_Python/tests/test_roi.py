@@ -0,0 +1,48 @@
+"""
+Unit tests for region-of-interest inference (roi.py)
+"""
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision import roi
+
+ZONES = {
+    "left": {"x_min": 0, "x_max": 0.3, "y_min": 0.2, "y_max": 0.8},
+    "right": {"x_min": 0.7, "x_max": 1.0, "y_min": 0.2, "y_max": 0.8},
+    "rear": {"x_min": 0.3, "x_max": 0.7, "y_min": 0.7, "y_max": 1.0},
+}
+
+
+class TestCameraRois:
+
+    def test_one_zone_per_camera_with_margin(self):
+        config = {zone: {"camera_id": i} for i, zone in enumerate(ZONES)}
+        rois = roi.camera_rois(margin=0.1, camera_config=config, zones=ZONES)
+        assert rois[0] == pytest.approx((0.0, 0.1, 0.4, 0.9))
+        assert rois[2] == pytest.approx((0.2, 0.6, 0.8, 1.0))
+
+    def test_shared_camera_gets_union(self):
+        config = {zone: {"camera_id": 0} for zone in ZONES}
+        rois = roi.camera_rois(margin=0.0, camera_config=config, zones=ZONES)
+        assert rois == {0: (0, 0.2, 1.0, 1.0)}
+
+
+class TestCropping:
+
+    def test_crop_is_a_view_and_offset_matches(self):
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        region = (0.0, 0.1, 0.4, 0.9)
+        cropped = roi.crop(frame, region)
+        assert cropped.shape == (384, 256, 3)
+        assert np.shares_memory(cropped, frame)
+        assert roi.offset(frame.shape, region) == (0, 48)
+
+    def test_effective_imgsz_keeps_pixel_density(self):
+        # 384 px of a 640 px frame at imgsz 416 -> ~250, rounded up to the stride
+        assert roi.effective_imgsz(416, (384, 256), (480, 640), zoom=1.0) == 256
+        assert roi.effective_imgsz(416, (384, 256), (480, 640), zoom=10.0) == 416
@@ -0,0 +1,42 @@
+"""
+Unit tests for the motion-gated inference scheduler (scheduler.py)
+"""
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision.scheduler import InferenceScheduler
+
+
+def frame(value):
+    return np.full((480, 640, 3), value, dtype=np.uint8)
+
+
+class TestInferenceScheduler:
+
+    def test_first_frame_is_always_inferred(self):
+        assert InferenceScheduler().should_infer(0, frame(0)) is True
+
+    def test_static_scene_is_thinned_to_every_nth_frame(self):
+        scheduler = InferenceScheduler(motion_threshold=3.0, max_skip=2)
+        decisions = [scheduler.should_infer(0, frame(10)) for _ in range(7)]
+        assert decisions == [True, False, False, True, False, False, True]
+
+    def test_motion_runs_at_full_rate(self):
+        scheduler = InferenceScheduler(motion_threshold=3.0, max_skip=5)
+        decisions = [scheduler.should_infer(0, frame(i * 20)) for i in range(6)]
+        assert all(decisions)
+
+    def test_cameras_are_scheduled_independently(self):
+        scheduler = InferenceScheduler(motion_threshold=3.0, max_skip=3)
+        for i in range(4):
+            scheduler.should_infer('quiet', frame(0))
+            scheduler.should_infer('busy', frame(i * 50))
+        stats = scheduler.get_stats()
+        assert stats['quiet']['skipped'] == 3
+        assert stats['busy']['skipped'] == 0
+        assert stats['busy']['motion'] > 3.0
+        assert 'inference_rate' in stats['quiet']
@@ -0,0 +1,114 @@
+"""
+Unit tests for Kafka message wire formats (serialization.py)
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision.serialization import (
+    CompactBinarySerializer, JsonSerializer, get_serializer, representative_message, compare_serializers
+)
+
+
+class TestJsonSerializer:
+
+    def test_round_trip(self):
+        message = representative_message(2)
+        s = JsonSerializer()
+        assert s.deserialize(s.serialize(message)) == message
+
+
+class TestCompactBinarySerializer:
+
+    def test_round_trip_within_quantization(self):
+        message = representative_message(3)
+        s = CompactBinarySerializer()
+        decoded = s.deserialize(s.serialize(message))
+
+        assert decoded['type'] == 'detections'
+        assert decoded['timestamp'] == message['timestamp']
+        assert len(decoded['detections']) == len(message['detections'])
+        for original, restored in zip(message['detections'], decoded['detections']):
+            assert restored['object'] == original['object']
+            assert restored['camera_zone'] == original['camera_zone']
+            assert restored['frame_hash'] == original['frame_hash']
+            assert restored['integrity_hmac'] == original['integrity_hmac']
+            assert restored['confidence'] == pytest.approx(original['confidence'], abs=1e-3)
+            for a, b in zip(restored['bbox'], original['bbox']):
+                assert a == pytest.approx(b, abs=0.5)
+            for axis in ('x', 'y', 'z'):
+                assert restored['position'][axis] == pytest.approx(original['position'][axis], abs=1e-3)
+
+    def test_status_messages_round_trip(self):
+        message = {'type': 'status', 'timestamp': 1700000000.25, 'status': {'fps': 12.5}}
+        s = CompactBinarySerializer()
+        assert s.deserialize(s.serialize(message)) == message
+
+    def test_much_smaller_than_json(self):
+        message = representative_message(10)
+        assert len(CompactBinarySerializer().serialize(message)) * 4 < len(JsonSerializer().serialize(message))
+
+    def test_rejects_unknown_version(self):
+        s = CompactBinarySerializer()
+        data = bytearray(s.serialize(representative_message(1)))
+        data[2] = 99
+        with pytest.raises(ValueError):
+            s.deserialize(bytes(data))
+
+
+class TestSerializerRegistry:
+
+    def test_unknown_name_raises(self):
+        with pytest.raises(ValueError):
+            get_serializer('xml')
+
+    def test_msgpack_round_trip(self):
+        pytest.importorskip('msgpack')
+        s = get_serializer('msgpack')
+        message = representative_message(1)
+        assert s.deserialize(s.serialize(message)) == message
+
+    def test_comparison_reports_size_and_time(self):
+        results = compare_serializers(boxes_per_zone=(1,), iterations=5)
+        assert 'json' in results and 'binary' in results
+        stats = results['binary']['3_boxes']
+        assert stats['bytes'] > 0 and stats['encode_us'] > 0
+
+
+class TestBinaryTrackFields:
+
+    def test_track_id_and_event_round_trip(self):
+        message = representative_message(1)
+        for i, det in enumerate(message['detections']):
+            det['track_id'] = 1000 + i
+            det['event'] = 'update'
+        s = CompactBinarySerializer()
+        decoded = s.deserialize(s.serialize(message))
+        assert [d['track_id'] for d in decoded['detections']] == [1000, 1001, 1002]
+        assert all(d['event'] == 'update' for d in decoded['detections'])
+
+
+class TestBinaryBlindSpotFlag:
+
+    def test_in_blind_spot_round_trip(self):
+        message = representative_message(1)
+        flags = [True, False, None]
+        for det, flag in zip(message['detections'], flags):
+            if flag is not None:
+                det['in_blind_spot'] = flag
+        s = CompactBinarySerializer()
+        decoded = s.deserialize(s.serialize(message))['detections']
+        assert decoded[0]['in_blind_spot'] is True
+        assert decoded[1]['in_blind_spot'] is False
+        assert 'in_blind_spot' not in decoded[2]
+
+    def test_version_2_records_still_decode(self):
+        s = CompactBinarySerializer()
+        data = bytearray(s.serialize(representative_message(1)))
+        data[2] = 2
+        decoded = s.deserialize(bytes(data))
+        assert len(decoded['detections']) == 3
+        assert all('in_blind_spot' not in d for d in decoded['detections'])
@@ -0,0 +1,142 @@
+"""
+Unit tests for the disk spool and its drainer (spool.py)
+"""
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision.spool import Spool, SpoolDrainer, decode_record, encode_record
+
+HEADERS = [('content-type', b'application/json'), ('signature', b'ab' * 32)]
+
+
+def _fill(spool, count, start=0):
+    for i in range(start, start + count):
+        assert spool.append(b'truck-1:left', f'record-{i}'.encode(), HEADERS)
+
+
+def _values(spool, max_records=1000):
+    return [record[1].decode() for _, record in spool.read(max_records)]
+
+
+class TestRecordEncoding:
+
+    def test_round_trip(self):
+        assert decode_record(encode_record(b'k', b'value', HEADERS)) == (b'k', b'value', HEADERS)
+
+    def test_no_key_no_headers(self):
+        assert decode_record(encode_record(None, b'v')) == (None, b'v', [])
+
+
+class TestSpool:
+
+    def test_records_come_back_in_order(self, tmp_path):
+        spool = Spool(str(tmp_path), segment_bytes=4096, max_bytes=1 << 20)
+        _fill(spool, 5)
+        records = spool.read(3)
+        assert [r[1][1] for r in records] == [b'record-0', b'record-1', b'record-2']
+        assert records[0][1][2] == HEADERS
+        spool.commit(records[1][0], count=2)
+        assert _values(spool) == ['record-2', 'record-3', 'record-4']
+        assert spool.get_stats()['pending'] == 3
+
+    def test_segments_rotate_and_drained_ones_are_deleted(self, tmp_path):
+        spool = Spool(str(tmp_path), segment_bytes=256, max_bytes=1 << 20)
+        _fill(spool, 20)
+        assert spool.get_stats()['segments'] > 2
+        records = spool.read(20)
+        assert len(records) == 20
+        for position, _ in records:
+            spool.commit(position)
+        assert spool.get_stats()['segments'] == 1
+        assert len([n for n in os.listdir(tmp_path) if n.endswith('.seg')]) == 1
+        assert spool.get_stats()['pending'] == 0
+
+    def test_oldest_segment_is_evicted_when_full(self, tmp_path):
+        spool = Spool(str(tmp_path), segment_bytes=256, max_bytes=512)
+        _fill(spool, 30)
+        stats = spool.get_stats()
+        assert stats['segments'] == 2 and stats['evicted'] > 0
+        values = _values(spool)
+        assert values[-1] == 'record-29' and values[0] != 'record-0'
+        assert stats['pending'] == len(values) == 30 - stats['evicted']
+
+    def test_oversized_record_is_rejected(self, tmp_path):
+        spool = Spool(str(tmp_path), segment_bytes=128, max_bytes=1024)
+        assert not spool.append(None, b'x' * 200)
+        assert spool.get_stats()['rejected'] == 1
+
+    def test_reopen_resumes_after_the_committed_record(self, tmp_path):
+        spool = Spool(str(tmp_path), segment_bytes=256, max_bytes=1 << 20)
+        _fill(spool, 8)
+        records = spool.read(3)
+        spool.commit(records[-1][0], count=3)
+        spool.close()
+
+        reopened = Spool(str(tmp_path), segment_bytes=256, max_bytes=1 << 20)
+        assert reopened.get_stats()['pending'] == 5
+        assert _values(reopened) == [f'record-{i}' for i in range(3, 8)]
+        _fill(reopened, 1, start=8)
+        assert _values(reopened)[-1] == 'record-8'
+
+    def test_torn_record_reads_as_the_end(self, tmp_path):
+        spool = Spool(str(tmp_path), segment_bytes=4096, max_bytes=1 << 20)
+        _fill(spool, 2)
+        segment = spool.segments[-1]
+        # A crash after the payload but before the length: the frame stays zero
+        segment.map[segment.end + 8:segment.end + 12] = b'junk'
+        spool.close()
+        assert _values(Spool(str(tmp_path), segment_bytes=4096)) == ['record-0', 'record-1']
+
+
+class TestSpoolDrainer:
+
+    def test_replays_everything_at_the_rate_limit(self, tmp_path):
+        spool = Spool(str(tmp_path), segment_bytes=4096)
+        _fill(spool, 10)
+        sent = []
+        drainer = SpoolDrainer(spool, lambda key, value, headers: sent.append(value), rate=100)
+        start = time.monotonic()
+        assert drainer.drain_once() == 10
+        assert time.monotonic() - start >= 0.08
+        assert sent == [f'record-{i}'.encode() for i in range(10)]
+        assert spool.get_stats()['pending'] == 0
+
+    def test_failed_replay_keeps_the_record(self, tmp_path):
+        spool = Spool(str(tmp_path), segment_bytes=4096)
+        _fill(spool, 3)
+        calls = []
+
+        def send(key, value, headers):
+            calls.append(value)
+            if len(calls) == 2:
+                raise RuntimeError('broker down')
+
+        drainer = SpoolDrainer(spool, send, rate=0)
+        try:
+            drainer.drain_once()
+        except RuntimeError:
+            pass
+        assert _values(spool) == ['record-1', 'record-2']
+        assert drainer.drain_once() == 2
+
+    def test_thread_waits_for_the_broker(self, tmp_path):
+        spool = Spool(str(tmp_path), segment_bytes=4096)
+        _fill(spool, 3)
+        reachable = []
+        sent = []
+        drainer = SpoolDrainer(spool, lambda key, value, headers: sent.append(value), rate=0,
+                               is_ready=lambda: bool(reachable), retry_interval=0.02)
+        drainer.start()
+        try:
+            time.sleep(0.1)
+            assert sent == []
+            reachable.append(True)
+            deadline = time.time() + 2
+            while spool.get_stats()['pending'] and time.time() < deadline:
+                time.sleep(0.01)
+            assert len(sent) == 3
+        finally:
+            drainer.stop()
@@ -0,0 +1,56 @@
+"""
+Unit tests for concurrent startup phases (startup.py)
+"""
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision.startup import StartupTimer
+
+
+class TestStartupTimer:
+
+    def test_parallel_tasks_overlap(self):
+        timer = StartupTimer()
+        barrier = threading.Barrier(3, timeout=5)
+        # Each task waits for the others, so this only completes if they run concurrently
+        results = timer.run({name: (lambda name=name: (barrier.wait(), name)[1]) for name in 'abc'})
+        assert results == {'a': 'a', 'b': 'b', 'c': 'c'}
+
+    def test_sequential_mode_runs_in_order(self):
+        order = []
+        StartupTimer().run({name: (lambda name=name: order.append(name)) for name in 'abc'}, parallel=False)
+        assert order == ['a', 'b', 'c']
+
+    def test_failure_raised_after_all_tasks_finish(self):
+        finished = []
+
+        def fail():
+            raise RuntimeError('model missing')
+
+        def slow():
+            time.sleep(0.05)
+            finished.append('slow')
+
+        with pytest.raises(RuntimeError, match='model missing'):
+            StartupTimer().run({'model': fail, 'kafka': slow})
+        assert finished == ['slow']
+
+    def test_phases_and_milestones(self):
+        timer = StartupTimer()
+        with timer.phase('model'):
+            time.sleep(0.01)
+        with pytest.raises(ValueError):
+            with timer.phase('audio'):
+                raise ValueError
+        assert timer.mark('first_cycle') is True
+        assert timer.mark('first_cycle') is False
+        stats = timer.get_stats()
+        assert stats['phases']['model'] >= 10
+        assert 'audio' in stats['phases']
+        assert stats['milestones']['first_cycle'] >= stats['phases']['model']
@@ -0,0 +1,83 @@
+"""
+Unit tests for the per-zone multi-object tracker (tracking.py)
+"""
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision.postprocess import BoxArrays
+from backend_Python.computer_vision import tracking
+
+
+def boxes(*rows):
+    """rows of (x1, y1, x2, y2, conf, cls)"""
+    data = np.array(rows, dtype=np.float32).reshape(-1, 6)
+    return BoxArrays(data[:, :4], data[:, 4], data[:, 5].astype(np.int64))
+
+
+def events_of(result):
+    return [(event, track.track_id) for event, track in result]
+
+
+class TestIoU:
+
+    def test_identical_and_disjoint_boxes(self):
+        a = np.array([[0, 0, 10, 10]], dtype=np.float32)
+        b = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=np.float32)
+        iou = tracking.iou_matrix(a, b)
+        assert iou[0, 0] == pytest.approx(1.0)
+        assert iou[0, 1] == 0.0
+
+
+class TestZoneTracker:
+
+    def test_stable_id_and_birth_then_steady(self):
+        tracker = tracking.ZoneTracker(update_threshold=0.05)
+        first = tracker.update(boxes((100, 100, 200, 200, 0.9, 2)), 640, 480)
+        second = tracker.update(boxes((101, 100, 201, 200, 0.9, 2)), 640, 480)
+        assert first[0][0] == tracking.EVENT_BIRTH
+        assert second[0][0] == tracking.EVENT_STEADY
+        assert first[0][1].track_id == second[0][1].track_id
+
+    def test_large_move_publishes_update(self):
+        tracker = tracking.ZoneTracker(update_threshold=0.05, smoothing=1.0)
+        tracker.update(boxes((100, 100, 200, 200, 0.9, 2)), 640, 480)
+        result = tracker.update(boxes((140, 100, 240, 200, 0.9, 2)), 640, 480)
+        assert result[0][0] == tracking.EVENT_UPDATE
+
+    def test_death_after_max_misses(self):
+        tracker = tracking.ZoneTracker(max_misses=2)
+        tracker.update(boxes((100, 100, 200, 200, 0.9, 0)), 640, 480)
+        empty = boxes()
+        results = [tracker.update(empty, 640, 480) for _ in range(3)]
+        assert [e for e, _ in results[-1]] == [tracking.EVENT_DEATH]
+        assert tracker.tracks == []
+
+    def test_different_classes_do_not_match(self):
+        tracker = tracking.ZoneTracker()
+        tracker.update(boxes((100, 100, 200, 200, 0.9, 0)), 640, 480)
+        result = tracker.update(boxes((100, 100, 200, 200, 0.9, 2)), 640, 480)
+        assert sorted(e for e, _ in result) == [tracking.EVENT_BIRTH, tracking.EVENT_STEADY]
+
+    def test_end_zones_kills_the_tracks_of_inactive_zones(self):
+        tracker = tracking.MultiZoneTracker()
+        left = tracker.update('left', boxes((100, 100, 200, 200, 0.9, 2)), 640, 480)
+        tracker.update('rear', boxes(), 640, 480)
+        tracker.update('right', boxes((10, 10, 50, 50, 0.9, 0)), 640, 480)
+        ended = tracker.end_zones({'right'})
+        assert events_of(ended['left']) == [(tracking.EVENT_DEATH, left[0][1].track_id)]
+        assert set(ended) == {'left'}
+        assert tracker.get_stats() == {'right': 1}
+
+    def test_detection_dicts_carry_track_fields(self):
+        tracker = tracking.MultiZoneTracker()
+        events = tracker.update('left', boxes((100, 100, 200, 200, 0.9, 2)), 640, 480)
+        dets = tracking.events_to_detection_dicts(events, 'left', 1.0, 'abcd')
+        assert dets[0]['object'] == 'car'
+        assert dets[0]['event'] == tracking.EVENT_BIRTH
+        assert isinstance(dets[0]['track_id'], int)
+        assert tracker.get_stats() == {'left': 1}
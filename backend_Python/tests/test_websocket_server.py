@@ -0,0 +1,186 @@
+"""
+Unit tests for the in-cab WebSocket server fan-out (websocket_server.py)
+"""
+import asyncio
+import json
+import sys
+import os
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision import websocket_server
+from backend_Python.computer_vision.websocket_server import DetectionWebSocketServer
+
+
+class FakeWebSocket:
+    """Records sent frames; each send takes ``delay`` seconds"""
+
+    def __init__(self, port, delay=0.0):
+        self.remote_address = ('10.0.0.2', port)
+        self.delay = delay
+        self.sent = []
+        self.closed = None
+
+    async def send(self, message, text=None):
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(message))
+
+    async def close(self, code=1000, reason=''):
+        self.closed = code
+
+
+def _run(server, scenario):
+    """Run scenario(server) on a fresh loop, with the server marked running on it"""
+    async def main():
+        server.loop = asyncio.get_running_loop()
+        server.is_running = True
+        try:
+            return await scenario(server)
+        finally:
+            for websocket in list(server.clients):
+                await server.unregister_client(websocket)
+    return asyncio.run(main())
+
+
+def _detections(sent):
+    return [message['detections'][0]['n'] for message in sent if message['type'] == 'detections']
+
+
+class TestFanOut:
+
+    def test_every_client_gets_every_message(self):
+        server = DetectionWebSocketServer(port=0)
+
+        async def scenario(server):
+            clients = [FakeWebSocket(port) for port in range(3)]
+            for websocket in clients:
+                await server.register_client(websocket)
+            for n in range(3):
+                server.publish_detections([{'n': n}])
+            await asyncio.sleep(0.05)
+            return clients
+
+        clients = _run(server, scenario)
+        for websocket in clients:
+            assert websocket.sent[0]['type'] == 'connection'
+            assert _detections(websocket.sent) == [0, 1, 2]
+
+    def test_serialized_once_for_all_clients(self):
+        server = DetectionWebSocketServer(port=0)
+
+        async def scenario(server):
+            for port in range(50):
+                await server.register_client(FakeWebSocket(port))
+            await asyncio.sleep(0.01)
+            with patch.object(websocket_server.json, 'dumps', wraps=json.dumps) as dumps:
+                server.publish_detections([{'n': 1}])
+                await asyncio.sleep(0.05)
+            return dumps.call_count
+
+        assert _run(server, scenario) == 1
+        assert server.published == 1
+
+    def test_slow_client_does_not_delay_fast_ones(self):
+        server = DetectionWebSocketServer(port=0, send_timeout=5.0)
+
+        async def scenario(server):
+            slow, fast = FakeWebSocket(1, delay=0.5), FakeWebSocket(2)
+            await server.register_client(slow)
+            await server.register_client(fast)
+            server.publish_detections([{'n': 0}])
+            await asyncio.sleep(0.05)
+            return slow, fast
+
+        slow, fast = _run(server, scenario)
+        assert _detections(fast.sent) == [0]
+        assert slow.sent == []
+
+    def test_publish_without_running_loop_is_a_no_op(self):
+        server = DetectionWebSocketServer(port=0)
+        server.publish_detections([{'n': 0}])
+        assert server.published == 0
+
+
+class TestSlowClients:
+
+    def test_latest_policy_skips_to_newest_state(self):
+        server = DetectionWebSocketServer(port=0, queue_size=2, slow_client='latest', send_timeout=5.0)
+
+        async def scenario(server):
+            slow = FakeWebSocket(1, delay=0.05)
+            client = await server.register_client(slow)
+            for n in range(10):
+                server.publish_detections([{'n': n}])
+            await asyncio.sleep(0.01)
+            assert len(client.queue) <= 2
+            status = server.get_status()['clients']['10.0.0.2:1']
+            await asyncio.sleep(0.3)
+            return slow, client, status
+
+        slow, client, status = _run(server, scenario)
+        sent = _detections(slow.sent)
+        assert sent[-2:] == [8, 9]
+        assert client.skipped == 10 + 1 - len(slow.sent)
+        assert status['queued'] == 2
+        assert status['lag_ms'] >= 0.0
+        assert status['skipped'] > 0
+
+    def test_disconnect_policy_closes_client(self):
+        server = DetectionWebSocketServer(port=0, queue_size=2, slow_client='disconnect', send_timeout=5.0)
+
+        async def scenario(server):
+            slow, fast = FakeWebSocket(1, delay=1.0), FakeWebSocket(2)
+            await server.register_client(slow)
+            await server.register_client(fast)
+            for n in range(5):
+                server.publish_detections([{'n': n}])
+                await asyncio.sleep(0.01)  # one detection cycle
+            return slow, fast
+
+        slow, fast = _run(server, scenario)
+        assert slow.closed == websocket_server.CLOSE_TOO_SLOW
+        assert server.disconnected_slow == 1
+        assert _detections(fast.sent) == [0, 1, 2, 3, 4]
+
+    def test_stalled_send_disconnects(self):
+        server = DetectionWebSocketServer(port=0, send_timeout=0.05)
+
+        async def scenario(server):
+            stuck = FakeWebSocket(1, delay=10.0)
+            await server.register_client(stuck)
+            await asyncio.sleep(0.2)
+            return stuck
+
+        stuck = _run(server, scenario)
+        assert stuck.closed == websocket_server.CLOSE_TOO_SLOW
+        assert server.get_status()['connected_clients'] == 0
+
+    def test_unknown_policy_rejected(self):
+        with pytest.raises(ValueError):
+            DetectionWebSocketServer(slow_client='buffer')
+
+
+class TestServerThread:
+
+    def test_real_client_receives_detections(self):
+        connect = pytest.importorskip('websockets.sync.client').connect
+        server = DetectionWebSocketServer(host='127.0.0.1', port=0)
+        server.start_in_thread()
+        try:
+            with connect(f'ws://127.0.0.1:{server.port}') as client:
+                assert json.loads(client.recv(timeout=2))['type'] == 'connection'
+                client.send(json.dumps({'type': 'ping'}))
+                assert json.loads(client.recv(timeout=2))['type'] == 'pong'
+                server.publish_detections([{'n': 7}])
+                message = json.loads(client.recv(timeout=2))
+                assert message['type'] == 'detections'
+                assert message['detections'] == [{'n': 7}]
+                status = server.get_status()
+                assert status['connected_clients'] == 1
+                assert next(iter(status['clients'].values()))['sent'] >= 2
+        finally:
+            server.stop()
+        assert not server.is_running
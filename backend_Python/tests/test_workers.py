@@ -0,0 +1,127 @@
+"""
+Unit tests for process-pool inference (workers.py)
+"""
+import sys
+import os
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision import workers
+from backend_Python.tests.test_inference_backends import prediction
+
+
+class TestParseCpuSets:
+
+    def test_empty_means_no_pinning(self):
+        assert workers.parse_cpu_sets('', 3) == [None, None, None]
+
+    def test_auto_splits_available_cpus(self):
+        assert workers.parse_cpu_sets('auto', 2, available=[0, 1, 2, 3]) == [{0, 1}, {2, 3}]
+        assert workers.parse_cpu_sets('auto', 3, available=[4, 5]) == [{4}, {5}, {4}]
+
+    def test_explicit_sets_cycle(self):
+        assert workers.parse_cpu_sets('0-1;2,5', 3) == [{0, 1}, {2, 5}, {0, 1}]
+
+    def test_invalid_spec_rejected(self):
+        with pytest.raises(ValueError):
+            workers.parse_cpu_sets(';', 2)
+
+
+@pytest.fixture
+def constant_model(tmp_path):
+    """Static 1x3x64x64 ONNX model that always predicts one car centred in the letterbox"""
+    onnx = pytest.importorskip('onnx')
+    pytest.importorskip('onnxruntime')
+    from onnx import helper, TensorProto, numpy_helper
+
+    const = numpy_helper.from_array(prediction([(32, 32, 16, 16, 0.9, 2)])[None], name='pred')
+    graph = helper.make_graph(
+        [helper.make_node('Constant', [], ['output0'], value=const)], 'fake_yolo',
+        [helper.make_tensor_value_info('images', TensorProto.FLOAT, [1, 3, 64, 64])],
+        [helper.make_tensor_value_info('output0', TensorProto.FLOAT, [1, 84, 1])],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 8
+    path = str(tmp_path / 'fake.onnx')
+    onnx.save(model, path)
+    return path
+
+
+class TestInferenceWorkerPool:
+
+    def test_cameras_spread_across_workers(self, constant_model):
+        pool = workers.InferenceWorkerPool(constant_model, workers=2, backend='onnx', cpus='', timeout=30)
+        try:
+            assert pool.fixed_imgsz == 64 and pool.device == 'cpu'
+            frames = {
+                'a': np.zeros((48, 64, 3), dtype=np.uint8),
+                'b': np.zeros((96, 128, 3), dtype=np.uint8),
+                'c': np.zeros((48, 64, 3), dtype=np.uint8),
+            }
+            results = pool.predict_cameras(frames, {key: 64 for key in frames}, conf=0.5)
+            assert results['a'][0].boxes.data.dtype == np.float32
+            assert results['a'][0].boxes.data[0].tolist() == pytest.approx([24, 16, 40, 32, 0.9, 2])
+            assert results['b'][0].boxes.data[0, :4].tolist() == pytest.approx([48, 32, 80, 64])
+
+            stats = pool.get_stats()
+            assert stats[0]['cameras'] == ['a', 'c'] and stats[1]['cameras'] == ['b']
+
+            # A larger frame replaces the camera's slot; the worker re-attaches
+            bigger = {'a': np.zeros((96, 128, 3), dtype=np.uint8)}
+            assert pool.predict_cameras(bigger, {'a': 64}, 0.5)['a'][0].boxes.data[0, :4].tolist() == \
+                pytest.approx([48, 32, 80, 64])
+        finally:
+            pool.close()
+
+    def test_dead_worker_is_restarted(self, constant_model):
+        pool = workers.InferenceWorkerPool(constant_model, workers=1, backend='onnx', cpus='', timeout=30)
+        try:
+            frame = np.zeros((48, 64, 3), dtype=np.uint8)
+            pool.predict([frame], 64, 0.5)
+            worker = pool._workers[0]
+            worker.process.kill()
+            worker.process.join()
+
+            # Restarted in the background: the camera is skipped until the model has loaded
+            assert pool.predict_cameras({0: frame}, {0: 64}, 0.5) == {}
+            assert pool.get_stats()[0]['restarts'] == 1
+            deadline = time.monotonic() + 30
+            results = {}
+            while not results and time.monotonic() < deadline:
+                time.sleep(0.05)
+                results = pool.predict_cameras({0: frame}, {0: 64}, 0.5)
+            assert len(results[0][0].boxes) == 1
+            assert pool.get_stats()[0]['ready'] is True
+        finally:
+            pool.close()
+
+    def test_replies_of_an_earlier_round_are_discarded(self, constant_model):
+        pool = workers.InferenceWorkerPool(constant_model, workers=1, backend='onnx', cpus='', timeout=30)
+        try:
+            small = np.zeros((48, 64, 3), dtype=np.uint8)
+            pool.predict_cameras({'a': small}, {'a': 64}, 0.5)
+            # A round that raised after sending left a reply in the pipe
+            pool._workers[0].conn.send(('infer', pool._seq, 'a', pool._slots['a'].name, small.shape,
+                                        small.dtype.str, 64, 0.5))
+            bigger = np.zeros((96, 128, 3), dtype=np.uint8)
+            results = pool.predict_cameras({'a': bigger}, {'a': 64}, 0.5)
+            assert results['a'][0].boxes.data[0, :4].tolist() == pytest.approx([48, 32, 80, 64])
+        finally:
+            pool.close()
+
+    def test_warm_up_leaves_no_camera_state(self, constant_model):
+        pool = workers.InferenceWorkerPool(constant_model, workers=2, backend='onnx', cpus='', timeout=30)
+        try:
+            pool.warm_up(np.zeros((48, 64, 3), dtype=np.uint8), 64, 0.5)
+            assert pool._slots == {}
+            assert all(stats['cameras'] == [] for stats in pool.get_stats().values())
+        finally:
+            pool.close()
+
+    def test_failed_model_load_raises(self, tmp_path):
+        with pytest.raises(RuntimeError):
+            workers.InferenceWorkerPool(str(tmp_path / 'missing.onnx'), workers=1, backend='onnx', cpus='')
@@ -0,0 +1,113 @@
+"""
+Unit tests for compiled blind spot zones (zones.py)
+"""
+import sys
+import os
+import json
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend_Python.computer_vision import zones
+
+RECTS = {
+    "left": {"x_min": 0, "x_max": 0.3, "y_min": 0.2, "y_max": 0.8},
+    "right": {"x_min": 0.7, "x_max": 1.0, "y_min": 0.2, "y_max": 0.8},
+    "rear": {"x_min": 0.3, "x_max": 0.7, "y_min": 0.7, "y_max": 1.0},
+}
+TRAPEZOID = [(0.2, 1.0), (0.4, 0.6), (0.6, 0.6), (0.8, 1.0)]
+
+
+def _points(n=5000, seed=0):
+    return np.random.RandomState(seed).uniform(0, 1, (n, 2))
+
+
+class TestRectangleZones:
+
+    def test_no_point_inside_a_rectangle_is_missed(self):
+        zone_map = zones.ZoneMap({z: zones.rect_polygon(r) for z, r in RECTS.items()})
+        points = _points()
+        for zone, r in RECTS.items():
+            exact = ((r["x_min"] <= points[:, 0]) & (points[:, 0] <= r["x_max"]) &
+                     (r["y_min"] <= points[:, 1]) & (points[:, 1] <= r["y_max"]))
+            grid = zone_map.zones[zone].contains(points)
+            assert not (exact & ~grid).any()
+            # Only cells straddling the border may add false positives
+            assert (grid & ~exact).mean() < 0.02
+
+    def test_scalar_matches_vector(self):
+        zone_map = zones.ZoneMap({z: zones.rect_polygon(r) for z, r in RECTS.items()})
+        points = _points(500, seed=1)
+        vector = zone_map.zones["rear"].contains(points)
+        scalar = [zone_map.contains("rear", x, y) for x, y in points]
+        assert vector.tolist() == scalar
+        assert zone_map.contains("left", 0.1, 0.5) is True
+        assert zone_map.contains("left", 0.9, 0.5) is False
+
+    def test_bounds_round_trip(self):
+        zone_map = zones.ZoneMap({z: zones.rect_polygon(r) for z, r in RECTS.items()})
+        assert zone_map.bounds()["right"] == {"x_min": 0.7, "x_max": 1.0, "y_min": 0.2, "y_max": 0.8}
+
+
+class TestPolygonAndMaskZones:
+
+    def test_trapezoid_excludes_corners_of_its_bounding_box(self):
+        zone_map = zones.ZoneMap({"rear": TRAPEZOID})
+        assert zone_map.contains("rear", 0.5, 0.8)
+        assert not zone_map.contains("rear", 0.25, 0.65)
+        assert not zone_map.contains("rear", 0.75, 0.65)
+
+    def test_mask_array_zone(self):
+        mask = np.zeros((240, 320), dtype=np.uint8)
+        mask[120:, :160] = 255
+        zone_map = zones.ZoneMap({"left": mask})
+        assert zone_map.contains("left", 0.25, 0.75)
+        assert not zone_map.contains("left", 0.75, 0.25)
+        bounds = zone_map.bounds()["left"]
+        assert bounds["x_min"] == pytest.approx(0.0) and bounds["y_min"] == pytest.approx(0.5)
+
+    def test_unreadable_mask_raises(self, tmp_path):
+        with pytest.raises(ValueError):
+            zones.ZoneGrid(str(tmp_path / "missing.png"))
+
+    def test_load_shapes_overrides_rectangles(self, tmp_path):
+        spec = json.dumps({"rear": [list(p) for p in TRAPEZOID]})
+        shapes = zones.load_shapes(spec, RECTS)
+        assert shapes["rear"] == TRAPEZOID
+        assert shapes["left"] == zones.rect_polygon(RECTS["left"])
+        path = tmp_path / "zones.json"
+        path.write_text(spec)
+        assert zones.load_shapes(str(path), RECTS)["rear"] == TRAPEZOID
+
+
+class TestHits:
+
+    def test_centre_and_overlap_modes(self):
+        zone_map = zones.ZoneMap({"left": zones.rect_polygon(RECTS["left"])})
+        # Centre at x=0.3125 is outside, but 40% of the box covers the zone
+        boxes = [[160, 200, 240, 280], [500, 200, 600, 280]]
+        assert zone_map.hits("left", boxes, 640, 480).tolist() == [False, False]
+        assert zone_map.hits("left", boxes, 640, 480, min_overlap=0.3).tolist() == [True, False]
+
+    def test_overlap_fraction(self):
+        grid = zones.ZoneGrid(zones.rect_polygon({"x_min": 0, "x_max": 0.5, "y_min": 0, "y_max": 1}), size=64)
+        fractions = grid.overlap(np.array([[0.0, 0.0, 0.25, 0.25], [0.25, 0.0, 0.75, 0.5], [0.8, 0.1, 0.9, 0.2]]))
+        assert fractions[0] == 1.0
+        assert fractions[1] == pytest.approx(0.5, abs=0.05)
+        assert fractions[2] == 0.0
+
+    def test_contains_any(self):
+        zone_map = zones.ZoneMap({z: zones.rect_polygon(r) for z, r in RECTS.items()})
+        assert zone_map.contains_any([(0.1, 0.5), (0.5, 0.5), (0.5, 0.9)]).tolist() == [True, False, True]
+
+    def test_blind_spot_flags_from_positions(self):
+        from shared.config import POSITION_SCALE
+        zone_map = zones.ZoneMap({z: zones.rect_polygon(r) for z, r in RECTS.items()})
+
+        def detection(zone, x, y):
+            return {"camera_zone": zone, "position": {"x": x * POSITION_SCALE["x"], "y": y * POSITION_SCALE["y"]}}
+
+        detections = [detection("left", 0.1, 0.5), detection("right", 0.1, 0.5), detection("rear", 0.5, 0.9)]
+        assert zones.blind_spot_flags(detections, zone_map).tolist() == [True, False, True]
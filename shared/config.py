@@ -40,6 +40,21 @@ def validate_env_vars():
 # WebSocket Configuration
 WEBSOCKET_HOST = os.environ.get("WEBSOCKET_HOST", "localhost")
 WEBSOCKET_PORT = int(os.environ.get("WEBSOCKET_PORT", 8765))
+# In-cab WebSocket output straight from the detector (websocket_server.py), next to Kafka
+WEBSOCKET_ENABLED = os.environ.get("WEBSOCKET_ENABLED", "false").lower() in ("1", "true", "yes")
+# Messages queued per client; a client that falls further behind is handled per WEBSOCKET_SLOW_CLIENT:
+#   "latest"     — drop its oldest queued messages so it skips ahead to the latest state
+#   "disconnect" — close the connection
+WEBSOCKET_CLIENT_QUEUE = int(os.environ.get("WEBSOCKET_CLIENT_QUEUE", 4))
+WEBSOCKET_SLOW_CLIENT = os.environ.get("WEBSOCKET_SLOW_CLIENT", "latest").lower()
+# Seconds one send may take before the client is considered stuck and disconnected
+WEBSOCKET_SEND_TIMEOUT = float(os.environ.get("WEBSOCKET_SEND_TIMEOUT", 2.0))
+
+# Metrics Configuration
+# Prometheus text-format endpoint (GET /metrics) served by cv-service from its own thread
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+METRICS_HOST = os.environ.get("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9101))
 
 # Kafka Configuration
 # When running natively (outside Docker) point to the PLAINTEXT_HOST listener:
@@ -49,14 +64,138 @@ WEBSOCKET_PORT = int(os.environ.get("WEBSOCKET_PORT", 8765))
 KAFKA_HOST = os.environ.get("KAFKA_HOST", "localhost")
 KAFKA_PORT = int(os.environ.get("KAFKA_PORT", "29092"))
 KAFKA_TOPIC = os.environ.get("KAFKA_TOPIC", "detections")
+# Publish with delivery callbacks instead of waiting for every broker ack
+KAFKA_ASYNC_SEND = os.environ.get("KAFKA_ASYNC_SEND", "true").lower() in ("1", "true", "yes")
+# Upper bound on unacknowledged records; beyond it KAFKA_OVERFLOW_POLICY applies:
+#   "drop"  — discard the new record and count it (never blocks the caller)
+#   "block" — wait up to KAFKA_SEND_TIMEOUT seconds for a slot, then drop
+# unless the broker is disconnected or the oldest record has waited KAFKA_STALL_TIMEOUT
+# seconds for its ack: then the window is full because of an outage and records are spooled
+KAFKA_MAX_IN_FLIGHT = int(os.environ.get("KAFKA_MAX_IN_FLIGHT", 100))
+KAFKA_OVERFLOW_POLICY = os.environ.get("KAFKA_OVERFLOW_POLICY", "drop").lower()
+KAFKA_LINGER_MS = int(os.environ.get("KAFKA_LINGER_MS", 5))
+KAFKA_MAX_BLOCK_MS = int(os.environ.get("KAFKA_MAX_BLOCK_MS", 100))
+KAFKA_SEND_TIMEOUT = float(os.environ.get("KAFKA_SEND_TIMEOUT", 10))
+KAFKA_STALL_TIMEOUT = float(os.environ.get("KAFKA_STALL_TIMEOUT", 2.0))
+# Wire format for Kafka messages: "json" (default), "msgpack" or "binary"
+KAFKA_SERIALIZER = os.environ.get("KAFKA_SERIALIZER", "json")
+# Identifies this truck in record keys and envelopes; set a distinct value per vehicle
+VEHICLE_ID = os.environ.get("VEHICLE_ID", "vehicle-1")
+# Record key, which picks the partition and the per-key ordering scope:
+#   "zone"    — one record per zone per cycle, key "<VEHICLE_ID>:<zone>" (default)
+#   "vehicle" — one record per cycle with every zone, key "<VEHICLE_ID>"
+KAFKA_PARTITION_KEY = os.environ.get("KAFKA_PARTITION_KEY", "zone").lower()
+# Idempotent producer: broker-side de-duplication of retries and ordered delivery per partition
+KAFKA_IDEMPOTENCE = os.environ.get("KAFKA_IDEMPOTENCE", "true").lower() in ("1", "true", "yes")
+# Topic provisioning: create KAFKA_TOPIC with this many partitions (or grow it) when the producer starts
+KAFKA_PROVISION_TOPIC = os.environ.get("KAFKA_PROVISION_TOPIC", "false").lower() in ("1", "true", "yes")
+KAFKA_PARTITIONS = int(os.environ.get("KAFKA_PARTITIONS", 6))
+KAFKA_REPLICATION_FACTOR = int(os.environ.get("KAFKA_REPLICATION_FACTOR", 1))
+# Consumer group of the Python reference reader (kafka_consumer.py)
+KAFKA_CONSUMER_GROUP = os.environ.get("KAFKA_CONSUMER_GROUP", "safedetect-python-readers")
+# Disk outbox for records Kafka could not take (broker down, send or delivery failed);
+# an empty KAFKA_SPOOL_DIR disables it and such records are dropped as before
+KAFKA_SPOOL_DIR = os.environ.get("KAFKA_SPOOL_DIR", os.path.join(os.path.expanduser("~"), ".safedetect", "spool"))
+# Size of one memory-mapped spool segment file, and of all segments together (oldest evicted first)
+KAFKA_SPOOL_SEGMENT_MB = float(os.environ.get("KAFKA_SPOOL_SEGMENT_MB", 8))
+KAFKA_SPOOL_MAX_MB = float(os.environ.get("KAFKA_SPOOL_MAX_MB", 256))
+# Records per second the drainer replays once the broker is reachable again
+KAFKA_SPOOL_REPLAY_RATE = float(os.environ.get("KAFKA_SPOOL_REPLAY_RATE", 200))
 
 # Detection Configuration
 MODEL_CONFIDENCE = float(os.environ.get("MODEL_CONFIDENCE", 0.5))
+# Inference backend: "auto" picks ONNX Runtime for .onnx models and Ultralytics otherwise;
+# "ultralytics" or "onnx" force one.
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "auto")
+# ONNX Runtime execution providers, comma-separated, or "auto" (OpenVINO if installed, then CPU)
+ONNX_PROVIDERS = os.environ.get("ONNX_PROVIDERS", "auto")
+# ONNX Runtime intra-op threads (0 = runtime default)
+ONNX_THREADS = int(os.environ.get("ONNX_THREADS", 0))
+# IoU above which the ONNX backend's NMS suppresses a same-class box (Ultralytics default)
+NMS_IOU_THRESHOLD = float(os.environ.get("NMS_IOU_THRESHOLD", 0.7))
+# Process-pool inference: INFERENCE_WORKERS > 0 runs the model in that many worker
+# processes, each with its own model instance; cameras are spread across them and
+# frames travel through shared memory. 0 keeps inference in-process.
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", 0))
+# CPU affinity per worker: "" (no pinning), "auto" (split the available CPUs
+# evenly) or explicit sets separated by ";", e.g. "0-1;2-3;4-5"
+INFERENCE_WORKER_CPUS = os.environ.get("INFERENCE_WORKER_CPUS", "")
+# Intra-op threads per worker (0 = one per pinned CPU, or the runtime default when unpinned)
+INFERENCE_WORKER_THREADS = int(os.environ.get("INFERENCE_WORKER_THREADS", 0))
+# Seconds to wait for a worker's results before it is considered hung and restarted
+INFERENCE_WORKER_TIMEOUT = float(os.environ.get("INFERENCE_WORKER_TIMEOUT", 10))
+# Detection signing with DETECTION_SECRET_KEY:
+#   "message"   — one HMAC-SHA256 over each serialized Kafka record, in its "signature" header
+#   "detection" — legacy truncated integrity_hmac field on every detection
+#   "off"       — no signing
+INTEGRITY_MODE = os.environ.get("INTEGRITY_MODE", "message").lower()
+# Frame fingerprint behind frame_hash: "xxh3" (needs xxhash), "blake2b", "md5" (original
+# values) or "auto" (xxh3 when xxhash is installed, md5 otherwise)
+FRAME_HASH = os.environ.get("FRAME_HASH", "auto")
+# Run all cameras' latest frames through one batched forward pass per cycle
+BATCH_INFERENCE = os.environ.get("BATCH_INFERENCE", "true").lower() in ("1", "true", "yes")
+# Motion-gated inference: a camera whose downsampled frame changes less than
+# MOTION_THRESHOLD (mean absolute difference, 0-255) is inferred only every
+# SKIP_FRAMES + 1 frames; its last boxes are carried forward in between.
+# Off by default: a small object entering a zone barely moves the whole-frame
+# mean, so gating can delay its detection by up to SKIP_FRAMES frames.
+MOTION_GATING = os.environ.get("MOTION_GATING", "false").lower() in ("1", "true", "yes")
+MOTION_THRESHOLD = float(os.environ.get("MOTION_THRESHOLD", 3.0))
+SKIP_FRAMES = int(os.environ.get("SKIP_FRAMES", 2))
+# Adaptive quality: hold the p95 capture-to-postprocess latency under
+# LATENCY_BUDGET_MS by stepping down through QUALITY_IMGSZ_STEPS (sizes above the
+# startup imgsz are skipped), then inferring each camera only every 2nd, 3rd ...
+# QUALITY_MAX_STRIDE-th cycle (staggered, so fewer frames share each batch).
+# It steps back up once latency stays below QUALITY_HEADROOM x the budget.
+ADAPTIVE_QUALITY = os.environ.get("ADAPTIVE_QUALITY", "false").lower() in ("1", "true", "yes")
+LATENCY_BUDGET_MS = float(os.environ.get("LATENCY_BUDGET_MS", 150))
+QUALITY_IMGSZ_STEPS = [int(size) for size in
+                       os.environ.get("QUALITY_IMGSZ_STEPS", "640,512,416,352,320,256").split(",")]
+QUALITY_MAX_STRIDE = int(os.environ.get("QUALITY_MAX_STRIDE", 3))
+QUALITY_HEADROOM = float(os.environ.get("QUALITY_HEADROOM", 0.6))
+# Cycles per decision and minimum seconds between two adjustments
+QUALITY_WINDOW = int(os.environ.get("QUALITY_WINDOW", 30))
+QUALITY_COOLDOWN = float(os.environ.get("QUALITY_COOLDOWN", 5.0))
+# CPU temperature (sysfs, millidegrees; empty = ignore). At THERMAL_LIMIT_C the
+# controller steps down regardless of latency and only steps up again once the
+# temperature is THERMAL_HYSTERESIS_C below the limit.
+THERMAL_PATH = os.environ.get("THERMAL_PATH", "/sys/class/thermal/thermal_zone0/temp")
+THERMAL_LIMIT_C = float(os.environ.get("THERMAL_LIMIT_C", 80.0))
+THERMAL_HYSTERESIS_C = float(os.environ.get("THERMAL_HYSTERESIS_C", 5.0))
 BLIND_SPOT_ZONES = {
     "left": {"x_min": 0, "x_max": 0.3, "y_min": 0.2, "y_max": 0.8},
     "right": {"x_min": 0.7, "x_max": 1.0, "y_min": 0.2, "y_max": 0.8},
     "rear": {"x_min": 0.3, "x_max": 0.7, "y_min": 0.7, "y_max": 1.0}
 }
+# Zone shapes overriding the rectangles above, per zone: a polygon of normalized
+# [x, y] points (e.g. a trapezoid in perspective) or the path of a mask image whose
+# non-zero pixels are the zone. JSON text or the path of a JSON file, e.g.
+#   {"left": [[0, 0.35], [0.3, 0.2], [0.3, 0.8], [0, 0.95]], "rear": "/app/masks/rear.png"}
+BLIND_SPOT_POLYGONS = os.environ.get("BLIND_SPOT_POLYGONS", "")
+# Zones are compiled at startup into ZONE_GRID_SIZE x ZONE_GRID_SIZE occupancy grids;
+# cells the zone touches count as inside, so tests err towards alerting.
+ZONE_GRID_SIZE = int(os.environ.get("ZONE_GRID_SIZE", 128))
+# 0 tests each box's centre point; above 0 a box is in a zone when at least this
+# fraction of its area overlaps the zone.
+ZONE_MIN_OVERLAP = float(os.environ.get("ZONE_MIN_OVERLAP", 0.0))
+
+# Region-of-interest inference: crop each camera's frame to the union of the
+# blind spot zones it serves (grown by ROI_MARGIN, normalized) and run it at a
+# proportionally smaller inference size. ROI_ZOOM > 1 spends part of the saving
+# on extra resolution for small objects inside the zone.
+ROI_INFERENCE = os.environ.get("ROI_INFERENCE", "false").lower() in ("1", "true", "yes")
+ROI_MARGIN = float(os.environ.get("ROI_MARGIN", 0.1))
+ROI_ZOOM = float(os.environ.get("ROI_ZOOM", 1.0))
+
+# Tracking Configuration
+# When enabled, detections carry a stable track_id and an event field, and only
+# track births, updates that move more than TRACK_UPDATE_THRESHOLD (world units)
+# and deaths are published. Consumers must keep state keyed by track_id.
+TRACKING_ENABLED = os.environ.get("TRACKING_ENABLED", "false").lower() in ("1", "true", "yes")
+TRACK_IOU_THRESHOLD = float(os.environ.get("TRACK_IOU_THRESHOLD", 0.3))
+TRACK_MAX_MISSES = int(os.environ.get("TRACK_MAX_MISSES", 5))
+TRACK_SMOOTHING = float(os.environ.get("TRACK_SMOOTHING", 0.6))
+TRACK_UPDATE_THRESHOLD = float(os.environ.get("TRACK_UPDATE_THRESHOLD", 0.05))
 
 # Object Classes (COCO dataset classes)
 OBJECT_CLASSES = {
@@ -75,11 +214,71 @@ OBJECT_COLORS = {
 # Alert Configuration
 ALERT_BEEP_FREQUENCY = int(os.environ.get("ALERT_BEEP_FREQUENCY", 800))  # Hz
 ALERT_DURATION = float(os.environ.get("ALERT_DURATION", 0.5))        # seconds
+# Alert engine (alerts.py): each camera's boxes drive a per-zone enter/exit state
+# machine as soon as they are post-processed, ahead of tracking and publishing,
+# and tones play on a dedicated audio thread
+ALERT_ENGINE = os.environ.get("ALERT_ENGINE", "true").lower() in ("1", "true", "yes")
+# Consecutive inferred frames with an object in the zone before its alert starts
+ALERT_ENTER_FRAMES = int(os.environ.get("ALERT_ENTER_FRAMES", 2))
+# Seconds a zone must stay clear before its alert ends
+ALERT_EXIT_SECONDS = float(os.environ.get("ALERT_EXIT_SECONDS", 0.5))
+# Seconds without any result from a zone's camera before its alert ends anyway
+# (dropped, stalled, frozen); far above the gaps between inferences on slow
+# hardware, quality strides or motion-gated skips, and at least CAMERA_STALL_TIMEOUT
+ALERT_STALE_SECONDS = float(os.environ.get("ALERT_STALE_SECONDS", 5.0))
+# Seconds between repeated tones while a zone stays in alert
+ALERT_REPEAT_INTERVAL = float(os.environ.get("ALERT_REPEAT_INTERVAL", 1.0))
+# Tone pitch per zone as "zone:Hz,..."; the left and right tones are also panned to their side
+ALERT_ZONE_FREQUENCIES = {
+    zone: int(frequency) for zone, frequency in (
+        item.split(":") for item in os.environ.get(
+            "ALERT_ZONE_FREQUENCIES",
+            f"left:{ALERT_BEEP_FREQUENCY},right:{ALERT_BEEP_FREQUENCY},rear:{ALERT_BEEP_FREQUENCY * 3 // 4}"
+        ).split(",") if item
+    )
+}
 
 # Camera Configuration
 CAMERA_WIDTH = int(os.environ.get("CAMERA_WIDTH", 640))
 CAMERA_HEIGHT = int(os.environ.get("CAMERA_HEIGHT", 480))
 FPS_TARGET = int(os.environ.get("FPS_TARGET", 15))
+# Frames kept per camera reader; only the newest is ever processed
+CAPTURE_BUFFER_SIZE = int(os.environ.get("CAPTURE_BUFFER_SIZE", 2))
+# Reusable decode buffers per camera reader. Must cover frames buffered plus
+# frames in flight through the pipeline; beyond it the reader allocates.
+FRAME_POOL_SIZE = int(os.environ.get("FRAME_POOL_SIZE", 8))
+
+# Pipeline Configuration
+# Run capture, inference and publishing as overlapping stages on separate threads.
+# All stage queues are bounded and drop their oldest entry when full; with
+# TRACKING_ENABLED the publish queue folds it into the next cycle instead.
+PIPELINE_ENABLED = os.environ.get("PIPELINE_ENABLED", "true").lower() in ("1", "true", "yes")
+FRAME_QUEUE_SIZE = int(os.environ.get("FRAME_QUEUE_SIZE", 2))
+PUBLISH_QUEUE_SIZE = int(os.environ.get("PUBLISH_QUEUE_SIZE", 8))
+ALERT_QUEUE_SIZE = int(os.environ.get("ALERT_QUEUE_SIZE", 4))
+
+# Startup Configuration
+# Load the model, open the cameras, start the audio mixer and bootstrap Kafka
+# concurrently instead of one after another.
+PARALLEL_STARTUP = os.environ.get("PARALLEL_STARTUP", "true").lower() in ("1", "true", "yes")
+# Run one inference on a blank frame at startup so lazy kernel and graph
+# initialization does not land on the first real camera frame.
+WARMUP_INFERENCE = os.environ.get("WARMUP_INFERENCE", "true").lower() in ("1", "true", "yes")
+
+# Latency Instrumentation
+# Samples kept per zone and stage for the rolling p50/p95/p99 latency figures.
+LATENCY_WINDOW = int(os.environ.get("LATENCY_WINDOW", 1000))
+
+# Capture Backends
+# Default decode path for every camera (see computer_vision/capture_backends.py):
+# "auto" uses GStreamer for CSI and network streams when OpenCV has it, FFmpeg
+# for network streams and files otherwise and plain OpenCV for USB cameras.
+CAPTURE_BACKEND = os.environ.get("CAPTURE_BACKEND", "auto").lower()
+# Ask OpenCV's FFmpeg backend for hardware decoding (falls back to software)
+CAPTURE_HW_DECODE = os.environ.get("CAPTURE_HW_DECODE", "true").lower() in ("1", "true", "yes")
+# GStreamer element(s) decoding network streams; decodebin autoplugs the
+# highest-ranked decoder, which is the hardware one where installed
+CAPTURE_GST_DECODER = os.environ.get("CAPTURE_GST_DECODER", "decodebin")
 
 # Multi-Camera Configuration
 # Each camera is assigned to a specific blind spot zone.
@@ -99,18 +298,24 @@ def _parse_camera_source(src_env: str, id_env: str, default_id: int):
 CAMERA_CONFIG = {
     "left": {
         "camera_id": _parse_camera_source("LEFT_CAMERA_SRC", "LEFT_CAMERA_ID", 0),
+        # Capture backend for this source: auto, opencv, ffmpeg or gstreamer
+        "backend": os.environ.get("LEFT_CAMERA_BACKEND", CAPTURE_BACKEND),
         "zone": "left",
         "name": "Left Side Camera",
         "description": "Monitors left side blind spot"
     },
     "right": {
         "camera_id": _parse_camera_source("RIGHT_CAMERA_SRC", "RIGHT_CAMERA_ID", 1),
+        # Capture backend for this source: auto, opencv, ffmpeg or gstreamer
+        "backend": os.environ.get("RIGHT_CAMERA_BACKEND", CAPTURE_BACKEND),
         "zone": "right",
         "name": "Right Side Camera",
         "description": "Monitors right side blind spot"
     },
     "rear": {
         "camera_id": _parse_camera_source("REAR_CAMERA_SRC", "REAR_CAMERA_ID", 2),
+        # Capture backend for this source: auto, opencv, ffmpeg or gstreamer
+        "backend": os.environ.get("REAR_CAMERA_BACKEND", CAPTURE_BACKEND),
         "zone": "rear",
         "name": "Rear Camera",
         "description": "Monitors rear blind spot"
@@ -121,10 +326,26 @@ CAMERA_CONFIG = {
 CAMERA_STATUS = {
     "available": "🟢 Available",
     "in_use": "🟡 In Use",
+    "reconnecting": "🟠 Reconnecting",
     "error": "🔴 Error",
     "not_connected": "⚫ Not Connected"
 }
 
+# Camera Supervision
+# Sources open concurrently; one that has not opened within CAMERA_OPEN_TIMEOUT
+# seconds is marked "error" and retried in the background with exponential
+# backoff from CAMERA_RETRY_INITIAL up to CAMERA_RETRY_MAX seconds.
+CAMERA_OPEN_TIMEOUT = float(os.environ.get("CAMERA_OPEN_TIMEOUT", 5.0))
+CAMERA_RETRY_INITIAL = float(os.environ.get("CAMERA_RETRY_INITIAL", 1.0))
+CAMERA_RETRY_MAX = float(os.environ.get("CAMERA_RETRY_MAX", 30.0))
+# A connected source is reconnected when it delivers no frame for CAMERA_STALL_TIMEOUT
+# seconds, or when at least CAMERA_FROZEN_FRAMES newly decoded frames over at least
+# CAMERA_FROZEN_SECONDS all have the same frame_hash (0 frames = off). Stalls and
+# freezes back off like failed opens.
+CAMERA_STALL_TIMEOUT = float(os.environ.get("CAMERA_STALL_TIMEOUT", 5.0))
+CAMERA_FROZEN_FRAMES = int(os.environ.get("CAMERA_FROZEN_FRAMES", 45))
+CAMERA_FROZEN_SECONDS = float(os.environ.get("CAMERA_FROZEN_SECONDS", 10.0))
+
 # 3D Visualization Configuration
 TRUCK_DIMENSIONS = {
     "length": 10,  # meters